@@ -1,4 +1,4 @@
-import { useState, useEffect, useMemo, useCallback } from 'react';
+import { useState, useEffect, useMemo, useCallback, useRef } from 'react';
 import {
     useReactTable,
     getCoreRowModel,
@@ -367,9 +367,15 @@ export function useServerDataTable<TData extends { name: string }>({
     // Use custom endpoint if provided, otherwise default to generic enhanced list
     // Use custom endpoint if provided, otherwise default to generic enhanced list
     const apiEndpoint = customApiEndpoint || 'nirmaan_stack.api.data-table.get_list_with_count_enhanced';
-    const { call: triggerFetch, loading: isCallingApi, error: apiError, reset: resetApiState } = useFrappePostCall<{ message: { data: TData[]; total_count: number; aggregates: any, group_by_result: any } }>(apiEndpoint); // Get Frappe call method from context
+    const { call: triggerFetch, loading: isCallingApi, error: apiError, reset: resetApiState } = useFrappePostCall<{ message: { data: TData[]; total_count: number; aggregates: any, group_by_result: any, next_cursor?: string | null } }>(apiEndpoint); // Get Frappe call method from context
     const { call: triggerExportFetch } = useFrappePostCall<{ message: { data: TData[]; total_count: number; aggregates: any, group_by_result: any } }>(apiEndpoint);
 
+    // Keyset paging: endpoints built on api/data_table/list_query return a
+    // `next_cursor` per page. Keep it under the offset it continues from and send it
+    // back for that page. The server only honours a cursor issued for the same
+    // filters/sort, so stale entries just fall back to OFFSET.
+    const pageCursorsRef = useRef<Record<number, string>>({});
+
     // --- SWR Mutate for Cache Invalidation ---
     const { mutate } = useSWRConfig();
     // -----------------------------------------
@@ -620,14 +626,16 @@ export function useServerDataTable<TData extends { name: string }>({
         const currentSearchFieldConfig = searchableFields.find(f => f.value === selectedSearchField);
         const isJsonField = currentSearchFieldConfig?.is_json === true;
 
+        const limitStart = pagination.pageIndex * pagination.pageSize;
         const payload = {
             doctype: doctype,
             fields: JSON.stringify(fetchFields),
             filters: JSON.stringify(combinedBaseFilters.length > 0 ? combinedBaseFilters : []),
             order_by: orderByForApi,
-            limit_start: pagination.pageIndex * pagination.pageSize,
+            limit_start: limitStart,
             limit_page_length: pagination.pageSize,
             search_term: searchTermForApi || undefined,
+            cursor: pageCursorsRef.current[limitStart],
             // --- NEW: Pass consolidated search params ---
             // current_search_fields: searchFieldsForBackend ? JSON.stringify(searchFieldsForBackend) : undefined,
             // is_global_search: isGlobalSearchEnabled,
@@ -667,6 +675,9 @@ export function useServerDataTable<TData extends { name: string }>({
             if (response.message) {
                 setData(response.message.data);
                 setTotalCount(response.message.total_count);
+                if (response.message.next_cursor) {
+                    pageCursorsRef.current[limitStart + pagination.pageSize] = response.message.next_cursor;
+                }
                 // Update SWR cache manually after successful fetch if needed elsewhere?
                 // mutate(currentQueryKey, response, false); // Update cache without revalidation
                 setAggregates(response.message.aggregates || null); // Set aggregates data
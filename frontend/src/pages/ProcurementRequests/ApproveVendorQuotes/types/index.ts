@@ -78,6 +78,12 @@ export interface TargetRateDetailFromAPI {
     creation?: string;
     modified?: string;
     make?: string;
+    // Rate index stats over every valid approved quote for this item/unit/make.
+    latest_rate?: number;
+    min_rate?: number;
+    max_rate?: number;
+    quote_count?: number;
+    last_quoted_on?: string;
     selected_quotations_items: ApiSelectedQuotation[]; 
     }
 export interface FrappeTargetRateApiResponse { message: TargetRateDetailFromAPI[]; }
@@ -10,6 +10,9 @@
  *  - Errors render INLINE in the dialog, never as toasts (BoQ wizard convention).
  *  - `inspect_workbook` is the only raw `fetch` (multipart); the other calls go through
  *    `useFrappePostCall`.
+ *  - Confirm ENQUEUES the ingest (`start_ingest_batches`) and waits for its `snag_import_*`
+ *    realtime events: a 2,000-row list outlives a request. With no socket it falls back to
+ *    the synchronous `ingest_batches`, which returns the same IngestBatchesResponse.
  *  - No object/array is ever a `useEffect` dependency (frontend/CLAUDE.md § React Effects):
  *    both refetch effects depend on a derived STRING signature.
  *
@@ -23,8 +26,8 @@
  *    header change a `mapping_guess: null` emptied the mapping and wedged every later one.
  */
 
-import { useCallback, useEffect, useMemo, useRef, useState } from "react";
-import { useFrappePostCall } from "frappe-react-sdk";
+import { useCallback, useContext, useEffect, useMemo, useRef, useState } from "react";
+import { FrappeConfig, FrappeContext, useFrappePostCall } from "frappe-react-sdk";
 import { AlertTriangle, ArrowLeft, Loader2 } from "lucide-react";
 
 import { Badge } from "@/components/ui/badge";
@@ -72,6 +75,67 @@ import {
 const SHEET_COLUMNS_METHOD = "nirmaan_stack.api.snags.import_wizard.get_sheet_columns";
 const PARSE_PREVIEW_METHOD = "nirmaan_stack.api.snags.import_wizard.parse_preview";
 const INGEST_METHOD = "nirmaan_stack.api.snags.import_wizard.ingest_batches";
+const START_INGEST_METHOD = "nirmaan_stack.api.snags.import_wizard.start_ingest_batches";
+
+const INGEST_PROGRESS_EVENT = "snag_import_progress";
+const INGEST_READY_EVENT = "snag_import_ready";
+const INGEST_FAILED_EVENT = "snag_import_failed";
+const INGEST_EVENTS = [INGEST_PROGRESS_EVENT, INGEST_READY_EVENT, INGEST_FAILED_EVENT];
+
+type Socket = NonNullable<FrappeConfig["socket"]>;
+
+/**
+ * Enqueue the ingest and resolve with the job's IngestBatchesResponse. The listeners go on
+ * BEFORE the enqueue call and events are matched on `job_id` once it is known, so a job that
+ * finishes before the enqueue reply lands is still caught rather than waited on forever.
+ */
+function runIngestJob(
+  socket: Socket,
+  start: () => Promise<{ message?: { job_id?: string } } | undefined>,
+  onProgress: (message: string) => void,
+): Promise<IngestBatchesResponse> {
+  return new Promise((resolve, reject) => {
+    let jobId: string | null = null;
+    const early: Array<[string, any]> = [];
+    const handlers: Record<string, (data: any) => void> = {};
+    const cleanup = () => INGEST_EVENTS.forEach((ev) => socket.off(ev, handlers[ev]));
+
+    const handle = (event: string, data: any) => {
+      if (!jobId) {
+        early.push([event, data]);
+        return;
+      }
+      if (data?.job_id !== jobId) return;
+      if (event === INGEST_PROGRESS_EVENT) {
+        if (data.message) onProgress(data.message);
+        return;
+      }
+      cleanup();
+      if (event === INGEST_READY_EVENT && data.result) resolve(data.result);
+      else reject(new Error(data?.message || "The import failed. Nothing was confirmed as imported."));
+    };
+    INGEST_EVENTS.forEach((ev) => {
+      handlers[ev] = (data: any) => handle(ev, data);
+      socket.on(ev, handlers[ev]);
+    });
+
+    start().then(
+      (res) => {
+        jobId = res?.message?.job_id ?? null;
+        if (!jobId) {
+          cleanup();
+          reject(new Error("The import could not be queued. Nothing was imported."));
+          return;
+        }
+        early.splice(0).forEach(([event, data]) => handle(event, data));
+      },
+      (err) => {
+        cleanup();
+        reject(err);
+      },
+    );
+  });
+}
 
 type Step = "upload" | "sheets" | "tabs" | "result";
 
@@ -96,6 +160,7 @@ export function SnagImportDialog({
   const [activeTab, setActiveTab] = useState<string>("");
   const [ingesting, setIngesting] = useState(false);
   const [ingestError, setIngestError] = useState<string | null>(null);
+  const [ingestProgress, setIngestProgress] = useState<string | null>(null);
   const [result, setResult] = useState<IngestBatchesResponse | null>(null);
 
   const { call: columnsCall } = useFrappePostCall<{ message: GetSheetColumnsResponse }>(
@@ -107,6 +172,10 @@ export function SnagImportDialog({
   const { call: ingestCall } = useFrappePostCall<{ message: IngestBatchesResponse }>(
     INGEST_METHOD,
   );
+  const { call: startIngestCall } = useFrappePostCall<{ message: { job_id: string } }>(
+    START_INGEST_METHOD,
+  );
+  const { socket } = useContext(FrappeContext) as FrappeConfig;
 
   const sheets: WorkbookSheet[] = useMemo(() => inspect?.sheets ?? [], [inspect]);
   const ticked = useMemo(
@@ -177,6 +246,7 @@ export function SnagImportDialog({
     setActiveTab("");
     setIngesting(false);
     setIngestError(null);
+    setIngestProgress(null);
     setResult(null);
   }, []);
 
@@ -563,16 +633,27 @@ export function SnagImportDialog({
 
   const handleConfirm = useCallback(async () => {
     if (!inspect || !gate.ok) return;
+    const runId = runIdRef.current;
     setIngesting(true);
     setIngestError(null);
+    setIngestProgress(null);
+    const params = {
+      project: projectId,
+      file_url: inspect.file_url,
+      file_name: inspect.file_name,
+      batches: buildIngestBatches(ticked, tabStates, inspect.file_name),
+    };
     try {
-      const res = await ingestCall({
-        project: projectId,
-        file_url: inspect.file_url,
-        file_name: inspect.file_name,
-        batches: buildIngestBatches(ticked, tabStates, inspect.file_name),
-      });
-      const payload = res?.message;
+      const payload = socket
+        ? await runIngestJob(socket, () => startIngestCall(params), (message) => {
+            if (runIdRef.current === runId) setIngestProgress(message);
+          })
+        : (await ingestCall(params))?.message;
+      // The dialog was closed (and reset) while the job ran -- the caller still refetches.
+      if (runIdRef.current !== runId) {
+        if (payload) onImported(payload);
+        return;
+      }
       if (!payload) {
         setIngestError("The import returned no result. Nothing was confirmed as imported.");
         return;
@@ -581,11 +662,16 @@ export function SnagImportDialog({
       setStep("result");
       onImported(payload);
     } catch (err) {
-      setIngestError(errorText(err, "The import failed. Nothing was imported."));
+      if (runIdRef.current === runId) {
+        setIngestError(errorText(err, "The import failed. Nothing was imported."));
+      }
     } finally {
-      setIngesting(false);
+      if (runIdRef.current === runId) {
+        setIngesting(false);
+        setIngestProgress(null);
+      }
     }
-  }, [gate.ok, ingestCall, inspect, onImported, projectId, tabStates, ticked]);
+  }, [gate.ok, ingestCall, inspect, onImported, projectId, socket, startIngestCall, tabStates, ticked]);
 
   // -- render --------------------------------------------------------------------------
   const sheetsByName = useMemo(() => {
@@ -688,7 +774,10 @@ export function SnagImportDialog({
                 <span>{gate.message}</span>
               </p>
             )}
-            {step === "tabs" && gate.ok && !ingestError && (
+            {ingesting && ingestProgress && (
+              <p className="text-sm text-muted-foreground">{ingestProgress}</p>
+            )}
+            {step === "tabs" && gate.ok && !ingestError && !ingestProgress && (
               <p className="text-sm text-muted-foreground">
                 {gate.totalRows} {gate.totalRows === 1 ? "snag" : "snags"} across{" "}
                 {ticked.length} {ticked.length === 1 ? "sheet" : "sheets"}.
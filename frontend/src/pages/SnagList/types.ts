@@ -207,6 +207,8 @@ export interface ParsePreviewResponse {
 // Endpoint: ingest_batches  (step 3 — confirm)
 // POST: { project, file_url, file_name, batches: SheetIngestRequest[] }
 // One Batch per entry. Per-sheet failure isolation.
+// start_ingest_batches takes the same body, returns { status, job_id } and delivers the
+// IngestBatchesResponse as `result` on the `snag_import_ready` realtime event.
 // ---------------------------------------------------------------------------
 
 export interface SheetIngestRequest {
@@ -22,7 +22,7 @@ const result = (over: Partial<ExportPricedBcsWorkbookResponse> = {}) =>
   ({
     filename: "x_priced_bcs_internal_20260819.xlsx",
     content_type: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    content_base64: "",
+    token: "",
     exported_sheets: ["Elec "],
     skipped_formula_columns: {},
     remark_columns: {},
@@ -30,7 +30,7 @@ import { Button } from "@/components/ui/button";
 import { Checkbox } from "@/components/ui/checkbox";
 import { getFrappeError } from "@/utils/frappeErrors";
 import type { CommittedSheetState, ExportPricedBcsWorkbookResponse } from "./boqTypes";
-import { base64ToBytes, downloadBytes } from "./downloadBlob";
+import { downloadTempFile } from "./downloadBlob";
 
 /**
  * May the current user see the internal-export action at all?
@@ -197,7 +197,7 @@ export function PricedTenderBcsDialog({
       // version server-side and never writes the original on S3 (copy-on-write).
       const res = await callExport({ boq_name: boqName, sheet_names: tickedList });
       const result = res.message as ExportPricedBcsWorkbookResponse;
-      downloadBytes(base64ToBytes(result.content_base64), result.filename, result.content_type);
+      downloadTempFile(result.token, result.filename);
       setRunning(false);
       onDownloaded(result);
       onOpenChange(false);
@@ -31,7 +31,7 @@ import { Button } from "@/components/ui/button";
 import { Checkbox } from "@/components/ui/checkbox";
 import { getFrappeError } from "@/utils/frappeErrors";
 import type { CommittedSheetState, ExportPricedWorkbookResponse } from "./boqTypes";
-import { base64ToBytes, downloadBytes } from "./downloadBlob";
+import { downloadTempFile } from "./downloadBlob";
 
 // "date HH:MM" from a Frappe datetime string -- the wizard's slice(0,16) pattern.
 function fmtAt(at: string | null | undefined): string {
@@ -109,8 +109,8 @@ export function PricedTenderDialog({
       // version server-side and never writes the original on S3 (copy-on-write).
       const res = await callExport({ boq_name: boqName, sheet_names: tickedList });
       const result = res.message as ExportPricedWorkbookResponse;
-      // Decode base64 -> bytes -> download (the exportReviewXlsx download tail).
-      downloadBytes(base64ToBytes(result.content_base64), result.filename, result.content_type);
+      // The stamped file is a one-shot temp download; fetch_temp_file streams it.
+      downloadTempFile(result.token, result.filename);
       setRunning(false);
       onDownloaded(result);
       onOpenChange(false);
@@ -1450,7 +1450,8 @@ export interface CrossBoqCarryDecision {
 
 /**
  * Response shape of export_priced_workbook (Phase 5 Slice 5a endpoint; consumed by 5b).
- * content_base64 is the stamped .xlsx bytes; the frontend decodes -> Blob -> download.
+ * token names the stamped .xlsx as a one-shot temp file; the frontend downloads it via
+ * bulk_download.fetch_temp_file (downloadTempFile).
  */
 /**
  * Response shape of `export_bcs_writeback.export_priced_workbook_with_bcs` -- the INTERNAL
@@ -1466,7 +1467,8 @@ export interface CrossBoqCarryDecision {
 export interface ExportPricedBcsWorkbookResponse {
   filename: string;
   content_type: string;
-  content_base64: string;
+  /** One-shot temp-file token for bulk_download.fetch_temp_file. */
+  token: string;
   exported_sheets: string[];
   /** {sheetName: [colLetter, ...]} -- rate columns left untouched because they hold formulas. */
   skipped_formula_columns: Record<string, string[]>;
@@ -1500,7 +1502,8 @@ export interface ExportPricedBcsWorkbookResponse {
 export interface ExportPricedWorkbookResponse {
   filename: string;
   content_type: string;
-  content_base64: string;
+  /** One-shot temp-file token for bulk_download.fetch_temp_file. */
+  token: string;
   exported_sheets: string[];
   /** {sheetName: [colLetter, ...]} -- rate columns left untouched because they hold formulas. */
   skipped_formula_columns: Record<string, string[]>;
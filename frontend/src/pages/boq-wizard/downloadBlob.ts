@@ -1,10 +1,13 @@
 /**
- * downloadBlob -- decode a base64 payload to bytes + trigger a browser download.
+ * downloadBlob -- browser downloads for the BoQ wizard.
  *
- * The 5a Excel write-back endpoint (export_priced_workbook) returns the stamped .xlsx as
- * base64-in-JSON (the file-only frappe.response.filecontent idiom cannot also carry the
- * skipped-formula report). The frontend decodes it here and downloads via the SAME
- * Blob -> createObjectURL -> anchor.click -> revokeObjectURL tail exportReviewXlsx uses.
+ * The priced write-back endpoints (export_priced_workbook, export_priced_workbook_with_bcs)
+ * store the stamped .xlsx as a one-shot temp file and return its `token` alongside the
+ * skipped-formula / cost report. `downloadTempFile` points an anchor at the shared
+ * bulk_download.fetch_temp_file endpoint, which streams the file -- the workbook never
+ * travels as base64 in JSON and is never held in JS memory.
+ *
+ * `base64ToBytes` + `downloadBytes` remain for payloads that are still base64-in-JSON.
  */
 
 /**
@@ -36,3 +39,18 @@ export function downloadBytes(bytes: Uint8Array, filename: string, contentType:
   document.body.removeChild(link);
   URL.revokeObjectURL(url);
 }
+
+/**
+ * Download a server-side temp file by token under `filename` (served once, then deleted).
+ * DOM-side (anchor click) -- not unit-runnable headless. Same URL as useBulkPdfDownload.
+ */
+export function downloadTempFile(token: string, filename: string): void {
+  const link = document.createElement("a");
+  link.href =
+    `/api/method/nirmaan_stack.api.pdf_helper.bulk_download.fetch_temp_file` +
+    `?token=${encodeURIComponent(token)}&filename=${encodeURIComponent(filename)}`;
+  link.setAttribute("download", filename);
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
+}
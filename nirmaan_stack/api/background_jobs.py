@@ -0,0 +1,223 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Shared runner for long exports / prints — enqueue -> progress -> temp artifact -> token.
+
+Generalises the pattern `api/pdf_helper/bulk_download.py` and
+`api/commission_report/bulk_download_reports.py` each hand-rolled:
+
+    start_job(kind, builder, filename=..., **kwargs)       # web worker, ~ms
+        -> {"status": "enqueued", "job_id": ...}
+    _run_job(...)                                           # `long` queue
+        builder(job, **kwargs) -> {"content": bytes | "write": fn(f) | "token": str,
+                                   "filename"?: str, **extra}
+        -> public/files/temp_downloads/{token}.bin
+        -> realtime `<kind>_ready` {job_id, token, filename, **extra}
+        builder(job, **kwargs) -> {"result": dict}               # no download
+        -> realtime `<kind>_ready` {job_id, result}
+
+The builder is any importable function taking a `JobContext` first. It returns
+the artifact as bytes (`content`), as a `write(f)` callable that streams it
+to the temp file (a `PdfWriter.write`), or as the `token` of a temp download it
+already wrote itself (`write_temp_artifact`), plus any extra keys for the ready
+event. A job whose output is data rather than a file (a bulk import's per-sheet
+results) returns it as `result` instead, and the ready event carries it as-is.
+It reports progress with `job.progress(done, total, message)` and signals
+a user-facing failure with `frappe.throw` (the message is forwarded as-is); any
+other exception is logged and reported generically. The client downloads the
+artifact with `bulk_download.fetch_temp_file(token, filename)`, which deletes
+it on read; `tasks/cleanup_temp_downloads.py` sweeps whatever is never fetched.
+
+Every event is user-targeted and carries `job_id`, so a page can ignore events
+from an export it did not start.
+
+Concurrency: at most MAX_JOBS_PER_USER heavy jobs in flight per user, across
+all kinds. Each job holds one slot — a SET NX EX key, the same primitive as the
+commission-report lock — released in the worker's `finally`; the TTL frees the
+slot of a job that died without reaching it.
+"""
+import os
+
+import frappe
+from frappe import _
+
+MAX_JOBS_PER_USER = 2
+
+# Default job timeout; also the slot TTL, so a slot never outlives its job.
+DEFAULT_TIMEOUT_SECONDS = 15 * 60
+
+# Kinds whose realtime events pre-date this runner keep their names — the
+# frontend already listens on them. Every other kind gets `<kind>_progress` /
+# `<kind>_ready` / `<kind>_failed`.
+_LEGACY_EVENTS = {
+    "bulk_download": ("bulk_download_progress", "bulk_download_all_ready", "bulk_download_failed"),
+    "commission_bulk": ("commission_bulk_progress", "commission_bulk_ready", "commission_bulk_failed"),
+}
+
+_RUN_METHOD = "nirmaan_stack.api.background_jobs._run_job"
+
+
+# ── temp artifacts (swept hourly by tasks/cleanup_temp_downloads.py) ─────────────────
+
+def get_temp_path(token):
+    return frappe.utils.get_site_path("public", "files", "temp_downloads", f"{token}.bin")
+
+
+def ensure_temp_dir():
+    temp_dir = frappe.utils.get_site_path("public", "files", "temp_downloads")
+    if not os.path.exists(temp_dir):
+        os.makedirs(temp_dir, exist_ok=True)
+
+
+def write_temp_artifact(content=None, write=None):
+    """Write a fresh temp download and return its token.
+
+    Pass the bytes as `content`, or a `write(f)` callable (e.g. `PdfWriter.write`)
+    to stream straight to disk without holding the whole artifact in memory.
+    """
+    ensure_temp_dir()
+    token = frappe.generate_hash(length=32)
+    with open(get_temp_path(token), "wb") as f:
+        if write:
+            write(f)
+        else:
+            f.write(content)
+    return token
+
+
+# ── events ────────────────────────────────────────────────────────────────────────────
+
+def job_events(kind):
+    """(progress, ready, failed) realtime event names for a job kind."""
+    return _LEGACY_EVENTS.get(kind) or (f"{kind}_progress", f"{kind}_ready", f"{kind}_failed")
+
+
+class JobContext:
+    """Handed to a builder: who the job is for, and how to report progress."""
+
+    def __init__(self, kind, job_id, user):
+        self.kind = kind
+        self.job_id = job_id
+        self.user = user
+        self.progress_event, self.ready_event, self.failed_event = job_events(kind)
+
+    def progress(self, done, total, message=None, **extra):
+        payload = {
+            "job_id": self.job_id,
+            "done": done,
+            "total": total,
+            "progress": int(done * 100 / total) if total else 0,
+            **extra,
+        }
+        if message:
+            payload["message"] = message
+        frappe.publish_realtime(self.progress_event, payload, user=self.user)
+
+    def ready(self, token=None, filename=None, **extra):
+        payload = {"job_id": self.job_id, **extra}
+        if token:
+            payload.update(token=token, filename=filename)
+        frappe.publish_realtime(self.ready_event, payload, user=self.user)
+
+    def failed(self, message):
+        frappe.publish_realtime(
+            self.failed_event, {"job_id": self.job_id, "message": message}, user=self.user
+        )
+
+
+# ── per-user slots ────────────────────────────────────────────────────────────────────
+
+def _slot_key(user, index):
+    return frappe.cache().make_key(f"background_job_slot:{user}:{index}")
+
+
+def _acquire_slot(user, job_id, ttl):
+    """Claim a free slot for job_id; return its index, or None if all are taken."""
+    cache = frappe.cache()
+    for index in range(MAX_JOBS_PER_USER):
+        if cache.set(_slot_key(user, index), job_id, ex=ttl, nx=True):
+            return index
+    return None
+
+
+def _release_slot(user, index, job_id):
+    """Free the slot only if this job still holds it (an expired slot may have been re-claimed)."""
+    cache = frappe.cache()
+    key = _slot_key(user, index)
+    held = cache.get(key)
+    if held is not None and (held.decode() if isinstance(held, bytes) else held) == job_id:
+        cache.delete(key)
+
+
+# ── enqueue + worker ──────────────────────────────────────────────────────────────────
+
+def start_job(kind, builder, filename=None, timeout=DEFAULT_TIMEOUT_SECONDS, **kwargs):
+    """Claim a slot and enqueue `builder` on the `long` queue. Returns immediately.
+
+    Args:
+        kind:     short job-kind name; selects the realtime event names.
+        builder:  dotted path of `fn(job: JobContext, **kwargs) -> dict`.
+        filename: default download filename (the builder may override it).
+        kwargs:   JSON-serialisable arguments for the builder.
+
+    Returns {"status": "enqueued", "job_id": <hash>}.
+    """
+    user = frappe.session.user
+    job_id = frappe.generate_hash(length=16)
+    slot = _acquire_slot(user, job_id, timeout)
+    if slot is None:
+        frappe.throw(
+            _("You already have {0} downloads in progress. Please wait for one to finish.").format(
+                MAX_JOBS_PER_USER
+            ),
+            title=_("Too many downloads"),
+        )
+
+    try:
+        frappe.enqueue(
+            _RUN_METHOD,
+            queue="long",
+            timeout=timeout,
+            kind=kind,
+            builder=builder,
+            filename=filename,
+            user=user,
+            job_id=job_id,
+            slot=slot,
+            builder_kwargs=kwargs,
+        )
+    except Exception:
+        # Never made it onto the queue — give the slot back before surfacing the error.
+        _release_slot(user, slot, job_id)
+        raise
+    return {"status": "enqueued", "job_id": job_id}
+
+
+def _run_job(kind, builder, filename=None, user=None, job_id=None, slot=None, builder_kwargs=None):
+    """Background worker: run the builder, store its artifact, publish the token (or the result)."""
+    frappe.set_user(user or "Administrator")
+    job = JobContext(kind, job_id, user)
+    try:
+        result = frappe.get_attr(builder)(job, **(builder_kwargs or {})) or {}
+        if "result" in result:
+            job.ready(result=result["result"])
+            return
+        content, write = result.pop("content", None), result.pop("write", None)
+        token = result.pop("token", None)
+        if not content and not write and not token:
+            job.failed(_("Nothing was generated for this download."))
+            return
+        name = result.pop("filename", None) or filename or f"{kind}.bin"
+        token = token or write_temp_artifact(content, write=write)
+        # The file is on disk before the ready event fires -> no race for the download.
+        job.ready(token, name, **result)
+    except frappe.ValidationError as e:
+        frappe.db.rollback()
+        job.failed(str(e))
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), f"Background job failed: {kind}")
+        job.failed(_("The download failed. Please try again."))
+    finally:
+        if user and slot is not None:
+            _release_slot(user, slot, job_id)
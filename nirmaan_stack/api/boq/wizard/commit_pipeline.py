@@ -73,7 +73,6 @@ import os
 from typing import Any
 
 import frappe
-import openpyxl
 
 from nirmaan_stack.api.boq.wizard.commit_gate import compute_committable_sheets
 from nirmaan_stack.api.boq.wizard import committed_carry
@@ -82,6 +81,7 @@ from nirmaan_stack.api.boq.wizard.review_screen import _NOTE_CLS, resolve_effect
 from nirmaan_stack.api.boq.wizard.sheet_preview import (
     _extract_grid_rows,
     _fetch_boq_file_to_tempfile,
+    _open_grid_workbook,
 )
 # The level derivation + the shared cls->node_type+level derivation + the effective-
 # classification constants are OWNED by commit_validation (so the real commit and the
@@ -534,7 +534,7 @@ def commit_boq(boq_name: str = None, sheet_subset: Any = None, confirm_orphan=No
         # workbook -- grid rows come from the review rows instead; see the loop below.)
         if not is_template:
             tempfile_path = _fetch_boq_file_to_tempfile(source_file_url)
-            wb = openpyxl.load_workbook(tempfile_path, data_only=True, read_only=True)
+            wb = _open_grid_workbook(tempfile_path, build_snapshot=True)
 
         for sheet_name in subset:
             # PER-SHEET FAILURE ISOLATION (Slice 5): a sheet that raises mid-write is
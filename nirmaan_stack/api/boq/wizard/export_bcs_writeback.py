@@ -24,7 +24,9 @@ ZERO DIFF FROM THIS SLICE.
 WHAT IS SHARED AND WHAT IS NOT. Every STAMPING helper is IMPORTED from `export_writeback` and
 has exactly one definition: finding the worksheet, the rate stamp with its per-cell formula
 skip, the colour pass, the priced-cell teal, the remark column, the fidelity snapshot, the
-committed-version resolver, the filename sanitiser. What is duplicated is the ~40-line
+committed-version resolver, the filename sanitiser -- and how the workbook is opened and saved
+(`_open_for_stamping` / `_store_verified`: the zip-part patcher, verified, into a temp
+download). What is duplicated is the ~40-line
 ORCHESTRATION loop, and only because the alternative -- parameterising the client path with
 hooks -- would have changed the file the guard above protects. If a stamping RULE ever changes
 it changes in one place and both exports inherit it; if the ORDER of the passes changes, this
@@ -60,9 +62,7 @@ Public API:
 """
 from __future__ import annotations
 
-import base64
 import os
-import shutil
 from typing import Any
 
 import frappe
@@ -74,16 +74,17 @@ from nirmaan_stack.api.boq.wizard.export_writeback import (
     _XLSX_CONTENT_TYPE,
     _apply_colors,
     _apply_priced_highlight,
-    _assert_fidelity,
     _coerce_names,
     _col_is_empty,
     _fidelity_snapshot,
     _find_ws,
     _MAX_EXCEL_COLS,
+    _open_for_stamping,
     _resolve_sheet_plan,
     _rightmost_mapped_col_index,
     _safe_export_basename,
     _stamp_rates,
+    _store_verified,
     _write_remark_column,
 )
 # The formula-to-Excel vocabulary, shared so the operator set and the sheet-column resolution
@@ -670,8 +671,9 @@ def _sheet_qty_source(sheet_docname: str):
 def _generate_internal_workbook(
     boq_name: str, sheet_names: list, src_path: str, display_name: str = None
 ) -> dict:
-    """Stamp the client-facing layers AND the cost block onto the workbook at src_path (a
-    throwaway COPY), assert fidelity, and return the download payload.
+    """Stamp the client-facing layers AND the cost block onto the workbook at src_path (only
+    READ -- the stamped copy is a fresh temp download), assert fidelity, and return the
+    download payload.
 
     ⚠️ THE PASS ORDER MIRRORS THE CLIENT EXPORT'S AND THEN ADDS ONE STEP. Rates, then user
     colours, then the system teal LAST so it wins on a stamped rate cell, then the REMARK
@@ -690,13 +692,12 @@ def _generate_internal_workbook(
     they have never been sent. This export therefore writes NOTHING to the database at all,
     which is also why it needs no commit.
 
-    MUST be loaded data_only=False -- data_only=True loads cached VALUES and DESTROYS every
-    formula on save, which on this export would take the client's own amount formulas with it.
+    Opened through `_open_for_stamping`, whose openpyxl fallback MUST stay data_only=False --
+    data_only=True loads cached VALUES and DESTROYS every formula on save, which on this export
+    would take the client's own amount formulas with it.
     """
-    import openpyxl
-
     plans = {sn: _resolve_sheet_plan(boq_name, sn) for sn in sheet_names}
-    wb = openpyxl.load_workbook(src_path, data_only=False)
+    wb = _open_for_stamping(src_path)
     before = _fidelity_snapshot(wb)
 
     exported: list = []
@@ -785,28 +786,14 @@ def _generate_internal_workbook(
     # main job to make room for its one legitimate exception.
     expected = {**before, "formulas": before["formulas"] + formulas_written}
 
-    saved = src_path + ".bcs.xlsx"
-    try:
-        wb.save(saved)
-        wb.close()
-        wb2 = openpyxl.load_workbook(saved, data_only=False)
-        after = _fidelity_snapshot(wb2)
-        wb2.close()
-        _assert_fidelity(expected, after)
-        with open(saved, "rb") as f:
-            data = f.read()
-    finally:
-        try:
-            os.unlink(saved)
-        except OSError:
-            pass
+    token = _store_verified(wb, expected)
 
     ts = frappe.utils.now()[:19].replace("-", "").replace(":", "").replace(" ", "_")
     filename = f"{_safe_export_basename(display_name, boq_name)}_{_INTERNAL_SUFFIX}_{ts}.xlsx"
     return {
         "filename": filename,
         "content_type": _XLSX_CONTENT_TYPE,
-        "content_base64": base64.b64encode(data).decode("ascii"),
+        "token": token,
         "exported_sheets": exported,
         "skipped_formula_columns": skipped_by_sheet,
         "remark_columns": remark_cols,
@@ -818,11 +805,11 @@ def _generate_internal_workbook(
 @frappe.whitelist(methods=["POST"])
 def export_priced_workbook_with_bcs(boq_name: str = None, sheet_names: Any = None) -> dict:
     """Generate the INTERNAL priced .xlsx -- the client export plus the BCS cost block -- for a
-    ticked subset of a committed BoQ's sheets, and return its bytes (base64).
+    ticked subset of a committed BoQ's sheets, as a temp download.
 
     ADMIN + ESTIMATION ONLY, gated FIRST, before any lookup or read. COPY-ON-WRITE: the
-    original is fetched from S3 to a tempfile and copied to a second tempfile that is the ONLY
-    thing stamped and saved; nothing is ever uploaded back.
+    original is fetched from S3 to a tempfile that is only READ; the stamped copy is written
+    to a fresh temp download and nothing is ever uploaded back.
 
     ⚠️ TEMPLATE-ORIGIN BoQs ARE REFUSED, BY NAME (planning Q5). A BoQ cloned from a master
     template has no source workbook at all -- its priced export is BUILT FROM SCRATCH by
@@ -831,8 +818,9 @@ def export_priced_workbook_with_bcs(boq_name: str = None, sheet_names: Any = Non
     implementation of this whole module, so v1 says so out loud rather than failing obscurely
     on a missing `source_file_url`.
 
-    Returns {filename, content_type, content_base64, exported_sheets, skipped_formula_columns,
-    remark_columns, cost_blocks, cost_skipped}. NOTHING is written to the database -- in
+    Returns {filename, content_type, token, exported_sheets, skipped_formula_columns,
+    remark_columns, cost_blocks, cost_skipped}; the file streams from
+    bulk_download.fetch_temp_file(token, filename). NOTHING is written to the database -- in
     particular `last_exported_at` is left alone (see `_generate_internal_workbook`).
     URL: /api/method/nirmaan_stack.api.boq.wizard.export_bcs_writeback.export_priced_workbook_with_bcs
     """
@@ -857,16 +845,13 @@ def export_priced_workbook_with_bcs(boq_name: str = None, sheet_names: Any = Non
         frappe.throw(f"BOQs '{boq_name}' has no source_file_url set.", title="Missing source file")
 
     fetched = None
-    copy = None
     try:
         fetched = _fetch_boq_file_to_tempfile(source_file_url)
-        copy = fetched + ".work.xlsx"
-        shutil.copy(fetched, copy)  # COPY-ON-WRITE -- never the original temp, never S3
-        return _generate_internal_workbook(boq_name, names, copy, display_name)
+        # COPY-ON-WRITE -- the fetched file is only read, never the original S3 object.
+        return _generate_internal_workbook(boq_name, names, fetched, display_name)
     finally:
-        for p in (fetched, copy):
-            if p:
-                try:
-                    os.unlink(p)
-                except OSError:
-                    pass
+        if fetched:
+            try:
+                os.unlink(fetched)
+            except OSError:
+                pass
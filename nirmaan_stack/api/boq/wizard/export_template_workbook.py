@@ -20,16 +20,14 @@ BUILDS a fresh .xlsx FROM SCRATCH out of the committed tier:
 It NEVER touches S3, never reads node amounts (ZERO for template BoQs -- capture-only), and
 fail-safes any amount cell whose formula operand cannot be resolved to a BLANK cell.
 
-REJECT-MUTATES-NOTHING: the whole workbook is built + serialized to bytes BEFORE any
-last_exported_at stamp; a raise anywhere stamps nothing and returns nothing.
+REJECT-MUTATES-NOTHING: the whole workbook is built + serialized to its temp download BEFORE
+any last_exported_at stamp; a raise anywhere stamps nothing and returns nothing.
 
 Public API (called ONLY from export_writeback.export_priced_workbook's is_template branch):
   generate_template_priced_workbook(boq_name, sheet_names) -> dict
 """
 from __future__ import annotations
 
-import base64
-import io
 import json
 from typing import Any
 
@@ -41,6 +39,7 @@ from openpyxl.utils import column_index_from_string
 # Reuse the upload-path helpers + constants (they operate on any worksheet). Imported at
 # module load: this module is imported LAZILY from export_writeback's endpoint, so
 # export_writeback is fully loaded first -> no import cycle.
+from nirmaan_stack.api.background_jobs import write_temp_artifact
 from nirmaan_stack.api.boq.wizard.export_writeback import (
     _XLSX_CONTENT_TYPE,
     _BOQ_SHEET,
@@ -774,12 +773,12 @@ def generate_template_priced_workbook(boq_name: str, sheet_names: list[str]) ->
 
     wb.remove(default_ws)
 
-    # Serialize to bytes IN MEMORY (no tempfile, no S3). A raise above never reaches here, so
+    # Serialize straight into a temp download (no S3). A raise above never reaches here, so
     # the stamps below run only on a fully-built workbook.
-    buf = io.BytesIO()
-    wb.save(buf)
-    wb.close()
-    data = buf.getvalue()
+    try:
+        token = write_temp_artifact(write=wb.save)
+    finally:
+        wb.close()
 
     # Stamp last_exported_at per exported sheet via set_value (NOT doc.save -- BoQ Sheet's
     # list-valued area_dimensions JSON throws on a full save; mirror export_writeback).
@@ -794,7 +793,7 @@ def generate_template_priced_workbook(boq_name: str, sheet_names: list[str]) ->
     return {
         "filename": filename,
         "content_type": _XLSX_CONTENT_TYPE,
-        "content_base64": base64.b64encode(data).decode("ascii"),
+        "token": token,
         "exported_sheets": exported,
         "skipped_formula_columns": {},   # template amounts are WRITTEN as formulas -- none skipped
         "remark_columns": remark_cols,
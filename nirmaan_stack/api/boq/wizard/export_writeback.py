@@ -31,29 +31,38 @@ What it stamps, per ticked sheet, onto a fresh copy:
     column the mapping did not cover -- e.g. an estimator note sitting one column past the
     mapped edge) so the write-back NEVER overwrites real data yet never dead-ends the export.
 
-After stamping + saving the copy, a POST-SAVE FIDELITY ASSERTION re-opens the saved file
-and verifies the amount-formula count, merged-range count, worksheet count, and
-defined-name count are unchanged vs the pre-stamp copy -- a mismatch FAILS the export
-(reject-mutates-nothing; nothing is handed to a client and last_exported_at is not stamped).
+HOW IT WRITES: the stamps go through `services.xlsx_patch.PatchedWorkbook`, which presents the
+openpyxl worksheet surface these helpers use but rewrites ONLY the touched worksheet parts
+(plus the styles part for fills) inside the zip and copies every other part byte-for-byte. A
+full openpyxl load + save of a large tender cost tens of seconds and several hundred MB and
+dropped whatever openpyxl does not model. A package the patcher cannot handle falls back to
+the openpyxl round trip (`_open_for_stamping`), and both paths run the SAME stamping helpers.
+
+After saving, a POST-SAVE FIDELITY ASSERTION verifies the amount-formula count, merged-range
+count, worksheet count, and defined-name count are unchanged vs the source -- counted off the
+raw XML on the patch path (`xlsx_patch.structure`), by re-loading on the fallback. A mismatch
+FAILS the export (reject-mutates-nothing; the file is deleted, nothing is handed to a client
+and last_exported_at is not stamped).
 
 Grid-only general-specs sheets (treat_as == "master_preamble") carry no rates/nodes; they
 pass through UNTOUCHED but still count as exported (their last_exported_at is stamped).
 
-Return shape (base64-in-JSON, NOT frappe.local.response.filecontent): the file-only
-download idiom cannot carry the skipped-formula report alongside the bytes, so one JSON
-response carries BOTH -- 5b decodes content_base64 -> Blob -> browser download and surfaces
-skipped_formula_columns.
+Return shape: the stamped file is saved straight into a temp download
+(api/background_jobs.write_temp_artifact) and the JSON response carries its `token` beside the
+skipped-formula report. 5b streams the file from `bulk_download.fetch_temp_file(token,
+filename)` and surfaces skipped_formula_columns -- the bytes never ride the JSON as base64.
 
 Public API:
   export_priced_workbook(boq_name, sheet_names) -> dict   [whitelisted POST]
+  enqueue_priced_workbook_export(boq_name, sheet_names) -> dict   [whitelisted POST]
+    the same export on the shared job runner (api/background_jobs.py): returns {status,
+    job_id} at once; the same token + report keys arrive on the `boq_writeback_ready` event.
 """
 from __future__ import annotations
 
-import base64
 import json
 import os
 import re
-import shutil
 from typing import Any
 
 import frappe
@@ -61,7 +70,9 @@ import openpyxl
 from openpyxl.styles import PatternFill
 from openpyxl.utils import column_index_from_string, get_column_letter
 
+from nirmaan_stack.api.background_jobs import get_temp_path, start_job, write_temp_artifact
 from nirmaan_stack.api.boq.wizard.sheet_preview import _fetch_boq_file_to_tempfile
+from nirmaan_stack.services import xlsx_patch
 
 _PRICING = "BoQ Cell Pricing"
 _COLOR = "BoQ Cell Color"
@@ -250,7 +261,10 @@ def _write_remark_column(ws, remark_rows: list[dict], column_role_map: dict, hea
 # ── fidelity guard ────────────────────────────────────────────────────────────────
 def _fidelity_snapshot(wb) -> dict:
     """Count the four invariants the write-back must NOT disturb: amount/any formula cells,
-    merged ranges, worksheets, and defined names."""
+    merged ranges, worksheets, and defined names. A PatchedWorkbook is counted off its
+    source package's XML (the edits are not applied until save)."""
+    if isinstance(wb, xlsx_patch.PatchedWorkbook):
+        return xlsx_patch.structure(wb.path)
     formulas = 0
     merges = 0
     for ws in wb.worksheets:
@@ -283,6 +297,45 @@ def _assert_fidelity(before: dict, after: dict) -> None:
         )
 
 
+def _open_for_stamping(src_path: str):
+    """The workbook the stamping helpers write into: the zip-part patcher, or -- for a package
+    shape it does not handle -- a full openpyxl load. MUST be data_only=False on the fallback:
+    data_only=True loads cached VALUES and DESTROYS formulas on save (the trap)."""
+    try:
+        return xlsx_patch.PatchedWorkbook(src_path)
+    except xlsx_patch.XlsxPatchError as e:
+        frappe.logger("boq_upload").warning(
+            f"Priced write-back falling back to a full openpyxl load path={src_path!r}: {e}"
+        )
+        return openpyxl.load_workbook(src_path, data_only=False)
+
+
+def _store_verified(wb, expected: dict) -> str:
+    """Save the stamped workbook straight into a temp download, assert fidelity against the
+    SAVED file, and return the download token. On a fidelity failure the file is deleted
+    before the throw, so nothing reaches a client."""
+    try:
+        token = write_temp_artifact(write=wb.save)
+    finally:
+        wb.close()
+    path = get_temp_path(token)
+    try:
+        if isinstance(wb, xlsx_patch.PatchedWorkbook):
+            after = xlsx_patch.structure(path)
+        else:
+            saved = openpyxl.load_workbook(path, data_only=False)
+            after = _fidelity_snapshot(saved)
+            saved.close()
+        _assert_fidelity(expected, after)
+    except Exception:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+    return token
+
+
 # ── per-sheet committed-version + config resolution ───────────────────────────────
 def _resolve_sheet_plan(boq_name: str, sheet_name: str) -> dict:
     """Resolve the CURRENT committed BoQ Sheet for (boq, sheet_name): its name,
@@ -331,16 +384,15 @@ def _generate_priced_workbook(
     boq_name: str, sheet_names: list[str], src_path: str, display_name: str = None
 ) -> dict:
     """Stamp the committed pricing/colors/remarks for each sheet onto the workbook at
-    src_path (a throwaway COPY), run the fidelity guard, stamp last_exported_at per exported
-    sheet, and return the download payload. src_path is loaded data_only=False so formulas
-    survive (data_only=True would load cached VALUES and DESTROY formulas on save -- the trap).
+    src_path, run the fidelity guard, stamp last_exported_at per exported sheet, and return
+    the download payload. src_path is only READ: the stamped copy is written to a fresh temp
+    download (see `_open_for_stamping` / `_store_verified`).
 
     Separated from the whitelisted endpoint so tests can inject a synthetic workbook and
     bypass the S3 fetch."""
     plans = {sn: _resolve_sheet_plan(boq_name, sn) for sn in sheet_names}
 
-    # MUST be data_only=False -- preserve formulas as formula strings (see the trap above).
-    wb = openpyxl.load_workbook(src_path, data_only=False)
+    wb = _open_for_stamping(src_path)
     before = _fidelity_snapshot(wb)
 
     exported: list[str] = []
@@ -389,23 +441,9 @@ def _generate_priced_workbook(
             skipped_by_sheet[sn] = sorted({s["col_letter"] for s in skipped})
         exported.append(sn)
 
-    # Save the stamped copy, re-open it, and assert fidelity BEFORE returning / stamping
-    # last_exported_at (reject-mutates-nothing on a fidelity failure).
-    saved = src_path + ".priced.xlsx"
-    try:
-        wb.save(saved)
-        wb.close()
-        wb2 = openpyxl.load_workbook(saved, data_only=False)
-        after = _fidelity_snapshot(wb2)
-        wb2.close()
-        _assert_fidelity(before, after)
-        with open(saved, "rb") as f:
-            data = f.read()
-    finally:
-        try:
-            os.unlink(saved)
-        except OSError:
-            pass
+    # Save the stamped copy and assert fidelity BEFORE returning / stamping last_exported_at
+    # (reject-mutates-nothing on a fidelity failure).
+    token = _store_verified(wb, before)
 
     # Stamp last_exported_at per exported sheet via set_value (NOT doc.save -- BoQ Sheet's
     # list-valued area_dimensions JSON throws on a full save; mirror the commit pipeline).
@@ -422,7 +460,7 @@ def _generate_priced_workbook(
     return {
         "filename": filename,
         "content_type": _XLSX_CONTENT_TYPE,
-        "content_base64": base64.b64encode(data).decode("ascii"),
+        "token": token,
         "exported_sheets": exported,
         "skipped_formula_columns": skipped_by_sheet,
         "remark_columns": remark_cols,
@@ -432,26 +470,31 @@ def _generate_priced_workbook(
 
 @frappe.whitelist(methods=["POST"])
 def export_priced_workbook(boq_name: str = None, sheet_names: Any = None) -> dict:
-    """Generate a priced .xlsx for a ticked subset of a committed BoQ's sheets and return
-    its bytes (base64) + the skipped-formula report. The CURRENT committed version per sheet
-    is resolved server-side (the client never passes a version).
-
-    COPY-ON-WRITE: the original is fetched from S3 to a tempfile and shutil-copied to a
-    second tempfile that is the ONLY thing stamped + saved; the original temp is never
-    written and nothing is ever uploaded back to S3 (the source remains the immutable
-    forever-reference).
-
-    Returns {filename, content_type, content_base64, exported_sheets,
-    skipped_formula_columns, remark_columns, last_exported_at}. 5b decodes content_base64 ->
-    Blob -> browser download and surfaces skipped_formula_columns.
+    """Generate a priced .xlsx for a ticked subset of a committed BoQ's sheets as a temp
+    download + the skipped-formula report. The CURRENT committed version per sheet is
+    resolved server-side (the client never passes a version).
+
+    COPY-ON-WRITE: the original is fetched from S3 to a tempfile that is only READ; the
+    stamped copy is written to a fresh temp download and nothing is ever uploaded back to S3
+    (the source remains the immutable forever-reference).
+
+    Returns {filename, content_type, token, exported_sheets, skipped_formula_columns,
+    remark_columns, last_exported_at}. 5b streams the file from
+    bulk_download.fetch_temp_file(token, filename) and surfaces skipped_formula_columns.
     URL: /api/method/nirmaan_stack.api.boq.wizard.export_writeback.export_priced_workbook
     """
+    return _export_priced_workbook(boq_name, _validated_names(boq_name, sheet_names))
+
+
+def _validated_names(boq_name: str, sheet_names: Any) -> list[str]:
     if not boq_name:
         frappe.throw("boq_name is required.", title="Missing field: boq_name")
     if not frappe.db.exists("BOQs", boq_name):
         frappe.throw(f"BOQs '{boq_name}' not found.", title="Not found")
-    names = _coerce_names(sheet_names)
+    return _coerce_names(sheet_names)
 
+
+def _export_priced_workbook(boq_name: str, names: list[str]) -> dict:
     # TEMPLATE-ORIGIN BRANCH (ADR-0013 A2-D2 / R4): a template-cloned BoQ has NO source
     # workbook (source_file_url is None), so its priced Excel is GENERATED FROM SCRATCH from
     # the committed tier -- never copied from S3. Gated FIRST so the source_file_url guard +
@@ -471,16 +514,32 @@ def export_priced_workbook(boq_name: str = None, sheet_names: Any = None) -> dic
         frappe.throw(f"BOQs '{boq_name}' has no source_file_url set.", title="Missing source file")
 
     fetched = None
-    copy = None
     try:
         fetched = _fetch_boq_file_to_tempfile(source_file_url)
-        copy = fetched + ".work.xlsx"
-        shutil.copy(fetched, copy)  # COPY-ON-WRITE -- stamp the copy, never the original temp/S3
-        return _generate_priced_workbook(boq_name, names, copy, display_name)
+        # COPY-ON-WRITE -- the fetched file is only read; the stamped copy is a new file.
+        return _generate_priced_workbook(boq_name, names, fetched, display_name)
     finally:
-        for p in (fetched, copy):
-            if p:
-                try:
-                    os.unlink(p)
-                except OSError:
-                    pass
+        if fetched:
+            try:
+                os.unlink(fetched)
+            except OSError:
+                pass
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_priced_workbook_export(boq_name: str = None, sheet_names: Any = None) -> dict:
+    """Background twin of export_priced_workbook. Inputs are validated here (a bad
+    boq_name / sheet list fails the request, not the job); the stamp + fidelity guard run
+    on the `long` queue. Progress / token / failure arrive on the boq_writeback_* events."""
+    names = _validated_names(boq_name, sheet_names)
+    return start_job(
+        "boq_writeback",
+        "nirmaan_stack.api.boq.wizard.export_writeback._priced_workbook_job",
+        boq_name=boq_name,
+        sheet_names=names,
+    )
+
+
+def _priced_workbook_job(job, boq_name: str, sheet_names: list[str]) -> dict:
+    job.progress(0, 1, "Stamping priced workbook...")
+    return _export_priced_workbook(boq_name, sheet_names)  # already a temp download (token)
@@ -12,13 +12,12 @@ from __future__ import annotations
 import json
 import logging
 import os
-import shutil
-import tempfile
 import urllib.parse
 from typing import Any
 
 import frappe
 
+from nirmaan_stack.api.boq.wizard import workbook_cache
 from nirmaan_stack.services.boq_parser.config import (
     GlobalSettings,
     MappingConfig,
@@ -806,7 +805,9 @@ def _run_parse_worker(
 
         # Step 4: Run parser (handles skip + master_preamble internally)
         try:
-            parsed = parse_boq(tempfile_path, config)
+            parsed = parse_boq(
+                tempfile_path, config, snapshot=workbook_cache.get_snapshot(tempfile_path)
+            )
         except Exception as exc:
             err = frappe.log_error(
                 title=f"BoQ parse: parse_boq failed for {boq_name}",
@@ -1012,26 +1013,22 @@ def _run_parse_worker(
 
 def _fetch_boq_file_to_tempfile(source_file_url: str) -> str:
     """
-    Fetch the BoQ workbook to a NamedTemporaryFile preserving the real file extension.
+    Fetch the BoQ workbook to a private path preserving the real file extension.
     Caller must os.unlink the returned path in a finally block.
 
     Routing:
       - If 'frappe_gcp_attachment' is not in the URL: treat as local/dev path (tests, dev env).
         /private/... and /files/... are resolved via frappe.get_site_path(); bare absolute
-        paths (e.g. test fixture paths) are used as-is.  File is copied to a tempfile so the
-        caller can safely unlink it without destroying the source.
+        paths (e.g. test fixture paths) are used as-is.  The caller gets its own path, so
+        unlinking it never destroys the source.
       - Otherwise: download from S3 via S3Operations.read_file_from_s3.
         Real extension is derived from the 'file_name' query param (set by frappe_gcp_attachment).
         Unlike sheet_preview._fetch_boq_file_to_tempfile (which hardcodes '.xlsx'), this
         version correctly handles '.xlsm' workbooks.
-    """
-    # Shared with sheet_preview's twin so the openpyxl-hostile-workbook repair has ONE
-    # definition. Local import: sheet_preview does not import parse_run, so there is no
-    # cycle, and this mirrors how upload_file/revision reach the same module.
-    from nirmaan_stack.api.boq.wizard.sheet_preview import (  # noqa: PLC0415
-        _repair_fetched_workbook,
-    )
 
+    Both routes are served from `workbook_cache` (which also owns the one-time repair via
+    sheet_preview._repair_fetched_workbook), so repeat fetches skip the download.
+    """
     if "frappe_gcp_attachment" not in source_file_url:
         # Local path (dev / test)
         if source_file_url.startswith("/private/") or source_file_url.startswith("/files/"):
@@ -1039,22 +1036,10 @@ def _fetch_boq_file_to_tempfile(source_file_url: str) -> str:
         else:
             local_path = source_file_url
         _, ext = os.path.splitext(local_path)
-        suffix = ext.lower() if ext.lower() in {".xlsx", ".xlsm"} else ".xlsx"
-        tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
-        try:
-            shutil.copy2(local_path, tmp.name)
-        except Exception as exc:
-            try:
-                os.unlink(tmp.name)
-            except OSError:
-                pass
-            frappe.throw(f"Failed to read local BoQ file: {exc}", title="File access failed")
-        _repair_fetched_workbook(tmp.name, source_file_url)
-        return tmp.name
+        identity, fetch = workbook_cache.local_source(local_path)
+        return workbook_cache.checkout(identity, ext.lower(), fetch, source_file_url)
 
     # S3 path
-    from frappe_gcp_attachment.controller import S3Operations  # noqa: PLC0415
-
     parsed_url = urllib.parse.urlparse(source_file_url)
     params = urllib.parse.parse_qs(parsed_url.query)
 
@@ -1079,23 +1064,8 @@ def _fetch_boq_file_to_tempfile(source_file_url: str) -> str:
                 title="S3 key not found",
             )
 
-    try:
-        s3 = S3Operations()
-        response = s3.read_file_from_s3(key)
-        file_bytes = response["Body"].read()
-    except Exception as exc:
-        frappe.throw(
-            f"Failed to fetch BoQ file from S3 (key={key!r}): {exc}",
-            title="S3 fetch failed",
-        )
-
-    tmp = tempfile.NamedTemporaryFile(suffix=ext, delete=False)
-    try:
-        tmp.write(file_bytes)
-    finally:
-        tmp.close()
-    _repair_fetched_workbook(tmp.name, source_file_url)
-    return tmp.name
+    identity, fetch = workbook_cache.s3_source(key)
+    return workbook_cache.checkout(identity, ext, fetch, source_file_url)
 
 
 def _set_draft_status(
@@ -223,6 +223,7 @@ def convert_revision_entry(
         # Function-level imports: `upload_file` imports THIS module (`assert_revisable_source`),
         # so a module-level import back would be a cycle -- same reason `_read_revised_tab_names`
         # imports `sheet_preview` locally.
+        from nirmaan_stack.api.boq.wizard import workbook_cache  # noqa: PLC0415
         from nirmaan_stack.api.boq.wizard.sheet_preview import (  # noqa: PLC0415
             _fetch_boq_file_to_tempfile,
         )
@@ -234,11 +235,11 @@ def convert_revision_entry(
 
         worker_tmp = _fetch_boq_file_to_tempfile(boq_doc.source_file_url)
         try:
-            reader = BoqReader(worker_tmp)
-            sheets = reader.list_sheets()
-            append_sheet_drafts(boq_doc, reader, sheets)
-            boq_doc.save(ignore_permissions=True)
-            prefill_sheet_configs(boq_doc, reader)
+            with BoqReader(worker_tmp, snapshot=workbook_cache.get_snapshot(worker_tmp)) as reader:
+                sheets = reader.list_sheets()
+                append_sheet_drafts(boq_doc, reader, sheets)
+                boq_doc.save(ignore_permissions=True)
+                prefill_sheet_configs(boq_doc, reader)
         finally:
             try:
                 os.remove(worker_tmp)
@@ -369,10 +370,9 @@ def _read_revised_tab_names(source_file_url: str) -> list[str]:
     so `read_only=True` (no cell scan). Function-level imports keep the module load
     light and sidestep any import cycle with `sheet_preview`.
     """
-    import openpyxl  # noqa: PLC0415
-
     from nirmaan_stack.api.boq.wizard.sheet_preview import (  # noqa: PLC0415
         _fetch_boq_file_to_tempfile,
+        _open_grid_workbook,
     )
 
     if not source_file_url:
@@ -382,7 +382,7 @@ def _read_revised_tab_names(source_file_url: str) -> list[str]:
     tmp = _fetch_boq_file_to_tempfile(source_file_url)
     wb = None
     try:
-        wb = openpyxl.load_workbook(tmp, read_only=True)
+        wb = _open_grid_workbook(tmp)
         return list(wb.sheetnames)
     finally:
         if wb is not None:
@@ -643,6 +643,7 @@ def _prefill_new_sheet_configs(boq_doc, new_tabs) -> None:
     # Function-level imports: `upload_file` imports THIS module (`assert_revisable_source`), so a
     # module-level import back would be a cycle -- same reason `_read_revised_tab_names` and
     # `convert_revision_entry` import locally.
+    from nirmaan_stack.api.boq.wizard import workbook_cache  # noqa: PLC0415
     from nirmaan_stack.api.boq.wizard.sheet_preview import (  # noqa: PLC0415
         _fetch_boq_file_to_tempfile,
     )
@@ -655,7 +656,8 @@ def _prefill_new_sheet_configs(boq_doc, new_tabs) -> None:
     try:
         # S3 safety: bytes via the tempfile pattern, NEVER a local path built from `file_url`.
         worker_tmp = _fetch_boq_file_to_tempfile(boq_doc.source_file_url)
-        prefill_sheet_configs(boq_doc, BoqReader(worker_tmp), only_sheet_names=new_tabs)
+        with BoqReader(worker_tmp, snapshot=workbook_cache.get_snapshot(worker_tmp)) as reader:
+            prefill_sheet_configs(boq_doc, reader, only_sheet_names=new_tabs)
     except Exception:
         frappe.logger("boq_revision").warning(
             f"revised-BoQ {boq_doc.name}: could not auto-guess config for new sheets "
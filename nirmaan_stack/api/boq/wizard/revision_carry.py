@@ -215,11 +215,10 @@ def _read_revised_columns(source_file_url: str, sheet_specs: dict) -> dict:
     Module-level (like `_read_revised_tab_names`) so tests can stub the whole workbook read.
     S3-safety: bytes via `_fetch_boq_file_to_tempfile`, NEVER a local path from `file_url`.
     """
-    import openpyxl  # noqa: PLC0415
-
     from nirmaan_stack.api.boq.wizard.sheet_preview import (  # noqa: PLC0415
         _extract_grid_rows,
         _fetch_boq_file_to_tempfile,
+        _open_grid_workbook,
     )
 
     if not source_file_url or not sheet_specs:
@@ -228,7 +227,7 @@ def _read_revised_columns(source_file_url: str, sheet_specs: dict) -> dict:
     wb = None
     out: dict = {}
     try:
-        wb = openpyxl.load_workbook(tmp, read_only=True, data_only=True)
+        wb = _open_grid_workbook(tmp, build_snapshot=True)
         by_title = {ws.title: ws for ws in wb.worksheets}
         for tab, (header_row, header_row_count) in sheet_specs.items():
             ws = by_title.get(tab)
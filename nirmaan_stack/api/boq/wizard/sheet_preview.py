@@ -5,7 +5,9 @@ Performance rationale: openpyxl.load_workbook(path, data_only=True, read_only=Tr
 takes ~0.56 s on a 7.65 MB workbook.  BoqReader takes ~27 s on the same file because
 it opens the workbook TWICE (data_only + formula pass) and pre-scans merged ranges.
 This endpoint does NOT use BoqReader -- raw openpyxl read_only is the correct path for
-a synchronous preview.
+a synchronous preview. Once a background stage (upload / parse) has built the workbook's
+sheet snapshot (services/boq_parser/snapshot.py), the preview reads that instead and
+skips the XML parse entirely; see `_open_grid_workbook`.
 
 S3 safety: BOQs.source_file_url is an S3 API redirect URL after the frappe_s3_attachment
 plugin moves the file.  frappe.get_doc("File", ...).get_content() does not work because
@@ -16,13 +18,14 @@ from __future__ import annotations
 
 import datetime
 import os
-import tempfile
 import urllib.parse
 
 import frappe
 import openpyxl
 from openpyxl.utils import get_column_letter
 
+from nirmaan_stack.api.boq.wizard import workbook_cache
+
 _PREVIEW_MAX_ROWS = 200  # hard cap on a single preview window
 
 
@@ -52,36 +55,16 @@ def _derive_s3_key(source_file_url: str) -> str:
 
 
 def _fetch_boq_file_to_tempfile(source_file_url: str) -> str:
-    """Download the BoQ file from S3 to a NamedTemporaryFile; return the path.
+    """Materialise the BoQ file from S3 to a private path; return the path.
 
     Caller is responsible for os.unlink in a finally block.
     Raises a frappe error if the key cannot be derived or the S3 fetch fails.
-    The tempfile is only created after bytes are successfully downloaded, so a
-    failed fetch never leaves an orphaned file.
+    Served from `workbook_cache`: a repeat fetch of the same object is a HEAD plus a
+    hard link, not a download and a repair scan. A failed fetch never leaves a file.
     """
-    from frappe_gcp_attachment.controller import S3Operations  # noqa: PLC0415
-
     key = _derive_s3_key(source_file_url)
-
-    try:
-        s3 = S3Operations()
-        response = s3.read_file_from_s3(key)
-        file_bytes = response["Body"].read()
-    except Exception as exc:
-        frappe.throw(
-            f"Failed to fetch BoQ file from S3 (key={key!r}): {exc}",
-            title="S3 fetch failed",
-        )
-
-    tmp = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
-    try:
-        tmp.write(file_bytes)
-    finally:
-        tmp.close()
-
-    _repair_fetched_workbook(tmp.name, source_file_url)
-
-    return tmp.name
+    identity, fetch = workbook_cache.s3_source(key)
+    return workbook_cache.checkout(identity, ".xlsx", fetch, source_file_url)
 
 
 def _repair_fetched_workbook(path: str, source_file_url: str) -> None:
@@ -139,6 +122,23 @@ def _to_json_serializable(value):
     return str(value)
 
 
+def _open_grid_workbook(path: str, build_snapshot: bool = False):
+    """Open the workbook `_extract_grid_rows` reads (read_only, values).
+
+    The workbook's sheet snapshot when one exists -- built here first when
+    `build_snapshot` -- else `openpyxl.load_workbook(path, data_only=True,
+    read_only=True)`. Both expose the same sheetnames / wb[name] / iter_rows /
+    max_row surface and yield the same grid (test_snapshot.py), so callers do not
+    branch. Request-path callers leave `build_snapshot` False: a build is a full
+    workbook load, which the preview must never pay for. The returned workbook owns
+    the snapshot, so the caller's `wb.close()` unmaps it.
+    """
+    snapshot = workbook_cache.get_snapshot(path, build=build_snapshot)
+    if snapshot is not None:
+        return snapshot.workbook("read_only", owns_snapshot=True)
+    return openpyxl.load_workbook(path, data_only=True, read_only=True)
+
+
 def _extract_grid_rows(ws, min_row: int = 1, max_row=None) -> list[dict]:
     """Extract a faithful row grid from an OPEN openpyxl worksheet.
 
@@ -238,7 +238,7 @@ def get_sheet_preview(boq_name=None, sheet_name=None, start_row=1, end_row=40):
     wb = None
     try:
         tempfile_path = _fetch_boq_file_to_tempfile(source_file_url)
-        wb = openpyxl.load_workbook(tempfile_path, data_only=True, read_only=True)
+        wb = _open_grid_workbook(tempfile_path)
 
         if sheet_name not in wb.sheetnames:
             frappe.throw(
@@ -336,7 +336,7 @@ def get_sheet_preview_full(boq_name=None, sheet_name=None):
     wb = None
     try:
         tempfile_path = _fetch_boq_file_to_tempfile(source_file_url)
-        wb = openpyxl.load_workbook(tempfile_path, data_only=True, read_only=True)
+        wb = _open_grid_workbook(tempfile_path)
 
         if sheet_name not in wb.sheetnames:
             frappe.throw(
@@ -17,8 +17,6 @@ Run:
     bench --site localhost run-tests --module \\
         nirmaan_stack.api.boq.wizard.test_export_bcs_writeback
 """
-import base64
-import io
 import json
 import os
 import tempfile
@@ -28,6 +26,7 @@ import openpyxl
 from frappe.tests.utils import FrappeTestCase
 from openpyxl import load_workbook
 
+from nirmaan_stack.api.background_jobs import get_temp_path
 from nirmaan_stack.api.boq.wizard.export_bcs_writeback import (
     _BCS_FILLED_HEX,
     _amount_body,
@@ -343,7 +342,7 @@ class TestInternalWorkbookEndToEnd(FrappeTestCase):
             cls.boq, cls.sheets, cls._synthetic_workbook(), "Internal Export BoQ"
         )
         cls.wb = load_workbook(
-            io.BytesIO(base64.b64decode(cls.result["content_base64"])), data_only=False
+            get_temp_path(cls.result["token"]), data_only=False
         )
         # ⚠️ CAPTURED BEFORE THE CLIENT EXPORT RUNS. The client export STAMPS
         # `last_exported_at` and commits -- that is its correct behaviour -- so reading the
@@ -623,7 +622,7 @@ class TestInternalWorkbookEndToEnd(FrappeTestCase):
         no BCS in it; on its own that could pass because there was nothing to find. Here the
         SAME BoQ produces both files, and only one of them carries the cost."""
         client = load_workbook(
-            io.BytesIO(base64.b64decode(self.client_result["content_base64"])), data_only=False
+            get_temp_path(self.client_result["token"]), data_only=False
         )
         for sentinel in (_SUPPLY, _INSTALL):
             rendered = repr(sentinel)
@@ -641,7 +640,7 @@ class TestInternalWorkbookEndToEnd(FrappeTestCase):
         """G/H/I exist only in the internal file. The client's remark column still lands at G,
         which is where it landed before this module existed."""
         client = load_workbook(
-            io.BytesIO(base64.b64decode(self.client_result["content_base64"])), data_only=False
+            get_temp_path(self.client_result["token"]), data_only=False
         )
         self.assertEqual(self.client_result["remark_columns"]["Elec "], "G")
         self.assertIsNone(client["Elec "]["H1"].value)
@@ -897,7 +896,7 @@ class TestPlacementCombinedRateAndEverySkip(FrappeTestCase):
             cls.boq, cls.sheets, cls._workbook(), "Placement And Skips BoQ"
         )
         cls.wb = load_workbook(
-            io.BytesIO(base64.b64decode(cls.result["content_base64"])), data_only=False
+            get_temp_path(cls.result["token"]), data_only=False
         )
 
     @classmethod
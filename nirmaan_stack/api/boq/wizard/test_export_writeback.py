@@ -12,7 +12,7 @@ the S3 original. Coverage:
   and the regenerated Summary / GST builder (Pre-tax vs Post-tax).
 
   DB end-to-end: seed a committed template BoQ (single-area data sheet + multi-area data sheet
-  + a Make-List general-specs sheet), call export_priced_workbook, decode the base64, load the
+  + a Make-List general-specs sheet), call export_priced_workbook, open its temp download, load the
   produced workbook, and assert the sheet set, grid cells, overlaid rates, amount cells being
   live Excel formulas, the multi-area Total = =SUM, the per-sheet grand-total row, and the
   Summary's live cross-sheet refs + GST line.
@@ -22,14 +22,13 @@ the S3 original. Coverage:
 
 sheet_name carries a trailing space (#152) throughout.
 """
-import base64
-import io
 import json
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
 from openpyxl import Workbook, load_workbook
 
+from nirmaan_stack.api.background_jobs import get_temp_path
 from nirmaan_stack.api.boq.wizard import export_template_workbook as etw
 from nirmaan_stack.api.boq.wizard.export_writeback import export_priced_workbook
 from nirmaan_stack.api.boq.wizard.test_review_screen import _make_project, _cleanup_project
@@ -446,7 +445,7 @@ class TestTemplateExportEndToEnd(FrappeTestCase):
         )
         cls.result = result
         cls.wb = load_workbook(
-            io.BytesIO(base64.b64decode(result["content_base64"])), data_only=False
+            get_temp_path(result["token"]), data_only=False
         )
 
     @classmethod
@@ -638,7 +637,7 @@ class TestTemplateExportBlankRowCompaction(FrappeTestCase):
         cls.result = export_priced_workbook(
             boq_name=cls.boq, sheet_names=json.dumps(["Compact "]))
         cls.wb = load_workbook(
-            io.BytesIO(base64.b64decode(cls.result["content_base64"])), data_only=False)
+            get_temp_path(cls.result["token"]), data_only=False)
         cls.ws = cls.wb["Compact "]
         # Snapshot the extent AS PRODUCED: openpyxl MATERIALISES a cell on indexed access, so a
         # later test reading an out-of-range address would otherwise grow max_row under us.
@@ -785,7 +784,7 @@ class TestBcsCostRatesNeverReachTheExport(FrappeTestCase):
         )
         cls.result = result
         cls.wb = load_workbook(
-            io.BytesIO(base64.b64decode(result["content_base64"])), data_only=False
+            get_temp_path(result["token"]), data_only=False
         )
 
     @classmethod
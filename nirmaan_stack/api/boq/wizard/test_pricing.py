@@ -2989,12 +2989,12 @@ class TestReconciliationChoice(FrappeTestCase):
 # ====================================================================================
 # Slice 5a -- Excel write-back backend (export_writeback)
 # ====================================================================================
-import base64 as _b64
 import os as _os
 import tempfile as _tempfile
 
 import openpyxl as _openpyxl
 
+from nirmaan_stack.api.background_jobs import get_temp_path
 from nirmaan_stack.api.boq.wizard.export_writeback import (
     _COLOR_HEX,
     _PRICED_HIGHLIGHT_HEX,
@@ -3346,11 +3346,8 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
             ws["F{}".format(r)] = "=D{0}*E{0}".format(r)   # amount formula -> the fidelity anchor
         return _save_tmp(wb)
 
-    def _load_b64(self, content_base64):
-        raw = _b64.b64decode(content_base64)
-        fd, path = _tempfile.mkstemp(suffix=".xlsx")
-        _os.write(fd, raw)
-        _os.close(fd)
+    def _load_download(self, token):
+        path = get_temp_path(token)
         wb = _openpyxl.load_workbook(path, data_only=False)
         _os.unlink(path)
         return wb
@@ -3365,7 +3362,7 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
             _os.unlink(path)
         self.assertEqual(res["exported_sheets"], [self.sheet])
         self.assertEqual(res["skipped_formula_columns"], {})
-        wb = self._load_b64(res["content_base64"])
+        wb = self._load_download(res["token"])
         ws = wb[self.sheet_stripped]
         self.assertEqual(ws["E34"].value, 250.0, "rate stamped")
         self.assertEqual(ws["F34"].value, "=D34*E34", "paired amount formula preserved")
@@ -3410,7 +3407,7 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
             res = _generate_priced_workbook(self.boq, [self.sheet], path)
         finally:
             _os.unlink(path)
-        wb = self._load_b64(res["content_base64"])
+        wb = self._load_download(res["token"])
         ws = wb[self.sheet_stripped]
         # stamped rate cell carries the system teal
         self.assertIn(_PRICED_HIGHLIGHT_HEX, ws["E34"].fill.fgColor.rgb or "",
@@ -3432,7 +3429,7 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
             res = _generate_priced_workbook(self.boq, [self.sheet], path)
         finally:
             _os.unlink(path)
-        wb = self._load_b64(res["content_base64"])
+        wb = self._load_download(res["token"])
         # RULE 1: a skipped formula rate cell gets NO teal (it was never written).
         self.assertNotIn(_PRICED_HIGHLIGHT_HEX, wb[self.sheet_stripped]["E34"].fill.fgColor.rgb or "",
                          "skipped formula rate cell carries no highlight")
@@ -3448,7 +3445,7 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
             _os.unlink(path)
         self.assertEqual(res["skipped_formula_columns"], {self.sheet: ["E"]},
                          "the formula rate column is reported skipped")
-        wb = self._load_b64(res["content_base64"])
+        wb = self._load_download(res["token"])
         self.assertEqual(wb[self.sheet_stripped]["E34"].value, "=H34:I34",
                          "formula rate cell left untouched")
         wb.close()
@@ -3461,7 +3458,7 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
         finally:
             _os.unlink(path)
         self.assertEqual(res["remark_columns"], {self.sheet: "J"})
-        wb = self._load_b64(res["content_base64"])
+        wb = self._load_download(res["token"])
         ws = wb[self.sheet_stripped]
         self.assertEqual(ws["J3"].value, "Nirmaan Remarks")
         self.assertEqual(ws["J34"].value, "verify qty")
@@ -3474,7 +3471,7 @@ class TestExportWritebackEndToEnd(FrappeTestCase):
             res = _generate_priced_workbook(self.boq, [self.sheet], path)
         finally:
             _os.unlink(path)
-        wb = self._load_b64(res["content_base64"])
+        wb = self._load_download(res["token"])
         self.assertEqual(wb[self.sheet_stripped]["B34"].fill.fill_type, "solid",
                          "color fill survived the save round-trip")
         wb.close()
@@ -0,0 +1,140 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the fetched-workbook cache: hit/miss, content addressing, checkout
+lifecycle, LRU eviction, the janitor sweep and sheet snapshots.
+
+No Frappe site needed — the site path and the repair hook are patched. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.boq.wizard.test_workbook_cache
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import openpyxl
+
+from nirmaan_stack.api.boq.wizard import workbook_cache as wc
+from nirmaan_stack.services.boq_parser import snapshot
+
+
+class TestWorkbookCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for target, kwargs in (
+            ("_cache_dir", {"return_value": self.tmp.name}),
+            ("_max_bytes", {"return_value": 10_000}),
+            ("_rules_version", {"return_value": 1}),
+            ("_repair", {}),
+        ):
+            patcher = patch.object(wc, target, **kwargs)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(wc.frappe, "generate_hash", side_effect=lambda length=16: os.urandom(8).hex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fetches = 0
+
+    def _fetch(self, data=b"PK workbook"):
+        def fetch():
+            self.fetches += 1
+            return data
+        return fetch
+
+    def _get(self, identity="s3\x1fkey-1\x1fetag-1", data=b"PK workbook", ext=".xlsx"):
+        return wc.get_cached_workbook(identity, ext, self._fetch(data), "/url")
+
+    def _blobs(self):
+        return os.listdir(os.path.join(self.tmp.name, "blobs"))
+
+    def test_second_lookup_is_a_hit_and_repairs_once(self):
+        first = self._get()
+        second = self._get()
+        self.assertEqual(first, second)
+        self.assertEqual(self.fetches, 1)
+        self.assertEqual(self._repair.call_count, 1)
+
+    def test_changed_etag_misses(self):
+        self._get()
+        self._get(identity="s3\x1fkey-1\x1fetag-2", data=b"PK edited")
+        self.assertEqual(self.fetches, 2)
+        self.assertEqual(len(self._blobs()), 2)
+
+    def test_identical_bytes_share_one_blob(self):
+        a = self._get(identity="s3\x1fkey-1\x1f")
+        b = self._get(identity="s3\x1fkey-2\x1f")
+        self.assertEqual(a, b)
+        self.assertEqual(self._repair.call_count, 1)
+
+    def test_extension_is_kept(self):
+        self.assertTrue(self._get(ext=".xlsm").endswith(".xlsm"))
+        self.assertTrue(self._get(ext=".csv", data=b"other").endswith(".xlsx"))
+
+    def test_checkout_is_private_and_unlinkable(self):
+        path = wc.checkout("s3\x1fkey-1\x1f", ".xlsx", self._fetch(), "/url")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"PK workbook")
+        os.unlink(path)
+        self.assertEqual(len(self._blobs()), 1)
+        wc.checkout("s3\x1fkey-1\x1f", ".xlsx", self._fetch(), "/url")
+        self.assertEqual(self.fetches, 1)
+
+    def test_unwritable_cache_falls_back_to_a_tempfile(self):
+        blocker = os.path.join(self.tmp.name, "not-a-dir")
+        open(blocker, "w").close()
+        self._cache_dir.return_value = os.path.join(blocker, "cache")  # makedirs -> NotADirectoryError
+        path = wc.checkout("s3\x1fkey-1\x1f", ".xlsx", self._fetch(), "/url")
+        self.addCleanup(os.unlink, path)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"PK workbook")
+
+    def test_eviction_drops_least_recently_used(self):
+        old = time.time() - wc.disk_cache.EVICT_MIN_IDLE_SEC - 100
+        paths = []
+        for i in range(4):  # 4 x 3000 bytes against a 10_000-byte bound
+            paths.append(self._get(identity=f"k{i}", data=bytes([i]) * 3000))
+            os.utime(paths[-1], (old + i, old + i))  # distinct, evictable mtimes
+        wc._evict()
+        remaining = {os.path.join(self.tmp.name, "blobs", b) for b in self._blobs()}
+        self.assertNotIn(paths[0], remaining)
+        self.assertIn(paths[3], remaining)
+        self.fetches = 0
+        self._get(identity="k0", data=bytes([0]) * 3000)  # evicted blob -> refetch
+        self.assertEqual(self.fetches, 1)
+
+    def test_sweep_drops_idle_blobs_their_index_and_stale_checkouts(self):
+        blob = self._get()
+        path = wc.checkout("s3\x1fkey-1\x1fetag-1", ".xlsx", self._fetch(), "/url")
+        idle = time.time() - wc.IDLE_DAYS * 86400 - 60
+        os.utime(blob, (idle, idle))  # shared inode: the checkout ages with it
+        self.assertEqual(wc.sweep(dry_run=True)["blobs"], 1)
+        self.assertTrue(os.path.exists(blob))
+        result = wc.sweep()
+        self.assertEqual((result["blobs"], result["index"], result["checkouts"]), (1, 1, 1))
+        self.assertFalse(os.path.exists(blob) or os.path.exists(path))
+
+    def test_snapshot_is_built_once_and_shared(self):
+        workbook = os.path.join(self.tmp.name, "in.xlsx")
+        wb = openpyxl.Workbook()
+        wb.active["A1"] = "Item"
+        wb.save(workbook)
+        self.assertIsNone(wc.get_snapshot(workbook, build=False))
+        with patch.object(snapshot, "build_snapshot", wraps=snapshot.build_snapshot) as build:
+            first = wc.get_snapshot(workbook)
+            second = wc.get_snapshot(workbook, build=False)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(second.workbook("read_only")["Sheet"].cell(1, 1).value, "Item")
+
+    def test_unreadable_workbook_fails_open(self):
+        junk = os.path.join(self.tmp.name, "junk.xlsx")
+        with open(junk, "wb") as f:
+            f.write(b"not a zip")
+        self.assertIsNone(wc.get_snapshot(junk))
+
+
+if __name__ == "__main__":
+    unittest.main()
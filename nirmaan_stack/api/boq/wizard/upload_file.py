@@ -4,6 +4,7 @@ import os
 import frappe
 from frappe.utils.file_manager import save_file
 
+from nirmaan_stack.api.boq.wizard import workbook_cache
 from nirmaan_stack.api.boq.wizard.revision import assert_revisable_source
 from nirmaan_stack.api.boq.wizard.sheet_preview import _fetch_boq_file_to_tempfile
 from nirmaan_stack.services.boq_parser._auto_guess import auto_guess_sheet_config
@@ -279,6 +280,7 @@ def _upload_file_worker(project_id, file_url, file_name, user, is_template_sourc
     """
     frappe.set_user(user)
     worker_tmp = None
+    reader = None
     try:
         # Step 1: Create Nirmaan Attachments early; associated_docname linked in step 11.
         att_doc = frappe.new_doc("Nirmaan Attachments")
@@ -298,7 +300,7 @@ def _upload_file_worker(project_id, file_url, file_name, user, is_template_sourc
         # is a corrupted workbook.
         worker_tmp = _fetch_boq_file_to_tempfile(file_url)
         try:
-            reader = BoqReader(worker_tmp)
+            reader = BoqReader(worker_tmp, snapshot=workbook_cache.get_snapshot(worker_tmp))
         except Exception:
             # LOG BEFORE RETURNING. This branch returns rather than raising, so
             # without an explicit log_error it lands in NO Error Log at all -- the
@@ -396,6 +398,8 @@ def _upload_file_worker(project_id, file_url, file_name, user, is_template_sourc
         _publish_and_record({"status": "error", "error_code": "internal"}, user)
         raise
     finally:
+        if reader is not None:
+            reader.close()  # unmaps the sheet snapshot
         if worker_tmp:
             try:
                 os.remove(worker_tmp)
@@ -0,0 +1,271 @@
+"""
+workbook_cache — bench-local, content-addressed cache of fetched BoQ source workbooks.
+
+WHY THIS EXISTS
+---------------
+Every phase that opens a BoQ's source workbook -- upload, config preview, parse,
+commit, revision entry/mapping/confirm, revision carry, both rate exports --
+materialised it through `_fetch_boq_file_to_tempfile` (sheet_preview / parse_run),
+which downloaded the FULL object from S3 and re-ran the repair scan every time.
+One wizard session re-downloads the same multi-MB workbook a dozen times.
+
+LAYOUT (under `sites/<site>/private/boq_workbook_cache/`, never web-served and
+outside `private/files`, so the orphan-workbook sweep never mistakes it for a leak)
+---------------------------------------------------------------------------------
+* `blobs/<sha256 of the fetched bytes>-r<RULES_VERSION><ext>` -- the workbook AFTER
+  `_repair_fetched_workbook`. Content-addressed: two URLs for the same bytes share
+  one blob, and a repair-rule bump (RULES_VERSION) re-derives every blob.
+* `index/<sha256 of the source identity>.json` -- {"blob": name}. The identity is
+  `s3 key + ETag` (ETag from a HEAD when the S3 client exposes one; frappe_gcp
+  attachment keys are per-upload, so the key alone is already immutable) or
+  `local path + mtime + size`. A changed source is therefore a new identity and a miss.
+* `checkout/` -- per-call hard links handed to legacy callers (see `checkout`).
+* `snapshots/<sha256 of the repaired workbook>-s<SNAPSHOT_VERSION>.snap` -- the
+  memory-mapped sheet snapshot (services/boq_parser/snapshot.py) every stage reads
+  instead of re-parsing the XML. Built once, by the first background stage that
+  opens the workbook (see `get_snapshot`).
+
+The index, atomic writes, eviction and sweep are services/disk_cache.py, shared
+with the PDF render and attachment caches. Blobs and snapshots together are bounded
+to `boq_workbook_cache_mb` from site config (DEFAULT_MAX_MB); after every store the
+least-recently-used files are evicted. The daily
+`tasks/cleanup_orphan_private_files` run calls `sweep()` for idle blobs and
+snapshots, dangling index entries and leaked checkouts.
+
+CONTRACT
+--------
+`get_cached_workbook` returns a SHARED path: callers may open it read-only and must
+never write to or unlink it. `checkout` returns a private path the caller unlinks --
+the contract `_fetch_boq_file_to_tempfile` has always had. It is a hard link into the
+cache (no copy), falling back to a real copy when linking is impossible.
+
+Caching FAILS OPEN: if the cache directory cannot be written, the workbook is
+materialised to a plain tempfile exactly as before.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import frappe
+
+from nirmaan_stack.services import disk_cache
+
+DEFAULT_MAX_MB = 2048
+IDLE_DAYS = 14                 # sweep(): blobs untouched this long are dropped
+CHECKOUT_MAX_AGE_HOURS = 24    # sweep(): checkouts a crashed worker never unlinked
+
+WORKBOOK_EXTS = (".xlsx", ".xlsm")
+SNAPSHOT_EXT = ".snap"
+UNSUPPORTED_EXT = ".unsupported"   # marker: this workbook cannot be snapshotted, don't retry
+
+_BOUNDED = (("blobs", WORKBOOK_EXTS), ("snapshots", (SNAPSHOT_EXT, UNSUPPORTED_EXT)))
+
+
+def _cache_dir() -> str:
+    return frappe.get_site_path("private", "boq_workbook_cache")
+
+
+def _max_bytes() -> int:
+    return int(frappe.conf.get("boq_workbook_cache_mb") or DEFAULT_MAX_MB) * 1024 * 1024
+
+
+def _rules_version() -> int:
+    from nirmaan_stack.services.boq_parser.workbook_repair import (  # noqa: PLC0415
+        RULES_VERSION,
+    )
+
+    return RULES_VERSION
+
+
+# --------------------------------------------------------------------------- sources
+
+
+def s3_source(key: str):
+    """(identity, fetch) for an S3 object. `fetch()` raises the same frappe errors the
+    fetch helpers always raised."""
+    from frappe_gcp_attachment.controller import S3Operations  # noqa: PLC0415
+
+    try:
+        s3 = S3Operations()
+    except Exception as exc:
+        frappe.throw(
+            f"Failed to fetch BoQ file from S3 (key={key!r}): {exc}",
+            title="S3 fetch failed",
+        )
+    identity = disk_cache.s3_identity(key, getattr(s3, "S3_CLIENT", None), getattr(s3, "BUCKET", None))
+
+    def fetch() -> bytes:
+        try:
+            return s3.read_file_from_s3(key)["Body"].read()
+        except Exception as exc:
+            frappe.throw(
+                f"Failed to fetch BoQ file from S3 (key={key!r}): {exc}",
+                title="S3 fetch failed",
+            )
+
+    return identity, fetch
+
+
+def local_source(path: str):
+    """(identity, fetch) for a workbook on local disk (dev / test URLs)."""
+    try:
+        identity = disk_cache.file_identity(path)
+    except OSError as exc:
+        frappe.throw(f"Failed to read local BoQ file: {exc}", title="File access failed")
+
+    def fetch() -> bytes:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError as exc:
+            frappe.throw(f"Failed to read local BoQ file: {exc}", title="File access failed")
+
+    return identity, fetch
+
+
+# --------------------------------------------------------------------------- lookups
+
+
+def get_cached_workbook(identity: str, ext: str, fetch, source_file_url: str) -> str:
+    """Shared, read-only path of the repaired workbook for `identity`.
+
+    A hit costs one small JSON read; a miss calls `fetch()`, repairs once and stores.
+    Never write to or unlink the returned path -- use `checkout` for a private one.
+    """
+    ext = ext if ext in WORKBOOK_EXTS else ".xlsx"
+    root = _cache_dir()
+    index_path = disk_cache.index_path(root, f"{identity}\x1f{ext}")
+
+    blob = disk_cache.lookup(root, index_path)
+    if blob:
+        return blob
+
+    data = fetch()
+    blob = os.path.join(root, "blobs", f"{disk_cache.sha256(data)}-r{_rules_version()}{ext}")
+    if not os.path.exists(blob):
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp = disk_cache.write_tmp(data, ext, os.path.dirname(blob))
+        _repair(tmp, source_file_url)
+        os.replace(tmp, blob)
+    else:
+        os.utime(blob)
+    disk_cache.write_index(index_path, os.path.basename(blob))
+    _evict()
+    return blob
+
+
+def checkout(identity: str, ext: str, fetch, source_file_url: str) -> str:
+    """Private path the caller unlinks (the `_fetch_boq_file_to_tempfile` contract)."""
+    try:
+        blob = get_cached_workbook(identity, ext, fetch, source_file_url)
+    except OSError:
+        # Cache dir unwritable (disk full, permissions): fetch uncached, as before.
+        frappe.logger("boq_upload").warning(
+            f"BoQ workbook cache unavailable; fetching uncached url={source_file_url!r}",
+            exc_info=True,
+        )
+        tmp = disk_cache.write_tmp(fetch(), ext if ext in WORKBOOK_EXTS else ".xlsx")
+        _repair(tmp, source_file_url)
+        return tmp
+
+    ext = os.path.splitext(blob)[1]
+    link_dir = os.path.join(_cache_dir(), "checkout")
+    try:
+        os.makedirs(link_dir, exist_ok=True)
+        path = os.path.join(link_dir, frappe.generate_hash(length=16) + ext)
+        os.link(blob, path)
+        return path
+    except OSError:
+        tmp = tempfile.NamedTemporaryFile(suffix=ext, delete=False)
+        tmp.close()
+        shutil.copyfile(blob, tmp.name)
+        return tmp.name
+
+
+def _repair(path: str, source_file_url: str) -> None:
+    from nirmaan_stack.api.boq.wizard.sheet_preview import (  # noqa: PLC0415
+        _repair_fetched_workbook,
+    )
+
+    _repair_fetched_workbook(path, source_file_url)
+
+
+# --------------------------------------------------------------------------- snapshots
+
+
+def get_snapshot(workbook_path: str, build: bool = True):
+    """The open sheet snapshot of the workbook at `workbook_path`, or None.
+
+    Keyed by the sha256 of the bytes at `workbook_path` (a checkout of the repaired
+    workbook), so every stage that fetched the same BoQ version finds the same file.
+    `build=False` is for request-path callers (the config preview): they use a
+    snapshot if an earlier background stage built one and never pay for a build.
+
+    FAILS OPEN: any error -- unreadable file, a workbook the snapshot cannot
+    represent, a full disk -- returns None and the caller opens the .xlsx with
+    openpyxl exactly as before.
+    """
+    from nirmaan_stack.services.boq_parser.snapshot import (  # noqa: PLC0415
+        SNAPSHOT_VERSION,
+        SnapshotError,
+        WorkbookSnapshot,
+        build_snapshot,
+    )
+
+    tmp = None
+    try:
+        sha = hashlib.sha256()
+        with open(workbook_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        stem = os.path.join(_cache_dir(), "snapshots", f"{digest}-s{SNAPSHOT_VERSION}")
+        path = stem + SNAPSHOT_EXT
+        if os.path.exists(path):
+            os.utime(path)  # LRU
+            return WorkbookSnapshot(path)
+        if not build or os.path.exists(stem + UNSUPPORTED_EXT):
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            build_snapshot(workbook_path, tmp)
+        except SnapshotError:
+            open(stem + UNSUPPORTED_EXT, "w").close()
+            raise
+        os.replace(tmp, path)
+        tmp = None
+        _evict()
+        return WorkbookSnapshot(path)
+    except Exception:
+        frappe.logger("boq_upload").warning(
+            f"BoQ sheet snapshot unavailable; reading the workbook directly path={workbook_path!r}",
+            exc_info=True,
+        )
+        return None
+    finally:
+        if tmp:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+# --------------------------------------------------------------------------- upkeep
+
+
+def _evict() -> int:
+    return disk_cache.evict(_cache_dir(), _BOUNDED, _max_bytes())
+
+
+def sweep(dry_run: bool = False) -> dict:
+    """Daily upkeep: idle blobs and snapshots, index entries whose blob is gone, leaked
+    checkouts, then the size bound. Returns counts for the janitor log."""
+    return disk_cache.sweep(
+        _cache_dir(), _BOUNDED, _max_bytes(), IDLE_DAYS,
+        aged={"checkouts": ("checkout", CHECKOUT_MAX_AGE_HOURS * 3600)},
+        dry_run=dry_run,
+    )
@@ -5,6 +5,7 @@ from frappe.utils import create_batch
 
 from typing import Any, Dict, Set, TypedDict
 from nirmaan_stack.services.role_profiles import MATERIAL_PROCUREMENT_PROFILES
+from nirmaan_stack.services.project_permissions import user_projects
 
 class ProjectStats(TypedDict):
     project: str
@@ -46,11 +47,7 @@ def _get_allowed_projects(user: str) -> list[str]:
     """
     Get list of projects the user has access to via Nirmaan User Permissions.
     """
-    return frappe.get_all(
-        "Nirmaan User Permissions",
-        filters={"user": user, "allow": "Projects"},
-        pluck="for_value",
-    )
+    return user_projects(user)
 
 
 def _should_filter_by_permissions(user: str, role: str) -> bool:
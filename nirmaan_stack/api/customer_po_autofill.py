@@ -3,7 +3,7 @@ import re
 
 import frappe
 
-from nirmaan_stack.services.extraction import extract
+from nirmaan_stack.services.extraction.cache import extract_cached
 from nirmaan_stack.services.extraction.files import (
     SUPPORTED_EXTS,
     fetch_file_content,
@@ -47,7 +47,8 @@ def extract_customer_po_fields(file_url, project_name=None):
     fields the model could read are returned populated; everything else comes
     back empty for manual entry. Mirrors payment_autofill (the simple variant —
     no GSTIN checks, no reconciliation, no auto-approve). The response is never
-    persisted server-side.
+    persisted server-side; the raw provider result is served from the
+    content-hash extraction cache when the file was already read.
 
     When `project_name` (the Projects docname) is passed, a soft project-match
     check compares the project reference read off the PO against the project's
@@ -76,7 +77,10 @@ def extract_customer_po_fields(file_url, project_name=None):
     if not content:
         frappe.throw("Could not read file content.")
 
-    _, entities = extract(content, file_ext, settings, doc_kind="customer_po")
+    # Customer POs have no line-item table — the third return value is always [].
+    _, entities, _ = extract_cached(
+        content, file_ext, settings, doc_kind="customer_po", file_url=file_url
+    )
 
     po_number, po_number_conf = pick_entity(entities, PO_NUMBER_KEYS)
     po_date, po_date_conf = pick_entity(entities, PO_DATE_KEYS)
@@ -1,12 +1,161 @@
+import json
+
 import frappe
 from frappe import _
-from frappe.utils import cint, create_batch
-from frappe.utils.caching import redis_cache
+from frappe.utils import flt
+
+# Statuses whose POs no longer count towards the customer's order value.
+_INACTIVE_PO_STATUSES = ("Cancelled", "Merged", "PO Amendment", "Inactive")
+
+# Per-customer summary cache. Invalidated from the Project Payments / Project Inflows /
+# Procurement Orders / Service Requests / Projects hooks (`on_financial_doc_change`); the
+# TTL is the safety net for the writes that bypass hooks (frappe.db.set_value etc.).
+_CACHE_PREFIX = "customer_financials"
+CACHE_TTL_SECONDS = 60 * 60
+
+# `Project Inflows.amount` is a Data field. Regex-guarded rather than NULLIF(btrim(...), ''):
+# one "n/a" would otherwise fail the CAST and the whole statement with it.
+_INFLOW_AMOUNT = (
+    "CASE WHEN btrim(amount) ~ '^-?[0-9]+(\\.[0-9]+)?$' "
+    "THEN CAST(btrim(amount) AS numeric) ELSE 0 END"
+)
+
+_TOTAL_KEYS = ("amount_paid", "inflow_amount", "po_amount_with_gst", "sr_amount_with_gst")
+
+
+def compute_customer_financials(customer_id):
+    """
+    Per-project totals for one customer in ONE grouped statement -> [{project, project_name, <_TOTAL_KEYS>}].
+
+    Every project of the customer gets a row (zeros when it has no activity), plus a row for
+    any project that only appears on one of the customer's inflows (inflows are customer-scoped,
+    so one booked against another customer's project still counts here; `own_project` is False).
+
+      - amount_paid        = Σ Project Payments.amount (any status, as before)
+      - inflow_amount      = Σ Project Inflows.amount where inflow.customer = customer
+      - po_amount_with_gst = Σ PO.total_amount (status NOT IN _INACTIVE_PO_STATUSES)
+      - sr_amount_with_gst = Σ SR.total_amount (status = Approved; already GST-inclusive)
+
+    No row caps: the sums run in the database over every matching row.
+    """
+    rows = frappe.db.sql(f"""
+        WITH cp AS (
+            SELECT name, project_name FROM "tabProjects" WHERE customer = %(customer)s
+        ),
+        pay AS (
+            SELECT project, SUM(COALESCE(amount, 0)) AS amount_paid
+            FROM "tabProject Payments"
+            WHERE project IN (SELECT name FROM cp)
+            GROUP BY project
+        ),
+        inf AS (
+            SELECT project, SUM({_INFLOW_AMOUNT}) AS inflow_amount
+            FROM "tabProject Inflows"
+            WHERE customer = %(customer)s
+            GROUP BY project
+        ),
+        po AS (
+            SELECT project, SUM(COALESCE(total_amount, 0)) AS po_amount_with_gst
+            FROM "tabProcurement Orders"
+            WHERE project IN (SELECT name FROM cp) AND COALESCE(status, '') NOT IN %(inactive)s
+            GROUP BY project
+        ),
+        sr AS (
+            SELECT project, SUM(COALESCE(total_amount, 0)) AS sr_amount_with_gst
+            FROM "tabService Requests"
+            WHERE project IN (SELECT name FROM cp) AND status = 'Approved'
+            GROUP BY project
+        ),
+        k AS (
+            SELECT name AS project FROM cp
+            UNION
+            SELECT project FROM inf
+        )
+        SELECT k.project, cp.project_name, cp.name IS NOT NULL AS own_project,
+               COALESCE(pay.amount_paid, 0) AS amount_paid,
+               COALESCE(inf.inflow_amount, 0) AS inflow_amount,
+               COALESCE(po.po_amount_with_gst, 0) AS po_amount_with_gst,
+               COALESCE(sr.sr_amount_with_gst, 0) AS sr_amount_with_gst
+        FROM k
+        LEFT JOIN cp ON cp.name = k.project
+        LEFT JOIN pay ON pay.project = k.project
+        LEFT JOIN inf ON inf.project IS NOT DISTINCT FROM k.project
+        LEFT JOIN po ON po.project = k.project
+        LEFT JOIN sr ON sr.project = k.project
+        ORDER BY k.project
+    """, {"customer": customer_id, "inactive": _INACTIVE_PO_STATUSES}, as_dict=True)
+
+    return [
+        {
+            "project": r.project,
+            "project_name": r.project_name,
+            "own_project": bool(r.own_project),
+            **{key: flt(r.get(key)) for key in _TOTAL_KEYS},
+        }
+        for r in rows
+    ]
+
+
+def _cache_key(customer_id):
+    return frappe.cache().make_key(f"{_CACHE_PREFIX}:{customer_id}")
+
+
+def get_customer_financial_summary(customer_id):
+    """Cached `compute_customer_financials` for one customer."""
+    cache = frappe.cache()
+    raw = cache.get(_cache_key(customer_id))
+    if raw:
+        return json.loads(raw)
+
+    summary = compute_customer_financials(customer_id)
+    cache.set(_cache_key(customer_id), json.dumps(summary), ex=CACHE_TTL_SECONDS)
+    return summary
+
+
+def invalidate_customer_financials(customers=(), projects=()):
+    """Drop cached summaries for these customers (and the customers of these projects) now,
+    and again after commit.
+
+    The post-commit drop closes the window where a concurrent reader recomputes from the
+    not-yet-committed state and re-caches a stale value.
+    """
+    customers = {c for c in customers if c}
+    projects = [p for p in dict.fromkeys(projects) if p]
+    if projects:
+        customers.update(frappe.get_all(
+            "Projects", filters={"name": ["in", projects]}, pluck="customer", limit_page_length=0,
+        ))
+    keys = [_cache_key(c) for c in customers if c]
+    if not keys:
+        return
+
+    def _drop():
+        frappe.cache().delete(*keys)
+
+    _drop()
+    frappe.db.after_commit.add(_drop)
+
+
+def on_financial_doc_change(doc, method=None):
+    """Doc-event hook: a payment, inflow, PO, SR or project changed -> drop the affected summaries.
+
+    Both the current and the pre-save project / customer are dropped, so moving a document
+    (or a project) between customers refreshes both sides.
+    """
+    old_doc = doc.get_doc_before_save() if method == "on_update" else None
+    if doc.doctype == "Projects":
+        invalidate_customer_financials(customers=[doc.get("customer"), old_doc and old_doc.get("customer")])
+        return
+    invalidate_customer_financials(
+        customers=[doc.get("customer"), old_doc and old_doc.get("customer")],
+        projects=[doc.get("project"), old_doc and old_doc.get("project")],
+    )
+
 
 def get_customer_financial_details(customer_id):
     """
-    API to fetch financial details of a customer, including projects, payments,
-    inflows, procurement orders, and service requests.
+    API to fetch financial details of a customer: its projects, inflows, and the
+    payment / inflow / PO / SR totals, overall and per project.
 
     Args:
         customer_id (str): The ID of the customer to fetch financial details for.
@@ -16,113 +165,36 @@ def get_customer_financial_details(customer_id):
     """
 
     try:
-        # Fetch associated projects
-        projects = frappe.get_all(
-            "Projects",
-            fields=["name", "project_name"],
-            filters={"customer": customer_id},
-            limit=1000
-        )
+        # Per-project totals, one statement, cached per customer (see compute_customer_financials).
+        project_totals = get_customer_financial_summary(customer_id)
 
-        project_names = [p["name"] for p in projects]
-
-        # `project_names` feeds several `project IN (...)` lookups. A customer with many projects would
-        # inline thousands of names and blow sqlparse's 10,000-token cap (validate_generated_query). Chunk
-        # every project-scoped IN into <=500-name batches and concatenate — each row belongs to exactly one
-        # project (names are unique PKs), so no row is double-counted, and a single customer's row volume
-        # never reaches the per-chunk `limit`, so the merged result is byte-identical to the pre-chunk query.
-
-        # Fetch project payments
-        project_payments = []
-        for chunk in create_batch(project_names, 500):
-            project_payments.extend(frappe.get_all(
-                "Project Payments",
-                fields=["amount"],
-                filters={"project": ("in", list(chunk))},
-                limit=1000
-            ))
-
-        # Fetch project inflows (customer-scoped, not project-scoped -> bounded, no chunking needed)
+        projects = [
+            {"name": p["project"], "project_name": p["project_name"]}
+            for p in project_totals
+            if p["own_project"]
+        ]
+
+        # The inflow rows themselves, for the "Total Amount Received" dialog.
         project_inflows = frappe.get_all(
             "Project Inflows",
-            fields=["*"],
+            fields=["name", "project", "customer", "amount", "payment_date", "utr", "inflow_attachment", "creation"],
             filters={"customer": customer_id},
-            limit=1000
+            limit_page_length=0
         )
 
-        # Fetch Procurement Orders
-        procurement_orders = []
-        for chunk in create_batch(project_names, 500):
-            procurement_orders.extend(frappe.get_all(
-                "Procurement Orders",
-                fields=["order_list", "loading_charges", "freight_charges"],
-                filters={"status": ("not in", ["Cancelled", "Merged", "PO Amendment","Inactive"]), "project": ("in", list(chunk))},
-                limit=100000,
-                order_by="modified desc"
-            ))
-
-        # Fetch Service Requests — `total_amount` is computed on every save (validate)
-        # and already includes GST when sr.gst === "true".
-        service_requests = []
-        for chunk in create_batch(project_names, 500):
-            service_requests.extend(frappe.get_all(
-                "Service Requests",
-                fields=["name", "gst", "total_amount"],
-                filters={"status": "Approved", "project": ("in", list(chunk))},
-                limit=10000,
-                order_by="modified desc"
-            ))
-
-        # Calculate totals
-        total_amount_paid = sum(cint(p["amount"]) for p in project_payments)
-        total_inflow_amount = sum(cint(i["amount"]) for i in project_inflows)
-
-        def get_po_total(order):
-            if not order or not order.get("order_list") or not order["order_list"].get("list"):
-                return {"total": 0, "total_gst": 0, "total_amt": 0}
-
-            order_data = order["order_list"]["list"]
-
-            total, total_gst = 0, 0
-            for item in order_data:
-                price = cint(item.get("quote", 0))
-                quantity = cint(item.get("quantity", 1))
-                gst = price * quantity * (cint(item.get("tax", 0)) / 100)
-                total += price * quantity
-                total_gst += cint(gst)
-
-            loading_charges = cint(order.get("loading_charges", 0))
-            freight_charges = cint(order.get("freight_charges", 0))
-            additional_charges = loading_charges + freight_charges
-            additional_gst = loading_charges * 0.18 + freight_charges * 0.18
-
-            return {
-                "total": total + additional_charges,
-                "total_gst": total_gst + additional_gst,
-                "total_amt": total + total_gst + additional_charges + additional_gst,
-            }
-
-        def get_sr_total(order):
-            with_gst = cint(order.get("total_amount", 0))
-            without_gst = with_gst / 1.18 if order.get("gst") == "true" else with_gst
-            return {"with_gst": with_gst, "without_gst": without_gst}
-
-        total_po_amount_with_gst = sum(get_po_total(po)["total_amt"] for po in procurement_orders)
-        total_sr_amount_with_gst = sum(get_sr_total(sr)["with_gst"] for sr in service_requests)
+        totals = {key: sum(p[key] for p in project_totals) for key in _TOTAL_KEYS}
 
         # Prepare response
         response = {
             "projects": projects,
-            # "project_payments": project_payments,
             "project_inflows": project_inflows,
-            # "procurement_orders": procurement_orders,
-            # "service_requests": service_requests,
+            "project_totals": project_totals,
             "totals": {
-                "total_amount_paid": total_amount_paid,
-                "total_inflow_amount": total_inflow_amount,
-                "total_po_amount_with_gst": total_po_amount_with_gst,
-                "total_sr_amount_with_gst": total_sr_amount_with_gst,
-                "total_amount_due": (total_po_amount_with_gst + total_sr_amount_with_gst) - total_amount_paid,
+                "total_amount_paid": totals["amount_paid"],
+                "total_inflow_amount": totals["inflow_amount"],
+                "total_po_amount_with_gst": totals["po_amount_with_gst"],
+                "total_sr_amount_with_gst": totals["sr_amount_with_gst"],
+                "total_amount_due": (totals["po_amount_with_gst"] + totals["sr_amount_with_gst"]) - totals["amount_paid"],
             }
         }
 
@@ -132,10 +204,9 @@ def get_customer_financial_details(customer_id):
         frappe.log_error(frappe.get_traceback(), _("Error fetching customer financial details"))
         frappe.throw(_("An error occurred while fetching financial details: {}").format(e))
 
-#@redis_cache(shared=True)
 @frappe.whitelist()
 def get_customer_financial_details_api(customer_id):
     """
     Whitelist function to expose the API.
     """
-    return get_customer_financial_details(customer_id)
\ No newline at end of file
+    return get_customer_financial_details(customer_id)
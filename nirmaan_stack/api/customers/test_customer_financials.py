@@ -0,0 +1,133 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the aggregated, cached customer financials.
+
+`frappe.db`, `frappe.cache` and `frappe.get_all` are patched, so these check the one statement,
+the totals built from its rows, and the cache / invalidation paths. No Frappe site needed:
+    python -m unittest nirmaan_stack.api.customers.test_customer_financials
+"""
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.api.customers import customer_financials as cf
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class _Cache:
+    def __init__(self):
+        self.store = {}
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+ROWS = [
+    _Row(project="P-1", project_name="Tower A", own_project=True, amount_paid=100,
+         inflow_amount=500, po_amount_with_gst=300, sr_amount_with_gst=50),
+    _Row(project="P-2", project_name="Tower B", own_project=True, amount_paid=0,
+         inflow_amount=0, po_amount_with_gst=0, sr_amount_with_gst=0),
+    _Row(project=None, project_name=None, own_project=False, amount_paid=0,
+         inflow_amount=25.5, po_amount_with_gst=0, sr_amount_with_gst=0),
+]
+
+
+class _PatchedSite(unittest.TestCase):
+    def setUp(self):
+        self.cache = _Cache()
+        for target, value in (("db", MagicMock()), ("cache", lambda: self.cache), ("get_all", MagicMock())):
+            patcher = patch.object(cf.frappe, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.db = cf.frappe.db
+        self.db.sql.return_value = ROWS
+        cf.frappe.get_all.return_value = []
+
+
+class TestCustomerFinancials(_PatchedSite):
+    def test_one_statement_gives_per_project_and_customer_totals(self):
+        details = cf.get_customer_financial_details("CUST-1")
+        self.db.sql.assert_called_once()
+        query, values = self.db.sql.call_args.args
+        self.assertNotIn("LIMIT", query.upper())
+        self.assertEqual(values, {"customer": "CUST-1", "inactive": cf._INACTIVE_PO_STATUSES})
+
+        self.assertEqual(details["projects"], [
+            {"name": "P-1", "project_name": "Tower A"}, {"name": "P-2", "project_name": "Tower B"},
+        ])
+        self.assertEqual(len(details["project_totals"]), 3)
+        self.assertEqual(details["totals"], {
+            "total_amount_paid": 100,
+            "total_inflow_amount": 525.5,
+            "total_po_amount_with_gst": 300,
+            "total_sr_amount_with_gst": 50,
+            "total_amount_due": 250,
+        })
+        inflow_call = cf.frappe.get_all.call_args
+        self.assertEqual(inflow_call.kwargs["limit_page_length"], 0)
+
+    def test_summary_is_served_from_cache_until_invalidated(self):
+        cf.get_customer_financial_details("CUST-1")
+        cf.get_customer_financial_details("CUST-1")
+        self.assertEqual(self.db.sql.call_count, 1)
+
+        cf.invalidate_customer_financials(customers=["CUST-1"])
+        self.db.after_commit.add.assert_called_once()
+        cf.get_customer_financial_details("CUST-1")
+        self.assertEqual(self.db.sql.call_count, 2)
+
+
+class TestInvalidation(_PatchedSite):
+    def _seed(self, *customers):
+        for customer in customers:
+            self.cache.set(cf._cache_key(customer), json.dumps([]))
+
+    def _doc(self, doctype, before=None, **fields):
+        doc = SimpleNamespace(doctype=doctype, get=fields.get)
+        doc.get_doc_before_save = lambda: before and SimpleNamespace(get=before.get)
+        return doc
+
+    def test_a_payment_drops_the_customers_of_its_old_and_new_project(self):
+        self._seed("CUST-1", "CUST-2", "CUST-3")
+        cf.frappe.get_all.return_value = ["CUST-1", "CUST-2"]
+        doc = self._doc("Project Payments", before={"project": "P-9"}, project="P-1")
+        cf.on_financial_doc_change(doc, "on_update")
+
+        self.assertCountEqual(cf.frappe.get_all.call_args.kwargs["filters"]["name"][1], ["P-1", "P-9"])
+        self.assertEqual(list(self.cache.store), [cf._cache_key("CUST-3")])
+        # Dropped again once the write is committed.
+        self._seed("CUST-1")
+        self.db.after_commit.add.call_args.args[0]()
+        self.assertNotIn(cf._cache_key("CUST-1"), self.cache.store)
+
+    def test_a_project_moving_customers_drops_both(self):
+        self._seed("CUST-1", "CUST-2")
+        doc = self._doc("Projects", before={"customer": "CUST-1"}, customer="CUST-2")
+        cf.on_financial_doc_change(doc, "on_update")
+        self.assertEqual(self.cache.store, {})
+        cf.frappe.get_all.assert_not_called()
+
+    def test_an_inflow_carries_its_customer(self):
+        self._seed("CUST-1")
+        doc = self._doc("Project Inflows", customer="CUST-1")
+        cf.on_financial_doc_change(doc, "on_trash")
+        self.assertEqual(self.cache.store, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import frappe
 from nirmaan_stack.api.data_table.search import get_list_with_count_enhanced_impl
-from nirmaan_stack.api.data_table.facets import get_facet_values_impl
+from nirmaan_stack.api.data_table.facets import get_facet_values_impl, get_facet_values_multi_impl
 
 @frappe.whitelist(allow_guest=False)
 def get_list_with_count_enhanced(
@@ -66,4 +66,30 @@ def get_facet_values(
         limit=limit,
         require_pending_items=require_pending_items,
         include_blank_bucket=include_blank_bucket
-    )
\ No newline at end of file
+    )
+
+@frappe.whitelist(allow_guest=False)
+def get_facet_values_multi(
+    doctype: str = None,
+    fields: str | list[str] = None,
+    filters: str | list | dict | None = None,
+    search_term: str | None = None,
+    current_search_fields: str | None = None,
+    limit: int | str = 100,
+    require_pending_items: bool | str = False,
+    include_blank_bucket: bool | str = False
+) -> dict:
+    """
+    Whitelisted entry point for calculating several facets of one list in a single call.
+    Returns {field: {"values": [...]}}, each entry identical to get_facet_values for that field.
+    """
+    return get_facet_values_multi_impl(
+        doctype=doctype,
+        fields=fields,
+        filters=filters,
+        search_term=search_term,
+        current_search_fields=current_search_fields,
+        limit=limit,
+        require_pending_items=require_pending_items,
+        include_blank_bucket=include_blank_bucket
+    )
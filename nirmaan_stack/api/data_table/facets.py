@@ -2,6 +2,7 @@ import frappe
 from frappe import _
 from frappe.utils import cint
 from frappe.desk.reportview import execute as reportview_execute
+import json
 import re
 import traceback
 
@@ -13,6 +14,7 @@ from .utils import (
     append_search_filter
 )
 from .token_search import tokenize
+from . import item_index
 
 # Sentinel value for the "blank"/"not set" facet bucket. Surfaced as a facet
 # option (the frontend renders it with a caller-supplied label, e.g. "Not
@@ -25,6 +27,365 @@ from .token_search import tokenize
 NOT_SET_FACET_VALUE = "__NOT_SET__"
 
 
+def _resolve_facet_field(doctype, meta, field):
+    """Return (field_meta, is_standard_field, child_doctype) for a facet field on
+    `doctype`, looking through its child tables; throws for an unknown field."""
+    field_meta = meta.get_field(field)
+
+    # Standard Frappe fields that don't have explicit field_meta but are valid for facets
+    STANDARD_FIELDS = ['owner', 'modified_by', 'creation', 'modified', 'docstatus', 'name']
+    is_standard_field = field in STANDARD_FIELDS
+
+    child_table_field_name = None
+    child_doctype = None
+    if not field_meta and not is_standard_field:
+        # Check child tables
+        for df in meta.get_table_fields():
+            child_meta = frappe.get_meta(df.options)
+            field_meta = child_meta.get_field(field)
+            if field_meta:
+                child_table_field_name = df.fieldname
+                child_doctype = df.options
+                break
+
+    if not field_meta and not is_standard_field: frappe.throw(_("Invalid field '{0}' for DocType '{1}'").format(field, doctype))
+
+    return field_meta, is_standard_field, child_doctype
+
+
+def _is_filter_on_field(f, field):
+    """True for a [field, op, value] / [doctype, field, op, value] filter on `field`,
+    including prefixed names like 'DocType.fieldname'."""
+    return (
+        (len(f) == 3 and (f[0] == field or f[0].endswith(f".{field}"))) or
+        (len(f) == 4 and (f[1] == field or f[1].endswith(f".{field}")))
+    )
+
+
+def _apply_search_filters(doctype, processed_filters, search_term, current_search_fields, facet_field=None):
+    """Append the search narrowing to `processed_filters` in place. Skipped when the
+    search targets `facet_field` itself, so a facet lists every option of its own column."""
+    if not (search_term and current_search_fields):
+        return
+    target_search_field = _parse_target_search_field(current_search_fields, doctype)
+
+    if target_search_field and target_search_field != facet_field:
+        # If the search field is a child-table or JSON item field, do a
+        # separate sub-query for matching parents and append as a
+        # `name in [...]` filter. A plain LIKE on a relationship field
+        # crashes (e.g. `tabProcurement Requests.order_list does not
+        # exist`) because it isn't a real column on the parent table.
+        search_tokens = tokenize(search_term)
+        doctype_str = str(doctype)
+        is_child_table_field = (
+            doctype_str in CHILD_TABLE_ITEM_SEARCH_MAP
+            and target_search_field in CHILD_TABLE_ITEM_SEARCH_MAP[doctype_str]
+        )
+        is_json_field = (
+            doctype_str in JSON_ITEM_SEARCH_DOCTYPE_MAP
+            and JSON_ITEM_SEARCH_DOCTYPE_MAP[doctype_str]["json_field"] == target_search_field
+        )
+
+        if is_child_table_field and search_tokens and item_index.is_ready():
+            # Token-index lookup (item_index.py): no candidate enumeration or regex scan. The
+            # returned set is pulled back out by split_name_in_constraints, never inlined.
+            filter_tokens = [t for t in search_tokens if len(t) >= 1] or search_tokens
+            item_matches = item_index.matching_parents(doctype_str, target_search_field, filter_tokens)
+            processed_filters.append([doctype, "name", "in", list(item_matches) or ["__NO_MATCH__"]])
+        elif is_child_table_field and search_tokens:
+            item_search_config = CHILD_TABLE_ITEM_SEARCH_MAP[doctype_str][target_search_field]
+            child_doctype_name = str(item_search_config["child_doctype"])
+            child_link_field = str(item_search_config["link_field_to_parent"])
+            searchable_child_fields = list(item_search_config["searchable_child_fields"])
+            # Drop short tokens from SQL filter (mirrors search.py).
+            filter_tokens = [t for t in search_tokens if len(t) >= 1] or search_tokens
+            # Scope the child sub-query to parents that already match
+            # the other facet filters. Without this, `~*` falls back to
+            # a sequential scan of the full child table on every request.
+            candidate_parent_names = [
+                doc.get("name") for doc in reportview_execute(
+                    doctype=doctype, filters=processed_filters,
+                    fields=["name"], limit_page_length=0,
+                ) if doc.get("name")
+            ]
+            if not candidate_parent_names:
+                processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
+            else:
+                # Token-OR (union) at PARENT level: a parent qualifies if any
+                # of its rows matches any token. Matches search.py's behavior
+                # so the facet panel agrees with the list.
+                # Word-boundary regex: matches token only at start of a "word"
+                # (after whitespace/hyphen/underscore/slash/paren/start-of-string).
+                # Expand the OR clause across every (field × token) pair so
+                # the union resolves in one round-trip instead of N.
+                field_token_clauses = []
+                regex_params = []
+                for f in searchable_child_fields:
+                    for token in filter_tokens:
+                        field_token_clauses.append(f"`tab{child_doctype_name}`.`{f}` ~* %s")
+                        regex_params.append(r"(^|[\s\-_/()])" + re.escape(token))
+                or_clause = " OR ".join(field_token_clauses)
+                sql = (
+                    f"SELECT DISTINCT `tab{child_doctype_name}`.`{child_link_field}` "
+                    f"FROM `tab{child_doctype_name}` "
+                    f"WHERE `tab{child_doctype_name}`.`{child_link_field}` IN %s "
+                    f"AND `parenttype` = %s AND ({or_clause})"
+                )
+                union_set = {
+                    r[0] for r in frappe.db.sql(
+                        sql, (tuple(candidate_parent_names), doctype, *regex_params),
+                        as_list=True,
+                    ) if r and r[0]
+                }
+                item_matches = list(union_set)
+                if item_matches:
+                    processed_filters.append([doctype, "name", "in", item_matches])
+                else:
+                    processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
+        elif is_json_field and search_tokens:
+            item_search_config = JSON_ITEM_SEARCH_DOCTYPE_MAP[doctype_str]
+            json_field_name = item_search_config["json_field"]
+            item_path_parts = item_search_config["item_path_parts"]
+            item_name_key = item_search_config.get("item_name_key_in_json", "item")
+            json_array_key = item_path_parts[0]
+            # Drop short tokens from SQL filter (mirrors search.py).
+            filter_tokens = [t for t in search_tokens if len(t) >= 2] or search_tokens
+            # Scope the JSON sub-query to parents that already match
+            # the other facet filters. Without this, the EXISTS clause
+            # is evaluated against every row in the parent table.
+            candidate_parent_names = [
+                doc.get("name") for doc in reportview_execute(
+                    doctype=doctype, filters=processed_filters,
+                    fields=["name"], limit_page_length=0,
+                ) if doc.get("name")
+            ]
+            if not candidate_parent_names:
+                processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
+            else:
+                # Token-OR (union) at PARENT level — mirrors the search.py
+                # JSON branch so facets agree with the list.
+                # OR all token regex tests inside a single EXISTS so the
+                # union resolves in one round-trip; EXISTS short-circuits
+                # on the first matching JSON element per parent.
+                token_conditions = []
+                sql_params: dict = {"names_tuple": tuple(candidate_parent_names)}
+                for i, token in enumerate(filter_tokens):
+                    key = f"token_{i}"
+                    token_conditions.append(f"item_obj->>'{item_name_key}' ~* %({key})s")
+                    sql_params[key] = r"(^|[\s\-_/()])" + re.escape(token)
+                or_clause = " OR ".join(token_conditions)
+                sql = (
+                    f"SELECT DISTINCT name FROM `tab{doctype_str}` "
+                    f"WHERE name IN %(names_tuple)s AND EXISTS("
+                    f"SELECT 1 FROM jsonb_array_elements("
+                    f"COALESCE(`tab{doctype_str}`.`{json_field_name}`::jsonb->'{json_array_key}','[]'::jsonb)"
+                    f") AS item_obj WHERE ({or_clause}))"
+                )
+                union_set = {
+                    r[0] for r in frappe.db.sql(sql, sql_params, as_list=True)
+                    if r and r[0]
+                }
+                item_matches = list(union_set)
+                if item_matches:
+                    processed_filters.append([doctype, "name", "in", item_matches])
+                else:
+                    processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
+        else:
+            # Plain column field — original behavior
+            for token in search_tokens:
+                # A non-text field returns names rather than appending a filter.
+                # Appending them as `name in` is safe HERE (and only here) because
+                # `split_name_in_constraints` runs a few lines below and pulls the
+                # set straight back out, so it never reaches the generated SQL.
+                _name_matches = append_search_filter(
+                    doctype, target_search_field, token, processed_filters
+                )
+                if _name_matches is not None:
+                    processed_filters.append(
+                        [doctype, "name", "in", list(_name_matches) or ["__NO_MATCH__"]]
+                    )
+
+
+def _filter_pending_names(doctype, matching_names):
+    """Keep only parents with at least one Pending item row (child table or JSON list)."""
+    if doctype in CHILD_TABLE_ITEM_SEARCH_MAP:
+        # Use first available child table config (e.g., "order_list")
+        child_table_key = next(iter(CHILD_TABLE_ITEM_SEARCH_MAP[doctype]))
+        search_config = CHILD_TABLE_ITEM_SEARCH_MAP[doctype][child_table_key]
+        child_status_field = search_config.get("status_field")
+        if child_status_field:
+            child_doctype_name = search_config["child_doctype"]
+            child_link_field = search_config["link_field_to_parent"]
+            sql = (
+                f"SELECT DISTINCT `tab{child_doctype_name}`.`{child_link_field}` "
+                f"FROM `tab{child_doctype_name}` "
+                f"WHERE `{child_link_field}` IN %(names_tuple)s "
+                f"AND `parenttype` = %(parent_doctype)s "
+                f"AND `{child_status_field}` = 'Pending'"
+            )
+            sql_params = {"names_tuple": tuple(matching_names), "parent_doctype": doctype}
+            matching_names = [
+                r[0] for r in frappe.db.sql(sql, sql_params, as_list=True) if r and r[0]
+            ]
+    elif doctype in JSON_ITEM_SEARCH_DOCTYPE_MAP:
+        search_config = JSON_ITEM_SEARCH_DOCTYPE_MAP[doctype]
+        json_field_name = search_config["json_field"]
+        item_path_parts = search_config["item_path_parts"]
+        json_array_key = item_path_parts[0]
+        json_pending_sql = (
+            f"SELECT DISTINCT name FROM `tab{doctype}` "
+            f"WHERE name IN %(names_tuple)s AND "
+            f"EXISTS(SELECT 1 FROM jsonb_array_elements("
+            f"COALESCE(`tab{doctype}`.`{json_field_name}`::jsonb->'{json_array_key}','[]'::jsonb)"
+            f") AS item_obj WHERE item_obj->>'status' = 'Pending')"
+        )
+        matching_names = [
+            r[0] for r in frappe.db.sql(json_pending_sql, {"names_tuple": tuple(matching_names)}, as_list=True) if r and r[0]
+        ]
+    return matching_names
+
+
+def _facet_buckets(doctype, field, field_meta, is_standard_field, child_doctype,
+                   matching_names, limit_int, include_blank_bucket=False):
+    """GROUP BY `field` over `matching_names` (non-empty) with resolved Link labels,
+    plus the optional "not set" bucket."""
+    facet_values = []
+
+    # Check if the field is a JSON field
+    is_json_field = field_meta.fieldtype == 'JSON' if field_meta else False
+
+    # Postgres rejects `column != ''` against non-text columns — comparing
+    # smallint/int/timestamp to '' raises `invalid input syntax`. Only emit
+    # the empty-string guard when the column actually stores text.
+    _NON_TEXT_FIELDTYPES = {
+        'Int', 'Float', 'Currency', 'Percent', 'Rating',
+        'Date', 'Datetime', 'Time', 'Duration', 'Check',
+    }
+    _STANDARD_NON_TEXT_FIELDS = {'docstatus', 'creation', 'modified'}
+    if is_standard_field:
+        field_is_text = field not in _STANDARD_NON_TEXT_FIELDS
+    elif field_meta:
+        field_is_text = field_meta.fieldtype not in _NON_TEXT_FIELDTYPES
+    else:
+        field_is_text = True
+
+    if child_doctype:
+        limit_clause = "LIMIT %(limit)s" if limit_int else ""
+        empty_check = f"AND `tab{child_doctype}`.`{field}` != ''" if field_is_text else ""
+        sql = f"""
+            SELECT `tab{child_doctype}`.`{field}` as value, COUNT(*) as count
+            FROM `tab{child_doctype}`
+            WHERE `tab{child_doctype}`.parent IN %(names)s
+              AND `tab{child_doctype}`.parenttype = %(parent_doctype)s
+              AND `tab{child_doctype}`.`{field}` IS NOT NULL
+              {empty_check}
+            GROUP BY `tab{child_doctype}`.`{field}`
+            ORDER BY count DESC, `tab{child_doctype}`.`{field}` ASC
+            {limit_clause}
+        """
+        params = {"names": tuple(matching_names), "parent_doctype": doctype}
+        if limit_int:
+            params["limit"] = limit_int
+        results = frappe.db.sql(sql, params, as_dict=True)
+    elif is_json_field:
+        # Special handling for JSON fields.
+        # Handles both top-level arrays and objects with a 'categories' key (standard in this app)
+        limit_clause = "LIMIT %(limit)s" if limit_int else ""
+        sql = f"""
+            SELECT value, COUNT(*) as count
+            FROM (
+                SELECT jsonb_array_elements_text(
+                    CASE
+                        WHEN jsonb_typeof("{field}"::jsonb) = 'array' THEN "{field}"::jsonb
+                        ELSE COALESCE("{field}"::jsonb->'categories', '[]'::jsonb)
+                    END
+                ) as value
+                FROM "tab{doctype}"
+                WHERE name IN %(names)s
+                AND "{field}" IS NOT NULL
+            ) as unnested
+            GROUP BY value
+            ORDER BY count DESC, value ASC
+            {limit_clause}
+        """
+        params = {"names": tuple(matching_names)}
+        if limit_int:
+            params["limit"] = limit_int
+        results = frappe.db.sql(sql, params, as_dict=True)
+    else:
+        limit_clause = "LIMIT %(limit)s" if limit_int else ""
+        empty_check = f"AND `{field}` != ''" if field_is_text else ""
+        sql = f"SELECT `{field}` as value, COUNT(*) as count FROM `tab{doctype}` WHERE name IN %(names)s AND `{field}` IS NOT NULL {empty_check} GROUP BY `{field}` ORDER BY count DESC, `{field}` ASC {limit_clause}"
+        params = {"names": tuple(matching_names)}
+        if limit_int:
+            params["limit"] = limit_int
+        results = frappe.db.sql(sql, params, as_dict=True)
+
+    # --- Resolve Link labels in ONE query, not per value (ADR-0010: a lookup over
+    # many rows resides in the DB, not a Python loop). Preserves the previous
+    # per-value behaviour exactly: an unresolved or empty label falls back to the
+    # raw value, and a Link whose title field is "name" is left unresolved.
+    _label_map = {}
+    _target_doctype = _label_field = None
+    if field in LINK_FIELD_MAP:
+        _target_doctype = LINK_FIELD_MAP[field]["doctype"]
+        _label_field = LINK_FIELD_MAP[field]["label_field"]
+    elif field_meta and field_meta.fieldtype == "Link":
+        try:
+            _title_field = frappe.get_meta(field_meta.options).get_title_field()
+            if _title_field and _title_field != "name":
+                _target_doctype = field_meta.options
+                _label_field = _title_field
+        except Exception:
+            pass
+    _values = [row.get("value") for row in results if row.get("value")]
+    if _target_doctype and _label_field and _values:
+        try:
+            _rows = frappe.db.sql(
+                f"SELECT name, `{_label_field}` AS label FROM `tab{_target_doctype}` WHERE name IN %(names)s",
+                {"names": tuple(_values)}, as_dict=True,
+            )
+            _label_map = {r["name"]: r["label"] for r in _rows}
+        except Exception:
+            traceback.print_exc()
+            _label_map = {}
+
+    for row in results:
+        value = row.get("value")
+        label = (_label_map.get(value) or value) if value else value
+        facet_values.append({"value": value, "label": label, "count": row.get("count", 0)})
+
+    # --- Optional "blank"/"not set" bucket (opt-in via include_blank_bucket) ---
+    # Every query branch above filters out NULL/'' values, so an unset row is
+    # invisible to the normal facet. This surfaces ONE sentinel option counting
+    # those rows (within the already-filtered `matching_names`), letting a user
+    # filter to "never linked". Only for text-storing, top-level (non-child,
+    # non-JSON) fields — the sentinel rewrite in utils.py handles the parent
+    # table only. The frontend supplies the human label; selecting it sends the
+    # sentinel back, which _process_filters_for_query rewrites to `is not set`.
+    if include_blank_bucket and field_is_text and not child_doctype and not is_json_field:
+        blank_sql = (
+            f"SELECT COUNT(*) FROM `tab{doctype}` "
+            f"WHERE name IN %(names)s AND (`{field}` IS NULL OR `{field}` = '')"
+        )
+        blank_count = cint(
+            (frappe.db.sql(blank_sql, {"names": tuple(matching_names)}, as_list=True) or [[0]])[0][0]
+        )
+        if blank_count > 0:
+            facet_values.append({
+                "value": NOT_SET_FACET_VALUE,
+                "label": NOT_SET_FACET_VALUE,
+                "count": blank_count,
+            })
+    # --- End blank bucket ---
+
+    return facet_values
+
+
+def _as_bool(value):
+    return (isinstance(value, str) and value.lower() == 'true') or value is True
+
+
 def get_facet_values_impl(
     doctype=None,
     field=None,
@@ -40,173 +401,17 @@ def get_facet_values_impl(
         if not frappe.has_permission(doctype, "read"): frappe.throw(_("Not permitted"), frappe.PermissionError)
         
         meta = frappe.get_meta(doctype)
-        field_meta = meta.get_field(field)
-        
-        # Standard Frappe fields that don't have explicit field_meta but are valid for facets
-        STANDARD_FIELDS = ['owner', 'modified_by', 'creation', 'modified', 'docstatus', 'name']
-        is_standard_field = field in STANDARD_FIELDS
-        
-        child_table_field_name = None
-        child_doctype = None
-        if not field_meta and not is_standard_field:
-            # Check child tables
-            for df in meta.get_table_fields():
-                child_meta = frappe.get_meta(df.options)
-                field_meta = child_meta.get_field(field)
-                if field_meta:
-                    child_table_field_name = df.fieldname
-                    child_doctype = df.options
-                    break
-        
-        if not field_meta and not is_standard_field: frappe.throw(_("Invalid field '{0}' for DocType '{1}'").format(field, doctype))
+        field_meta, is_standard_field, child_doctype = _resolve_facet_field(doctype, meta, field)
         
         raw_filters = _parse_filters_input(filters, doctype)
         # Filter out existing filters for the target field so we get all possible options
         # We handle both plain field names and prefixed ones (like 'DocType.fieldname')
-        filtered_filters = [f for f in raw_filters if not (
-            (len(f) == 3 and (f[0] == field or f[0].endswith(f".{field}"))) or 
-            (len(f) == 4 and (f[1] == field or f[1].endswith(f".{field}")))
-        )]
+        filtered_filters = [f for f in raw_filters if not _is_filter_on_field(f, field)]
         processed_filters = _process_filters_for_query(filtered_filters, doctype)
-        
-        if search_term and current_search_fields:
-            target_search_field = _parse_target_search_field(current_search_fields, doctype)
-
-            if target_search_field and target_search_field != field:
-                # If the search field is a child-table or JSON item field, do a
-                # separate sub-query for matching parents and append as a
-                # `name in [...]` filter. A plain LIKE on a relationship field
-                # crashes (e.g. `tabProcurement Requests.order_list does not
-                # exist`) because it isn't a real column on the parent table.
-                search_tokens = tokenize(search_term)
-                doctype_str = str(doctype)
-                is_child_table_field = (
-                    doctype_str in CHILD_TABLE_ITEM_SEARCH_MAP
-                    and target_search_field in CHILD_TABLE_ITEM_SEARCH_MAP[doctype_str]
-                )
-                is_json_field = (
-                    doctype_str in JSON_ITEM_SEARCH_DOCTYPE_MAP
-                    and JSON_ITEM_SEARCH_DOCTYPE_MAP[doctype_str]["json_field"] == target_search_field
-                )
-
-                if is_child_table_field and search_tokens:
-                    item_search_config = CHILD_TABLE_ITEM_SEARCH_MAP[doctype_str][target_search_field]
-                    child_doctype_name = str(item_search_config["child_doctype"])
-                    child_link_field = str(item_search_config["link_field_to_parent"])
-                    searchable_child_fields = list(item_search_config["searchable_child_fields"])
-                    # Drop short tokens from SQL filter (mirrors search.py).
-                    filter_tokens = [t for t in search_tokens if len(t) >= 1] or search_tokens
-                    # Scope the child sub-query to parents that already match
-                    # the other facet filters. Without this, `~*` falls back to
-                    # a sequential scan of the full child table on every request.
-                    candidate_parent_names = [
-                        doc.get("name") for doc in reportview_execute(
-                            doctype=doctype, filters=processed_filters,
-                            fields=["name"], limit_page_length=0,
-                        ) if doc.get("name")
-                    ]
-                    if not candidate_parent_names:
-                        processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
-                    else:
-                        # Token-OR (union) at PARENT level: a parent qualifies if any
-                        # of its rows matches any token. Matches search.py's behavior
-                        # so the facet panel agrees with the list.
-                        # Word-boundary regex: matches token only at start of a "word"
-                        # (after whitespace/hyphen/underscore/slash/paren/start-of-string).
-                        # Expand the OR clause across every (field × token) pair so
-                        # the union resolves in one round-trip instead of N.
-                        field_token_clauses = []
-                        regex_params = []
-                        for f in searchable_child_fields:
-                            for token in filter_tokens:
-                                field_token_clauses.append(f"`tab{child_doctype_name}`.`{f}` ~* %s")
-                                regex_params.append(r"(^|[\s\-_/()])" + re.escape(token))
-                        or_clause = " OR ".join(field_token_clauses)
-                        sql = (
-                            f"SELECT DISTINCT `tab{child_doctype_name}`.`{child_link_field}` "
-                            f"FROM `tab{child_doctype_name}` "
-                            f"WHERE `tab{child_doctype_name}`.`{child_link_field}` IN %s "
-                            f"AND `parenttype` = %s AND ({or_clause})"
-                        )
-                        union_set = {
-                            r[0] for r in frappe.db.sql(
-                                sql, (tuple(candidate_parent_names), doctype, *regex_params),
-                                as_list=True,
-                            ) if r and r[0]
-                        }
-                        item_matches = list(union_set)
-                        if item_matches:
-                            processed_filters.append([doctype, "name", "in", item_matches])
-                        else:
-                            processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
-                elif is_json_field and search_tokens:
-                    item_search_config = JSON_ITEM_SEARCH_DOCTYPE_MAP[doctype_str]
-                    json_field_name = item_search_config["json_field"]
-                    item_path_parts = item_search_config["item_path_parts"]
-                    item_name_key = item_search_config.get("item_name_key_in_json", "item")
-                    json_array_key = item_path_parts[0]
-                    # Drop short tokens from SQL filter (mirrors search.py).
-                    filter_tokens = [t for t in search_tokens if len(t) >= 2] or search_tokens
-                    # Scope the JSON sub-query to parents that already match
-                    # the other facet filters. Without this, the EXISTS clause
-                    # is evaluated against every row in the parent table.
-                    candidate_parent_names = [
-                        doc.get("name") for doc in reportview_execute(
-                            doctype=doctype, filters=processed_filters,
-                            fields=["name"], limit_page_length=0,
-                        ) if doc.get("name")
-                    ]
-                    if not candidate_parent_names:
-                        processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
-                    else:
-                        # Token-OR (union) at PARENT level — mirrors the search.py
-                        # JSON branch so facets agree with the list.
-                        # OR all token regex tests inside a single EXISTS so the
-                        # union resolves in one round-trip; EXISTS short-circuits
-                        # on the first matching JSON element per parent.
-                        token_conditions = []
-                        sql_params: dict = {"names_tuple": tuple(candidate_parent_names)}
-                        for i, token in enumerate(filter_tokens):
-                            key = f"token_{i}"
-                            token_conditions.append(f"item_obj->>'{item_name_key}' ~* %({key})s")
-                            sql_params[key] = r"(^|[\s\-_/()])" + re.escape(token)
-                        or_clause = " OR ".join(token_conditions)
-                        sql = (
-                            f"SELECT DISTINCT name FROM `tab{doctype_str}` "
-                            f"WHERE name IN %(names_tuple)s AND EXISTS("
-                            f"SELECT 1 FROM jsonb_array_elements("
-                            f"COALESCE(`tab{doctype_str}`.`{json_field_name}`::jsonb->'{json_array_key}','[]'::jsonb)"
-                            f") AS item_obj WHERE ({or_clause}))"
-                        )
-                        union_set = {
-                            r[0] for r in frappe.db.sql(sql, sql_params, as_list=True)
-                            if r and r[0]
-                        }
-                        item_matches = list(union_set)
-                        if item_matches:
-                            processed_filters.append([doctype, "name", "in", item_matches])
-                        else:
-                            processed_filters.append([doctype, "name", "=", "__NO_MATCH__"])
-                else:
-                    # Plain column field — original behavior
-                    for token in search_tokens:
-                        # A non-text field returns names rather than appending a filter.
-                        # Appending them as `name in` is safe HERE (and only here) because
-                        # `split_name_in_constraints` runs a few lines below and pulls the
-                        # set straight back out, so it never reaches the generated SQL.
-                        _name_matches = append_search_filter(
-                            doctype, target_search_field, token, processed_filters
-                        )
-                        if _name_matches is not None:
-                            processed_filters.append(
-                                [doctype, "name", "in", list(_name_matches) or ["__NO_MATCH__"]]
-                            )
+        _apply_search_filters(doctype, processed_filters, search_term, current_search_fields, field)
         
         # limit=0 means no limit, otherwise use the requested limit (no artificial cap)
         limit_int = cint(limit) if cint(limit) > 0 else None
-        require_pending_items_bool = (
-            isinstance(require_pending_items, str) and require_pending_items.lower() == 'true'
-        ) or require_pending_items is True
 
         # Pull any `name in [...]` narrowing (the JSON-facet filter injected by _process_filters_for_query,
         # or the child/JSON item-search sets appended above) OUT of the filter list so this enumeration never
@@ -215,183 +420,112 @@ def get_facet_values_impl(
         _plain_filters, _name_constraint = split_name_in_constraints(processed_filters)
         matching_names = enumerate_matching_names(doctype, _plain_filters, _name_constraint)
         
-        # --- Apply require_pending_items filter ---
-        if require_pending_items_bool and matching_names:
-            if doctype in CHILD_TABLE_ITEM_SEARCH_MAP:
-                # Use first available child table config (e.g., "order_list")
-                child_table_key = next(iter(CHILD_TABLE_ITEM_SEARCH_MAP[doctype]))
-                search_config = CHILD_TABLE_ITEM_SEARCH_MAP[doctype][child_table_key]
-                child_status_field = search_config.get("status_field")
-                if child_status_field:
-                    child_doctype_name = search_config["child_doctype"]
-                    child_link_field = search_config["link_field_to_parent"]
-                    sql = (
-                        f"SELECT DISTINCT `tab{child_doctype_name}`.`{child_link_field}` "
-                        f"FROM `tab{child_doctype_name}` "
-                        f"WHERE `{child_link_field}` IN %(names_tuple)s "
-                        f"AND `parenttype` = %(parent_doctype)s "
-                        f"AND `{child_status_field}` = 'Pending'"
-                    )
-                    sql_params = {"names_tuple": tuple(matching_names), "parent_doctype": doctype}
-                    matching_names = [
-                        r[0] for r in frappe.db.sql(sql, sql_params, as_list=True) if r and r[0]
-                    ]
-            elif doctype in JSON_ITEM_SEARCH_DOCTYPE_MAP:
-                search_config = JSON_ITEM_SEARCH_DOCTYPE_MAP[doctype]
-                json_field_name = search_config["json_field"]
-                item_path_parts = search_config["item_path_parts"]
-                json_array_key = item_path_parts[0]
-                json_pending_sql = (
-                    f"SELECT DISTINCT name FROM `tab{doctype}` "
-                    f"WHERE name IN %(names_tuple)s AND "
-                    f"EXISTS(SELECT 1 FROM jsonb_array_elements("
-                    f"COALESCE(`tab{doctype}`.`{json_field_name}`::jsonb->'{json_array_key}','[]'::jsonb)"
-                    f") AS item_obj WHERE item_obj->>'status' = 'Pending')"
-                )
-                matching_names = [
-                    r[0] for r in frappe.db.sql(json_pending_sql, {"names_tuple": tuple(matching_names)}, as_list=True) if r and r[0]
-                ]
-        # --- End require_pending_items filter ---
+        if _as_bool(require_pending_items) and matching_names:
+            matching_names = _filter_pending_names(doctype, matching_names)
 
         if not matching_names:
             return {"values": []}
+
+        return {"values": _facet_buckets(
+            doctype, field, field_meta, is_standard_field, child_doctype,
+            matching_names, limit_int, _as_bool(include_blank_bucket),
+        )}
         
-        facet_values = []
+    except Exception as e:
+        traceback.print_exc()
+        frappe.throw(_("An error occurred while fetching facet values: {0}").format(str(e)))
 
-        # Check if the field is a JSON field
-        is_json_field = field_meta.fieldtype == 'JSON' if field_meta else False
 
-        # Postgres rejects `column != ''` against non-text columns — comparing
-        # smallint/int/timestamp to '' raises `invalid input syntax`. Only emit
-        # the empty-string guard when the column actually stores text.
-        _NON_TEXT_FIELDTYPES = {
-            'Int', 'Float', 'Currency', 'Percent', 'Rating',
-            'Date', 'Datetime', 'Time', 'Duration', 'Check',
-        }
-        _STANDARD_NON_TEXT_FIELDS = {'docstatus', 'creation', 'modified'}
-        if is_standard_field:
-            field_is_text = field not in _STANDARD_NON_TEXT_FIELDS
-        elif field_meta:
-            field_is_text = field_meta.fieldtype not in _NON_TEXT_FIELDTYPES
-        else:
-            field_is_text = True
-
-        if child_doctype:
-            limit_clause = "LIMIT %(limit)s" if limit_int else ""
-            empty_check = f"AND `tab{child_doctype}`.`{field}` != ''" if field_is_text else ""
-            sql = f"""
-                SELECT `tab{child_doctype}`.`{field}` as value, COUNT(*) as count
-                FROM `tab{child_doctype}`
-                WHERE `tab{child_doctype}`.parent IN %(names)s
-                  AND `tab{child_doctype}`.parenttype = %(parent_doctype)s
-                  AND `tab{child_doctype}`.`{field}` IS NOT NULL
-                  {empty_check}
-                GROUP BY `tab{child_doctype}`.`{field}`
-                ORDER BY count DESC, `tab{child_doctype}`.`{field}` ASC
-                {limit_clause}
-            """
-            params = {"names": tuple(matching_names), "parent_doctype": doctype}
-            if limit_int:
-                params["limit"] = limit_int
-            results = frappe.db.sql(sql, params, as_dict=True)
-        elif is_json_field:
-            # Special handling for JSON fields.
-            # Handles both top-level arrays and objects with a 'categories' key (standard in this app)
-            limit_clause = "LIMIT %(limit)s" if limit_int else ""
-            sql = f"""
-                SELECT value, COUNT(*) as count
-                FROM (
-                    SELECT jsonb_array_elements_text(
-                        CASE
-                            WHEN jsonb_typeof("{field}"::jsonb) = 'array' THEN "{field}"::jsonb
-                            ELSE COALESCE("{field}"::jsonb->'categories', '[]'::jsonb)
-                        END
-                    ) as value
-                    FROM "tab{doctype}"
-                    WHERE name IN %(names)s
-                    AND "{field}" IS NOT NULL
-                ) as unnested
-                GROUP BY value
-                ORDER BY count DESC, value ASC
-                {limit_clause}
-            """
-            params = {"names": tuple(matching_names)}
-            if limit_int:
-                params["limit"] = limit_int
-            results = frappe.db.sql(sql, params, as_dict=True)
-        else:
-            limit_clause = "LIMIT %(limit)s" if limit_int else ""
-            empty_check = f"AND `{field}` != ''" if field_is_text else ""
-            sql = f"SELECT `{field}` as value, COUNT(*) as count FROM `tab{doctype}` WHERE name IN %(names)s AND `{field}` IS NOT NULL {empty_check} GROUP BY `{field}` ORDER BY count DESC, `{field}` ASC {limit_clause}"
-            params = {"names": tuple(matching_names)}
-            if limit_int:
-                params["limit"] = limit_int
-            results = frappe.db.sql(sql, params, as_dict=True)
-        
-        # --- Resolve Link labels in ONE query, not per value (ADR-0010: a lookup over
-        # many rows resides in the DB, not a Python loop). Preserves the previous
-        # per-value behaviour exactly: an unresolved or empty label falls back to the
-        # raw value, and a Link whose title field is "name" is left unresolved.
-        _label_map = {}
-        _target_doctype = _label_field = None
-        if field in LINK_FIELD_MAP:
-            _target_doctype = LINK_FIELD_MAP[field]["doctype"]
-            _label_field = LINK_FIELD_MAP[field]["label_field"]
-        elif field_meta and field_meta.fieldtype == "Link":
-            try:
-                _title_field = frappe.get_meta(field_meta.options).get_title_field()
-                if _title_field and _title_field != "name":
-                    _target_doctype = field_meta.options
-                    _label_field = _title_field
-            except Exception:
-                pass
-        _values = [row.get("value") for row in results if row.get("value")]
-        if _target_doctype and _label_field and _values:
+def _matching_name_set(doctype, processed_filters):
+    # Same sqlparse-safe enumeration as get_facet_values_impl: `name in` sets become a constraint.
+    _plain_filters, _name_constraint = split_name_in_constraints(processed_filters)
+    return set(enumerate_matching_names(doctype, _plain_filters, _name_constraint))
+
+
+def get_facet_values_multi_impl(
+    doctype=None,
+    fields=None,
+    filters=None,
+    search_term=None,
+    current_search_fields=None,
+    limit=100,
+    require_pending_items=False,
+    include_blank_bucket=False
+):
+    """Every facet of a list in one call: {field: {"values": [...]}}.
+
+    Returns exactly what one `get_facet_values_impl` call per field would, but the
+    filters are parsed and the parent set enumerated ONCE instead of once per facet.
+    The filters split into a base group (on none of the requested fields) and one
+    group per facet field. The base set (search applied) and each group's set are
+    evaluated once; facet F's parents are then the base set intersected with every
+    OTHER group's set, so F still ignores its own filter. Buckets and Link labels
+    come from the same `_facet_buckets` as the single-facet path.
+    """
+    try:
+        if not frappe.db.exists("DocType", doctype): frappe.throw(_("Invalid DocType: {0}").format(doctype))
+        if not frappe.has_permission(doctype, "read"): frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+        if isinstance(fields, str):
             try:
-                _rows = frappe.db.sql(
-                    f"SELECT name, `{_label_field}` AS label FROM `tab{_target_doctype}` WHERE name IN %(names)s",
-                    {"names": tuple(_values)}, as_dict=True,
-                )
-                _label_map = {r["name"]: r["label"] for r in _rows}
-            except Exception:
-                traceback.print_exc()
-                _label_map = {}
-
-        for row in results:
-            value = row.get("value")
-            label = (_label_map.get(value) or value) if value else value
-            facet_values.append({"value": value, "label": label, "count": row.get("count", 0)})
-
-        # --- Optional "blank"/"not set" bucket (opt-in via include_blank_bucket) ---
-        # Every query branch above filters out NULL/'' values, so an unset row is
-        # invisible to the normal facet. This surfaces ONE sentinel option counting
-        # those rows (within the already-filtered `matching_names`), letting a user
-        # filter to "never linked". Only for text-storing, top-level (non-child,
-        # non-JSON) fields — the sentinel rewrite in utils.py handles the parent
-        # table only. The frontend supplies the human label; selecting it sends the
-        # sentinel back, which _process_filters_for_query rewrites to `is not set`.
-        include_blank_bucket_bool = (
-            isinstance(include_blank_bucket, str) and include_blank_bucket.lower() == 'true'
-        ) or include_blank_bucket is True
-
-        if include_blank_bucket_bool and field_is_text and not child_doctype and not is_json_field and matching_names:
-            blank_sql = (
-                f"SELECT COUNT(*) FROM `tab{doctype}` "
-                f"WHERE name IN %(names)s AND (`{field}` IS NULL OR `{field}` = '')"
-            )
-            blank_count = cint(
-                (frappe.db.sql(blank_sql, {"names": tuple(matching_names)}, as_list=True) or [[0]])[0][0]
-            )
-            if blank_count > 0:
-                facet_values.append({
-                    "value": NOT_SET_FACET_VALUE,
-                    "label": NOT_SET_FACET_VALUE,
-                    "count": blank_count,
-                })
-        # --- End blank bucket ---
-
-        return {"values": facet_values}
-        
+                fields = json.loads(fields)
+            except ValueError:
+                fields = [fields]
+        fields = list(dict.fromkeys(f for f in (fields or []) if f))
+        if not fields:
+            return {}
+
+        meta = frappe.get_meta(doctype)
+        resolved = {field: _resolve_facet_field(doctype, meta, field) for field in fields}
+
+        raw_filters = _parse_filters_input(filters, doctype)
+        own_filters = {field: [f for f in raw_filters if _is_filter_on_field(f, field)] for field in fields}
+        base_filters = _process_filters_for_query(
+            [f for f in raw_filters if not any(_is_filter_on_field(f, field) for field in fields)], doctype
+        )
+
+        searched_filters = list(base_filters)
+        _apply_search_filters(doctype, searched_filters, search_term, current_search_fields)
+        base_names = _matching_name_set(doctype, searched_filters)
+
+        # The facet on the searched column itself skips the search (see _apply_search_filters).
+        target_search_field = (
+            _parse_target_search_field(current_search_fields, doctype)
+            if search_term and current_search_fields else None
+        )
+        unsearched_names = (
+            _matching_name_set(doctype, base_filters) if target_search_field in resolved else None
+        )
+
+        # One evaluation per facet field that actually carries a filter, scoped by the base filters.
+        group_names = {
+            field: _matching_name_set(doctype, base_filters + _process_filters_for_query(group, doctype))
+            for field, group in own_filters.items() if group
+        }
+
+        if _as_bool(require_pending_items):
+            if base_names:
+                base_names = set(_filter_pending_names(doctype, list(base_names)))
+            if unsearched_names:
+                unsearched_names = set(_filter_pending_names(doctype, list(unsearched_names)))
+
+        limit_int = cint(limit) if cint(limit) > 0 else None
+        include_blank = _as_bool(include_blank_bucket)
+
+        result = {}
+        for field in fields:
+            names = unsearched_names if field == target_search_field else base_names
+            for other, other_names in group_names.items():
+                if other != field:
+                    names = names & other_names
+            field_meta, is_standard_field, child_doctype = resolved[field]
+            values = _facet_buckets(
+                doctype, field, field_meta, is_standard_field, child_doctype,
+                list(names), limit_int, include_blank,
+            ) if names else []
+            result[field] = {"values": values}
+        return result
+
     except Exception as e:
         traceback.print_exc()
         frappe.throw(_("An error occurred while fetching facet values: {0}").format(str(e)))
@@ -0,0 +1,242 @@
+"""
+Word-prefix token index for "Item in X" list searches.
+
+The item search in search.py / facets.py asks "which parents have a child row
+where some word of item_name / item_id STARTS WITH one of the query tokens?".
+Answered with `~* '(^|[\\s\\-_/()])token'` that is a regex scan of every child
+row of every candidate parent. The `Item Search Token` table answers it from an
+index instead: one row per (parent, child row, field, word), the word lowercased
+and cut with the SAME separators as `token_search.tokenize`, so
+
+    regex word-prefix match of token t  <=>  some indexed word LIKE 't%'
+
+holds exactly, and `_find_word_prefix`'s position is the smallest `char_pos`
+among those words. That equivalence is what lets `rank_parents` compute
+`token_search.rank_parents_by_token_score`'s scores in SQL.
+
+Maintenance:
+  * `on_parent_update` / `on_parent_trash` (hooks.py doc_events) rebuild or drop
+    a parent's rows on every save / delete of the doctypes in
+    CHILD_TABLE_ITEM_SEARCH_MAP.
+  * `rebuild_item_search_index` is the backfill (patch) and the nightly
+    correctness backstop for child rows written without a parent save
+    (`frappe.db.set_value` on a child row). It flips INDEX_READY_KEY; until then
+    `is_ready()` is False and every caller keeps the regex path.
+"""
+
+import re
+
+import frappe
+from frappe.utils import now
+
+from .constants import CHILD_TABLE_ITEM_SEARCH_MAP
+
+INDEX_DOCTYPE = "Item Search Token"
+INDEX_READY_KEY = "item_search_index_ready"
+REBUILD_CHUNK = 500
+
+# Complement of token_search._TOKEN_SEPARATOR: a "word" starts at 0 or right after a separator,
+# which is exactly where the search regex's `(^|[\s\-_/()])` boundary lets a token begin.
+_WORD = re.compile(r"[^\s\-_/()]+")
+_INSERT_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by",
+    "ref_doctype", "ref_name", "search_field", "child_row", "source_field", "token", "char_pos",
+)
+
+
+def is_ready() -> bool:
+    return bool(frappe.db.get_global(INDEX_READY_KEY))
+
+
+def is_indexed(doctype: str, search_field: str) -> bool:
+    return search_field in CHILD_TABLE_ITEM_SEARCH_MAP.get(str(doctype), {})
+
+
+def word_positions(value) -> list[tuple[str, int]]:
+    """(word, char offset) for every word of the lowercased value."""
+    text = str(value or "").lower()
+    return [(m.group(0), m.start()) for m in _WORD.finditer(text)]
+
+
+def _like_prefix(token: str) -> str:
+    escaped = token.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def index_rows(doctype: str, parent_name: str, child_rows_by_field: dict) -> list[tuple]:
+    """Index tuples (search_field, child_row, source_field, word, char_pos) for one parent.
+
+    child_rows_by_field: {search_field: [row dicts carrying `name` + the searchable fields]}.
+    """
+    out = []
+    for search_field, rows in child_rows_by_field.items():
+        fields = CHILD_TABLE_ITEM_SEARCH_MAP[doctype][search_field]["searchable_child_fields"]
+        for row in rows:
+            for source_field in fields:
+                for word, pos in word_positions(row.get(source_field)):
+                    out.append((search_field, row.get("name"), source_field, word, pos))
+    return out
+
+
+def _write(doctype: str, rows_by_parent: dict) -> None:
+    """Replace the index rows of every parent in rows_by_parent (delete + bulk insert)."""
+    names = list(rows_by_parent)
+    if not names:
+        return
+    frappe.db.sql(
+        f"DELETE FROM `tab{INDEX_DOCTYPE}` WHERE ref_doctype = %s AND ref_name IN %s",
+        (doctype, tuple(names)),
+    )
+    stamp, user = now(), frappe.session.user
+    values = [
+        (frappe.generate_hash(length=12), stamp, stamp, user, user, doctype, parent, *row)
+        for parent, rows in rows_by_parent.items()
+        for row in rows
+    ]
+    if values:
+        frappe.db.bulk_insert(INDEX_DOCTYPE, _INSERT_FIELDS, values)
+
+
+def on_parent_update(doc, method=None):
+    config = CHILD_TABLE_ITEM_SEARCH_MAP.get(doc.doctype)
+    if not config:
+        return
+    child_rows = {
+        search_field: [
+            {"name": row.name, **{f: row.get(f) for f in cfg["searchable_child_fields"]}}
+            for row in (doc.get(search_field) or [])
+        ]
+        for search_field, cfg in config.items()
+    }
+    _write(doc.doctype, {doc.name: index_rows(doc.doctype, doc.name, child_rows)})
+
+
+def on_parent_trash(doc, method=None):
+    if doc.doctype in CHILD_TABLE_ITEM_SEARCH_MAP:
+        frappe.db.delete(INDEX_DOCTYPE, {"ref_doctype": doc.doctype, "ref_name": doc.name})
+
+
+def rebuild_item_search_index(doctypes=None):
+    """Re-derive the whole index from the child tables, REBUILD_CHUNK parents per commit.
+
+    Idempotent; daily scheduler entry and the backfill patch. Parents without child rows
+    are cleared too (their rows are deleted and nothing is inserted).
+    """
+    for doctype in doctypes or list(CHILD_TABLE_ITEM_SEARCH_MAP):
+        config = CHILD_TABLE_ITEM_SEARCH_MAP[doctype]
+        parents = frappe.get_all(doctype, pluck="name", order_by="name asc")
+        for start in range(0, len(parents), REBUILD_CHUNK):
+            chunk = parents[start:start + REBUILD_CHUNK]
+            child_rows = {name: {} for name in chunk}
+            for search_field, cfg in config.items():
+                for row in frappe.get_all(
+                    cfg["child_doctype"],
+                    filters={
+                        cfg["link_field_to_parent"]: ["in", chunk],
+                        "parenttype": doctype,
+                        "parentfield": search_field,
+                    },
+                    fields=["name", cfg["link_field_to_parent"], *cfg["searchable_child_fields"]],
+                    limit_page_length=0,
+                ):
+                    parent = row.get(cfg["link_field_to_parent"])
+                    child_rows[parent].setdefault(search_field, []).append(row)
+            _write(doctype, {name: index_rows(doctype, name, rows) for name, rows in child_rows.items()})
+            frappe.db.commit()
+        # Parents deleted outside on_trash (raw SQL) leave orphans; sweep them.
+        frappe.db.sql(
+            f"""DELETE FROM `tab{INDEX_DOCTYPE}` t WHERE t.ref_doctype = %s
+                AND NOT EXISTS (SELECT 1 FROM `tab{doctype}` p WHERE p.name = t.ref_name)""",
+            (doctype,),
+        )
+        frappe.db.commit()
+    frappe.db.set_global(INDEX_READY_KEY, 1)
+    frappe.db.commit()
+
+
+def matching_parents(doctype, search_field, tokens, pending_status_field=None) -> set:
+    """Parents with at least one child row having a word that starts with ANY token (token-OR,
+    as in search.py). `pending_status_field` additionally requires that row to be Pending."""
+    if not tokens:
+        return set()
+    likes = " OR ".join(["t.token LIKE %s"] * len(tokens))
+    params = [doctype, search_field, *[_like_prefix(tok) for tok in tokens]]
+    pending_join = ""
+    if pending_status_field:
+        child_doctype = CHILD_TABLE_ITEM_SEARCH_MAP[doctype][search_field]["child_doctype"]
+        pending_join = (
+            f"JOIN `tab{child_doctype}` c ON c.name = t.child_row "
+            f"AND c.`{pending_status_field}` = 'Pending'"
+        )
+    rows = frappe.db.sql(
+        f"""SELECT DISTINCT t.ref_name FROM `tab{INDEX_DOCTYPE}` t {pending_join}
+            WHERE t.ref_doctype = %s AND t.search_field = %s AND ({likes})""",
+        tuple(params),
+    )
+    return {r[0] for r in rows}
+
+
+def rank_parents(doctype, search_field, parent_names, tokens) -> list:
+    """`token_search.rank_parents_by_token_score` with the scoring done in SQL over the index.
+
+    Same keys in the same order: parent token coverage, then the score of the parent's best
+    row (best = full match, then matched-token count, then score), then input order. Row
+    score = sum over fields of (matched/n * 1000 + 100 / (avg first-position + 1)) * weight,
+    x1.5 on a full match; the first searchable field weighs 2.0 (as in search.py). Only the
+    final sort of the (at most TOKEN_SCORE_MAX_CANDIDATES) parents happens here.
+    """
+    if not tokens or not parent_names:
+        return list(parent_names)
+    primary_field = CHILD_TABLE_ITEM_SEARCH_MAP[doctype][search_field]["searchable_child_fields"][0]
+    params = {
+        "doctype": doctype,
+        "search_field": search_field,
+        "parents": tuple(parent_names),
+        "n": len(tokens),
+        "primary_field": primary_field,
+    }
+    # Query tokens keep their position (a repeated token counts twice, as in the Python ranker).
+    # A VALUES list, not unnest(array): Frappe's Postgres layer turns list params into tuples.
+    q_rows = []
+    for i, tok in enumerate(tokens):
+        params[f"pat_{i}"] = _like_prefix(tok)
+        q_rows.append(f"(%(pat_{i})s, {i})")
+    scored = frappe.db.sql(
+        f"""
+        WITH q(pat, idx) AS (VALUES {", ".join(q_rows)}),
+        hits AS (
+            SELECT t.ref_name, t.child_row, t.source_field, q.idx, MIN(t.char_pos) AS pos
+            FROM `tab{INDEX_DOCTYPE}` t JOIN q ON t.token LIKE q.pat
+            WHERE t.ref_doctype = %(doctype)s AND t.search_field = %(search_field)s
+              AND t.ref_name IN %(parents)s
+            GROUP BY t.ref_name, t.child_row, t.source_field, q.idx
+        ), field_scores AS (
+            SELECT ref_name, child_row,
+                   (COUNT(*)::float / %(n)s * 1000 + 100.0 / (AVG(pos) + 1))
+                   * CASE WHEN source_field = %(primary_field)s THEN 2.0 ELSE 1.0 END AS score
+            FROM hits GROUP BY ref_name, child_row, source_field
+        ), row_scores AS (
+            SELECT f.ref_name, c.matched,
+                   SUM(f.score) * CASE WHEN c.matched = %(n)s THEN 1.5 ELSE 1.0 END AS score
+            FROM field_scores f
+            JOIN (SELECT ref_name, child_row, COUNT(DISTINCT idx) AS matched
+                  FROM hits GROUP BY ref_name, child_row) c USING (ref_name, child_row)
+            GROUP BY f.ref_name, f.child_row, c.matched
+        ), best AS (
+            SELECT DISTINCT ON (ref_name) ref_name, score
+            FROM row_scores ORDER BY ref_name, matched DESC, score DESC
+        )
+        SELECT b.ref_name, cv.covered, b.score
+        FROM best b
+        JOIN (SELECT ref_name, COUNT(DISTINCT idx) AS covered FROM hits GROUP BY ref_name) cv
+          USING (ref_name)
+        """,
+        params,
+    )
+    keys = {name: (int(covered), float(score)) for name, covered, score in scored}
+    order = {name: i for i, name in enumerate(parent_names)}
+    return sorted(
+        parent_names,
+        key=lambda name: (*keys.get(name, (0, 0.0)), -order[name]),
+        reverse=True,
+    )
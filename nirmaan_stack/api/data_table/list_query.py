@@ -0,0 +1,279 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Shared SQL list builder for custom ``useServerDataTable`` endpoints.
+
+An endpoint describes its query once as a ``ListSpec``: the FROM clause, the select
+list, and whitelists mapping the field names the frontend sends to SQL expressions.
+``run_list_query`` turns the standard request (filters / search_term / order_by /
+limit_start / limit_page_length / for_export) into one page plus the count and
+returns the usual envelope::
+
+    {"data": [...], "total_count": int, "aggregates": {}, "group_by_result": [],
+     "next_cursor": str | None}
+
+Keyset paging
+-------------
+Every order is made total by a unique tiebreak column (``spec.tiebreak``), so a page
+ends at a well-defined (sort value, tiebreak) pair. ``next_cursor`` encodes that pair
+with a digest of the filters, order and offset it belongs to. A request passing it
+back as ``cursor`` for exactly that query and offset seeks past the pair with a row
+comparison instead of OFFSET, so page N costs the same as page 1. Anything else -- no
+cursor, a page jump, a changed filter or sort, a tampered token, or a NULL sort
+value -- falls back to OFFSET, which returns the same rows.
+
+Every ``order_fields`` key must also be a column of the select list, because the
+cursor reads the sort value back from the last row.
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+import frappe
+from frappe.utils import cint
+
+from .constants import DEFAULT_PAGE_LENGTH, EXPORT_MAX_PAGE_LENGTH, MAX_PAGE_LENGTH
+
+
+@dataclass
+class ListSpec:
+    from_sql: str  # FROM ... JOIN ..., aliases referenced by every expression below
+    select_sql: str  # the select list; must carry `tiebreak_field` and every order_fields key
+    filter_fields: dict[str, str]  # request field -> SQL expression
+    order_fields: dict[str, str]  # request field -> SQL expression (no aliases: used in WHERE)
+    default_order: tuple[str, str]  # (order_fields key, "ASC" | "DESC")
+    tiebreak: str  # unique, non-null SQL expression, e.g. "w.name"
+    tiebreak_field: str = "name"  # its column in the select list
+    search_exprs: tuple[str, ...] = ()  # each search token must ILIKE-match one of these
+    conditions: tuple[str, ...] = field(default_factory=tuple)  # always applied
+
+
+def run_list_query(
+    spec: ListSpec,
+    filters: Any = None,
+    order_by: str | None = None,
+    limit_start: int | str = 0,
+    limit_page_length: int | str | None = None,
+    search_term: str | None = None,
+    for_export: bool | str = False,
+    cursor: str | None = None,
+) -> dict:
+    """One page of `spec` in the ``useServerDataTable`` envelope (see module docstring)."""
+    for_export = to_bool(for_export)
+    start = max(cint(limit_start), 0)
+    if for_export and cint(limit_page_length or 0) == 0:
+        page_length = EXPORT_MAX_PAGE_LENGTH
+    else:
+        page_length = min(
+            cint(limit_page_length or DEFAULT_PAGE_LENGTH),
+            EXPORT_MAX_PAGE_LENGTH if for_export else MAX_PAGE_LENGTH,
+        )
+
+    conditions, values = build_conditions(spec, filters, search_term)
+    order_key, direction = order_for(spec, order_by)
+    order_expr = spec.order_fields[order_key]
+    where_clause = " AND ".join(conditions)
+
+    query_key = _query_key(where_clause, values, order_key, direction, start)
+    seek = _decode_cursor(cursor, query_key)
+    page_conditions = list(conditions)
+    if seek:
+        comparison = "<" if direction == "DESC" else ">"
+        keyset = f"({order_expr}, {spec.tiebreak}) {comparison} (%(_k_value)s, %(_k_tiebreak)s)"
+        if direction == "ASC":
+            # ASC sorts NULLs last; they follow every non-NULL value the cursor can hold.
+            keyset = f"({keyset} OR {order_expr} IS NULL)"
+        page_conditions.append(keyset)
+        values["_k_value"], values["_k_tiebreak"] = seek
+
+    data = frappe.db.sql(
+        f"""
+        SELECT {spec.select_sql}
+        {spec.from_sql}
+        WHERE {" AND ".join(page_conditions)}
+        ORDER BY {order_expr} {direction}, {spec.tiebreak} {direction}
+        LIMIT %(_limit)s{"" if seek else " OFFSET %(_offset)s"}
+        """,
+        {**values, "_limit": page_length, "_offset": start},
+        as_dict=True,
+    )
+    total_count = frappe.db.sql(
+        f"SELECT COUNT(*) {spec.from_sql} WHERE {where_clause}",
+        values,
+    )[0][0]
+
+    next_cursor = None
+    if len(data) == page_length:
+        last = data[-1]
+        next_cursor = _encode_cursor(
+            _query_key(where_clause, values, order_key, direction, start + page_length),
+            last.get(order_key), last.get(spec.tiebreak_field),
+        )
+    return {
+        "data": data,
+        "total_count": total_count,
+        "aggregates": {},
+        "group_by_result": [],
+        "next_cursor": next_cursor,
+    }
+
+
+def build_conditions(spec: ListSpec, filters: Any, search_term: str | None) -> tuple[list[str], dict[str, Any]]:
+    """WHERE conditions and their values for the request's filters and search term."""
+    conditions: list[str] = ["1=1", *spec.conditions]
+    values: dict[str, Any] = {}
+
+    for idx, (fieldname, operator, value) in enumerate(parse_filters(filters)):
+        sql_expr = spec.filter_fields.get(fieldname)
+        if not sql_expr:
+            continue
+
+        op = (operator or "=").lower()
+        value_key = f"f_{idx}"
+
+        if op == "in":
+            if not isinstance(value, (list, tuple)) or len(value) == 0:
+                continue
+            conditions.append(f"{sql_expr} IN %({value_key})s")
+            values[value_key] = tuple(value)
+        elif op == "not in":
+            if not isinstance(value, (list, tuple)) or len(value) == 0:
+                continue
+            conditions.append(f"{sql_expr} NOT IN %({value_key})s")
+            values[value_key] = tuple(value)
+        elif op == "like":
+            conditions.append(f"{sql_expr} ILIKE %({value_key})s")
+            values[value_key] = value if (isinstance(value, str) and "%" in value) else f"%{value}%"
+        elif op in ("=", "!=", ">", ">=", "<", "<="):
+            conditions.append(f"{sql_expr} {op} %({value_key})s")
+            values[value_key] = value
+        elif op == "is":
+            if str(value).lower() in ("set",):
+                conditions.append(f"{sql_expr} IS NOT NULL AND {sql_expr} != ''")
+            else:
+                conditions.append(f"({sql_expr} IS NULL OR {sql_expr} = '')")
+        else:
+            conditions.append(f"{sql_expr} = %({value_key})s")
+            values[value_key] = value
+
+    if spec.search_exprs and search_term and isinstance(search_term, str) and search_term.strip():
+        for t_idx, token in enumerate(search_term.strip().split()):
+            token_key = f"s_{t_idx}"
+            conditions.append(
+                "(" + " OR ".join(f"{expr} ILIKE %({token_key})s" for expr in spec.search_exprs) + ")"
+            )
+            values[token_key] = f"%{token}%"
+
+    return conditions, values
+
+
+def order_for(spec: ListSpec, order_by: str | None) -> tuple[str, str]:
+    """(order_fields key, direction) for ``"<field> [asc|desc]"``, else the default.
+    A recognised field without a direction sorts the default's way."""
+    default_key, default_direction = spec.default_order
+    parts = order_by.strip().split() if isinstance(order_by, str) else []
+    if not parts:
+        return default_key, default_direction
+
+    field_raw = parts[0].strip("`")
+    if "." in field_raw:
+        field_raw = field_raw.rsplit(".", 1)[-1].strip("`")
+    if field_raw not in spec.order_fields:
+        return default_key, default_direction
+
+    direction = default_direction
+    if len(parts) > 1 and parts[1].strip(",").upper() in ("ASC", "DESC"):
+        direction = parts[1].strip(",").upper()
+    return field_raw, direction
+
+
+def to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    if isinstance(value, (int, float)):
+        return bool(value)
+    return False
+
+
+def parse_filters(filters: Any) -> list[tuple[str, str, Any]]:
+    """Parse the filter envelope into ``(field, operator, value)`` tuples.
+
+    Accepts the same shapes as ``get_itms_list._parse_filters``.
+    """
+    if not filters:
+        return []
+
+    parsed: Any = filters
+    if isinstance(filters, str):
+        try:
+            parsed = json.loads(filters)
+        except (json.JSONDecodeError, ValueError):
+            return []
+
+    if not isinstance(parsed, list):
+        return []
+
+    result: list[tuple[str, str, Any]] = []
+    for item in parsed:
+        if isinstance(item, list):
+            if len(item) == 3:
+                fieldname, op, value = item[0], item[1], item[2]
+            elif len(item) == 4:
+                if isinstance(item[0], str) and frappe.db.exists("DocType", item[0]):
+                    fieldname, op, value = item[1], item[2], item[3]
+                else:
+                    fieldname, op, value = item[0], item[1], item[2]
+            else:
+                continue
+            if isinstance(fieldname, str) and fieldname.strip():
+                result.append((fieldname.strip(), str(op or "=").strip(), value))
+        elif isinstance(item, dict) and "id" in item and "value" in item:
+            fieldname = item["id"]
+            raw = item["value"]
+            if isinstance(raw, list):
+                if len(raw) > 0:
+                    result.append((fieldname, "in", raw))
+            elif isinstance(raw, dict) and "operator" in raw and "value" in raw:
+                result.append((fieldname, raw["operator"], raw["value"]))
+            elif isinstance(raw, str):
+                if raw.strip():
+                    result.append((fieldname, "like", raw))
+            else:
+                result.append((fieldname, "=", raw))
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Cursor tokens
+# ---------------------------------------------------------------------------
+
+
+def _query_key(where_clause, values, order_key, direction, offset) -> str:
+    """Digest of everything a cursor is only valid for: filters, search, order, offset."""
+    payload = json.dumps([where_clause, values, order_key, direction, offset], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def _encode_cursor(query_key, value, tiebreak) -> str | None:
+    if value is None or tiebreak is None:
+        return None  # a NULL can't be compared past; the next page uses OFFSET
+    payload = json.dumps([query_key, value, tiebreak], default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor, query_key):
+    """(value, tiebreak) when `cursor` was issued for exactly this query and offset."""
+    if not cursor or not isinstance(cursor, str):
+        return None
+    try:
+        key, value, tiebreak = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None
+    if key != query_key or value is None or tiebreak is None:
+        return None
+    return value, tiebreak
@@ -2,6 +2,7 @@ import frappe
 from frappe import _
 from frappe.utils import cint, create_batch
 from frappe.desk.reportview import execute as reportview_execute
+from frappe.model import default_fields, no_value_fields
 import json
 import hashlib
 import re
@@ -20,6 +21,8 @@ from .utils import (
 )
 from .aggregations import get_aggregates, get_group_by_results
 from .token_search import rank_parents_by_token_score, tokenize
+from . import item_index
+from nirmaan_stack.services.name_set import get_all_in, in_key_set, key_set_json
 
 # Size of the relevance-ranked "head" of the result list. The first N parents
 # (taken in modified-desc order, the order the SQL filter returned) get
@@ -34,23 +37,46 @@ TOKEN_SCORE_MAX_CANDIDATES = 1000
 # Max names per `name IN (...)` chunk when hydrating a page of rows via reportview. Kept well under the
 # sqlparse 10,000-token cap that Frappe's validate_generated_query enforces (each name ~= 2-3 tokens, so
 # 2000 names ~= 4000-6000 tokens). Larger pages / exports are fetched in several chunks and concatenated.
+# Only the reportview fallback chunks; plain-column pages go through `get_all_in` in one statement.
 _HYDRATE_CHUNK = 2000
 
 
+def _plain_columns(doctype, fields):
+    """True when every field is a bare column of `doctype` that needs no field-level permission check
+    (a standard field, or a permlevel-0 docfield that has a column). Anything else -- child-table or
+    qualified fields, `*`, expressions, permlevel > 0 -- keeps the reportview path."""
+    meta = frappe.get_meta(doctype)
+    for f in fields:
+        if not isinstance(f, str) or not re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", f):
+            return False
+        if f in default_fields:
+            continue
+        df = meta.get_field(f)
+        if not df or df.permlevel or df.fieldtype in no_value_fields:
+            return False
+    return True
+
+
 def _hydrate_rows_by_names(doctype, fields, ordered_names):
-    """Fetch full rows for `ordered_names` via reportview, chunked so no single `name IN (...)` exceeds the
-    sqlparse token cap, and return them in `ordered_names` order. Shared by the ranked and the narrowed
-    non-ranked page paths so a large page/export can never build a giant IN list."""
+    """Fetch full rows for `ordered_names` and return them in `ordered_names` order. Shared by the ranked
+    and the narrowed non-ranked page paths so a large page/export can never build a giant IN list.
+
+    The names already come out of a permission-checked query, so a page of plain columns is read with
+    `get_all_in` -- one statement whatever the page size. Other field lists go through reportview (it owns
+    joins and field-level permissions), chunked so no single `name IN (...)` exceeds the sqlparse cap."""
     if not ordered_names:
         return []
-    rows = []
-    for chunk in create_batch(list(ordered_names), _HYDRATE_CHUNK):
-        chunk = list(chunk)
-        rows.extend(reportview_execute(**{
-            "doctype": doctype, "fields": fields,
-            "filters": [["name", "in", chunk]], "order_by": None,
-            "limit_start": 0, "limit_page_length": len(chunk),
-        }))
+    if _plain_columns(doctype, fields):
+        rows = get_all_in(doctype, "name", ordered_names, fields=list(fields))
+    else:
+        rows = []
+        for chunk in create_batch(list(ordered_names), _HYDRATE_CHUNK):
+            chunk = list(chunk)
+            rows.extend(reportview_execute(**{
+                "doctype": doctype, "fields": fields,
+                "filters": [["name", "in", chunk]], "order_by": None,
+                "limit_start": 0, "limit_page_length": len(chunk),
+            }))
     # order_by=None above means reportview would apply its own default ordering; re-impose the caller's
     # order (rank order, or the DB-ordered page slice). This .sort is LOAD-BEARING, not cosmetic.
     order_index = {n: i for i, n in enumerate(ordered_names)}
@@ -223,30 +249,38 @@ def get_list_with_count_enhanced_impl(
                     # The ranker downstream still sees the full token set for
                     # scoring — short tokens contribute to position weight.
                     filter_tokens = [t for t in search_tokens if len(t) >= 1] or search_tokens
-                    # Word-boundary regex match: token must appear at start of
-                    # string OR right after one of our separators. Avoids
-                    # "gi" matching inside "galvanised".
-                    # Expand the OR clause across every (field × token) pair so
-                    # the union of token matches resolves in a single query
-                    # instead of one round-trip per token.
-                    field_token_clauses = []
-                    regex_params = []
-                    for sfield in searchable_child_fields:
-                        for token in filter_tokens:
-                            field_token_clauses.append(f"`tab{child_doctype_name}`.`{sfield}` ~* %s")
-                            regex_params.append(r"(^|[\s\-_/()])" + re.escape(token))
-                    or_clause = " OR ".join(field_token_clauses)
-                    extra_where = [f"`tab{child_doctype_name}`.`{child_link_field}` IN %s",
-                                   f"`tab{child_doctype_name}`.`parenttype` = %s",
-                                   f"({or_clause})"]
-                    if require_pending_items_bool and child_status_field:
-                        extra_where.append(f"`tab{child_doctype_name}`.`{child_status_field}` = 'Pending'")
-                    sql = (
-                        f"SELECT DISTINCT `tab{child_doctype_name}`.`{child_link_field}` "
-                        f"FROM `tab{child_doctype_name}` WHERE {' AND '.join(extra_where)}"
-                    )
-                    params = (tuple(potential_parent_names), doctype, *regex_params)
-                    final_set = {r[0] for r in frappe.db.sql(sql, params, as_list=True) if r and r[0]}
+                    if item_index.is_ready():
+                        # Word-prefix lookup on the maintained token index (item_index.py) — same
+                        # matches as the regex below without scanning every candidate's child rows.
+                        final_set = candidate_set & item_index.matching_parents(
+                            doctype, target_search_field_name, filter_tokens,
+                            pending_status_field=child_status_field if require_pending_items_bool else None,
+                        )
+                    else:
+                        # Word-boundary regex match: token must appear at start of
+                        # string OR right after one of our separators. Avoids
+                        # "gi" matching inside "galvanised".
+                        # Expand the OR clause across every (field × token) pair so
+                        # the union of token matches resolves in a single query
+                        # instead of one round-trip per token.
+                        field_token_clauses = []
+                        regex_params = []
+                        for sfield in searchable_child_fields:
+                            for token in filter_tokens:
+                                field_token_clauses.append(f"`tab{child_doctype_name}`.`{sfield}` ~* %s")
+                                regex_params.append(r"(^|[\s\-_/()])" + re.escape(token))
+                        or_clause = " OR ".join(field_token_clauses)
+                        extra_where = [f"`tab{child_doctype_name}`.`{child_link_field}` IN %s",
+                                       f"`tab{child_doctype_name}`.`parenttype` = %s",
+                                       f"({or_clause})"]
+                        if require_pending_items_bool and child_status_field:
+                            extra_where.append(f"`tab{child_doctype_name}`.`{child_status_field}` = 'Pending'")
+                        sql = (
+                            f"SELECT DISTINCT `tab{child_doctype_name}`.`{child_link_field}` "
+                            f"FROM `tab{child_doctype_name}` WHERE {' AND '.join(extra_where)}"
+                        )
+                        params = (tuple(potential_parent_names), doctype, *regex_params)
+                        final_set = {r[0] for r in frappe.db.sql(sql, params, as_list=True) if r and r[0]}
                 elif require_pending_items_bool and child_status_field:
                     # No search term but pending-only required — restrict to parents
                     # with at least one Pending child row.
@@ -412,7 +446,12 @@ def get_list_with_count_enhanced_impl(
                 parents_to_rank = final_matching_parent_names[:TOKEN_SCORE_MAX_CANDIDATES]
                 rank_remainder = final_matching_parent_names[TOKEN_SCORE_MAX_CANDIDATES:]
 
-                if use_child_table_item_search:
+                if use_child_table_item_search and item_index.is_ready():
+                    # Same ordering as rank_parents_by_token_score, scored in SQL on the token index.
+                    ranked_head = item_index.rank_parents(
+                        doctype, target_search_field_name, parents_to_rank, tokenize(search_term)
+                    )
+                elif use_child_table_item_search:
                     search_config = CHILD_TABLE_ITEM_SEARCH_MAP[doctype][target_search_field_name]
                     child_doctype_name = str(search_config["child_doctype"])
                     child_link_field = str(search_config["link_field_to_parent"])
@@ -504,13 +543,14 @@ def get_list_with_count_enhanced_impl(
                 data = _hydrate_rows_by_names(doctype, parsed_select_fields_str_list, page_names)
             else:
                 # Narrowed set (child-table item-search or pending-filter), no ranking. Let the DB order the
-                # full matched set and slice out the page NAMES via raw SQL (a bound tuple -> sqlparse-exempt),
-                # then hydrate those <= page_length names via reportview (chunked). Ordering is preserved
-                # exactly because the DB applies `_formatted_order_by` before the LIMIT/OFFSET.
+                # full matched set and slice out the page NAMES via raw SQL (the set bound as ONE key-set
+                # parameter -> constant-size and sqlparse-exempt), then hydrate those <= page_length names.
+                # Ordering is preserved exactly because the DB applies `_formatted_order_by` before the
+                # LIMIT/OFFSET.
                 page_names = frappe.db.sql(
-                    f"SELECT name FROM `tab{doctype}` WHERE name IN %(names)s "
+                    f"SELECT name FROM `tab{doctype}` WHERE {in_key_set('name')} "
                     f"ORDER BY {_formatted_order_by} LIMIT %(pl)s OFFSET %(start)s",
-                    {"names": tuple(final_matching_parent_names), "pl": page_length, "start": start},
+                    {"keys": key_set_json(final_matching_parent_names), "pl": page_length, "start": start},
                     pluck=True,
                 )
                 data = _hydrate_rows_by_names(doctype, parsed_select_fields_str_list, page_names)
@@ -0,0 +1,110 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Parity tests: get_facet_values_multi_impl == one get_facet_values_impl call per field.
+
+No Frappe site needed — name enumeration, search and bucketing run against an
+in-memory table. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.data_table.test_facets_multi
+"""
+import json
+import unittest
+from collections import Counter
+from unittest.mock import patch
+
+from nirmaan_stack.api.data_table import facets
+
+ROWS = [
+    {"name": f"PO-{i}", "status": s, "vendor": v, "project": p}
+    for i, (s, v, p) in enumerate([
+        ("Pending", "V1", "P1"), ("Pending", "V2", "P1"), ("Approved", "V1", "P2"),
+        ("Approved", "V3", "P2"), ("Rejected", "V2", "P3"), ("Pending", "V3", "P3"),
+        ("Approved", "V1", "P1"), ("Pending", "V1", "P2"),
+    ])
+]
+
+
+def _matches(row, f):
+    field, op, value = f[-3:]
+    if op == "=":
+        return row.get(field) == value
+    if op == "in":
+        return row.get(field) in value
+    if op == "like":
+        return value.strip("%").lower() in str(row.get(field)).lower()
+    raise AssertionError(f"unexpected operator {op}")
+
+
+def _enumerate(doctype, filters, constraint=None):
+    names = [r["name"] for r in ROWS if all(_matches(r, f) for f in filters)]
+    return [n for n in names if constraint is None or n in constraint]
+
+
+def _buckets(doctype, field, field_meta, is_standard_field, child_doctype,
+             matching_names, limit_int, include_blank_bucket=False):
+    wanted = set(matching_names)
+    counts = Counter(r[field] for r in ROWS if r["name"] in wanted)
+    return [{"value": v, "label": v, "count": c} for v, c in sorted(counts.items())]
+
+
+def _search(doctype, processed_filters, search_term, current_search_fields, facet_field=None):
+    target = json.loads(current_search_fields)[0] if search_term and current_search_fields else None
+    if target and target != facet_field:
+        processed_filters.append([doctype, target, "like", f"%{search_term}%"])
+
+
+class TestFacetMultiParity(unittest.TestCase):
+    FIELDS = ["status", "vendor", "project"]
+
+    def setUp(self):
+        patches = [
+            patch.object(facets.frappe.db, "exists", return_value=True),
+            patch.object(facets.frappe, "has_permission", return_value=True),
+            patch.object(facets.frappe, "get_meta"),
+            patch.object(facets, "_resolve_facet_field", return_value=(None, True, None)),
+            patch.object(facets, "_process_filters_for_query", side_effect=lambda f, d: list(f)),
+            patch.object(facets, "_parse_target_search_field", side_effect=lambda s, d: json.loads(s)[0]),
+            patch.object(facets, "_apply_search_filters", side_effect=_search),
+            patch.object(facets, "enumerate_matching_names", side_effect=_enumerate),
+            patch.object(facets, "_facet_buckets", side_effect=_buckets),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.enumerate = facets.enumerate_matching_names
+
+    def _assert_parity(self, filters, search_term=None, search_field=None):
+        kwargs = {
+            "filters": json.dumps(filters),
+            "search_term": search_term,
+            "current_search_fields": json.dumps([search_field]) if search_field else None,
+        }
+        multi = facets.get_facet_values_multi_impl(doctype="Procurement Orders", fields=self.FIELDS, **kwargs)
+        for field in self.FIELDS:
+            with self.subTest(field=field):
+                single = facets.get_facet_values_impl(doctype="Procurement Orders", field=field, **kwargs)
+                self.assertEqual(multi[field], single)
+
+    def test_no_filters(self):
+        self._assert_parity([])
+
+    def test_each_facet_ignores_only_its_own_filter(self):
+        self._assert_parity([
+            ["status", "in", ["Pending", "Approved"]], ["vendor", "=", "V1"], ["project", "in", ["P1", "P2"]],
+        ])
+
+    def test_base_filter_and_search(self):
+        self._assert_parity([["project", "=", "P1"]], search_term="V", search_field="name")
+        self._assert_parity([["status", "=", "Pending"]], search_term="V1", search_field="vendor")
+
+    def test_parent_set_enumerated_once_not_per_facet(self):
+        self.enumerate.reset_mock()
+        facets.get_facet_values_multi_impl(
+            doctype="Procurement Orders", fields=self.FIELDS, filters=json.dumps([["vendor", "=", "V1"]]),
+        )
+        # base set + the one facet field that carries a filter
+        self.assertEqual(self.enumerate.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
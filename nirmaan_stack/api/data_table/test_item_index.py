@@ -0,0 +1,58 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the item-search token index's tokenization contract.
+
+The index lookups and SQL ranking are only correct if "some indexed word starts with
+t" is the same predicate as the search regex, and the smallest word offset is the
+position `_find_word_prefix` reports. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.data_table.test_item_index
+"""
+import unittest
+
+from nirmaan_stack.api.data_table import item_index
+from nirmaan_stack.api.data_table.token_search import _find_word_prefix, tokenize
+
+VALUES = [
+    "GI-Wire 4mm", "ITM/Lugs-10", "Big GI Wire", "galvanised pipe", "  (Copper)  cable__2.5 sqmm",
+    "3M Face Mask", "MCB 32A/SP", "", None, "PVC conduit 25mm (ISI)", "Cable Tray-300x50",
+]
+QUERIES = ["gi", "wire", "4m", "lugs", "10", "cop", "2.5", "face 3m", "sp", "(isi)", "x50", "300x", "a"]
+
+
+def _index_position(value, token):
+    positions = [pos for word, pos in item_index.word_positions(value) if word.startswith(token)]
+    return min(positions) if positions else -1
+
+
+class TestWordPrefixContract(unittest.TestCase):
+    def test_index_matches_regex_word_prefix(self):
+        for value in VALUES:
+            for query in QUERIES:
+                for token in tokenize(query.lower()):
+                    with self.subTest(value=value, token=token):
+                        self.assertEqual(
+                            _index_position(value, token),
+                            _find_word_prefix(str(value or "").lower(), token),
+                        )
+
+    def test_like_pattern_escapes_wildcards(self):
+        self.assertEqual(item_index._like_prefix("10%"), "10\\%%")
+        self.assertEqual(item_index._like_prefix("A\\B"), "a\\\\b%")
+
+
+class TestIndexRows(unittest.TestCase):
+    def test_rows_per_word_and_field(self):
+        rows = item_index.index_rows("Procurement Orders", "PO/1", {
+            "items": [{"name": "row1", "item_name": "GI Wire", "item_id": "ITEM-7"}],
+        })
+        self.assertEqual(rows, [
+            ("items", "row1", "item_name", "gi", 0),
+            ("items", "row1", "item_name", "wire", 3),
+            ("items", "row1", "item_id", "item", 0),
+            ("items", "row1", "item_id", "7", 5),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the shared list builder's paging contract and the warehouse
+`reserved_qty` hooks that let the stock list read it directly.
+
+`frappe.db` is patched, so no site is needed:
+    python -m unittest nirmaan_stack.api.data_table.test_list_query
+"""
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.api.data_table import list_query as lq
+from nirmaan_stack.integrations.controllers import internal_transfer_memo as itm
+
+SPEC = lq.ListSpec(
+    from_sql='FROM "tabThing" t',
+    select_sql="t.name, t.qty",
+    filter_fields={"qty": "t.qty"},
+    order_fields={"qty": "t.qty", "name": "t.name"},
+    default_order=("name", "ASC"),
+    tiebreak="t.name",
+    search_exprs=("t.name",),
+    conditions=("t.qty > 0",),
+)
+
+
+class TestRunListQuery(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(lq.frappe, "db", MagicMock())
+        self.db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.page = [{"name": "A", "qty": 5}, {"name": "B", "qty": 3}]
+        self.db.sql.side_effect = lambda sql, values, as_dict=False: self.page if as_dict else [[9]]
+
+    def _run(self, **kwargs):
+        result = lq.run_list_query(SPEC, limit_page_length=2, **kwargs)
+        data_sql, values = self.db.sql.call_args_list[-2].args
+        return result, data_sql, values
+
+    def test_first_page_uses_offset_and_hands_out_a_cursor(self):
+        result, sql, values = self._run(order_by="qty desc", search_term="a")
+        self.assertEqual((result["data"], result["total_count"]), (self.page, 9))
+        self.assertIn("ORDER BY t.qty DESC, t.name DESC", sql)
+        self.assertIn("OFFSET %(_offset)s", sql)
+        self.assertIn("t.qty > 0", sql)
+        self.assertEqual(values["s_0"], "%a%")
+        self.assertIsNotNone(result["next_cursor"])
+
+    def test_the_cursor_seeks_the_next_page_instead_of_offsetting(self):
+        first, _, _ = self._run(order_by="qty desc")
+        _, sql, values = self._run(order_by="qty desc", limit_start=2, cursor=first["next_cursor"])
+        self.assertIn("(t.qty, t.name) < (%(_k_value)s, %(_k_tiebreak)s)", sql)
+        self.assertNotIn("OFFSET", sql)
+        self.assertEqual((values["_k_value"], values["_k_tiebreak"]), (3, "B"))
+
+        _, sql, _ = self._run(limit_start=2, cursor=self._run()[0]["next_cursor"])
+        self.assertIn("OR t.name IS NULL", sql)  # ASC: NULLs sort after the cursor
+
+    def test_a_cursor_for_another_query_falls_back_to_offset(self):
+        cursor = self._run(order_by="qty desc")[0]["next_cursor"]
+        for kwargs in (
+            {"order_by": "qty asc", "limit_start": 2},  # sort changed
+            {"order_by": "qty desc", "limit_start": 4},  # page jump
+            {"order_by": "qty desc", "limit_start": 2, "filters": '[["qty", ">", 1]]'},  # filter changed
+        ):
+            with self.subTest(**kwargs):
+                _, sql, _ = self._run(cursor=cursor, **kwargs)
+                self.assertIn("OFFSET %(_offset)s", sql)
+        _, sql, _ = self._run(cursor="not-a-cursor", limit_start=2)
+        self.assertIn("OFFSET %(_offset)s", sql)
+
+    def test_a_short_page_or_a_null_sort_value_ends_the_cursor_chain(self):
+        self.page = [{"name": "A", "qty": 5}]
+        self.assertIsNone(self._run()[0]["next_cursor"])
+        self.page = [{"name": "A", "qty": 5}, {"name": "B", "qty": None}]
+        self.assertIsNone(self._run(order_by="qty")[0]["next_cursor"])
+
+    def test_order_by_is_whitelisted(self):
+        self.assertEqual(lq.order_for(SPEC, "qty; DROP TABLE x"), ("name", "ASC"))
+        self.assertEqual(lq.order_for(SPEC, "`t`.`qty`"), ("qty", "ASC"))
+
+
+def _itm(status="Approved", source_type="Warehouse", lines=(("ITEM-1", "Tata", 5),)):
+    items = [SimpleNamespace(item_id=i, make=m, transfer_quantity=q) for i, m, q in lines]
+    return SimpleNamespace(status=status, source_type=source_type, items=items)
+
+
+class TestReservationHooks(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("nirmaan_stack.integrations.controllers.warehouse_stock.sync_reserved_qty")
+        self.sync = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _save(self, before, after):
+        after.get_doc_before_save = lambda: before
+        itm._sync_warehouse_reservations(after)
+
+    def test_saves_that_cannot_move_a_reservation_are_skipped(self):
+        self._save(_itm(), _itm())
+        self._save(_itm(status="Dispatched"), _itm(status="Dispatched", lines=(("ITEM-9", None, 1),)))
+        self._save(_itm(source_type="Project"), _itm(source_type="Project", status="Dispatched"))
+        self.sync.assert_not_called()
+
+    def test_transitions_and_line_edits_resync_old_and_new_buckets(self):
+        self._save(_itm(), _itm(status="Dispatched"))
+        self.sync.assert_called_once_with({("ITEM-1", "Tata")})
+
+        self.sync.reset_mock()
+        self._save(_itm(), _itm(lines=(("ITEM-1", None, 5),)))
+        self.sync.assert_called_once_with({("ITEM-1", "Tata"), ("ITEM-1", None)})
+
+    def test_insert_and_delete_resync_without_a_before_image(self):
+        self._save(None, _itm())
+        doc = _itm()
+        doc.get_doc_before_save = MagicMock()
+        itm.after_delete(doc, "after_delete")
+        doc.get_doc_before_save.assert_not_called()
+        self.assertEqual(self.sync.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import frappe
 import json
+from nirmaan_stack.api.inventory_summary_index import refresh_po_rates_for
 from nirmaan_stack.api.vendor_credit import recalculate_vendor_credit
 from nirmaan_stack.integrations.controllers.procurement_orders import cleanup_po_linked_docs
 
@@ -86,6 +87,9 @@ def handle_cancel_po(po_id: str, comment: str = None):
             for source in source_pos:
                 frappe.db.set_value("Procurement Orders", source["name"], "status", "Cancelled")
                 frappe.db.set_value("Procurement Orders", source["name"], "merged", None)
+            # set_value fires no hook; Cancelled sources count towards the inventory
+            # rates again, so re-derive their rows.
+            refresh_po_rates_for([source["name"] for source in source_pos])
 
         if comment:
             ref_doctype = "Sent Back Category" if sent_back_doc_name else "Procurement Order"
@@ -104,8 +104,8 @@ def create_itms(
 
     # --- Availability guard (aggregate per bucket so one error per bucket) ---
     from nirmaan_stack.integrations.controllers.internal_transfer_memo import (
-        available_quantity,
-        warehouse_available_quantity,
+        available_quantities,
+        warehouse_available_quantities,
     )
 
     proj_aggregated: dict[tuple[str, str, str | None], float] = defaultdict(float)
@@ -116,16 +116,20 @@ def create_itms(
         else:
             proj_aggregated[(sel["item_id"], sel["source_project"], sel.get("make"))] += sel["transfer_quantity"]
 
+    # Every bucket in a fixed number of grouped queries, not a round of queries each.
+    proj_available = available_quantities(proj_aggregated.keys())
+    wh_available = warehouse_available_quantities(wh_aggregated.keys())
+
     errors = []
     for (item_id, source_project, make), requested in proj_aggregated.items():
-        available = available_quantity(item_id, source_project, make=make)
+        available = proj_available[(item_id, source_project, make)]
         if requested > flt(available):
             make_label = f" ({make})" if make else ""
             errors.append(
                 f"Item {item_id}{make_label} in {source_project}: requested {requested}, available {available}"
             )
     for (item_id, make), requested in wh_aggregated.items():
-        available = warehouse_available_quantity(item_id, make=make)
+        available = wh_available[(item_id, make)]
         if requested > flt(available):
             make_label = f" ({make})" if make else ""
             errors.append(
@@ -23,29 +23,131 @@ Rows are keyed by `(project, item_id, make)` so that the same item in
 different makes appears as distinct rows — mirroring how Warehouse
 Stock is keyed `(item_id, make)`. NULL/empty makes are treated as a
 single bucket via `IS NOT DISTINCT FROM`.
+
+The ``latest_reports`` and max-PO-rate legs are read from the helper
+tables kept by :mod:`nirmaan_stack.api.inventory_summary_index` once its
+backfill has run (the inline CTEs are used until then); that, not the way
+rows are fetched, is what makes the summary cheap. Callers that pass
+``limit_page_length`` get one filtered, sorted page instead of every row.
 """
 
+from typing import Any
+
 import frappe
+from frappe.utils import cint
+
+from nirmaan_stack.api import inventory_summary_index
+from nirmaan_stack.api.data_table.constants import MAX_PAGE_LENGTH
+
+# Whitelist of sortable columns. Ties always fall back to the default order, so
+# pages stay stable.
+_ORDER_BY_FIELDS = (
+    "item_id", "item_name", "category", "make", "project", "project_name",
+    "report_date", "remaining_quantity", "max_rate", "estimated_cost",
+)
+_DEFAULT_ORDER = "s.item_id, s.make NULLS FIRST, s.project"
+
+_LATEST_REPORTS_FROM_INDEX = f"""
+        SELECT report AS name, project, report_date, report_modified AS modified
+        FROM "tab{inventory_summary_index.LATEST_REPORT_DOCTYPE}"
+"""
+
+_RATES_FROM_INDEX = f"""
+        SELECT project, item_id, make, max_quote, max_quote_tax,
+               string_to_array(po_numbers, chr(10)) AS po_list
+        FROM "tab{inventory_summary_index.PO_RATE_DOCTYPE}"
+"""
 
 
 @frappe.whitelist()
-def get_inventory_item_wise_summary():
+def get_inventory_item_wise_summary(
+    project: str | None = None,
+    category: str | None = None,
+    search_term: str | None = None,
+    order_by: str | None = None,
+    limit_start: int | str = 0,
+    limit_page_length: int | str | None = None,
+) -> list | dict:
     """Return flat per-project-per-(item, make) rows from latest submitted reports,
     enriched with max PO quote rates for estimated cost.
 
     Remaining quantities are reduced by dispatched ITM transfer quantities
     for ITMs dispatched after the latest RIR date (prevents double-counting
     once the PM submits a new report with reduced values).
+
+    Args:
+        project: Only this project's rows.
+        category: Only this item category.
+        search_term: Whitespace-separated tokens; each must match item_id,
+            item_name, make or project_name (ILIKE).
+        order_by: ``"<field> [asc|desc]"`` over ``_ORDER_BY_FIELDS``.
+        limit_start / limit_page_length: One page. Without a page length
+            the full filtered list is returned, as the Item-Wise page expects.
+
+    Returns:
+        The rows, or ``{"data": [...], "total_count": int}`` when paged.
     """
+    conditions, values = _conditions(project, category, search_term)
+    paged = cint(limit_page_length or 0) > 0
 
-    sql = """
-    WITH latest_reports AS (
-        SELECT DISTINCT ON (project)
-            name, project, report_date, modified
-        FROM "tabRemaining Items Report"
-        WHERE status = 'Submitted'
-        ORDER BY project, report_date DESC
-    ),
+    sql = _summary_sql(
+        where=" AND ".join(conditions) or "TRUE",
+        order=_order_clause(order_by),
+        paged=paged,
+    )
+    if paged:
+        values["_limit"] = min(cint(limit_page_length), MAX_PAGE_LENGTH)
+        values["_offset"] = max(cint(limit_start), 0)
+
+    rows = frappe.db.sql(sql, values, as_dict=True)
+    if not paged:
+        return rows
+
+    total = 0
+    for row in rows:
+        total = row.pop("_total", total)
+    if not rows and values["_offset"]:
+        # Past the last page: the window count came back with no row to ride on.
+        total = _count(conditions, values)
+    return {"data": rows, "total_count": total}
+
+
+def _conditions(project, category, search_term) -> tuple[list[str], dict[str, Any]]:
+    # The inline PO-rate leg (before the helper tables are ready) reads this one.
+    conditions, values = [], {"excluded_po": inventory_summary_index.EXCLUDED_PO_STATUSES}
+    if project:
+        conditions.append("s.project = %(project)s")
+        values["project"] = project
+    if category:
+        conditions.append("s.category = %(category)s")
+        values["category"] = category
+    for idx, token in enumerate((search_term or "").split()):
+        key = f"s_{idx}"
+        conditions.append(
+            f"(s.item_id ILIKE %({key})s OR s.item_name ILIKE %({key})s "
+            f"OR s.make ILIKE %({key})s OR s.project_name ILIKE %({key})s)"
+        )
+        values[key] = f"%{token}%"
+    return conditions, values
+
+
+def _order_clause(order_by: str | None) -> str:
+    parts = (order_by or "").split()
+    if not parts or parts[0] not in _ORDER_BY_FIELDS:
+        return f"ORDER BY {_DEFAULT_ORDER}"
+    direction = "DESC" if len(parts) > 1 and parts[1].upper() == "DESC" else "ASC"
+    return f"ORDER BY s.{parts[0]} {direction}, {_DEFAULT_ORDER}"
+
+
+def _summary_sql(where: str, order: str = "", paged: bool = False, count: bool = False) -> str:
+    if inventory_summary_index.is_ready():
+        latest_reports, rates = _LATEST_REPORTS_FROM_INDEX, _RATES_FROM_INDEX
+    else:
+        latest_reports = inventory_summary_index.latest_reports_sql()
+        rates = inventory_summary_index.po_rates_sql()
+    # `rates` carries its own WITH; nest it as a subquery so it stays one CTE.
+    return f"""
+    WITH latest_reports AS ({latest_reports}),
     report_items AS (
         SELECT
             lr.project,
@@ -95,80 +197,58 @@ def get_inventory_item_wise_summary():
           AND itm.dispatched_on > lr.modified
         GROUP BY itm.source_project, itmi.item_id, itmi.make
     ),
-    max_rates AS (
-        SELECT DISTINCT ON (po.project, poi.item_id, poi.make)
-            po.project,
-            poi.item_id,
-            poi.make,
-            poi.quote AS max_quote,
-            poi.tax AS max_quote_tax
-        FROM "tabPurchase Order Item" poi
-        JOIN "tabProcurement Orders" po ON poi.parent = po.name
-        WHERE po.status NOT IN ('Merged', 'Inactive', 'PO Amendment')
-        ORDER BY po.project, poi.item_id, poi.make, poi.quote DESC
-    ),
-    po_numbers AS (
-        SELECT po.project, poi.item_id, poi.make,
-               array_agg(DISTINCT po.name ORDER BY po.name) AS po_list
-        FROM "tabPurchase Order Item" poi
-        JOIN "tabProcurement Orders" po ON poi.parent = po.name
-        WHERE po.status NOT IN ('Merged', 'Inactive', 'PO Amendment')
-        GROUP BY po.project, poi.item_id, poi.make
+    rates AS (SELECT * FROM ({rates}) r),
+    summary AS (
+        SELECT
+            ri.project,
+            p.project_name,
+            ri.report_date,
+            ri.item_id,
+            ri.item_name,
+            ri.unit,
+            ri.category,
+            ri.make,
+            GREATEST(
+                ri.remaining_quantity
+                  - COALESCE(ar.reserved_qty, 0)
+                  - COALESCE(dd.deducted_qty, 0),
+                0
+            ) AS remaining_quantity,
+            COALESCE(mr.max_quote, 0) AS max_rate,
+            COALESCE(mr.max_quote_tax, 18) AS tax,
+            GREATEST(
+                ri.remaining_quantity
+                  - COALESCE(ar.reserved_qty, 0)
+                  - COALESCE(dd.deducted_qty, 0),
+                0
+            )
+                * COALESCE(mr.max_quote, 0)
+                * (1 + COALESCE(mr.max_quote_tax, 18) / 100.0) AS estimated_cost,
+            COALESCE(mr.po_list, ARRAY[]::text[]) AS po_numbers
+        FROM report_items ri
+        JOIN "tabProjects" p ON p.name = ri.project
+        LEFT JOIN approved_itm_reservations ar
+            ON ar.project = ri.project
+           AND ar.item_id = ri.item_id
+           AND ar.make IS NOT DISTINCT FROM ri.make
+        LEFT JOIN dispatched_itm_deductions dd
+            ON dd.project = ri.project
+           AND dd.item_id = ri.item_id
+           AND dd.make IS NOT DISTINCT FROM ri.make
+        LEFT JOIN rates mr
+            ON mr.project = ri.project
+           AND mr.item_id = ri.item_id
+           AND mr.make IS NOT DISTINCT FROM ri.make
     )
-    SELECT
-        ri.project,
-        p.project_name,
-        ri.report_date,
-        ri.item_id,
-        ri.item_name,
-        ri.unit,
-        ri.category,
-        ri.make,
-        GREATEST(
-            ri.remaining_quantity
-              - COALESCE(ar.reserved_qty, 0)
-              - COALESCE(dd.deducted_qty, 0),
-            0
-        ) AS remaining_quantity,
-        COALESCE(mr.max_quote, 0) AS max_rate,
-        COALESCE(mr.max_quote_tax, 18) AS tax,
-        GREATEST(
-            ri.remaining_quantity
-              - COALESCE(ar.reserved_qty, 0)
-              - COALESCE(dd.deducted_qty, 0),
-            0
-        )
-            * COALESCE(mr.max_quote, 0)
-            * (1 + COALESCE(mr.max_quote_tax, 18) / 100.0) AS estimated_cost,
-        COALESCE(pn.po_list, ARRAY[]::text[]) AS po_numbers
-    FROM report_items ri
-    JOIN "tabProjects" p ON p.name = ri.project
-    LEFT JOIN approved_itm_reservations ar
-        ON ar.project = ri.project
-       AND ar.item_id = ri.item_id
-       AND ar.make IS NOT DISTINCT FROM ri.make
-    LEFT JOIN dispatched_itm_deductions dd
-        ON dd.project = ri.project
-       AND dd.item_id = ri.item_id
-       AND dd.make IS NOT DISTINCT FROM ri.make
-    LEFT JOIN max_rates mr
-        ON mr.project = ri.project
-       AND mr.item_id = ri.item_id
-       AND mr.make IS NOT DISTINCT FROM ri.make
-    LEFT JOIN po_numbers pn
-        ON pn.project = ri.project
-       AND pn.item_id = ri.item_id
-       AND pn.make IS NOT DISTINCT FROM ri.make
-    WHERE GREATEST(
-            ri.remaining_quantity
-              - COALESCE(ar.reserved_qty, 0)
-              - COALESCE(dd.deducted_qty, 0),
-            0
-        ) > 0
-    ORDER BY ri.item_id, ri.make NULLS FIRST, ri.project
+    SELECT {"COUNT(*) AS _total" if count else "s.*"}{", COUNT(*) OVER () AS _total" if paged else ""}
+    FROM summary s
+    WHERE s.remaining_quantity > 0 AND {where}
+    {order}
+    {"LIMIT %(_limit)s OFFSET %(_offset)s" if paged else ""}
     """
 
-    rows = frappe.db.sql(sql, as_dict=True)
-    frappe.db.commit()
 
-    return rows
+def _count(conditions, values) -> int:
+    sql = _summary_sql(" AND ".join(conditions) or "TRUE", count=True)
+    return frappe.db.sql(sql, values)[0][0]
+
@@ -0,0 +1,261 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Helper tables behind the cross-project inventory item-wise summary.
+
+Two legs of `inventory_item_wise.get_inventory_item_wise_summary` scanned whole
+tables on every call:
+
+  * `latest_reports` -- DISTINCT ON (project) over every Submitted Remaining Items
+    Report, kept as `Inventory Latest Report` (one row per project).
+  * `max_rates` / `po_numbers` -- the highest quote and the PO list per (project,
+    item, make) over every live Purchase Order Item, kept as `Inventory PO Rate`.
+
+Each table is filled by the SAME SELECT the summary used to run inline, narrowed to
+the rows a change can touch, so a refreshed row is exactly what the CTE would give.
+
+Maintenance:
+  * `on_report_change` (Remaining Items Report on_update / after_delete) refreshes
+    the report's project. `after_delete`, not `on_trash`: the deleted report must be
+    gone before the latest one is picked again.
+  * `on_po_change` (Procurement Orders on_update / after_delete) refreshes the items
+    of the PO's project(s) when its status, project or lines moved -- approval,
+    amendment, cancellation and line edits all land here.
+  * `refresh_po_rates_for` covers status writes that bypass the doc events: the
+    merge (`po_merge_and_unmerge.handle_merge_pos`) sets its sources to Merged, and
+    cancelling a merged master (`handle_cancel_po`) sets them to Cancelled, both
+    with `frappe.db.set_value`. Those sites call it after the write.
+  * `rebuild_inventory_summary_index` is the backfill (patch) and the nightly
+    correctness backstop for rows written without a save. It flips INDEX_READY_KEY;
+    until then `is_ready()` is False and the summary keeps the inline CTEs.
+"""
+
+import frappe
+from frappe.utils import now
+
+LATEST_REPORT_DOCTYPE = "Inventory Latest Report"
+PO_RATE_DOCTYPE = "Inventory PO Rate"
+INDEX_READY_KEY = "inventory_summary_index_ready"
+_INDEX_LOCK = "inventory_summary_index"
+
+# PO statuses that never count towards a rate or the PO list.
+EXCLUDED_PO_STATUSES = ("Merged", "Inactive", "PO Amendment")
+
+# The PO fields the rate rows are derived from; a save touching none of them is skipped.
+_PO_LINE_FIELDS = ("item_id", "make", "quote", "tax")
+
+
+def is_ready() -> bool:
+    return bool(frappe.db.get_global(INDEX_READY_KEY))
+
+
+def latest_reports_sql(project_filter: str = "") -> str:
+    """The `latest_reports` SELECT (name, project, report_date, modified)."""
+    return f"""
+        SELECT DISTINCT ON (project)
+            name, project, report_date, modified
+        FROM "tabRemaining Items Report"
+        WHERE status = 'Submitted' {project_filter}
+        ORDER BY project, report_date DESC
+    """
+
+
+def po_rates_sql(po_filter: str = "") -> str:
+    """(project, item_id, make, max_quote, max_quote_tax, po_list) per live PO line key.
+
+    `max_rates` keeps DISTINCT ON ... ORDER BY quote DESC, so the tax is the one on
+    the line carrying the top quote (and a NULL quote sorts first, as it always has).
+    """
+    return f"""
+        WITH max_rates AS (
+            SELECT DISTINCT ON (po.project, poi.item_id, poi.make)
+                po.project,
+                poi.item_id,
+                poi.make,
+                poi.quote AS max_quote,
+                poi.tax AS max_quote_tax
+            FROM "tabPurchase Order Item" poi
+            JOIN "tabProcurement Orders" po ON poi.parent = po.name
+            WHERE po.status NOT IN %(excluded_po)s {po_filter}
+            ORDER BY po.project, poi.item_id, poi.make, poi.quote DESC
+        ),
+        po_numbers AS (
+            SELECT po.project, poi.item_id, poi.make,
+                   array_agg(DISTINCT po.name ORDER BY po.name) AS po_list
+            FROM "tabPurchase Order Item" poi
+            JOIN "tabProcurement Orders" po ON poi.parent = po.name
+            WHERE po.status NOT IN %(excluded_po)s {po_filter}
+            GROUP BY po.project, poi.item_id, poi.make
+        )
+        SELECT mr.project, mr.item_id, mr.make, mr.max_quote, mr.max_quote_tax, pn.po_list
+        FROM max_rates mr
+        JOIN po_numbers pn
+          ON pn.project = mr.project
+         AND pn.item_id = mr.item_id
+         AND pn.make IS NOT DISTINCT FROM mr.make
+    """
+
+
+def refresh_latest_reports(projects) -> None:
+    """Re-derive the `Inventory Latest Report` row of each project (none if it has
+    no Submitted report any more)."""
+    projects = tuple(sorted(p for p in set(projects) if p))
+    if not projects:
+        return
+    _lock_refresh("latest_report", projects)
+    frappe.db.sql(
+        f'DELETE FROM "tab{LATEST_REPORT_DOCTYPE}" WHERE project IN %(projects)s',
+        {"projects": projects},
+    )
+    _insert_latest_reports("AND project IN %(projects)s", {"projects": projects})
+
+
+def refresh_po_rates(project, item_ids=None) -> None:
+    """Re-derive the `Inventory PO Rate` rows of `project`, all items or just `item_ids`."""
+    if not project:
+        return
+    values = {"project": project}
+    scope = "AND po.project = %(project)s"
+    delete_scope = ""
+    if item_ids is not None:
+        item_ids = tuple(i for i in set(item_ids) if i)
+        if not item_ids:
+            return
+        values["items"] = item_ids
+        scope += " AND poi.item_id IN %(items)s"
+        delete_scope = " AND item_id IN %(items)s"
+    _lock_refresh("po_rate", (project,))
+    frappe.db.sql(
+        f'DELETE FROM "tab{PO_RATE_DOCTYPE}" WHERE project = %(project)s{delete_scope}',
+        values,
+    )
+    _insert_po_rates(scope, values)
+
+
+def _lock_refresh(table, projects) -> None:
+    """Serialise refreshes of the same project's rows until this transaction ends.
+
+    A refresh is DELETE + INSERT of deterministically named rows, so two transactions
+    refreshing one project at once (two POs approved together, an RIR submit racing
+    another) would both insert the same name and the second would fail on the
+    primary key. The per-project lock makes the second wait and then re-derive from
+    the committed state. Every refresh also holds the index-wide lock SHARED, which
+    `rebuild_inventory_summary_index` takes exclusively. `projects` is sorted, so two
+    multi-project refreshes take their locks in the same order.
+    """
+    frappe.db.sql("SELECT pg_advisory_xact_lock_shared(hashtextextended(%s, 0))", (_INDEX_LOCK,))
+    for project in projects:
+        frappe.db.sql(
+            "SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))",
+            (f"inventory_summary:{table}:{project}",),
+        )
+
+
+def refresh_po_rates_for(po_names) -> None:
+    """Refresh the rate rows of every (project, item) on these POs.
+
+    For callers that change PO status with `frappe.db.set_value`, which fires no
+    doc event: the merge flips its sources to Merged, and cancelling a merged
+    master flips them on to Cancelled.
+    """
+    po_names = tuple(n for n in set(po_names or ()) if n)
+    if not po_names:
+        return
+    items_by_project = {}
+    for row in frappe.db.sql(
+        """
+        SELECT DISTINCT po.project, poi.item_id
+        FROM "tabPurchase Order Item" poi
+        JOIN "tabProcurement Orders" po ON poi.parent = po.name
+        WHERE po.name IN %(pos)s
+        """,
+        {"pos": po_names},
+        as_dict=True,
+    ):
+        if row.project:
+            items_by_project.setdefault(row.project, set()).add(row.item_id)
+    for project, item_ids in items_by_project.items():
+        refresh_po_rates(project, item_ids)
+
+
+def _insert_latest_reports(project_filter, values) -> None:
+    frappe.db.sql(
+        f"""
+        INSERT INTO "tab{LATEST_REPORT_DOCTYPE}"
+            (name, creation, modified, owner, modified_by,
+             project, report, report_date, report_modified)
+        SELECT lr.project, %(_now)s, %(_now)s, %(_user)s, %(_user)s,
+               lr.project, lr.name, lr.report_date, lr.modified
+        FROM ({latest_reports_sql(project_filter)}) lr
+        """,
+        {**values, "_now": now(), "_user": frappe.session.user},
+    )
+
+
+def _insert_po_rates(po_filter, values) -> None:
+    # The name is a digest of the row key, so a rebuild names a row the same way.
+    # The make is tagged, not COALESCEd, because NULL and '' are different keys here.
+    frappe.db.sql(
+        f"""
+        INSERT INTO "tab{PO_RATE_DOCTYPE}"
+            (name, creation, modified, owner, modified_by,
+             project, item_id, make, max_quote, max_quote_tax, po_numbers)
+        SELECT left(md5(concat_ws(chr(31), r.project, r.item_id,
+                                  CASE WHEN r.make IS NULL THEN 'N' ELSE 'M' || r.make END)), 20),
+               %(_now)s, %(_now)s, %(_user)s, %(_user)s,
+               r.project, r.item_id, r.make, r.max_quote, r.max_quote_tax,
+               array_to_string(r.po_list, chr(10))
+        FROM ({po_rates_sql(po_filter)}) r
+        """,
+        {**values, "excluded_po": EXCLUDED_PO_STATUSES, "_now": now(), "_user": frappe.session.user},
+    )
+
+
+def on_report_change(doc, method=None):
+    before = doc.get_doc_before_save() if method != "after_delete" else None
+    refresh_latest_reports({doc.project, before and before.project})
+
+
+def on_po_change(doc, method=None):
+    before = doc.get_doc_before_save() if method != "after_delete" else None
+    if before is not None and not _po_rates_may_change(before, doc):
+        return
+    items_by_project = {}
+    for d in (doc, before):
+        if d is not None and d.project:
+            items_by_project.setdefault(d.project, set()).update(
+                row.item_id for row in (d.get("items") or [])
+            )
+    for project, item_ids in items_by_project.items():
+        refresh_po_rates(project, item_ids)
+
+
+def _po_rates_may_change(before, doc) -> bool:
+    def key(d):
+        return (
+            d.status in EXCLUDED_PO_STATUSES,
+            d.project,
+            sorted(
+                tuple(str(row.get(f) or "") for f in _PO_LINE_FIELDS)
+                for row in (d.get("items") or [])
+            ),
+        )
+
+    return key(before) != key(doc)
+
+
+def rebuild_inventory_summary_index():
+    """Re-derive both tables from source in one transaction.
+
+    Idempotent; daily scheduler entry and the backfill patch. Both tables hold one row
+    per project / per ordered item, so a full rewrite is a single INSERT ... SELECT each.
+    Holds the index-wide advisory lock exclusively, so no per-project refresh
+    interleaves with the rewrite.
+    """
+    frappe.db.sql("SELECT pg_advisory_xact_lock(hashtextextended(%s, 0))", (_INDEX_LOCK,))
+    frappe.db.sql(f'DELETE FROM "tab{LATEST_REPORT_DOCTYPE}"')
+    _insert_latest_reports("", {})
+    frappe.db.sql(f'DELETE FROM "tab{PO_RATE_DOCTYPE}"')
+    _insert_po_rates("", {})
+    frappe.db.set_global(INDEX_READY_KEY, 1)
+    frappe.db.commit()
@@ -5,7 +5,7 @@ from nirmaan_stack.api.invoices._validation import (
     existing_invoiced_sum,
     gstin_match,
 )
-from nirmaan_stack.services.extraction import extract
+from nirmaan_stack.services.extraction.cache import extract_cached
 from nirmaan_stack.services.extraction.mapping import gemini_map_residue
 from nirmaan_stack.services.extraction.files import (
     SUPPORTED_EXTS,
@@ -50,7 +50,9 @@ def extract_invoice_fields(file_url, docname=None):
     Called from the Add Invoice dialog when the user picks a file in Auto-fill
     mode. Extracted values populate the form; a deterministic validation layer
     (GSTIN checksum, amount reconciliation, line-item self-reconcile) surfaces soft
-    warnings and gates auto-approval. The response is never persisted server-side.
+    warnings and gates auto-approval. The response is never persisted server-side;
+    only the raw provider result is, in the content-hash extraction cache, so
+    re-opening the dialog on the same file skips the model call.
 
     When `docname` is a Procurement Order, the response also includes `line_match`
     (each invoice line mapped to a PO item — fuzzy-first, Gemini-resolved residue)
@@ -78,7 +80,9 @@ def extract_invoice_fields(file_url, docname=None):
     if not content:
         frappe.throw("Could not read file content.")
 
-    _, entities, line_items = extract(content, file_ext, settings, doc_kind="invoice")
+    _, entities, line_items = extract_cached(
+        content, file_ext, settings, doc_kind="invoice", file_url=file_url
+    )
 
     invoice_no, invoice_no_conf = pick_entity(entities, INVOICE_NO_KEYS)
     invoice_date, invoice_date_conf = pick_entity(entities, INVOICE_DATE_KEYS, prefer_normalized=True)
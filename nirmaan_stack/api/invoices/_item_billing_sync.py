@@ -12,6 +12,11 @@ Two of them live here, with deliberately DIFFERENT rules:
                                         stored negative and net out).
 Do not "harmonise" the two — they answer different questions.
 
+They are maintained differently too. `amount_invoiced` is a plain sum, so an invoice
+event moves it by that invoice's own contribution (`apply_document_amount_invoiced_delta`)
+and a nightly verifier checks the result against a full recompute. `invoice_qty` is a
+whole-PO classification and is always recomputed.
+
 --- invoice_qty: SELF-CLASSIFYING ---
 
 `invoice_qty` is a DERIVED per-PO-row field, RECOMPUTED FROM SOURCE on every call
@@ -50,13 +55,15 @@ _TOL = 1.0   # Rs rounding cushion: a few Rs under the PO total still counts as
 def recompute_po_invoice_qty(po_name: str) -> None:
     """Self-classify invoice_qty on every `Purchase Order Item` row of `po_name`.
 
-    Resolves the PO to EXACT / ORDERED / ZERO (see module docstring) and writes each
-    row via db.set_value, which stamps `modified` / `modified_by` on the child rows.
-    That stamp is the POINT: a runtime hook must leave a trace a user can find, so the
-    row visibly moved. Only PATCHES suppress it with `update_modified=False`, because a
-    migration rewriting history should not look like everyone edited every document.
-    The PO's own `on_update` controller does NOT fire either way — `set_value` runs no
-    doc events at all, whatever `update_modified` says. No-op for blank/missing PO.
+    Resolves the PO to EXACT / ORDERED / ZERO (see module docstring) and writes all
+    of its rows in one UPDATE (`_write_invoice_qty`), leaving `modified` untouched.
+    The PO's own `on_update` controller does NOT fire — a raw write runs no doc
+    events at all. No-op for blank/missing PO.
+
+    Stays a full recompute even though `amount_invoiced` moved to deltas: the bucket
+    is decided by ALL of the PO's counted invoices at once (is every one mapped? do
+    they reach the PO total?), so one invoice changing can flip every row of the PO
+    between buckets. There is no per-invoice contribution to add or subtract.
     """
     if not po_name:
         return
@@ -87,14 +94,12 @@ def recompute_po_invoice_qty(po_name: str) -> None:
     )
 
     def _write(value_fn):
-        for r in po_rows:
-            # Additional Charges (freight / P&F / etc.) are not real line quantities — they
-            # NEVER carry an invoice_qty (always 0), whatever the bucket.
-            val = 0 if r.category == "Additional Charges" else value_fn(r)
-            frappe.db.set_value(
-                "Purchase Order Item", r.name, "invoice_qty", val,
-                update_modified=False,
-            )
+        # Additional Charges (freight / P&F / etc.) are not real line quantities — they
+        # NEVER carry an invoice_qty (always 0), whatever the bucket.
+        _write_invoice_qty([
+            (r.name, 0 if r.category == "Additional Charges" else value_fn(r))
+            for r in po_rows
+        ])
 
     mapped = [c for c in counted if (c.n_lines or 0) > 0]
     all_mapped = bool(counted) and len(mapped) == len(counted)
@@ -153,6 +158,24 @@ def recompute_po_invoice_qty(po_name: str) -> None:
     _write(lambda r: 0)
 
 
+def _write_invoice_qty(values) -> None:
+    """Write (row name, invoice_qty) pairs in ONE statement, touching only rows whose
+    value actually changed. Same effect as a `set_value(..., update_modified=False)`
+    per row, without one round trip per PO line."""
+    if not values:
+        return
+    frappe.db.sql(
+        """
+        UPDATE "tabPurchase Order Item" poi
+        SET invoice_qty = v.qty
+        FROM (VALUES {0}) AS v(name, qty)
+        WHERE poi.name = v.name
+          AND poi.invoice_qty IS DISTINCT FROM v.qty
+        """.format(", ".join(["(%s, CAST(%s AS numeric))"] * len(values))),
+        [x for name, qty in values for x in (name, flt(qty))],
+    )
+
+
 def _project_is_completed(po_name: str) -> bool:
     project = frappe.db.get_value("Procurement Orders", po_name, "project")
     return bool(project) and (
@@ -179,8 +202,11 @@ def recompute_document_amount_invoiced(document_type: str, document_name: str) -
     above, which counts Pending+Approved and skips credit notes entirely.)
 
     RECOMPUTED FROM SOURCE on every call, never incremented by a delta, so it
-    cannot drift. Written with `set_value`, which STAMPS `modified` / `modified_by`
-    (the default) — deliberately, so the parent row carries a visible trace that it
+    cannot drift. This is the reference figure: the invoice doc events move the
+    stored value by deltas (`apply_document_amount_invoiced_delta`), and patches
+    and the nightly verifier (`find_amount_invoiced_drift`) come back here.
+    Written with `set_value`, which STAMPS `modified` / `modified_by` (the
+    default) — deliberately, so the parent row carries a visible trace that it
     moved, exactly as `amount_paid` already does at its own write sites.
 
     `update_modified` does NOT gate the parent's `on_update` chain, and never did:
@@ -215,6 +241,96 @@ def recompute_document_amount_invoiced(document_type: str, document_name: str) -
     # amount_due is derived from this value, so it moves with it.
     recompute_document_amount_due(document_type, document_name)
 
+
+def apply_document_amount_invoiced_delta(
+    document_type: str, document_name: str, delta: float
+) -> None:
+    """Move `amount_invoiced` on ONE Procurement Order / Service Request by `delta`.
+
+    The runtime path. An invoice event knows exactly what it added to or took out of
+    the Approved sum, so the parent moves by that amount in ONE atomic UPDATE instead
+    of re-summing every invoice the order has ever had. `amount_due` moves in the
+    same statement where it is derived from `amount_invoiced` (Procurement Orders);
+    a Service Request's `amount_due` does not read it and is left alone.
+
+    Postgres evaluates every SET expression against the row as it was, so
+    `amount_due` is computed from the OLD `amount_invoiced` plus the delta. The row
+    lock the UPDATE takes serialises concurrent invoice events on the same order,
+    so two approvals cannot lose each other's delta.
+
+    Stamps `modified` / `modified_by` like the `set_value` in the recompute above.
+    Does NOT commit. No-op for a zero delta, a blank name or a doctype without the
+    field; a parent that no longer exists matches zero rows.
+    """
+    if document_type not in _TOTAL_PARENT_DOCTYPES or not document_name or not flt(delta):
+        return
+
+    set_due = ""
+    if _AMOUNT_DUE_OPERANDS[document_type][0] == "amount_invoiced":
+        set_due = (
+            ', amount_due = COALESCE(amount_invoiced, 0) + %(delta)s'
+            ' - COALESCE("{0}", 0)'.format(_AMOUNT_DUE_OPERANDS[document_type][1])
+        )
+    # Table and column names come from the constants, never from a caller.
+    frappe.db.sql(
+        'UPDATE "tab{0}" SET amount_invoiced = COALESCE(amount_invoiced, 0) + %(delta)s{1},'
+        ' modified = %(now)s, modified_by = %(user)s'
+        ' WHERE name = %(dn)s'.format(document_type, set_due),
+        {
+            "delta": flt(delta),
+            "now": frappe.utils.now(),
+            "user": frappe.session.user,
+            "dn": document_name,
+        },
+    )
+
+
+# Anything below a paisa is rounding, not drift.
+_DRIFT_TOL = 0.005
+
+
+def find_amount_invoiced_drift() -> list:
+    """Every Procurement Order / Service Request whose stored `amount_invoiced` (or
+    `amount_due`) disagrees with a recompute from source.
+
+    One grouped statement per doctype, comparing against exactly what
+    `recompute_document_amount_invoiced` / `recompute_document_amount_due` would
+    write. Returns dicts with document_type, name, stored, expected, stored_due,
+    expected_due.
+    """
+    drift = []
+    for document_type in _TOTAL_PARENT_DOCTYPES:
+        minuend, subtrahend = _AMOUNT_DUE_OPERANDS[document_type]
+        # For a PO the expected amount_due is built on the EXPECTED amount_invoiced.
+        expected_minuend = (
+            "COALESCE(s.total, 0)" if minuend == "amount_invoiced"
+            else 'COALESCE(d."{0}", 0)'.format(minuend)
+        )
+        rows = frappe.db.sql(
+            """
+            SELECT %(dt)s AS document_type, d.name,
+                   COALESCE(d.amount_invoiced, 0) AS stored,
+                   COALESCE(s.total, 0) AS expected,
+                   COALESCE(d.amount_due, 0) AS stored_due,
+                   {0} - COALESCE(d."{1}", 0) AS expected_due
+            FROM "tab{2}" d
+            LEFT JOIN (
+                SELECT vi.document_name, SUM(COALESCE(vi.invoice_amount, 0)) AS total
+                FROM "tabVendor Invoices" vi
+                WHERE vi.document_type = %(dt)s
+                  AND vi.status = 'Approved'
+                GROUP BY vi.document_name
+            ) s ON s.document_name = d.name
+            WHERE ABS(COALESCE(d.amount_invoiced, 0) - COALESCE(s.total, 0)) > %(tol)s
+               OR ABS(COALESCE(d.amount_due, 0) - ({0} - COALESCE(d."{1}", 0))) > %(tol)s
+            ORDER BY d.name
+            """.format(expected_minuend, subtrahend, document_type),
+            {"dt": document_type, "tol": _DRIFT_TOL},
+            as_dict=True,
+        )
+        drift.extend(rows)
+    return drift
+
 # ---------------------------------------------------------------------------
 # `Procurement Orders` / `Service Requests` .amount_due
 # ---------------------------------------------------------------------------
@@ -12,10 +12,23 @@ hard leftovers; Python always has the final, auditable say.
 
 The mapping is decision-support: it powers a reviewer's verification table + a
 soft over-billing flag. It never blocks submit and is not an auto-approve gate.
+
+Cost: a 150-line invoice against a 200-item PO is 30,000 pairs, and the
+SequenceMatcher ratio dominates. `_scored_pairs` keeps the scores EXACT but only
+pays for the ratio on pairs that can still reach MATCH_THRESHOLD: a token
+inverted index over PO item names gives each pair's token overlap for free, and
+SequenceMatcher's own upper bounds (real_quick_ratio, then quick_ratio) discard
+the rest. Pruning never changes a score — it only skips pairs that provably
+score below the threshold.
+
+Selection is an optimal one-to-one assignment (`_assign`), not greedy: the most
+lines matched, then the highest total score among those. Greedy best-first can
+lock in one strong pair that strands two good ones.
 """
 from __future__ import annotations
 
 import re
+from collections import defaultdict
 from difflib import SequenceMatcher
 
 # --- Tunable knobs (DOMAIN INPUTS — to be refined with the user) -------------
@@ -101,15 +114,175 @@ def _unit_score(inv_unit, po_unit) -> float:
     return 1.0 if a == b else 0.0
 
 
+def _combine(name, rate, unit) -> float:
+    return round(W_NAME * name + W_RATE * rate + W_UNIT * unit, 4)
+
+
 def _pair_score(line, po) -> float:
-    return round(
-        W_NAME * _name_score(line.get("description"), po.get("item_name"))
-        + W_RATE * _rate_score(line.get("rate"), po.get("quote"))
-        + W_UNIT * _unit_score(line.get("unit"), po.get("unit")),
-        4,
+    return _combine(
+        _name_score(line.get("description"), po.get("item_name")),
+        _rate_score(line.get("rate"), po.get("quote")),
+        _unit_score(line.get("unit"), po.get("unit")),
     )
 
 
+# round(x, 4) >= MATCH_THRESHOLD can hold for x a hair below the threshold, so a
+# pair is only pruned when its upper bound is below the threshold by this margin.
+_PRUNE_EPS = 1e-4
+
+
+def _scored_pairs(lines, pos, skip=frozenset()) -> list:
+    """Every (score, i, j) with score >= MATCH_THRESHOLD — identical to scoring all
+    pairs with `_pair_score`, without computing the ratio for hopeless pairs.
+
+    Per pair, rate + unit are cheap and exact; the name score is
+    max(ratio, (ratio + overlap) / 2), so an upper bound on `ratio` bounds the
+    whole pair. Overlap comes from the inverted index; the ratio bound is
+    real_quick_ratio (lengths only), then quick_ratio (character multiset), and
+    only a pair that survives both gets the real ratio. One SequenceMatcher per
+    PO item is reused across lines (seq2's index is built once).
+    """
+    names = [(po.get("item_name") or "").strip().lower() for po in pos]
+    name_tokens = [_tokens(n) for n in names]
+    index = defaultdict(list)
+    for j, toks in enumerate(name_tokens):
+        for t in toks:
+            index[t].append(j)
+    matchers = {}
+
+    floor = MATCH_THRESHOLD - _PRUNE_EPS
+    out = []
+    for i, ln in enumerate(lines):
+        if i in skip:
+            continue
+        desc = (ln.get("description") or "").strip().lower()
+        dt = _tokens(desc)
+        shared = defaultdict(int)
+        for t in dt:
+            for j in index.get(t, ()):
+                shared[j] += 1
+        for j, po in enumerate(pos):
+            rate = _rate_score(ln.get("rate"), po.get("quote"))
+            unit = _unit_score(ln.get("unit"), po.get("unit"))
+            rest = W_RATE * rate + W_UNIT * unit
+            n = names[j]
+            if not desc or not n:
+                name = 0.0
+            else:
+                nt = name_tokens[j]
+                overlap = shared[j] / min(len(dt), len(nt)) if dt and nt else 0.0
+                sm = matchers.get(j)
+                if sm is None:
+                    sm = matchers[j] = SequenceMatcher(None, "", n)
+                sm.set_seq1(desc)
+                bound = sm.real_quick_ratio()
+                if W_NAME * max(bound, 0.5 * bound + 0.5 * overlap) + rest < floor:
+                    continue
+                bound = sm.quick_ratio()
+                if W_NAME * max(bound, 0.5 * bound + 0.5 * overlap) + rest < floor:
+                    continue
+                ratio = sm.ratio()
+                name = max(ratio, 0.5 * ratio + 0.5 * overlap)
+            score = _combine(name, rate, unit)
+            if score >= MATCH_THRESHOLD:
+                out.append((score, i, j))
+    return out
+
+
+def _hungarian(cost) -> dict:
+    """Min-cost assignment for an n x m matrix with n <= m (Kuhn-Munkres with
+    potentials, O(n^2 m)). Returns {row: col} with every row assigned."""
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    p, way = [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], inf, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return {p[j] - 1: j - 1 for j in range(1, m + 1) if p[j]}
+
+
+def _assign(pairs) -> dict:
+    """Optimal one-to-one selection over above-threshold (score, i, j) pairs.
+
+    Objective: the MOST lines matched, then the highest total score among those
+    (each edge is weighted score + a constant larger than any component's total
+    score). Solved per connected component of the line/PO-item graph — real
+    invoices split into many small clusters of look-alike items, so the cubic
+    step only ever sees a handful of rows. Returns {i: (j, score)}.
+    """
+    by_line, by_po = defaultdict(list), defaultdict(list)
+    for score, i, j in pairs:
+        by_line[i].append((j, score))
+        by_po[j].append(i)
+
+    chosen, seen = {}, set()
+    for start in sorted(by_line):
+        if start in seen:
+            continue
+        rows, cols, stack = set(), set(), [start]
+        while stack:
+            i = stack.pop()
+            if i in rows:
+                continue
+            rows.add(i)
+            for j, _ in by_line[i]:
+                if j not in cols:
+                    cols.add(j)
+                    stack.extend(by_po[j])
+        seen |= rows
+        rows, cols = sorted(rows), sorted(cols)
+
+        if len(rows) == 1:
+            # One line: its best item (ties -> the lowest PO row).
+            j, score = max(by_line[rows[0]], key=lambda e: (e[1], -e[0]))
+            chosen[rows[0]] = (j, score)
+            continue
+
+        big = len(rows) + 1.0
+        col_at = {j: k for k, j in enumerate(cols)}
+        weight = [[0.0] * len(cols) for _ in rows]
+        for r, i in enumerate(rows):
+            for j, score in by_line[i]:
+                weight[r][col_at[j]] = score + big
+        transpose = len(rows) > len(cols)
+        if transpose:
+            weight = [list(col) for col in zip(*weight)]
+        picked = _hungarian([[-w for w in row] for row in weight])
+        for a, b in picked.items():
+            r, c = (b, a) if transpose else (a, b)
+            w = weight[a][b]
+            if w:
+                chosen[rows[r]] = (cols[c], round(w - big, 4))
+    return chosen
+
+
 def _verify_match(line, po) -> bool:
     """Backend ratification of a model-proposed match: accept only if the numbers
     OR the name independently corroborate it, so Gemini can't map arbitrarily."""
@@ -160,20 +333,11 @@ def match_invoice_lines_to_po(line_items, po_items, residue_mapper=None) -> dict
         if _NON_ITEM_RE.search(ln.get("description") or "")
     }
 
-    # Greedy one-to-one over all scored pairs, best first.
-    pairs = sorted(
-        (
-            (_pair_score(ln, po), i, j)
-            for i, ln in enumerate(lines) if i not in non_item_idx
-            for j, po in enumerate(pos)
-        ),
-        reverse=True,
-    )
-    chosen, used_line, used_po, source = {}, set(), set(), {}
-    for score, i, j in pairs:
-        if score < MATCH_THRESHOLD or i in used_line or j in used_po:
-            continue
-        chosen[i] = (j, score); used_line.add(i); used_po.add(j); source[i] = "fuzzy"
+    # Optimal one-to-one over the above-threshold pairs (see _assign).
+    chosen = _assign(_scored_pairs(lines, pos, skip=non_item_idx))
+    used_line = set(chosen)
+    used_po = {j for j, _ in chosen.values()}
+    source = {i: "fuzzy" for i in chosen}
 
     # Residue (unmatched, non-charge lines) → optional Gemini fallback, re-verified.
     residue = [i for i in range(len(lines)) if i not in used_line and i not in non_item_idx]
@@ -0,0 +1,115 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for delta maintenance of `amount_invoiced`: the per-event deltas, the one
+UPDATE they become, the set-based `invoice_qty` write, and the nightly verifier.
+
+`frappe.db` is patched, so no site is needed:
+    python -m unittest nirmaan_stack.api.invoices.test_amount_invoiced_delta
+"""
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.api.invoices import _item_billing_sync as sync
+from nirmaan_stack.integrations.controllers import vendor_invoices as vi
+from nirmaan_stack.tasks import invoice_total_verify as verify
+
+PO = "Procurement Orders"
+SR = "Service Requests"
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+def _invoice(status="Approved", amount=100, parent="PO-1", doctype=PO, before=None):
+    doc = _Row(status=status, invoice_amount=amount, document_type=doctype, document_name=parent)
+    doc.get_doc_before_save = lambda: before
+    return doc
+
+
+class TestParentDeltas(unittest.TestCase):
+    def test_insert_and_delete_use_the_invoices_own_status(self):
+        self.assertEqual(vi._parent_deltas(_invoice(), "on_update"), {(PO, "PO-1"): 100})
+        self.assertEqual(vi._parent_deltas(_invoice(), "after_delete"), {(PO, "PO-1"): -100})
+        self.assertEqual(vi._parent_deltas(_invoice(status="Pending"), "on_update"), {})
+        self.assertEqual(vi._parent_deltas(_invoice(status="Rejected"), "after_delete"), {})
+
+    def test_status_flips_add_or_remove_the_whole_amount(self):
+        approve = _invoice(before=_invoice(status="Pending"))
+        reject = _invoice(status="Rejected", before=_invoice())
+        self.assertEqual(vi._parent_deltas(approve, "on_update"), {(PO, "PO-1"): 100})
+        self.assertEqual(vi._parent_deltas(reject, "on_update"), {(PO, "PO-1"): -100})
+
+    def test_an_edit_moves_by_the_difference_and_a_repoint_moves_both(self):
+        edit = _invoice(amount=250, before=_invoice())
+        self.assertEqual(vi._parent_deltas(edit, "on_update"), {(PO, "PO-1"): 150})
+        repoint = _invoice(amount=80, parent="SR-1", doctype=SR, before=_invoice())
+        self.assertEqual(vi._parent_deltas(repoint, "on_update"), {(PO, "PO-1"): -100, (SR, "SR-1"): 80})
+
+    def test_saves_that_cannot_move_the_sum_return_nothing(self):
+        self.assertEqual(vi._parent_deltas(_invoice(before=_invoice()), "on_update"), {})
+        pending_edit = _invoice(status="Pending", amount=999, before=_invoice(status="Pending"))
+        self.assertEqual(vi._parent_deltas(pending_edit, "on_update"), {})
+
+
+class _PatchedDb(unittest.TestCase):
+    def setUp(self):
+        for module in (sync, verify):
+            for target, value in (("db", MagicMock()), ("session", SimpleNamespace(user="acc@x")),
+                                  ("log_error", MagicMock())):
+                patcher = patch.object(module.frappe, target, value)
+                patcher.start()
+                self.addCleanup(patcher.stop)
+        self.db = sync.frappe.db
+
+
+class TestApplyDelta(_PatchedDb):
+    def test_a_po_moves_amount_due_in_the_same_statement(self):
+        sync.apply_document_amount_invoiced_delta(PO, "PO-1", -40)
+        query, values = self.db.sql.call_args.args
+        self.assertIn('UPDATE "tabProcurement Orders"', query)
+        self.assertIn("amount_invoiced = COALESCE(amount_invoiced, 0) + %(delta)s", query)
+        self.assertIn('amount_due = COALESCE(amount_invoiced, 0) + %(delta)s - COALESCE("amount_paid", 0)', query)
+        self.assertEqual((values["delta"], values["dn"], values["user"]), (-40, "PO-1", "acc@x"))
+
+    def test_an_sr_leaves_amount_due_alone_and_guards_are_no_ops(self):
+        sync.apply_document_amount_invoiced_delta(SR, "SR-1", 10)
+        self.assertNotIn("amount_due", self.db.sql.call_args.args[0])
+        self.db.sql.reset_mock()
+        for args in ((PO, "PO-1", 0), (PO, "", 5), ("Project Payments", "X", 5)):
+            sync.apply_document_amount_invoiced_delta(*args)
+        self.db.sql.assert_not_called()
+
+
+class TestInvoiceQtyWrite(_PatchedDb):
+    def test_all_rows_in_one_statement(self):
+        sync._write_invoice_qty([("ROW-1", 2), ("ROW-2", 0), ("ROW-3", 1.5)])
+        self.db.sql.assert_called_once()
+        query, values = self.db.sql.call_args.args
+        self.assertEqual(query.count("CAST(%s AS numeric)"), 3)
+        self.assertIn("IS DISTINCT FROM", query)
+        self.assertEqual(values, ["ROW-1", 2, "ROW-2", 0, "ROW-3", 1.5])
+
+
+class TestVerifier(_PatchedDb):
+    def test_drift_is_logged_and_healed(self):
+        drifted = [_Row(document_type=PO, name="PO-1", stored=900, expected=1000,
+                        stored_due=900, expected_due=1000)]
+        with patch.object(verify, "find_amount_invoiced_drift", return_value=drifted), \
+                patch.object(verify, "recompute_document_amount_invoiced") as recompute:
+            self.assertEqual(verify.verify_invoice_totals(), drifted)
+        recompute.assert_called_once_with(PO, "PO-1")
+        self.assertIn("PO-1", verify.frappe.log_error.call_args.kwargs["message"])
+        verify.frappe.db.commit.assert_called_once()
+
+    def test_no_drift_logs_nothing(self):
+        self.db.sql.return_value = []
+        self.assertEqual(verify.verify_invoice_totals(), [])
+        self.assertEqual(self.db.sql.call_count, 2)  # one grouped statement per doctype
+        verify.frappe.log_error.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,11 +13,12 @@ Locks in the load-bearing rules that are easy to "clean up" into bugs:
         Service Requests    total_amount    - amount_paid
     Harmonising them is a bug. `test_sr_amount_due_ignores_amount_invoiced` fails
     if anyone does.
-  * Both are RECOMPUTED FROM SOURCE, never incremented by a delta, so a repeat call
+  * The recompute functions work FROM SOURCE, never by a delta, so a repeat call
     is a no-op and a poisoned value repairs itself.
-  * The Vendor Invoices doc events fire on insert / update / delete, recompute BOTH
-    parents when an invoice is re-pointed, and skip the work when a save touched no
-    total-affecting field.
+  * The Vendor Invoices doc events move the total by DELTAS on insert / update /
+    delete, move BOTH parents when an invoice is re-pointed, and skip the work when
+    a save touched no total-affecting field. The nightly verifier finds what a
+    delta landed on wrong and heals it with the recompute.
 
 Fixtures use `db_insert()` to bypass controller hooks and mandatory-field validation
 where we only need the fields the recompute reads. Tests that must exercise the doc
@@ -189,9 +190,9 @@ class TestDocumentAmountFields(FrappeTestCase):
         vi.reload(); vi.delete(ignore_permissions=True)
         self.assertAlmostEqual(_get("Procurement Orders", self.PO, "amount_invoiced"), 0)
 
-    def test_repointing_an_invoice_recomputes_both_parents(self):
+    def test_repointing_an_invoice_moves_both_parents(self):
         """The parent link is a watched field: the order it LEFT still holds a total
-        that includes it, so BOTH sides must be recomputed."""
+        that includes it, so BOTH sides must move."""
         vi = self._real_vi(300, status="Approved")
         self.assertAlmostEqual(_get("Procurement Orders", self.PO, "amount_invoiced"), 300)
 
@@ -207,6 +208,25 @@ class TestDocumentAmountFields(FrappeTestCase):
         vi.reload(); vi.reconciliation_status = "na"; vi.save(ignore_permissions=True)
         self.assertAlmostEqual(_get("Procurement Orders", self.PO, "amount_invoiced"), POISON)
 
+    def test_verifier_finds_and_heals_a_total_written_around_the_hooks(self):
+        """A delta lands on whatever is stored; the verifier is what repairs a bad base."""
+        from nirmaan_stack.tasks.invoice_total_verify import verify_invoice_totals
+
+        self._real_vi(200, status="Approved")
+        _poison("Procurement Orders", self.PO, "amount_invoiced")
+        self._real_vi(50, status="Approved")
+        self.assertAlmostEqual(_get("Procurement Orders", self.PO, "amount_invoiced"), POISON + 50)
+
+        real_commit = frappe.db.commit
+        frappe.db.commit = lambda *a, **k: None
+        try:
+            drifted = verify_invoice_totals()
+        finally:
+            frappe.db.commit = real_commit
+        self.assertIn(self.PO, [d.name for d in drifted])
+        self.assertAlmostEqual(_get("Procurement Orders", self.PO, "amount_invoiced"), 250)
+        self.assertAlmostEqual(_get("Procurement Orders", self.PO, "amount_due"), 250)
+
 
 class TestInvoiceLifecycleKeepsAmountInvoicedTrue(FrappeTestCase):
     """APPROVE / EDIT / DELETE an invoice -> `amount_invoiced` and `amount_due` follow.
@@ -6,13 +6,22 @@
 Pure functions — no Frappe site needed. Run inside the bench venv:
     python -m unittest nirmaan_stack.api.invoices.test_line_match
 """
+import json
+import os
 import unittest
 
 from nirmaan_stack.api.invoices._line_match import (
+    MATCH_THRESHOLD,
+    _NON_ITEM_RE,
+    _assign,
     _norm_unit,
+    _pair_score,
+    _scored_pairs,
     match_invoice_lines_to_po,
 )
 
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "line_match_large.json")
+
 PO = [
     {"item_id": "ITM-1", "item_name": "Cement OPC 53 Grade", "unit": "Bags",
      "quantity": 100, "received_quantity": 0, "quote": 350.0, "amount": 35000.0},
@@ -96,6 +105,58 @@ class TestGeminiResidue(unittest.TestCase):
         self.assertEqual(calls, [])  # everything matched by fuzzy → no model call
 
 
+class TestOptimalAssignment(unittest.TestCase):
+    def test_beats_greedy_trap(self):
+        # Greedy takes the single strongest pair (line 0 -> item 0) and strands
+        # line 1, whose only candidate is item 0. The optimal assignment matches both.
+        pairs = [(0.95, 0, 0), (0.60, 0, 1), (0.60, 1, 0)]
+        self.assertEqual(_assign(pairs), {0: (1, 0.6), 1: (0, 0.6)})
+
+    def test_prefers_higher_total_at_equal_count(self):
+        pairs = [(0.90, 0, 0), (0.70, 0, 1), (0.60, 1, 0), (0.90, 1, 1)]
+        self.assertEqual(_assign(pairs), {0: (0, 0.9), 1: (1, 0.9)})
+
+    def test_more_lines_than_items(self):
+        pairs = [(0.80, 0, 0), (0.90, 1, 0), (0.70, 2, 0)]
+        self.assertEqual(_assign(pairs), {1: (0, 0.9)})
+
+    def test_no_pairs(self):
+        self.assertEqual(_assign([]), {})
+
+
+class TestLargeInvoiceRegression(unittest.TestCase):
+    """150 invoice lines vs a 200-item PO (fixtures/line_match_large.json)."""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(FIXTURE) as fh:
+            data = json.load(fh)
+        cls.lines = data["invoice_lines"]
+        cls.po = data["po_items"]
+        cls.truth = data["expected_po_item_id"]
+
+    def test_pruned_scoring_equals_brute_force(self):
+        skip = {i for i, ln in enumerate(self.lines) if _NON_ITEM_RE.search(ln["description"] or "")}
+        brute = [
+            (_pair_score(ln, po), i, j)
+            for i, ln in enumerate(self.lines) if i not in skip
+            for j, po in enumerate(self.po)
+        ]
+        expected = sorted(p for p in brute if p[0] >= MATCH_THRESHOLD)
+        self.assertEqual(sorted(_scored_pairs(self.lines, self.po, skip=skip)), expected)
+
+    def test_match_quality(self):
+        res = match_invoice_lines_to_po(self.lines, self.po)
+        correct = sum(
+            1 for m, want in zip(res["mappings"], self.truth)
+            if want and m["po_item_id"] == want
+        )
+        self.assertEqual(res["summary"]["non_item"], 3)
+        self.assertEqual(res["summary"]["matched"], 150)
+        # Greedy selection got 143/150 right on this fixture; never regress below it.
+        self.assertGreaterEqual(correct, 147)
+
+
 class TestUomNormalization(unittest.TestCase):
     def test_synonyms_normalize_equal(self):
         self.assertEqual(_norm_unit("Nos"), _norm_unit("No."))
@@ -1,10 +1,26 @@
 """
 API for generating and merging milestone report PDFs.
 Provides endpoints for single zone and all zones PDF downloads.
+
+Each merged download has two entry points over one merge helper: the original
+synchronous endpoint (returns the PDF in the response) and an `enqueue_*` twin
+that runs it on the shared job runner (api/background_jobs.py) and streams
+progress over the `milestone_reports_*` realtime events — a many-zone project
+no longer pins a web worker for the whole render.
+
+Both render through `pdf_helper.batch_render`: every zone's HTML first, then the
+wkhtmltopdf conversions in a bounded pool, merged straight into a temp file that
+the response streams. Completed zone reports are reused from `render_cache`,
+keyed on everything the print format reads.
 """
 import frappe
-import io
-from pypdf import PdfWriter, PdfReader
+from frappe.utils import today
+
+from nirmaan_stack.api.background_jobs import start_job, write_temp_artifact
+from nirmaan_stack.api.pdf_helper.batch_render import PrintItem, write_merged
+from nirmaan_stack.api.pdf_helper.bulk_download import fetch_temp_file
+
+JOB_KIND = "milestone_reports"
 
 
 # @frappe.whitelist()
@@ -54,6 +70,112 @@ from pypdf import PdfWriter, PdfReader
 #         frappe.throw(f"Failed to generate PDF: {str(e)}")
 
 
+def _zone_report_items(project_id, report_date, is_admin="0"):
+    """One PrintItem per completed zone report for project/date."""
+    # Ensure the admin flag is visible to the Jinja template via form_dict,
+    # regardless of how get_print re-initialises the render context.
+    frappe.local.form_dict["is_admin"] = is_admin
+
+    # 1. Get all completed reports for this project on this date
+    reports = frappe.get_all(
+        "Project Progress Reports",
+        filters={
+            "project": project_id,
+            "report_date": report_date,
+            "report_status": "Completed"
+        },
+        fields=["name", "report_zone", "owner"],
+        order_by="report_zone asc"
+    )
+
+    if not reports:
+        frappe.throw(f"No completed reports found for project on {report_date}")
+
+    # Completed reports are reused through render_cache, which keys on the report's
+    # and the print format's `modified`. The template also reads the project, the
+    # report owner's Nirmaan Users record, Work Headers / Work Milestones and
+    # Project GST live, so their state goes into the variant alongside is_admin.
+    stamp = _milestone_report_stamp(project_id)
+    owners = _nirmaan_user_modified({report.owner for report in reports})
+    return [
+        PrintItem(
+            "Project Progress Reports", report.name, "Milestone Report",
+            label=f"zone {report.report_zone}", cache=True,
+            variant=f"is_admin={is_admin}|{stamp}|user={owners.get(report.owner)}",
+        )
+        for report in reports
+    ]
+
+
+def _milestone_report_stamp(project_id):
+    """`modified` of the project plus (row count, latest `modified`) of each master
+    table the Milestone Report print format reads; a count catches deletions."""
+    row = frappe.db.sql(
+        """
+        SELECT
+            (SELECT modified FROM "tabProjects" WHERE name = %(project)s),
+            (SELECT COUNT(*) || '/' || COALESCE(MAX(modified)::text, '') FROM "tabWork Headers"),
+            (SELECT COUNT(*) || '/' || COALESCE(MAX(modified)::text, '') FROM "tabWork Milestones"),
+            (SELECT COUNT(*) || '/' || COALESCE(MAX(modified)::text, '') FROM "tabProject GST")
+        """,
+        {"project": project_id},
+    )[0]
+    return "project={}|headers={}|milestones={}|gst={}".format(*row)
+
+
+def _nirmaan_user_modified(users):
+    """{user: Nirmaan Users.modified} for the report owners that have a record."""
+    users = [u for u in users if u]
+    if not users:
+        return {}
+    return dict(frappe.get_all(
+        "Nirmaan Users",
+        filters={"name": ["in", users]},
+        fields=["name", "modified"],
+        as_list=True,
+    ))
+
+
+def _overall_zone_items(project_id, is_admin="0"):
+    """The 14-day Overall report once per project zone, as PrintItems."""
+    # Ensure the admin flag is visible to the Jinja template via form_dict.
+    frappe.local.form_dict["is_admin"] = is_admin
+
+    # 1. Fetch project to get list of zones
+    project = frappe.get_doc("Projects", project_id)
+    if not project:
+        frappe.throw(f"Project not found: {project_id}")
+
+    # Get zones from child table 'project_zones'
+    zones = [z.zone_name for z in project.project_zones]
+
+    if not zones:
+        frappe.throw("No zones found for this project")
+
+    zones.sort() # Sort alphabetically
+
+    # 2. One item per zone. We pass a 'doc' object with 'report_zone' set (in-memory) to
+    # get_print, so the print format picks up 'doc.report_zone' without patching the
+    # global frappe.form_dict. Each zone gets its own fresh copy of the project doc to
+    # avoid any caching or reference issues in get_print / Jinja context.
+    # Not cached: the report reads the last 14 days of progress reports, which the
+    # Projects doc's `modified` does not track.
+    items = []
+    for zone in zones:
+        project_doc = frappe.get_doc("Projects", project_id)
+        project_doc.report_zone = zone
+        items.append(PrintItem(
+            "Projects", project_id, "Overall Milestones Report",
+            label=f"zone {zone}", doc=project_doc, no_letterhead=0,
+        ))
+    return items
+
+
+def _write_pdf(items, on_progress=None):
+    """Render and merge `items` into a temp download; returns its token."""
+    return write_temp_artifact(write=lambda f: write_merged(items, f, on_progress))
+
+
 @frappe.whitelist()
 def get_merged_zone_reports_pdf(project_id: str, report_date: str, is_admin: str = "0"):
     """
@@ -70,69 +192,33 @@ def get_merged_zone_reports_pdf(project_id: str, report_date: str, is_admin: str
         Merged PDF file download
     """
     try:
-        # Ensure the admin flag is visible to the Jinja template via form_dict,
-        # regardless of how get_print re-initialises the render context.
-        frappe.local.form_dict["is_admin"] = is_admin
-
-        # 1. Get all completed reports for this project on this date
-        reports = frappe.get_all(
-            "Project Progress Reports",
-            filters={
-                "project": project_id,
-                "report_date": report_date,
-                "report_status": "Completed"
-            },
-            fields=["name", "report_zone"],
-            order_by="report_zone asc"
-        )
-        
-        if not reports:
-            frappe.throw(f"No completed reports found for project on {report_date}")
-        
-        # 2. Generate PDF for each report
-        merger = PdfWriter()
-        
-        for report in reports:
-            try:
-                pdf_content = frappe.get_print(
-                    "Project Progress Reports",
-                    report.name,
-                    print_format="Milestone Report",
-                    as_pdf=True
-                )
-                
-                # Add to merger
-                reader = PdfReader(io.BytesIO(pdf_content))
-                for page in reader.pages:
-                    merger.add_page(page)
-                    
-            except Exception as e:
-                frappe.log_error(
-                    message=str(e),
-                    title=f"PDF generation failed for report: {report.name}"
-                )
-                # Continue with other reports
-        
-        # 3. Output merged PDF
-        output = io.BytesIO()
-        merger.write(output)
-        merger.close()
-        
-        merged_pdf = output.getvalue()
-        
-        if not merged_pdf:
-            frappe.throw("Failed to merge PDFs")
-        
-        # 4. Return as download
-        frappe.local.response.filename = f"{project_id}_all_zones_{report_date}.pdf"
-        frappe.local.response.filecontent = merged_pdf
-        frappe.local.response.type = "download"
-        
+        token = _write_pdf(_zone_report_items(project_id, report_date, is_admin))
+        # Streamed from the temp file, never held whole in memory.
+        return fetch_temp_file(token, f"{project_id}_all_zones_{report_date}.pdf")
+
     except Exception as e:
         frappe.log_error(f"Error in get_merged_zone_reports_pdf: {e}")
         frappe.throw(f"Failed to generate merged PDF: {str(e)}")
 
 
+@frappe.whitelist()
+def enqueue_merged_zone_reports_pdf(project_id: str, report_date: str, is_admin: str = "0"):
+    """Background twin of get_merged_zone_reports_pdf. Returns {status, job_id} immediately;
+    progress / token / failure arrive on the milestone_reports_* realtime events."""
+    return start_job(
+        JOB_KIND,
+        "nirmaan_stack.api.milestone.print_milestone_reports._zone_reports_job",
+        filename=f"{project_id}_all_zones_{report_date}.pdf",
+        project_id=project_id,
+        report_date=report_date,
+        is_admin=is_admin,
+    )
+
+
+def _zone_reports_job(job, project_id, report_date, is_admin="0"):
+    return {"token": _write_pdf(_zone_report_items(project_id, report_date, is_admin), job.progress)}
+
+
 @frappe.whitelist()
 def get_report_doc_name(project_id: str, report_date: str, zone: str):
     """
@@ -172,76 +258,25 @@ def get_all_zones_overall_report_pdf(project_id: str, is_admin: str = "0"):
         Merged PDF file download
     """
     try:
-        # Ensure the admin flag is visible to the Jinja template via form_dict.
-        frappe.local.form_dict["is_admin"] = is_admin
-
-        # 1. Fetch project to get list of zones
-        project = frappe.get_doc("Projects", project_id)
-        if not project:
-            frappe.throw(f"Project not found: {project_id}")
-            
-        # Get zones from child table 'project_zones'
-        zones = [z.zone_name for z in project.project_zones]
-        
-        if not zones:
-            frappe.throw("No zones found for this project")
-            
-        zones.sort() # Sort alphabetically
-        
-        merger = PdfWriter()
-        
-        # 2. Iterate each zone and generate PDF
-        # We pass the modified 'doc' object with 'report_zone' set (in-memory) to get_print.
-        # This allows the print format to pick up 'doc.report_zone' without patching global frappe.form_dict.
-        
-        for zone in zones:
-            # Re-fetch the project doc for each iteration to avoid any potential
-            # caching or reference issues in get_print / Jinja context.
-            project_doc = frappe.get_doc("Projects", project_id)
-            
-            # Inject zone into the doc object
-            project_doc.report_zone = zone
-            print(f"CountZone:{zone}")
-            
-            try:
-                pdf_content = frappe.get_print(
-                    "Projects",
-                    project_id,
-                    print_format="Overall Milestones Report",
-                    no_letterhead=0,
-                    as_pdf=True,
-                    doc=project_doc
-                )
-                
-                # Add to merger
-                reader = PdfReader(io.BytesIO(pdf_content))
-                for page in reader.pages:
-                    merger.add_page(page)
-                    
-            except Exception as e:
-                frappe.log_error(
-                    message=str(e),
-                    title=f"PDF generation failed for zone: {zone}"
-                )
-        
-        # 3. Output merged PDF
-        output = io.BytesIO()
-        merger.write(output)
-        merger.close()
-        
-        merged_pdf = output.getvalue()
-        
-        if not merged_pdf:
-            frappe.throw("Failed to merge PDFs")
-        
-        # 4. Return as download
-        from frappe.utils import today
-        date_str = today()
-        
-        frappe.local.response.filename = f"{project_id}_Overall_14Days_AllZones_{date_str}.pdf"
-        frappe.local.response.filecontent = merged_pdf
-        frappe.local.response.type = "download"
-        
+        token = _write_pdf(_overall_zone_items(project_id, is_admin))
+        return fetch_temp_file(token, f"{project_id}_Overall_14Days_AllZones_{today()}.pdf")
+
     except Exception as e:
         frappe.log_error(f"Error in get_all_zones_overall_report_pdf: {e}")
         frappe.throw(f"Failed to generate merged PDF: {str(e)}")
+
+
+@frappe.whitelist()
+def enqueue_all_zones_overall_report_pdf(project_id: str, is_admin: str = "0"):
+    """Background twin of get_all_zones_overall_report_pdf (see enqueue_merged_zone_reports_pdf)."""
+    return start_job(
+        JOB_KIND,
+        "nirmaan_stack.api.milestone.print_milestone_reports._overall_zones_job",
+        filename=f"{project_id}_Overall_14Days_AllZones_{today()}.pdf",
+        project_id=project_id,
+        is_admin=is_admin,
+    )
+
+
+def _overall_zones_job(job, project_id, is_admin="0"):
+    return {"token": _write_pdf(_overall_zone_items(project_id, is_admin), job.progress)}
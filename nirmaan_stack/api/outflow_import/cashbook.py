@@ -55,6 +55,7 @@ from nirmaan_stack.api.outflow_import.expenses import (
 )
 from nirmaan_stack.api.outflow_import.permissions import require_outflow_access
 from nirmaan_stack.api.outflow_import.review import _StagedRow
+from nirmaan_stack.services import deferred_recompute
 from nirmaan_stack.services.outflow_import.candidates import (
     load_expense_rules,
     load_project_aliases,
@@ -219,23 +220,27 @@ def _cashbook_worker(batch: str, actor: str):
         as_dict=True,
     )
 
-    for entry in rows:
-        try:
-            _write_one(entry["name"], batch, actor, statement_file_url)
-            frappe.db.commit()
-        except Exception:
-            frappe.db.rollback()
-            frappe.log_error(
-                title="Cashbook import: could not create an expense",
-                message=f"{batch} / {entry['name']}\n\n{frappe.get_traceback()}",
-            )
-            frappe.db.set_value(
-                ROW_DOCTYPE,
-                entry["name"],
-                {"row_status": ROW_ERROR, "outcome_note": "Could not create this expense."},
-                update_modified=False,
-            )
-            frappe.db.commit()
+    # Every expense is created Paid, so every insert re-evaluates its project's CEO Hold. The
+    # scope runs that once per project, after the last row -- on the final gap, where the
+    # per-job dedup flag alone would evaluate the first row's and skip the rest.
+    with deferred_recompute.coalescing():
+        for entry in rows:
+            try:
+                _write_one(entry["name"], batch, actor, statement_file_url)
+                frappe.db.commit()
+            except Exception:
+                frappe.db.rollback()
+                frappe.log_error(
+                    title="Cashbook import: could not create an expense",
+                    message=f"{batch} / {entry['name']}\n\n{frappe.get_traceback()}",
+                )
+                frappe.db.set_value(
+                    ROW_DOCTYPE,
+                    entry["name"],
+                    {"row_status": ROW_ERROR, "outcome_note": "Could not create this expense."},
+                    update_modified=False,
+                )
+                frappe.db.commit()
 
     _refresh_batch_rollup(batch)
     frappe.db.commit()
@@ -2,7 +2,7 @@ import re
 
 import frappe
 
-from nirmaan_stack.services.extraction import extract
+from nirmaan_stack.services.extraction.cache import extract_cached
 from nirmaan_stack.services.extraction.files import (
     SUPPORTED_EXTS,
     fetch_file_content,
@@ -45,7 +45,8 @@ def extract_payment_fields(file_url):
     Called from the New Payments → Pay dialog when the user selects an
     attachment. Only fields the model could read are returned populated;
     everything else comes back empty for manual entry. The response is never
-    persisted server-side.
+    persisted server-side; the raw provider result is served from the
+    content-hash extraction cache when the receipt was already read.
     """
     if not file_url:
         frappe.throw("file_url is required")
@@ -70,7 +71,9 @@ def extract_payment_fields(file_url):
         frappe.throw("Could not read file content.")
 
     # Payment receipts have no line-item table — the third return value is always [].
-    _, entities, _ = extract(content, file_ext, settings, doc_kind="payment")
+    _, entities, _ = extract_cached(
+        content, file_ext, settings, doc_kind="payment", file_url=file_url
+    )
 
     utr, utr_conf = pick_entity(entities, UTR_KEYS)
     payment_date, payment_date_conf = pick_entity(entities, PAYMENT_DATE_KEYS, prefer_normalized=True)
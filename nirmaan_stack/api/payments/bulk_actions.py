@@ -5,13 +5,16 @@ Two endpoints, same engine:
   * bulk_lead_approve_payments   — Admin promoting Requested → CEO Pending / Rejected
   * bulk_ceo_approve_payments    — CEO promoting CEO Pending → Approved / Rejected
 
-Race-safe by design:
-  * Locks each PO row (SELECT ... FOR UPDATE) before mutating its terms,
-    serializing against single-row approve / other bulk runs / PO revision.
-  * One po_doc.save() per PO group, regardless of how many payments touch it.
-  * Per-payment status guard so stale rows are reported, not silently overwritten.
-  * Suppresses the per-payment notification cascade via flags.bulk_approval and
-    emits one summary notification per recipient at the end.
+Set-based and race-safe by design:
+  * Locks every parent PO row, then every payment row, in one ordered
+    SELECT ... FOR UPDATE each, serializing against single-row approve / other
+    bulk runs / PO revision without holding the locks across per-row saves.
+  * Validates status and CEO Hold for the whole batch in that one read, so stale
+    rows are reported, not silently overwritten.
+  * Writes payment status, PO term status and the Version rows with one
+    statement per table instead of a save() per payment and per PO.
+  * Rejection comments and one summary notification per recipient go out from a
+    background job enqueued after the commit.
 """
 
 import json
@@ -23,11 +26,13 @@ import frappe
 from frappe import _
 from frappe.utils import nowdate
 
+from nirmaan_stack.api.customers.customer_financials import invalidate_customer_financials
+from nirmaan_stack.api.vendor_credit import invalidate_vendor_credit_cache
 from nirmaan_stack.constants.authorized_users import CEO_AUTHORIZED_USER
-from nirmaan_stack.integrations.Notifications.pr_notifications import (
-    get_admin_users,
-    get_allowed_accountants,
-)
+from nirmaan_stack.integrations.Notifications.pr_notifications import get_admin_users
+from nirmaan_stack.services.action_items.doc_hooks import enqueue_project_reconcile
+from nirmaan_stack.services.project_permissions import project_users
+from nirmaan_stack.services.version_rows import insert_versions, version_data
 
 MAX_BATCH_SIZE = 100
 LEAD_ALLOWED_ROLE_PROFILES = (
@@ -36,6 +41,8 @@ LEAD_ALLOWED_ROLE_PROFILES = (
     "Nirmaan Accountant Lead Profile",
 )
 REJECTED_STATUS = "Rejected"
+# Same profiles as pr_notifications.get_allowed_accountants.
+ACCOUNTANT_ROLE_PROFILES = ("Nirmaan Accountant Profile", "Nirmaan Accountant Lead Profile")
 
 
 # ---------------------------------------------------------------------------
@@ -95,19 +102,21 @@ def _ceo_recipients_for_approve(succeeded_rows: list[dict]) -> dict:
     bundles: dict = {}
 
     # ── Per-project accountants ─────────────────────────────────────────────
+    # Every project's name and accountants in two reads, not a Projects doc each.
+    project_names = dict(frappe.get_all(
+        "Projects", filters={"name": ["in", list(per_project)]}, fields=["name", "project_name"], as_list=True,
+    )) if per_project else {}
+    accountants = _accountants_by_project(list(project_names))
     for project_id, rows in per_project.items():
-        try:
-            project_doc = frappe.get_doc("Projects", project_id)
-        except frappe.DoesNotExistError:
+        if project_id not in project_names:
             continue
-        accountants = get_allowed_accountants(project_doc) or []
-        for user in accountants:
+        for user in accountants.get(project_id, []):
             key = (user.get("name"), project_id)
             bundles[key] = {
                 "user": user,
                 "count": len(rows),
                 "project_id": project_id,
-                "project_name": project_doc.project_name,
+                "project_name": project_names[project_id],
                 "sample_docname": rows[0]["name"],
             }
 
@@ -145,6 +154,25 @@ def _ceo_recipients_for_approve(succeeded_rows: list[dict]) -> dict:
     return bundles
 
 
+def _accountants_by_project(project_ids: list[str]) -> dict:
+    """{project: [accountant user dict]} — `get_allowed_accountants` for many projects at
+    once: the recipients come from the cached project-permission index, the user
+    fields from one read."""
+    members = {p: project_users(p, ACCOUNTANT_ROLE_PROFILES) for p in project_ids}
+    names = sorted({u for users in members.values() for u in users})
+    if not names:
+        return {}
+    users = {u.name: u for u in frappe.get_all(
+        "Nirmaan Users",
+        filters={"name": ["in", names], "role_profile": ["in", ACCOUNTANT_ROLE_PROFILES]},
+        fields=["fcm_token", "name", "full_name", "role_profile", "push_notification"],
+    )}
+    return {
+        project: [users[u] for u in project_accountants if u in users]
+        for project, project_accountants in members.items()
+    }
+
+
 def _ceo_user_dict():
     return frappe.db.get_value(
         "Nirmaan Users",
@@ -192,6 +220,9 @@ _CEO_CONFIG = _ModeConfig(
     approve_notification_recipients=_ceo_recipients_for_approve,
 )
 
+# The follow-up job is handed the mode by name; a config object does not serialise.
+_MODES = {"lead": _LEAD_CONFIG, "ceo": _CEO_CONFIG}
+
 
 # ---------------------------------------------------------------------------
 # Authorization
@@ -242,67 +273,27 @@ def _bulk_action(payment_ids, action: str, rejection_reason: str | None, config:
         frappe.throw(_("Rejection reason is required."))
 
     deduped_ids = list(dict.fromkeys(payment_ids))
-
-    payment_rows = frappe.get_all(
-        "Project Payments",
-        filters={"name": ["in", deduped_ids]},
-        fields=["name", "document_type", "document_name"],
-    )
-    found = {r["name"]: r for r in payment_rows}
-
-    succeeded: list[str] = []
-    failed: list[dict] = []
-
-    for pid in deduped_ids:
-        if pid not in found:
-            failed.append({"name": pid, "reason": "Payment not found"})
-
-    groups: dict[tuple, list[str]] = defaultdict(list)
-    for pid in deduped_ids:
-        if pid not in found:
-            continue
-        row = found[pid]
-        groups[(row["document_type"], row["document_name"])].append(pid)
-
     target_status = REJECTED_STATUS if action == "reject" else config.approve_target_status
 
-    # Deferred rejection-reason comments — applied AFTER the group commits,
-    # so a comment failure cannot poison the approval (fix E2).
-    pending_comments: list[str] = []
-
-    for (doc_type, doc_name), pids in groups.items():
-        _process_group(
-            doc_type=doc_type,
-            doc_name=doc_name,
-            payment_ids=pids,
+    succeeded_rows, failed = _apply(deduped_ids, action, target_status, config)
+
+    # Comments and notifications run in a job that is enqueued only once this commit
+    # lands (fix E7) — they reference state that already exists on disk, a failure in
+    # them cannot unwind the approvals (fix E2), and the request returns without
+    # waiting on the fan-out.
+    if succeeded_rows and (action == "approve" or rejection_reason):
+        frappe.enqueue(
+            "nirmaan_stack.api.payments.bulk_actions.run_followups",
+            queue="short",
+            enqueue_after_commit=True,
+            mode=_mode_key(config),
             action=action,
-            target_status=target_status,
-            approve_date_field=config.approve_date_field,
-            source_status=config.source_status,
-            succeeded=succeeded,
-            failed=failed,
-            pending_comments=pending_comments,
+            rows=succeeded_rows,
+            rejection_reason=rejection_reason,
         )
-
-    # Commit BEFORE emitting notifications / writing comments (fix E7) — push
-    # notifications and Comment rows should reference state that already exists
-    # on disk; if the engine had a fatal failure we would never reach this line.
     frappe.db.commit()
 
-    # Best-effort: rejection-reason comments. A failure here does not unwind the
-    # approvals — the comment is purely auditing.
-    if action == "reject" and rejection_reason and pending_comments:
-        _add_rejection_comments(pending_comments, rejection_reason)
-
-    if action == "approve" and succeeded:
-        try:
-            _emit_approve_summary(succeeded, config)
-        except Exception:
-            frappe.log_error(
-                title="Bulk Payment Notification Error",
-                message=frappe.get_traceback(),
-            )
-
+    succeeded = [r["name"] for r in succeeded_rows]
     return {
         "status": 200,
         "message": _("Processed {0} payments. {1} succeeded, {2} failed.").format(
@@ -317,174 +308,227 @@ def _bulk_action(payment_ids, action: str, rejection_reason: str | None, config:
 
 
 # ---------------------------------------------------------------------------
-# Per-group processing (one PO row lock + one PO save)
+# Set-based apply (one lock statement per row set, one UPDATE per table)
 # ---------------------------------------------------------------------------
 
-def _process_group(
-    doc_type: str,
-    doc_name: str,
-    payment_ids: list[str],
-    action: str,
-    target_status: str,
-    approve_date_field: Optional[str],
-    source_status: str,
-    succeeded: list[str],
-    failed: list[dict],
-    pending_comments: list[str],
-):
-    """Process all payments belonging to one parent doc atomically.
-
-    A Postgres SAVEPOINT wraps the whole group so a late failure
-    (e.g. ``po_doc.save()`` raising) rolls back every ``pay.save()`` already
-    made in this group — preventing the silent drift where payments end up in
-    the success list with their linked PO term still in the old state.
+def _apply(payment_ids: list[str], action: str, target_status: str, config: _ModeConfig):
+    """Move every eligible payment and its PO term to `target_status`; returns
+    (succeeded rows, failed [{name, reason}]).
+
+    Locks the parent POs and then the payments (the order this engine has always
+    taken), each set in ONE ``SELECT ... FOR UPDATE`` in name order, so two bulk
+    runs over overlapping sets serialise instead of deadlocking. The locks are held
+    only for the few statements below, not across a save() per row.
+
+    Nothing here goes through ``doc.save()``, so this does by hand what the hooks
+    would have done for a status move: the PO term sync, the ``Version`` rows, the
+    PO ``modified`` bump, and the vendor-credit / customer-financials cache drops.
+    The payment transitions here (Requested / CEO Pending -> CEO Pending / Approved /
+    Rejected) never enter or leave Paid, so the cashflow hold has nothing to
+    re-evaluate (see project_cashflow_hold_update.on_project_payment).
     """
+    names = tuple(payment_ids)
+    locked_pos = set(frappe.db.sql(
+        """
+        SELECT name FROM "tabProcurement Orders"
+        WHERE name IN (
+            SELECT document_name FROM "tabProject Payments"
+            WHERE name IN %(names)s AND document_type = 'Procurement Orders'
+        )
+        ORDER BY name
+        FOR UPDATE
+        """,
+        {"names": names},
+        pluck=True,
+    ))
+
+    date_field = config.approve_date_field if action == "approve" else None
+    rows = frappe.db.sql(
+        f"""
+        SELECT p.name, p.status, p.project, p.document_type, p.document_name, p.vendor, p.owner,
+               {f'p."{date_field}"' if date_field else "NULL"} AS old_date,
+               pr.status AS project_status
+        FROM "tabProject Payments" p
+        LEFT JOIN "tabProjects" pr ON pr.name = p.project
+        WHERE p.name IN %(names)s
+        ORDER BY p.name
+        FOR UPDATE OF p
+        """,
+        {"names": names},
+        as_dict=True,
+    )
 
-    po_doc = None
-    if doc_type == "Procurement Orders":
-        try:
-            frappe.db.sql(
-                'SELECT name FROM "tabProcurement Orders" WHERE name = %s FOR UPDATE',
-                doc_name,
-            )
-            po_doc = frappe.get_doc("Procurement Orders", doc_name)
-        except frappe.DoesNotExistError:
-            for pid in payment_ids:
-                failed.append({"name": pid, "reason": f"Linked PO {doc_name} not found"})
-            return
-        except Exception as exc:
-            frappe.log_error(
-                title="Bulk Payment PO Lock Error",
-                message=frappe.get_traceback(),
-            )
-            for pid in payment_ids:
-                failed.append({"name": pid, "reason": f"Could not lock linked PO: {exc}"})
-            return
+    eligible, failed = _plan_payments(payment_ids, rows, locked_pos, config.source_status)
+    if not eligible:
+        return [], failed
+
+    user, now, today = frappe.session.user, frappe.utils.now(), nowdate()
+    eligible_names = tuple(r.name for r in eligible)
+
+    frappe.db.sql(
+        f"""
+        UPDATE "tabProject Payments"
+        SET status = %(status)s, modified = %(now)s, modified_by = %(user)s
+            {f', "{date_field}" = %(today)s' if date_field else ""}
+        WHERE name IN %(names)s
+        """,
+        {"status": target_status, "now": now, "user": user, "today": today, "names": eligible_names},
+    )
 
-    savepoint = f"bulk_grp_{frappe.generate_hash(length=12)}"
-    frappe.db.savepoint(savepoint)
+    terms = frappe.db.sql(
+        """
+        SELECT name, parent, idx, project_payment, term_status
+        FROM "tabPO Payment Terms"
+        WHERE parenttype = 'Procurement Orders' AND parentfield = 'payment_terms'
+          AND project_payment IN %(names)s
+        ORDER BY parent, idx
+        """,
+        {"names": eligible_names},
+        as_dict=True,
+    )
+    changed_terms, orphans = _plan_terms(eligible, terms, target_status)
+
+    for pid in orphans:
+        row = next(r for r in eligible if r.name == pid)
+        frappe.log_error(
+            title=f"Bulk Payment Orphan Term ({pid})",
+            message=(
+                f"Payment {pid} status moved to '{target_status}' "
+                f"but no matching payment_terms row found on PO "
+                f"{row.document_name}. PO term will stay out of sync."
+            ),
+        )
 
-    local_succeeded: list[str] = []
-    local_rejection_pids: list[str] = []
-    po_dirty = False
+    changed_pos = sorted({t.parent for t in changed_terms})
+    if changed_terms:
+        frappe.db.sql(
+            """
+            UPDATE "tabPO Payment Terms"
+            SET term_status = %(status)s, modified = %(now)s, modified_by = %(user)s
+            WHERE name IN %(names)s
+            """,
+            {"status": target_status, "now": now, "user": user, "names": tuple(t.name for t in changed_terms)},
+        )
+        frappe.db.sql(
+            """
+            UPDATE "tabProcurement Orders" SET modified = %(now)s, modified_by = %(user)s
+            WHERE name IN %(names)s
+            """,
+            {"now": now, "user": user, "names": tuple(changed_pos)},
+        )
 
+    payment_versions, po_versions = _version_entries(eligible, changed_terms, target_status, date_field, today)
+    insert_versions("Project Payments", payment_versions, user, now)
+    insert_versions("Procurement Orders", po_versions, user, now)
+
+    # The cache drops the payment / PO hooks would have made.
+    invalidate_vendor_credit_cache(*{r.vendor for r in eligible if r.document_type == "Procurement Orders"})
+    invalidate_customer_financials(projects=[r.project for r in eligible])
+    # A PO save enqueued the project's action-item reconcile (after commit); keep that.
+    po_projects = {r.document_name: r.project for r in eligible}
+    for project in dict.fromkeys(po_projects.get(po) for po in changed_pos):
+        enqueue_project_reconcile(project)
+
+    succeeded_rows = [
+        {"name": r.name, "project": r.project, "document_name": r.document_name, "owner": r.owner}
+        for r in eligible
+    ]
+    return succeeded_rows, failed
+
+
+def _plan_payments(payment_ids, rows, locked_pos, source_status):
+    """Split the locked rows into (eligible rows, failed [{name, reason}]), in request order."""
+    found = {r.name: r for r in rows}
+    eligible, failed = [], []
     for pid in payment_ids:
-        try:
-            # Lock the payment row alongside the PO row (fix E4) so a single-row
-            # writer racing on the same payment serialises behind us, instead
-            # of either side hitting a TimestampMismatchError or producing a
-            # last-write-wins divergence between Project Payment.status and
-            # PO payment_terms[i].term_status.
-            frappe.db.sql(
-                'SELECT name FROM "tabProject Payments" WHERE name = %s FOR UPDATE',
-                pid,
-            )
-            pay = frappe.get_doc("Project Payments", pid)
-        except frappe.DoesNotExistError:
+        row = found.get(pid)
+        if row is None:
             failed.append({"name": pid, "reason": "Payment not found"})
-            continue
-
-        if pay.status != source_status:
+        elif row.document_type == "Procurement Orders" and row.document_name not in locked_pos:
+            failed.append({"name": pid, "reason": f"Linked PO {row.document_name} not found"})
+        elif row.status != source_status:
             failed.append({
                 "name": pid,
-                "reason": f"Status is '{pay.status}', expected '{source_status}'",
+                "reason": f"Status is '{row.status}', expected '{source_status}'",
             })
+        elif row.project_status == "CEO Hold":
+            failed.append({"name": pid, "reason": "Project is on CEO Hold"})
+        else:
+            eligible.append(row)
+    return eligible, failed
+
+
+def _plan_terms(eligible, terms, target_status):
+    """Mirrors ``_find_and_update_po_term``: the first term on the payment's own PO that
+    links to it. Returns (terms to move to `target_status`, payment names with no term)."""
+    first = {}
+    for term in terms:
+        first.setdefault((term.parent, term.project_payment), term)
+
+    changed, orphans = [], []
+    for row in eligible:
+        if row.document_type != "Procurement Orders":
             continue
+        term = first.get((row.document_name, row.name))
+        if term is None:
+            orphans.append(row.name)
+        elif term.term_status != target_status:
+            changed.append(term)
+    return changed, orphans
+
+
+def _version_entries(eligible, changed_terms, target_status, date_field, today):
+    """(payment, PO) `Version` entries — the diffs a ``pay.save()`` / ``po_doc.save()`` would log."""
+    payment_versions = []
+    for row in eligible:
+        changed = [["status", row.status, target_status]]
+        old_date = str(row.old_date) if row.old_date else None
+        if date_field and old_date != today:
+            changed.append([date_field, old_date, today])
+        payment_versions.append((row.name, version_data(changed=changed)))
+
+    by_po = defaultdict(list)
+    for term in changed_terms:
+        by_po[term.parent].append(
+            ["payment_terms", term.idx - 1, term.name, [["term_status", term.term_status, target_status]]]
+        )
+    po_versions = [(po, version_data(row_changed=rows)) for po, rows in by_po.items()]
+    return payment_versions, po_versions
 
-        if pay.project:
-            project_status = frappe.db.get_value("Projects", pay.project, "status")
-            if project_status == "CEO Hold":
-                failed.append({"name": pid, "reason": "Project is on CEO Hold"})
-                continue
 
-        try:
-            # In-memory mutations first (fix E2). PO term sync runs before
-            # pay.save() so that any orphan-term log surfaces even if the
-            # payment write later fails; ``po_dirty`` is only flipped on a
-            # successful save below.
-            pay.status = target_status
-            if action == "approve" and approve_date_field:
-                pay.set(approve_date_field, nowdate())
-
-            sync_outcome = "noop"
-            if po_doc is not None:
-                sync_outcome = _sync_po_term_in_memory(po_doc, pid, target_status)
-                if sync_outcome == "orphan":
-                    frappe.log_error(
-                        title=f"Bulk Payment Orphan Term ({pid})",
-                        message=(
-                            f"Payment {pid} status moved to '{target_status}' "
-                            f"but no matching payment_terms row found on PO "
-                            f"{doc_name}. PO term will stay out of sync."
-                        ),
-                    )
-
-            pay.flags.bulk_approval = True
-            pay.save(ignore_permissions=True)
-
-            if sync_outcome == "updated":
-                po_dirty = True
-
-            local_succeeded.append(pid)
-            if action == "reject":
-                local_rejection_pids.append(pid)
-        except Exception as exc:
-            failed.append({"name": pid, "reason": str(exc) or "Unknown error"})
-            frappe.log_error(
-                title=f"Bulk Payment Save Error ({pid})",
-                message=frappe.get_traceback(),
-            )
+# ---------------------------------------------------------------------------
+# After-commit follow-ups (background job)
+# ---------------------------------------------------------------------------
 
-    # One PO save covers all per-term mutations in this group.
-    if po_doc is not None and po_dirty:
-        try:
-            po_doc.save(ignore_permissions=True)
-        except Exception as exc:
-            # Fix E1: group rollback. Every payment we already committed in this
-            # group reverts to its old status; they all move from
-            # local_succeeded -> failed with a clear reason so the caller sees
-            # exactly what happened.
-            frappe.db.rollback(save_point=savepoint)
-            frappe.log_error(
-                title=f"Bulk Payment Group Rollback ({doc_name})",
-                message=frappe.get_traceback(),
-            )
-            for pid in local_succeeded:
-                failed.append({
-                    "name": pid,
-                    "reason": f"Group rollback — PO sync failed: {exc}",
-                })
-            return
-
-    # Group survived — release the savepoint and promote local results.
-    frappe.db.release_savepoint(savepoint)
-    succeeded.extend(local_succeeded)
-    pending_comments.extend(local_rejection_pids)
-
-
-def _sync_po_term_in_memory(po_doc, payment_name: str, new_status: str) -> str:
-    """Mirrors ``_find_and_update_po_term`` but mutates in-memory; caller saves once.
-
-    Returns one of:
-      * ``"updated"`` — a term row was modified; caller should save the PO.
-      * ``"noop"``    — matching term row already had this status.
-      * ``"orphan"``  — no matching term row found (caller should log).
+def _mode_key(config: _ModeConfig) -> str:
+    return next(key for key, value in _MODES.items() if value is config)
+
+
+def run_followups(mode: str, action: str, rows: list[dict], rejection_reason: Optional[str] = None):
+    """Rejection comments / approval summaries for a committed bulk run.
+
+    Enqueued with ``enqueue_after_commit`` by ``_bulk_action``, so it only ever sees
+    committed state, and runs as the acting user (comment author, notification sender).
     """
-    for term in po_doc.get("payment_terms") or []:
-        if term.project_payment == payment_name:
-            if term.term_status != new_status:
-                term.term_status = new_status
-                return "updated"
-            return "noop"
-    return "orphan"
+    if action == "reject":
+        if rejection_reason:
+            _add_rejection_comments([r["name"] for r in rows], rejection_reason)
+        return
+    try:
+        _emit_approve_summary(rows, _MODES[mode])
+    except Exception:
+        frappe.log_error(
+            title="Bulk Payment Notification Error",
+            message=frappe.get_traceback(),
+        )
 
 
 def _add_rejection_comments(payment_ids: list[str], rejection_reason: str):
     """Best-effort: attach a Frappe Comment to each rejected payment.
 
-    Runs AFTER the engine has committed the group (fix E2) so a comment
-    failure cannot leave the caller with a phantom-failed payment whose
-    status flip already landed.
+    Runs AFTER the engine has committed (fix E2) so a comment failure cannot
+    leave the caller with a phantom-failed payment whose status flip already
+    landed.
     """
     for pid in payment_ids:
         try:
@@ -501,14 +545,8 @@ def _add_rejection_comments(payment_ids: list[str], rejection_reason: str):
 # Summary notifications
 # ---------------------------------------------------------------------------
 
-def _emit_approve_summary(succeeded_ids: list[str], config: _ModeConfig):
+def _emit_approve_summary(rows: list[dict], config: _ModeConfig):
     """Single notification per recipient instead of N per-payment notifications."""
-    rows = frappe.get_all(
-        "Project Payments",
-        filters={"name": ["in", succeeded_ids]},
-        fields=["name", "project", "document_name", "owner"],
-    )
-
     bundles = config.approve_notification_recipients(rows)
 
     # Fix E6: visibility for misconfigured permission setups — if the engine
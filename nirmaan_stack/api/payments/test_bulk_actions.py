@@ -0,0 +1,154 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the set-based bulk payment engine: eligibility, term sync, Version diffs,
+and the statement shape of one run.
+
+`frappe.db` and the hook side effects are patched, so no site is needed:
+    python -m unittest nirmaan_stack.api.payments.test_bulk_actions
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.api.payments import bulk_actions as ba
+
+PO = "Procurement Orders"
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+def _payment(name, status="CEO Pending", po="PO-1", project="P-1", **extra):
+    row = _Row(name=name, status=status, project=project, document_type=PO, document_name=po,
+               vendor="V-1", owner="lead@x", old_date=None, project_status="WIP")
+    row.update(extra)
+    return row
+
+
+def _term(name, parent, payment, idx, status="CEO Pending"):
+    return _Row(name=name, parent=parent, project_payment=payment, idx=idx, term_status=status)
+
+
+class TestPlanning(unittest.TestCase):
+    def test_each_rejection_reason_in_request_order(self):
+        rows = [
+            _payment("PAY-2", status="Approved"),
+            _payment("PAY-3", po="PO-GONE"),
+            _payment("PAY-4", project_status="CEO Hold"),
+            _payment("PAY-5"),
+        ]
+        eligible, failed = ba._plan_payments(
+            ["PAY-1", "PAY-2", "PAY-3", "PAY-4", "PAY-5"], rows, {"PO-1"}, "CEO Pending",
+        )
+        self.assertEqual([r.name for r in eligible], ["PAY-5"])
+        self.assertEqual(failed, [
+            {"name": "PAY-1", "reason": "Payment not found"},
+            {"name": "PAY-2", "reason": "Status is 'Approved', expected 'CEO Pending'"},
+            {"name": "PAY-3", "reason": "Linked PO PO-GONE not found"},
+            {"name": "PAY-4", "reason": "Project is on CEO Hold"},
+        ])
+
+    def test_terms_follow_the_first_link_on_the_payments_own_po(self):
+        eligible = [_payment("PAY-1"), _payment("PAY-2"), _payment("PAY-3"),
+                    _Row(name="PAY-SR", document_type="Service Requests", document_name="SR-1")]
+        terms = [
+            _term("T-1", "PO-1", "PAY-1", 1),
+            _term("T-1b", "PO-1", "PAY-1", 2),           # a later duplicate link is left alone
+            _term("T-2", "PO-1", "PAY-2", 3, "Approved"),  # already there
+            _term("T-X", "PO-9", "PAY-3", 1),            # links the payment, but on another PO
+        ]
+        changed, orphans = ba._plan_terms(eligible, terms, "Approved")
+        self.assertEqual([t.name for t in changed], ["T-1"])
+        self.assertEqual(orphans, ["PAY-3"])
+
+    def test_version_diffs_match_a_save(self):
+        eligible = [_payment("PAY-1"), _payment("PAY-2", old_date="2026-10-19")]
+        with patch.object(ba, "version_data", side_effect=lambda **diff: diff):
+            payments, pos = ba._version_entries(
+                eligible, [_term("T-1", "PO-1", "PAY-1", 2)], "Approved", "ceo_approval_date", "2026-10-19",
+            )
+        self.assertEqual(payments, [
+            ("PAY-1", {"changed": [["status", "CEO Pending", "Approved"],
+                                   ["ceo_approval_date", None, "2026-10-19"]]}),
+            ("PAY-2", {"changed": [["status", "CEO Pending", "Approved"]]}),
+        ])
+        self.assertEqual(pos, [
+            ("PO-1", {"row_changed": [["payment_terms", 1, "T-1", [["term_status", "CEO Pending", "Approved"]]]]}),
+        ])
+
+
+class TestApply(unittest.TestCase):
+    def setUp(self):
+        self.rows = [_payment("PAY-1"), _payment("PAY-2"), _payment("PAY-3", status="Rejected")]
+        self.terms = [_term("T-1", "PO-1", "PAY-1", 1), _term("T-2", "PO-1", "PAY-2", 2)]
+
+        def sql(query, values=None, **kwargs):
+            if "FOR UPDATE OF p" in query:
+                return self.rows
+            if "FOR UPDATE" in query:
+                return ["PO-1"]
+            if query.lstrip().startswith("SELECT name, parent"):
+                return self.terms
+            return []
+
+        for target, value in (("db", MagicMock()), ("session", MagicMock(user="ceo@x")),
+                              ("log_error", MagicMock()), ("get_meta", MagicMock())):
+            patcher = patch.object(ba.frappe, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        ba.frappe.db.sql.side_effect = sql
+        self.side_effects = {}
+        for target in ("invalidate_vendor_credit_cache", "invalidate_customer_financials",
+                       "enqueue_project_reconcile", "insert_versions"):
+            patcher = patch.object(ba, target)
+            self.side_effects[target] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _statements(self):
+        return [c.args[0] for c in ba.frappe.db.sql.call_args_list]
+
+    def test_one_statement_per_table_regardless_of_batch_size(self):
+        succeeded, failed = ba._apply(["PAY-1", "PAY-2", "PAY-3"], "approve", "Approved", ba._CEO_CONFIG)
+        self.assertEqual([r["name"] for r in succeeded], ["PAY-1", "PAY-2"])
+        self.assertEqual(failed, [{"name": "PAY-3", "reason": "Status is 'Rejected', expected 'CEO Pending'"}])
+
+        statements = self._statements()
+        self.assertEqual(len(statements), 6)  # lock POs, lock+read payments, update, read terms, 2 updates
+        payment_update = ba.frappe.db.sql.call_args_list[2].args
+        self.assertIn('"ceo_approval_date" = %(today)s', payment_update[0])
+        self.assertEqual(payment_update[1]["names"], ("PAY-1", "PAY-2"))
+        self.assertEqual(ba.frappe.db.sql.call_args_list[4].args[1]["names"], ("T-1", "T-2"))
+        self.assertEqual(ba.frappe.db.sql.call_args_list[5].args[1]["names"], ("PO-1",))
+
+        self.side_effects["invalidate_vendor_credit_cache"].assert_called_once_with("V-1")
+        self.side_effects["enqueue_project_reconcile"].assert_called_once_with("P-1")
+        versioned = [c.args[0] for c in self.side_effects["insert_versions"].call_args_list]
+        self.assertEqual(versioned, ["Project Payments", "Procurement Orders"])
+
+    def test_reject_sets_no_date_and_nothing_eligible_writes_nothing(self):
+        ba._apply(["PAY-1"], "reject", "Rejected", ba._CEO_CONFIG)
+        self.assertNotIn("approval_date", self._statements()[2])
+
+        ba.frappe.db.sql.reset_mock()
+        self.rows = [_payment("PAY-1", status="Approved")]
+        succeeded, _ = ba._apply(["PAY-1"], "approve", "Approved", ba._CEO_CONFIG)
+        self.assertEqual(succeeded, [])
+        self.assertEqual(len(self._statements()), 2)  # the two lock reads only
+
+
+class TestAccountants(unittest.TestCase):
+    def test_recipients_come_from_the_project_permission_index(self):
+        members = {"P-1": ["acc@x", "lead@x"], "P-2": ["acc@x"], "P-3": []}
+        users = [_Row(name="acc@x", role_profile="Nirmaan Accountant Profile")]
+        with patch.object(ba, "project_users", side_effect=lambda p, profiles: members[p]) as index, \
+                patch.object(ba.frappe, "get_all", return_value=users) as get_all:
+            by_project = ba._accountants_by_project(["P-1", "P-2", "P-3"])
+        self.assertEqual(by_project, {"P-1": users, "P-2": users, "P-3": []})
+        index.assert_called_with("P-3", ba.ACCOUNTANT_ROLE_PROFILES)
+        get_all.assert_called_once()
+        self.assertEqual(get_all.call_args.kwargs["filters"]["name"], ["in", ["acc@x", "lead@x"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
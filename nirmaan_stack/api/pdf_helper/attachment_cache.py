@@ -0,0 +1,288 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""attachment_cache — bench-local, content-addressed cache of A4-normalised attachment PDFs.
+
+WHY THIS EXISTS
+---------------
+A TDS report interleaves every item's `tds_attachment` (a manufacturer datasheet, PDF or
+image) after its approval page. `merge_pdfs_interleaved` used to download each attachment
+and re-run image->PDF conversion and `ensure_a4` on every page, on every export -- yet the
+same few hundred datasheets recur across dozens of projects' reports.
+
+LAYOUT (under `sites/<site>/private/tds_attachment_cache/`, outside `private/files`)
+-------------------------------------------------------------------------------------
+* `blobs/<sha256 of the fetched bytes>-n<NORMALIZE_VERSION>[-a4].pdf` -- the attachment
+  after conversion and `ensure_a4`. Content-addressed: the same datasheet uploaded twice
+  is normalised once. `-a4` marks that at least one page had to be resized (the progress
+  message reports it). A NORMALIZE_VERSION bump re-derives every blob.
+* `index/<sha256 of the url + source identity>.json` -- {"blob": name}. The identity is
+  the S3 key + ETag (HEAD) or the local path + mtime + size, so a hit costs no download at
+  all and a replaced file is a miss. A url with no cheap identity (the authenticated
+  `get_file` fallback) skips the index: it is fetched, but known bytes still skip the
+  normalisation.
+
+The layout, atomic writes, eviction and sweep are services/disk_cache.py, shared with the
+render and workbook caches. Blobs are bounded to `tds_attachment_cache_mb` from site config
+(DEFAULT_MAX_MB): each merge ends with `evict()`, least-recently-used first, and the daily
+`tasks/cleanup_orphan_private_files` run calls `sweep()`.
+
+THREADING
+---------
+`resolve()` needs the Frappe site context (S3 settings, file paths) and runs on the job's
+own thread. `normalized()` touches only the network, the filesystem, pypdf and PIL, so the
+merge fans it out over a thread pool; it raises `AttachmentError` and never logs -- the
+caller logs on the job thread.
+
+Caching FAILS OPEN: if the cache directory cannot be written, the normalised PDF goes to a
+plain tempfile that the caller unlinks after the merge.
+"""
+from __future__ import annotations
+
+import io
+import os
+import urllib.parse
+from dataclasses import dataclass
+
+import frappe
+import requests
+
+from nirmaan_stack.services import disk_cache
+
+DEFAULT_MAX_MB = 1024
+IDLE_DAYS = 30             # sweep(): blobs untouched this long are dropped
+NORMALIZE_VERSION = 1      # bump when the conversion / ensure_a4 output changes
+
+FETCH_TIMEOUT_SEC = 30
+
+_BOUNDED = (("blobs", (".pdf",)),)
+
+
+class AttachmentError(Exception):
+    """`kind` is "fetch" (could not download) or "format" (neither a PDF nor an image)."""
+
+    def __init__(self, kind: str, message: str) -> None:
+        super().__init__(message)
+        self.kind = kind
+
+
+@dataclass
+class Source:
+    """Where one attachment's bytes come from. Built by `resolve()` on the job thread."""
+
+    url: str
+    root: str                        # cache dir
+    http_url: str | None = None
+    local_path: str | None = None
+    content: bytes | None = None     # already fetched (authenticated fallback)
+    s3_client: object = None
+    s3_bucket: str | None = None
+    s3_key: str | None = None
+
+
+@dataclass
+class Normalized:
+    path: str
+    converted: bool      # at least one page was resized to A4
+    cached: bool         # `path` is a shared blob (never unlink it) vs a private tempfile
+    warnings: list
+
+
+def _cache_dir() -> str:
+    return frappe.get_site_path("private", "tds_attachment_cache")
+
+
+def _max_bytes() -> int:
+    return int(frappe.conf.get("tds_attachment_cache_mb") or DEFAULT_MAX_MB) * 1024 * 1024
+
+
+def s3_key(url: str) -> str | None:
+    if "frappe_gcp_attachment.controller.generate_file" not in url:
+        return None
+    params = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+    return params.get("key", [None])[0]
+
+
+# --------------------------------------------------------------------------- job thread
+
+
+def resolve(url: str, s3=None) -> Source:
+    """Work out how to fetch `url` -- everything that needs the Frappe context.
+
+    `s3` is an `S3Operations` shared across one merge (None when S3 is not configured).
+    """
+    from nirmaan_stack.api.frappe_s3_attachment import get_s3_temp_url  # noqa: PLC0415
+
+    root = _cache_dir()
+    key = s3_key(url)
+    file_url = get_s3_temp_url(url)
+    if file_url.startswith("http"):
+        source = Source(url, root, http_url=file_url)
+        if key and s3 is not None:
+            source.s3_client = getattr(s3, "S3_CLIENT", None)
+            source.s3_bucket = getattr(s3, "BUCKET", None)
+            source.s3_key = key
+        return source
+
+    file_path = None
+    if url.startswith("/private/files/"):
+        file_path = frappe.utils.get_files_path(url[len("/private/files/"):], is_private=True)
+    elif url.startswith("/files/"):
+        file_path = frappe.utils.get_files_path(url[len("/files/"):], is_private=False)
+    if file_path and os.path.exists(file_path):
+        return Source(url, root, local_path=file_path)
+
+    # Authenticated fallback -- works for private files inside the worker since
+    # frappe.set_user was called before enqueueing the job.
+    from frappe.utils.file_manager import get_file  # noqa: PLC0415
+
+    _, content = get_file(url)
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return Source(url, root, content=content)
+
+
+# --------------------------------------------------------------------------- worker side
+
+
+def normalized(source: Source) -> Normalized:
+    """The A4-normalised PDF for `source`. Thread-safe; no Frappe calls."""
+    identity = _identity(source)
+    index_path = None
+    if identity:
+        index_path = disk_cache.index_path(source.root, identity)
+        blob = disk_cache.lookup(source.root, index_path)
+        if blob:
+            return Normalized(blob, blob.endswith("-a4.pdf"), True, [])
+
+    data = _fetch(source)
+    digest = disk_cache.sha256(data)
+    blob = _find_blob(source.root, digest)
+    if blob:
+        if index_path:
+            _write_index(index_path, os.path.basename(blob))
+        return Normalized(blob, blob.endswith("-a4.pdf"), True, [])
+
+    pdf, converted, warnings = _normalize(data)
+    del data
+    try:
+        blob = _store(source.root, digest, converted, pdf)
+    except OSError as e:
+        warnings.append(f"attachment cache unavailable ({e}); merging uncached")
+        return Normalized(disk_cache.write_tmp(pdf, ".pdf"), converted, False, warnings)
+    if index_path:
+        _write_index(index_path, os.path.basename(blob))
+    return Normalized(blob, converted, True, warnings)
+
+
+def _identity(source: Source) -> str | None:
+    if source.s3_key:
+        return disk_cache.s3_identity(source.s3_key, source.s3_client, source.s3_bucket)
+    if source.local_path:
+        try:
+            return disk_cache.file_identity(source.local_path)
+        except OSError:
+            return None
+    return None
+
+
+def _fetch(source: Source) -> bytes:
+    try:
+        if source.content is not None:
+            data = source.content
+        elif source.local_path:
+            with open(source.local_path, "rb") as f:
+                data = f.read()
+        else:
+            res = requests.get(source.http_url, timeout=FETCH_TIMEOUT_SEC, stream=True)
+            res.raise_for_status()
+            buffer = io.BytesIO()
+            for chunk in res.iter_content(chunk_size=1024 * 1024):
+                if chunk:
+                    buffer.write(chunk)
+            data = buffer.getvalue()
+    except Exception as e:
+        raise AttachmentError("fetch", f"{source.url}: {e}") from e
+    if not data:
+        raise AttachmentError("fetch", f"{source.url}: empty response")
+    return data
+
+
+def _normalize(data: bytes) -> tuple[bytes, bool, list]:
+    """(pdf bytes, any page resized, per-page warnings) -- a PDF as-is, else an image."""
+    from PIL import Image  # noqa: PLC0415
+    from pypdf import PdfReader, PdfWriter  # noqa: PLC0415
+
+    from nirmaan_stack.api.pdf_helper.pdf_merger_api import fit_a4  # noqa: PLC0415
+
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages = list(reader.pages)
+    except Exception:
+        try:
+            img = Image.open(io.BytesIO(data))
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img_pdf = io.BytesIO()
+            img.save(img_pdf, format="PDF")
+            pages = list(PdfReader(io.BytesIO(img_pdf.getvalue())).pages)
+        except Exception as e:
+            raise AttachmentError("format", str(e)) from e
+
+    writer = PdfWriter()
+    converted, warnings = False, []
+    for page in pages:
+        try:
+            converted = fit_a4(page) or converted
+        except Exception as e:
+            warnings.append(f"ensure_a4 failed: {e}")
+        writer.add_page(page)
+    out = io.BytesIO()
+    writer.write(out)
+    writer.close()
+    return out.getvalue(), converted, warnings
+
+
+def _blob_name(digest: str, converted: bool) -> str:
+    return f"{digest}-n{NORMALIZE_VERSION}{'-a4' if converted else ''}.pdf"
+
+
+def _find_blob(root: str, digest: str) -> str | None:
+    for converted in (False, True):
+        path = os.path.join(root, "blobs", _blob_name(digest, converted))
+        try:
+            os.utime(path)  # LRU
+            return path
+        except OSError:
+            continue
+    return None
+
+
+def _store(root: str, digest: str, converted: bool, pdf: bytes) -> str:
+    blob = os.path.join(root, "blobs", _blob_name(digest, converted))
+    disk_cache.write_atomic(blob, pdf)
+    return blob
+
+
+def _write_index(index_path: str, blob_name: str) -> None:
+    try:
+        disk_cache.write_index(index_path, blob_name)
+    except OSError:
+        pass  # the index is an optimisation; the next export refetches
+
+
+# --------------------------------------------------------------------------- upkeep
+
+
+def evict() -> int:
+    """Trim blobs to the size bound. Called once per merge, on the job thread."""
+    try:
+        return disk_cache.evict(_cache_dir(), _BOUNDED, _max_bytes())
+    except OSError:
+        return 0
+
+
+def sweep(dry_run: bool = False) -> dict:
+    """Daily upkeep: idle blobs, index entries whose blob is gone, then the size bound.
+    Returns counts for the janitor log."""
+    return disk_cache.sweep(_cache_dir(), _BOUNDED, _max_bytes(), IDLE_DAYS, dry_run=dry_run)
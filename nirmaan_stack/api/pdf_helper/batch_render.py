@@ -0,0 +1,153 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Render many print documents into ONE merged PDF, converting them in parallel.
+
+`frappe.get_print(..., as_pdf=True)` per document is one wkhtmltopdf launch after
+another, with every PDF held in memory until the merge. `write_merged` splits the
+work instead:
+
+  1. main thread  render each item's HTML (`get_print`, as_pdf=False) and prepare
+                  its wkhtmltopdf options exactly as `frappe.utils.pdf.get_pdf` does
+                  (print settings, header / footer files, the same flags)
+  2. pool         MAX_WORKERS threads run wkhtmltopdf into temp files. The workers
+                  make NO Frappe calls: `frappe.local` and the DB connection belong
+                  to the main thread.
+  3. main thread  merge the files in item order and stream the result to `f`
+
+An item with `cache=True` goes through `render_cache` first: a hit skips steps 1-2,
+and a miss stores its fresh PDF for the next download.
+
+Each item that fails is logged and left out, as the serial loops did. Nothing
+rendered at all is an error.
+"""
+import concurrent.futures
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Any
+
+import frappe
+import pdfkit
+from frappe.utils.pdf import (
+    PDF_CONTENT_ERRORS, cleanup, get_wkhtmltopdf_version, prepare_options, scrub_urls,
+)
+from packaging.version import Version
+from pypdf import PdfWriter
+
+from nirmaan_stack.api.pdf_helper import render_cache
+
+# Concurrent wkhtmltopdf processes per batch; `pdf_render_workers` in site config overrides.
+MAX_WORKERS = 4
+
+
+@dataclass
+class PrintItem:
+    doctype: str
+    name: str
+    print_format: str
+    label: str  # for progress messages and the error log
+    doc: Any = None  # an in-memory doc to print instead of the stored one
+    no_letterhead: int | None = None
+    cache: bool = False  # True only when the output depends on the stored doc alone
+    variant: str | None = None  # a render option the template reads (keys the cache)
+
+
+def _workers():
+    return max(1, int(frappe.conf.get("pdf_render_workers") or MAX_WORKERS))
+
+
+def _prepare(item):
+    """(html, options) for one item -- the main-thread half of `get_pdf`."""
+    kwargs = {"doc": item.doc} if item.doc is not None else {}
+    if item.no_letterhead is not None:
+        kwargs["no_letterhead"] = item.no_letterhead
+    html = frappe.get_print(item.doctype, item.name, print_format=item.print_format, as_pdf=False, **kwargs)
+    html, options = prepare_options(scrub_urls(html), {})
+    options.update({"disable-javascript": "", "disable-local-file-access": ""})
+    if Version(get_wkhtmltopdf_version()) > Version("0.12.3"):
+        options["disable-smart-shrinking"] = ""
+    return html, options
+
+
+def _convert(html, options, path):
+    """wkhtmltopdf one document into `path`. Thread-safe; no Frappe calls."""
+    try:
+        pdfkit.from_string(html, path, options=options)
+    except OSError as e:
+        # `get_pdf` keeps a PDF whose only problem was a broken image link.
+        broken_link = any(err in str(e) for err in PDF_CONTENT_ERRORS)
+        if not (broken_link and os.path.exists(path) and os.path.getsize(path)):
+            raise
+    return path
+
+
+def write_merged(items, f, on_progress=None):
+    """Render `items` (PrintItem) and stream the merged PDF to the binary file `f`.
+
+    Returns the labels of the items that failed. `on_progress(done, total, message)`
+    is called from the calling thread as each item finishes.
+    """
+    total = len(items)
+    tmp = tempfile.mkdtemp(prefix="batch_render_")
+    try:
+        paths, failed, done = {}, [], 0
+        pending = {}  # future -> (index, item, cache path, options)
+
+        def finished(item):
+            nonlocal done
+            done += 1
+            if on_progress:
+                on_progress(done, total, f"Rendered {item.label}")
+
+        def fail(item):
+            failed.append(item.label)
+            frappe.log_error(frappe.get_traceback(), f"PDF generation failed for {item.label}")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=_workers()) as pool:
+            for index, item in enumerate(items):
+                path = os.path.join(tmp, f"{index}.pdf")
+                try:
+                    cache_path = None
+                    if item.cache:
+                        cache_path, cached = render_cache.lookup(
+                            item.doctype, item.name, item.print_format, variant=item.variant)
+                        if cached is not None:
+                            with open(path, "wb") as out:
+                                out.write(cached)
+                            paths[index] = path
+                            finished(item)
+                            continue
+                    html, options = _prepare(item)
+                except Exception:
+                    fail(item)
+                    finished(item)
+                    continue
+                pending[pool.submit(_convert, html, options, path)] = (index, item, cache_path, options)
+
+            for future in concurrent.futures.as_completed(pending):
+                index, item, cache_path, options = pending[future]
+                cleanup(options)  # header / footer temp files written by prepare_options
+                try:
+                    paths[index] = future.result()
+                    if cache_path:
+                        with open(paths[index], "rb") as src:
+                            render_cache.store(cache_path, src.read())
+                except Exception:
+                    fail(item)
+                finished(item)
+
+        if not paths:
+            frappe.throw("Failed to merge PDFs")
+        writer = PdfWriter()
+        for index in sorted(paths):
+            try:
+                writer.append(paths[index])
+            except Exception:
+                fail(items[index])
+        writer.write(f)
+        writer.close()
+        return failed
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
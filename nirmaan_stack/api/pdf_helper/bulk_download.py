@@ -1,13 +1,15 @@
 import os
-import uuid
 import json
 import io
+import mimetypes
 import frappe
 import requests
 from pypdf import PdfWriter, PdfReader
-from nirmaan_stack.api.pdf_helper.po_print import merge_pdfs
+from nirmaan_stack.api.background_jobs import get_temp_path, start_job
+from nirmaan_stack.api.pdf_helper.po_print import render_merged_print
 from nirmaan_stack.api.frappe_s3_attachment import get_s3_temp_url
 from PIL import Image
+from werkzeug.utils import send_file
 
 def _merge_content(merger, content, name):
     """
@@ -89,18 +91,21 @@ def _fetch_attachment_content(original_url):
 @frappe.whitelist()
 def fetch_temp_file(token, filename):
     """
-    Fetches a temporary file by token and deletes it immediately after reading.
+    Streams a temporary file by token; the file is served once.
+
+    It is unlinked as soon as it is opened: the open handle keeps the bytes readable while
+    the response streams them, and the space is freed when the response closes. Nothing is
+    read into memory, which matters for a merged bulk PDF or a priced tender workbook.
     """
-    if not token:
+    if not token or not str(token).isalnum():
         frappe.throw("Invalid download token")
 
-    temp_path = frappe.utils.get_site_path("public", "files", "temp_downloads", f"{token}.bin")
-    
-    if not os.path.exists(temp_path):
-        frappe.throw("Download link expired or already used.")
+    temp_path = get_temp_path(token)
 
-    with open(temp_path, "rb") as f:
-        file_content = f.read()
+    try:
+        f = open(temp_path, "rb")
+    except FileNotFoundError:
+        frappe.throw("Download link expired or already used.")
 
     # Immediate deletion
     try:
@@ -108,81 +113,72 @@ def fetch_temp_file(token, filename):
     except Exception as e:
         frappe.log_error(f"Failed to delete temp file {temp_path}: {e}")
 
-    frappe.local.response.filename = filename
-    frappe.local.response.filecontent = file_content
-    frappe.local.response.type = "download"
+    response = send_file(
+        f,
+        frappe.request.environ,
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        as_attachment=True,
+        download_name=filename,
+        conditional=False,
+        etag=False,
+    )
+    response.content_length = os.fstat(f.fileno()).st_size
+    return response
 
 
-def get_temp_path(token):
-    return frappe.utils.get_site_path("public", "files", "temp_downloads", f"{token}.bin")
+_BUILDER = "nirmaan_stack.api.pdf_helper.bulk_download.build_bulk_download"
 
 
-def ensure_temp_dir():
-    temp_dir = frappe.utils.get_site_path("public", "files", "temp_downloads")
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
+def _start_bulk_download(filename, **kwargs):
+    """Enqueue one bulk download on the shared job runner (capped per user)."""
+    result = start_job("bulk_download", _BUILDER, filename=filename, **kwargs)
+    return {"message": "Job enqueued", **result}
 
 
 @frappe.whitelist()
 def download_selected_pos(project, names, with_rate=1):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_Selected_POs.pdf",
         project=project,
         doc_type="PO",
         names=names,
         with_rate=with_rate,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_Selected_POs.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
 def download_selected_wos(project, names, with_rate=1):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_Selected_WOs.pdf",
         project=project,
         doc_type="WO",
         names=names,
         with_rate=with_rate,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_Selected_WOs.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
 def download_selected_dns(project, names):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_Selected_DNs.pdf",
         project=project,
         doc_type="DN",
         names=names,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_Selected_DNs.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
 def download_selected_attachments(project, attachment_names, doc_type):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_Selected_{doc_type.replace(' ', '_')}.pdf",
         project=project,
         doc_type=doc_type,
         attachment_names=attachment_names,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_Selected_{doc_type.replace(' ', '_')}.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
@@ -190,17 +186,13 @@ def download_all_pos(project, with_rate=1):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
     names = frappe.get_all("Procurement Orders", filters={"project": project, "status": ["not in", ["Merged", "Cancelled", "PO Amendment", "Inactive"]]}, fields=["name"], order_by="creation asc")
     names = [n.name for n in names]
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_All_POs.pdf",
         project=project,
         doc_type="PO",
         names=json.dumps(names),
         with_rate=with_rate,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_All_POs.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
@@ -208,17 +200,13 @@ def download_all_wos(project, with_rate=1):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
     names = frappe.get_all("Service Requests", filters={"project": project, "status": "Approved"}, fields=["name"], order_by="creation asc")
     names = [n.name for n in names]
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_All_WOs.pdf",
         project=project,
         doc_type="WO",
         names=json.dumps(names),
         with_rate=with_rate,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_All_WOs.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
@@ -226,41 +214,30 @@ def download_all_dns(project):
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
     names = frappe.get_all("Procurement Orders", filters={"project": project, "status": ["in", ["Delivered", "Partially Delivered", "Partially Dispatched"]]}, fields=["name"], order_by="creation asc")
     names = [n.name for n in names]
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_All_DNs.pdf",
         project=project,
         doc_type="DN",
         names=json.dumps(names),
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_All_DNs.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
 @frappe.whitelist()
 def download_project_attachments(project, doc_type):
     # Enqueue with doc_type, the worker will resolve names if not provided
     project_name = frappe.db.get_value("Projects", project, "project_name") or project
-    frappe.enqueue(
-        "nirmaan_stack.api.pdf_helper.bulk_download.run_bulk_download_job",
+    return _start_bulk_download(
+        f"{project_name}_All_{doc_type.replace(' ', '_')}.pdf",
         project=project,
         doc_type=doc_type,
-        user=frappe.session.user,
-        custom_filename=f"{project_name}_All_{doc_type.replace(' ', '_')}.pdf",
-        queue="long"
     )
-    return {"message": "Job enqueued"}
 
 
-def run_bulk_download_job(project, doc_type, names=None, attachment_names=None, with_rate=1, user=None, custom_filename=None):
+def build_bulk_download(job, project, doc_type, names=None, attachment_names=None, with_rate=1):
     """
-    Worker function to process bulk downloads in a single unified flow.
+    Job-runner builder: merge every requested document / attachment into one PDF
+    in a single unified flow. Runs on the `long` queue as the requesting user.
     """
-    frappe.set_user(user or "Administrator")
-    ensure_temp_dir()
-    
-    import json
     if isinstance(names, str): names = json.loads(names)
     if isinstance(attachment_names, str): attachment_names = json.loads(attachment_names)
     if isinstance(with_rate, str): with_rate = with_rate.lower() in ("true", "1", "yes")
@@ -302,12 +279,9 @@ def run_bulk_download_job(project, doc_type, names=None, attachment_names=None,
 
     items_to_process = attachment_names if attachment_names else names
     if not items_to_process:
-        frappe.publish_realtime("bulk_download_failed", {"message": f"No {doc_type} items found."}, user=user)
-        return
+        frappe.throw(f"No {doc_type} items found.")
 
     total_items = len(items_to_process)
-    job_id = str(uuid.uuid4())
-    
     final_merger = PdfWriter()
     count = 0
 
@@ -316,12 +290,7 @@ def run_bulk_download_job(project, doc_type, names=None, attachment_names=None,
         try:
             # Progress Reporting
             abs_index = i + 1
-            progress = int((abs_index / total_items) * 100)
-            frappe.publish_realtime(
-                "bulk_download_progress",
-                {"progress": progress, "message": f"Processing {doc_type} {abs_index} of {total_items}...", "label": doc_type},
-                user=user
-            )
+            job.progress(abs_index, total_items, f"Processing {doc_type} {abs_index} of {total_items}...", label=doc_type)
 
             if attachment_names:
                 # Attachment Logic
@@ -347,12 +316,8 @@ def run_bulk_download_job(project, doc_type, names=None, attachment_names=None,
                 pf_map = {"PO": "PO Orders" if with_rate else "PO Orders Without Rate", "WO": "Work Orders" if with_rate else "Work Orders Without Rate", "DN": "PO Delivery Histroy"}
                 pf = pf_map.get(doc_type)
                 
-                pdf_content = frappe.get_print(dt, item, print_format=pf, as_pdf=True)
-                
-                if doc_type == "PO":
-                    doc_attachment = frappe.db.get_value(dt, item, "attachment")
-                    if doc_attachment:
-                        pdf_content = merge_pdfs(pdf_content, [doc_attachment])
+                # Served from the rendered-PDF cache when this PO/WO version was printed before.
+                pdf_content = render_merged_print(dt, item, pf, with_attachment=(doc_type == "PO"))
                 
                 if pdf_content:
                     final_merger.append(io.BytesIO(pdf_content))
@@ -360,28 +325,10 @@ def run_bulk_download_job(project, doc_type, names=None, attachment_names=None,
         except Exception as e:
             print(f"Error processing {doc_type} {item}: {e}")
 
-    # Final Save and Notify
-    if count > 0:
-        final_token = str(uuid.uuid4())
-        final_path = get_temp_path(final_token)
-        with open(final_path, "wb") as f:
-            final_merger.write(f)
-        final_merger.close()
-        
-        project_name = frappe.db.get_value("Projects", project, "project_name") or project
-        filename = custom_filename or f"{project_name}_All_{doc_type}.pdf"
-        
-        frappe.publish_realtime(
-            "bulk_download_all_ready",
-            {
-                "job_id": job_id,
-                "token": final_token,
-                "filename": filename
-            },
-            user=user
-        )
-    else:
-        frappe.publish_realtime("bulk_download_failed", {"message": "Failed to generate any documents."}, user=user)
+    # Final Save: the runner streams the merger to the temp file and publishes the token
+    if count == 0:
+        frappe.throw("Failed to generate any documents.")
+    return {"write": final_merger.write}
 
 
 def _fetch_attachment_content_by_name(attachment_record_name):
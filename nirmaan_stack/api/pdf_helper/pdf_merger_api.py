@@ -1,18 +1,62 @@
 import frappe
-import requests
 import io
 import os
 import concurrent.futures
 from pypdf import PdfWriter, PdfReader, Transformation
-from PIL import Image
-from nirmaan_stack.api.frappe_s3_attachment import get_s3_temp_url
+from nirmaan_stack.api.pdf_helper import attachment_cache
 
 # Standard A4 size in points (72 points per inch)
 A4_WIDTH = 595.27
 A4_HEIGHT = 841.89
 
+# Attachments fetched + normalised concurrently per merge (network-bound).
+MAX_FETCH_WORKERS = 4
+
 # // TDS  interval Merge PDfs for All Select POS 
 
+def fit_a4(page):
+    """
+    Stretch a page in place to fill exactly into A4 (Portrait or Landscape) to eliminate ALL
+    white space. Returns True if the page was resized. Raises on a malformed page; safe to
+    call off the job thread (no Frappe calls).
+    """
+    # Current dimensions (using MediaBox)
+    width = float(page.mediabox.width)
+    height = float(page.mediabox.height)
+
+    # Determine target dimensions based on orientation (Auto-Orientation)
+    is_landscape = width > height
+    target_w = A4_HEIGHT if is_landscape else A4_WIDTH
+    target_h = A4_WIDTH if is_landscape else A4_HEIGHT
+
+    # Define tolerance for comparison (1 point)
+    tolerance = 1.0
+
+    # Check if already the correct A4 size within tolerance and standard coordinates
+    is_a4_size = abs(width - target_w) < tolerance and abs(height - target_h) < tolerance
+    is_standard_origin = float(page.mediabox.left) == 0 and float(page.mediabox.bottom) == 0
+
+    if is_a4_size and is_standard_origin:
+        return False
+
+    # Calculate non-uniform scale factors to FILL the target exactly (Stretch to Fill)
+    # This eliminates ALL white space by mapping the original box to the target A4 box
+    scale_x = target_w / width
+    scale_y = target_h / height
+
+    # Apply transformation: Scaling to fill the entire target
+    # Note: We must also account for any existing offsets in the original mediabox
+    transform = Transformation().scale(sx=scale_x, sy=scale_y).translate(tx=0 - float(page.mediabox.left) * scale_x, ty=0 - float(page.mediabox.bottom) * scale_y)
+    page.add_transformation(transform)
+
+    # Force the page boundaries to be exactly the target A4 size
+    page.mediabox.lower_left = (0, 0)
+    page.mediabox.upper_right = (target_w, target_h)
+    page.cropbox.lower_left = (0, 0)
+    page.cropbox.upper_right = (target_w, target_h)
+    return True
+
+
 def ensure_a4(page):
     """
     Stretch a page to fill exactly into A4 (Portrait or Landscape) to eliminate ALL white space.
@@ -20,42 +64,7 @@ def ensure_a4(page):
     """
     was_converted = False
     try:
-        # Current dimensions (using MediaBox)
-        width = float(page.mediabox.width)
-        height = float(page.mediabox.height)
-        
-        # Determine target dimensions based on orientation (Auto-Orientation)
-        is_landscape = width > height
-        target_w = A4_HEIGHT if is_landscape else A4_WIDTH
-        target_h = A4_WIDTH if is_landscape else A4_HEIGHT
-        
-        # Define tolerance for comparison (1 point)
-        tolerance = 1.0
-        
-        # Check if already the correct A4 size within tolerance and standard coordinates
-        is_a4_size = abs(width - target_w) < tolerance and abs(height - target_h) < tolerance
-        is_standard_origin = float(page.mediabox.left) == 0 and float(page.mediabox.bottom) == 0
-        
-        if is_a4_size and is_standard_origin:
-            return page, False
-
-        # Calculate non-uniform scale factors to FILL the target exactly (Stretch to Fill)
-        # This eliminates ALL white space by mapping the original box to the target A4 box
-        scale_x = target_w / width
-        scale_y = target_h / height
-        
-        # Apply transformation: Scaling to fill the entire target
-        # Note: We must also account for any existing offsets in the original mediabox
-        transform = Transformation().scale(sx=scale_x, sy=scale_y).translate(tx=0 - float(page.mediabox.left) * scale_x, ty=0 - float(page.mediabox.bottom) * scale_y)
-        page.add_transformation(transform)
-        
-        # Force the page boundaries to be exactly the target A4 size
-        page.mediabox.lower_left = (0, 0)
-        page.mediabox.upper_right = (target_w, target_h)
-        page.cropbox.lower_left = (0, 0)
-        page.cropbox.upper_right = (target_w, target_h)
-        was_converted = True
-        
+        was_converted = fit_a4(page)
     except Exception as e:
         frappe.log_error(f"ensure_a4 failed: {e}")
     return page, was_converted
@@ -66,103 +75,126 @@ def merge_pdfs_interleaved(main_pdf_content: bytes, items: list, progress_event:
     Merge main PDF with attachments interleaved after each item's page.
     Returns: (pdf_content: bytes, failed_items: list)
     """
+    output = io.BytesIO()
+    failed_items = write_pdfs_interleaved(output, main_pdf_content, items, progress_event)
+    return output.getvalue(), failed_items
+
+
+def write_pdfs_interleaved(out, main_pdf_content: bytes, items: list, progress_event: str = None) -> list:
+    """
+    `merge_pdfs_interleaved`, written straight into the binary file `out` (e.g. the job
+    runner's temp artifact) instead of being returned as bytes. Returns failed_items.
+
+    Attachments come from `attachment_cache`: each one is resolved here, then fetched and
+    A4-normalised on a small thread pool -- or not at all, when the same datasheet was
+    normalised for an earlier report. Results are consumed in item order, so the interleave
+    is unchanged, and each is a PDF on disk, so workers running ahead hold no bytes in memory.
+    """
     writer = PdfWriter()
     failed_items = []
-    
+
     # Parse items if string
     if isinstance(items, str):
         items = frappe.parse_json(items)
-    
+
     # Read main PDF
     try:
         main_reader = PdfReader(io.BytesIO(main_pdf_content))
         total_pages = len(main_reader.pages)
         num_items = len(items)
-        
+
         # Calculate number of "Start Pages" (Stakeholders + Summary)
         # We assume each item generates exactly 1 Approval Form page at the end of the document
         # So: Start Pages = Total Pages - Item Pages
         num_start_pages = max(0, total_pages - num_items)
-        
+
     except Exception as e:
         frappe.log_error(f"Main PDF invalid: {e}")
-        return main_pdf_content, ["Main PDF generation failed"]
-    
+        out.write(main_pdf_content)
+        return ["Main PDF generation failed"]
+
     # Add all Start Pages (Stakeholders + Summary Table pages)
     for i in range(num_start_pages):
         page = main_reader.pages[i]
         fixed_page, _ = ensure_a4(page)
         writer.add_page(fixed_page)
-    
-    # Process each item
-    for idx, item in enumerate(items):
-        item_was_converted = False
-        # Calculate where this item's approval page is located
-        item_page_index = num_start_pages + idx
-        
-        # Add item's approval form page
-        if item_page_index < total_pages:
-            page = main_reader.pages[item_page_index]
-            fixed_page, conv = ensure_a4(page)
-            writer.add_page(fixed_page)
-            if conv: item_was_converted = True
-        
-        # Get attachment URL
-        attachment_url = item.get('tds_attachment') if isinstance(item, dict) else None
-        
-        if attachment_url:
-            # Inform frontend about conversion starting
-            if progress_event:
-                frappe.publish_realtime(
-                    progress_event,
-                    {"progress": int((idx / num_items) * 100), "message": f"Processing {item.get('tds_item_name', 'Item')}...", "status": "converting"},
-                    user=frappe.session.user
-                )
+
+    sources = _resolve_attachments(items)
+    futures = {}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as pool:
+            futures = {
+                idx: pool.submit(attachment_cache.normalized, source)
+                for idx, source in sources.items()
+                if isinstance(source, attachment_cache.Source)
+            }
             try:
-                # Fetch attachment content
-                attachment_content = fetch_attachment_content(attachment_url)
-                
-                if attachment_content:
-                    # Try as PDF
-                    try:
-                        attach_reader = PdfReader(io.BytesIO(attachment_content))
-                        for page in attach_reader.pages:
-                            fixed_page, conv = ensure_a4(page)
-                            writer.add_page(fixed_page)
-                            if conv: item_was_converted = True
-                    except Exception:
-                        # Try as Image
+                # Process each item
+                for idx, item in enumerate(items):
+                    item_was_converted = False
+                    # Calculate where this item's approval page is located
+                    item_page_index = num_start_pages + idx
+
+                    # Add item's approval form page
+                    if item_page_index < total_pages:
+                        page = main_reader.pages[item_page_index]
+                        fixed_page, conv = ensure_a4(page)
+                        writer.add_page(fixed_page)
+                        if conv: item_was_converted = True
+
+                    if idx in sources:
+                        # Inform frontend about conversion starting
+                        if progress_event:
+                            frappe.publish_realtime(
+                                progress_event,
+                                {"progress": int((idx / num_items) * 100), "message": f"Processing {item.get('tds_item_name', 'Item')}...", "status": "converting"},
+                                user=frappe.session.user
+                            )
                         try:
-                            img = Image.open(io.BytesIO(attachment_content))
-                            if img.mode != "RGB":
-                                img = img.convert("RGB")
-                            
-                            img_pdf = io.BytesIO()
-                            img.save(img_pdf, format="PDF")
-                            img_reader = PdfReader(io.BytesIO(img_pdf.getvalue()))
-                            for page in img_reader.pages:
-                                fixed_page, conv = ensure_a4(page)
-                                writer.add_page(fixed_page)
-                                if conv: item_was_converted = True
+                            if idx not in futures:
+                                raise sources[idx]
+                            result = futures[idx].result()
+                        except attachment_cache.AttachmentError as e:
+                            if e.kind == "format":
+                                frappe.log_error(f"Attachment convert failed for item {idx}: {e}")
+                                failed_items.append(f"{item.get('tds_item_name', 'Item')} (Invalid PDF/Image format)")
+                            else:
+                                frappe.log_error(f"Attachment fetch failed for item {idx}: {e}")
+                                failed_items.append(f"{item.get('tds_item_name', 'Item')} (Failed to fetch/download attachment)")
                         except Exception as e:
-                            frappe.log_error(f"Attachment convert failed for item {idx}: {e}")
-                            failed_items.append(f"{item.get('tds_item_name', 'Item')} (Invalid PDF/Image format)")
-                            
-            except Exception as e:
-                frappe.log_error(f"Attachment fetch failed for item {idx}: {e}")
-                failed_items.append(f"{item.get('tds_item_name', 'Item')} (Failed to fetch/download attachment)")
-
-        # Publish Progress AFTER processing this item
-        if progress_event:
-            progress = int(((idx + 1) / num_items) * 100)
-            item_name = item.get('tds_item_name', f"Item {idx+1}")
-            status_tag = " (A4 Converted)" if item_was_converted else " (Original A4)"
-            frappe.publish_realtime(
-                progress_event,
-                {"progress": progress, "message": f"Completed {item_name}{status_tag} ({idx + 1}/{num_items})", "status": "completed", "total": num_items, "current": idx + 1},
-                user=frappe.session.user
-            )
-    
+                            frappe.log_error(f"Attachment fetch failed for item {idx}: {e}")
+                            failed_items.append(f"{item.get('tds_item_name', 'Item')} (Failed to fetch/download attachment)")
+                        else:
+                            for warning in result.warnings:
+                                frappe.log_error(f"Attachment normalise warning for item {idx}: {warning}")
+                            # Already A4-normalised: added as-is, no second transform.
+                            for page in PdfReader(result.path).pages:
+                                writer.add_page(page)
+                            if result.converted: item_was_converted = True
+
+                    # Publish Progress AFTER processing this item
+                    if progress_event:
+                        progress = int(((idx + 1) / num_items) * 100)
+                        item_name = item.get('tds_item_name', f"Item {idx+1}")
+                        status_tag = " (A4 Converted)" if item_was_converted else " (Original A4)"
+                        frappe.publish_realtime(
+                            progress_event,
+                            {"progress": progress, "message": f"Completed {item_name}{status_tag} ({idx + 1}/{num_items})", "status": "completed", "total": num_items, "current": idx + 1},
+                            user=frappe.session.user
+                        )
+            finally:
+                for future in futures.values():
+                    future.cancel()
+    finally:
+        # The pool has drained: drop every private (uncached) tempfile, merged or not.
+        for future in futures.values():
+            if not future.cancelled() and future.exception() is None and not future.result().cached:
+                try:
+                    os.unlink(future.result().path)
+                except OSError:
+                    pass
+    attachment_cache.evict()
+
     # Output merged PDF
     try:
         if progress_event:
@@ -171,61 +203,35 @@ def merge_pdfs_interleaved(main_pdf_content: bytes, items: list, progress_event:
                 {"progress": 100, "message": "Finalizing PDF...", "total": num_items, "current": num_items},
                 user=frappe.session.user
             )
-        output = io.BytesIO()
-        writer.write(output)
+        writer.write(out)
         writer.close()
-        return output.getvalue(), failed_items
+        return failed_items
     except Exception as e:
         frappe.log_error(f"Interleaved PDF merge failed: {e}")
-        return main_pdf_content, [f"Merge failed: {str(e)}"]
-
-# // TDS fetch they file from s3url 
-
-def fetch_attachment_content(original_url: str) -> bytes:
-    """Fetch attachment content from URL or filesystem."""
-    try:
-        file_url = get_s3_temp_url(original_url)
-        
-        # HTTP / Presigned URL
-        if file_url.startswith("http"):
-            res = requests.get(file_url, timeout=30, stream=True)
-            res.raise_for_status()
-            
-            buffer = io.BytesIO()
-            for chunk in res.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    buffer.write(chunk)
-            return buffer.getvalue()
-        
-        # Local filesystem
-        else:
-            file_path = None
-            if original_url.startswith("/private/files/"):
-                file_path = frappe.utils.get_files_path(
-                    original_url[len("/private/files/"):],
-                    is_private=True
-                )
-            elif original_url.startswith("/files/"):
-                file_path = frappe.utils.get_files_path(
-                    original_url[len("/files/"):],
-                    is_private=False
-                )
-
-            if file_path and os.path.exists(file_path):
-                with open(file_path, "rb") as f:
-                    return f.read()
-
-            # Authenticated fallback — works for private files inside the worker
-            # since frappe.set_user was called before enqueueing the job.
-            from frappe.utils.file_manager import get_file
-            _, content = get_file(original_url)
-            if isinstance(content, str):
-                content = content.encode("utf-8")
-            return content
-                
-    except Exception as e:
-        frappe.log_error(f"fetch_attachment_content failed: {original_url} - {e}")
-        return None
-
+        out.seek(0)
+        out.truncate()
+        out.write(main_pdf_content)
+        return [f"Merge failed: {str(e)}"]
 
 
+def _resolve_attachments(items) -> dict:
+    """{item index: attachment_cache.Source, or the exception resolving it raised}."""
+    urls = {
+        idx: item.get('tds_attachment')
+        for idx, item in enumerate(items)
+        if isinstance(item, dict) and item.get('tds_attachment')
+    }
+    s3 = None
+    if any(attachment_cache.s3_key(url) for url in urls.values()):
+        try:
+            from frappe_gcp_attachment.controller import S3Operations
+            s3 = S3Operations()
+        except Exception:
+            s3 = None  # no HEAD identity: S3 attachments are refetched, known bytes still hit
+    sources = {}
+    for idx, url in urls.items():
+        try:
+            sources[idx] = attachment_cache.resolve(url, s3)
+        except Exception as e:
+            sources[idx] = e
+    return sources
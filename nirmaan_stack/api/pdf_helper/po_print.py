@@ -1,6 +1,8 @@
 
 import frappe
+from nirmaan_stack.api.background_jobs import start_job
 from nirmaan_stack.api.frappe_s3_attachment import get_s3_temp_url
+from nirmaan_stack.api.pdf_helper.render_cache import get_or_render
 import requests
 import io
 import os
@@ -8,52 +10,79 @@ import concurrent.futures
 from pypdf import PdfWriter, PdfReader
 from PIL import Image
 
-@frappe.whitelist()
-def attachment_merged_pdf(doctype, docname, print_format="Standard"):
-    """
-    Generates the Standard PDF for the document and merges it with linked PDF attachments.
+def render_merged_print(doctype, docname, print_format="Standard", with_attachment=True):
+    """Main print PDF merged with the document's `attachment` -> bytes.
+
+    Served from the rendered-PDF cache (render_cache) when this exact document
+    version / format / attachment set was rendered before. Falls back to the main
+    PDF alone when the merge fails; raises only if the main PDF itself cannot be
+    generated. with_attachment=False is the plain (cached) print.
     """
-    try:
+    # FETCH: Find Attachments — the 'attachment' field in the document itself
+    doc_attachment = frappe.db.get_value(doctype, docname, "attachment") if with_attachment else None
+    attachment_urls = [doc_attachment] if doc_attachment else []
+
+    def render():
         # 1. EXECUTION: Generate the Main PDF via Frappe's engine
         main_pdf_content = frappe.get_print(
-            doctype, 
-            docname, 
-            print_format=print_format, 
+            doctype,
+            docname,
+            print_format=print_format,
             as_pdf=True
         )
+        if not attachment_urls:
+            return main_pdf_content, True
 
-        # 2. FETCH: Find Attachments
-        attachment_urls = []
-        
-        # A) Fetch from 'attachment' field in the document itself
-        doc_attachment = frappe.db.get_value(doctype, docname, "attachment")
-        if doc_attachment:
-            attachment_urls.append(doc_attachment)
+        # 2. MERGE: Combine them
+        failures = []
+        try:
+            merged = merge_pdfs(main_pdf_content, attachment_urls, failures=failures)
+        except Exception as e:
+            frappe.log_error(f"Error in download_merged_pdf: {e}")
+            # Return main PDF if merge fails, rather than crashing
+            return main_pdf_content, False
+        return merged, not failures
 
-        # Optional: Log if no attachment found
-        if not attachment_urls:
-             print(f"No attachments found for {docname}")
-        
-        # 3. MERGE: Combine them
-        if not attachment_urls:
-            final_pdf = main_pdf_content
-        else:
-            final_pdf = merge_pdfs(main_pdf_content, attachment_urls)
+    return get_or_render(doctype, docname, print_format, attachment_urls, render)
 
-        # 4. RESPONSE: Return file to user
-        frappe.local.response.filename = f"{docname}.pdf"
-        frappe.local.response.filecontent = final_pdf
-        frappe.local.response.type = "download"
 
+@frappe.whitelist()
+def attachment_merged_pdf(doctype, docname, print_format="Standard"):
+    """
+    Generates the Standard PDF for the document and merges it with linked PDF attachments.
+    """
+    try:
+        final_pdf = render_merged_print(doctype, docname, print_format)
     except Exception as e:
         frappe.log_error(f"Error in download_merged_pdf: {e}")
-        # Return main PDF if merge fails, rather than crashing
-        if 'main_pdf_content' in locals() and main_pdf_content:
-             frappe.local.response.filename = f"{docname}.pdf"
-             frappe.local.response.filecontent = main_pdf_content
-             frappe.local.response.type = "download"
-        else:
-             frappe.throw(f"Failed to generate output: {str(e)}")
+        frappe.throw(f"Failed to generate output: {str(e)}")
+
+    # 4. RESPONSE: Return file to user
+    frappe.local.response.filename = f"{docname}.pdf"
+    frappe.local.response.filecontent = final_pdf
+    frappe.local.response.type = "download"
+
+
+@frappe.whitelist()
+def enqueue_attachment_merged_pdf(doctype, docname, print_format="Standard"):
+    """Background twin of attachment_merged_pdf on the shared job runner.
+
+    Returns {status, job_id} immediately; the token arrives on `po_print_ready`
+    (download via bulk_download.fetch_temp_file).
+    """
+    return start_job(
+        "po_print",
+        "nirmaan_stack.api.pdf_helper.po_print._attachment_merged_pdf_job",
+        filename=f"{docname}.pdf",
+        doctype=doctype,
+        docname=docname,
+        print_format=print_format,
+    )
+
+
+def _attachment_merged_pdf_job(job, doctype, docname, print_format="Standard"):
+    job.progress(0, 1, f"Rendering {docname}...")
+    return {"content": render_merged_print(doctype, docname, print_format)}
 
 
 # // Po Merge fetch 
@@ -93,11 +122,17 @@ def fetch_content_worker(task):
     return original_url, None
 
 # // Po Merge 
-def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None) -> bytes:
+def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None, failures: list = None) -> bytes:
     """
     Merge main PDF with attachment PDFs/images.
     Safe for large file counts and threaded I/O.
+
+    If `failures` is given, every attachment that could not be fetched or merged
+    (or "__main__" when the merge fell back to the main PDF) is appended to it,
+    so a caller can tell a complete merge from a degraded one.
     """
+    if failures is None:
+        failures = []
 
     merger = PdfWriter()
 
@@ -110,6 +145,7 @@ def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None) -> bytes:
             merger.append(io.BytesIO(main_pdf_content))
     except Exception as e:
         frappe.log_error(f"Main PDF invalid: {e}")
+        failures.append("__main__")
         return main_pdf_content
 
     # -----------------------------
@@ -152,6 +188,7 @@ def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None) -> bytes:
 
             except Exception as e:
                 print(f"Task preparation failed: {original_url} - {e}")
+                failures.append(original_url)
 
     # -----------------------------
     # 3. Fetch + Merge Attachments
@@ -162,6 +199,7 @@ def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None) -> bytes:
             for original_url, content in executor.map(fetch_content_worker, tasks):
 
                 if not content:
+                    failures.append(original_url)
                     continue
 
                 # ---- Try PDF ----
@@ -187,6 +225,7 @@ def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None) -> bytes:
 
                 except Exception as e:
                     print(f"Attachment merge failed [{original_url}]: {str(e)}")
+                    failures.append(original_url)
 
     # -----------------------------
     # 4. Output Final PDF
@@ -199,4 +238,5 @@ def merge_pdfs(main_pdf_content: bytes, attachment_urls: list = None) -> bytes:
 
     except Exception as e:
         frappe.log_error(f"Final PDF write failed: {e}")
+        failures.append("__main__")
         return main_pdf_content
@@ -0,0 +1,155 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Local-disk cache of rendered (and attachment-merged) print PDFs.
+
+A PO / WO print is a full wkhtmltopdf render plus an attachment fetch + merge,
+and the same unchanged PO is downloaded many times (single download, bulk
+download, re-download after a failed fetch). `get_or_render` keys the final
+PDF bytes by
+
+    doctype, name, doc.modified, print_format, Print Format.modified,
+    sorted attachment URL set
+
+so any save of the document, any edit of the print format, and any change to
+its attachments is a miss. What the key CANNOT see is a linked record the
+template reads (vendor address, project name) changing without the document
+being saved — MAX_AGE_HOURS bounds that staleness.
+
+Entries live under `sites/<site>/private/pdf_render_cache/` (never web-served).
+The directory is bounded to `pdf_render_cache_mb` from site config (default
+DEFAULT_MAX_MB); after every store the least-recently-used entries are evicted
+(services/disk_cache.py, shared with the attachment and workbook caches).
+
+Hit / miss / eviction counters live in Redis; `get_render_cache_stats` exposes
+them with the current disk usage for tuning.
+"""
+import hashlib
+import json
+import os
+import time
+
+import frappe
+
+from nirmaan_stack.services import disk_cache
+
+DEFAULT_MAX_MB = 512
+MAX_AGE_HOURS = 24
+
+_EXT = ".pdf"
+# Entries sit flat in the cache dir. No idle guard: an entry is read whole into
+# memory on a hit, so nothing holds it open while it is evicted.
+_BOUNDED = (("", (_EXT,)),)
+_COUNTERS = ("hits", "misses", "evictions")
+
+
+def _cache_dir():
+    return frappe.get_site_path("private", "pdf_render_cache")
+
+
+def _max_bytes():
+    return int(frappe.conf.get("pdf_render_cache_mb") or DEFAULT_MAX_MB) * 1024 * 1024
+
+
+def _counter_key(name):
+    return frappe.cache().make_key(f"pdf_render_cache:{name}")
+
+
+def _bump(name, by=1):
+    try:
+        frappe.cache().incrby(_counter_key(name), by)
+    except Exception:
+        pass  # counters are advisory; never fail a download over them
+
+
+def render_key(doctype, name, modified, print_format, format_modified=None, attachment_urls=None,
+               variant=None):
+    basis = [
+        doctype, name, str(modified or ""), print_format or "", str(format_modified or ""),
+        sorted(u for u in (attachment_urls or []) if u),
+    ]
+    if variant is not None:
+        basis.append(str(variant))  # a render option the template reads (e.g. is_admin)
+    return hashlib.sha256(json.dumps(basis).encode()).hexdigest()
+
+
+def lookup(doctype, name, print_format, attachment_urls=None, variant=None):
+    """(cache path, cached bytes or None) for this exact doc version / format / attachments.
+
+    Print permission is checked on every call — a hit must not bypass the check
+    `frappe.get_print` would have made. Counts the hit or miss; on a miss the caller
+    renders and hands complete output to `store(path, content)`.
+    """
+    frappe.has_permission(doctype, "print", doc=name, throw=True)
+
+    modified = frappe.db.get_value(doctype, name, "modified")
+    format_modified = frappe.db.get_value("Print Format", print_format, "modified") if print_format else None
+    key = render_key(doctype, name, modified, print_format, format_modified, attachment_urls, variant)
+    path = os.path.join(_cache_dir(), key + _EXT)
+
+    cached = _read_fresh(path)
+    _bump("hits" if cached is not None else "misses")
+    return path, cached
+
+
+def get_or_render(doctype, name, print_format, attachment_urls, render):
+    """Return the cached PDF for this exact (doc version, format, attachments), or
+    call `render()` -> (bytes, complete) and return the bytes, storing them only
+    when `complete` — a render that fell back (an attachment failed to fetch or
+    merge) is served but not cached, so a transient S3 error is not pinned.
+    """
+    path, cached = lookup(doctype, name, print_format, attachment_urls)
+    if cached is not None:
+        return cached
+
+    content, complete = render()
+    if content and complete:
+        store(path, content)
+    return content
+
+
+def _read_fresh(path):
+    try:
+        if time.time() - os.path.getmtime(path) > MAX_AGE_HOURS * 3600:
+            os.remove(path)
+            return None
+        with open(path, "rb") as f:
+            content = f.read()
+        os.utime(path)  # LRU: a hit makes the entry the newest
+        return content
+    except OSError:
+        return None  # absent, or removed by a concurrent eviction
+
+
+def store(path, content):
+    """Atomic write (tmp + rename), then trim the directory to its bound."""
+    try:
+        disk_cache.write_atomic(path, content)
+        _evict()
+    except OSError:
+        frappe.log_error(frappe.get_traceback(), "PDF render cache write failed")
+
+
+def _entries():
+    return disk_cache.files(_cache_dir(), (_EXT,))
+
+
+def _evict():
+    evicted = disk_cache.evict(_cache_dir(), _BOUNDED, _max_bytes(), min_idle_sec=0)
+    if evicted:
+        _bump("evictions", evicted)
+
+
+@frappe.whitelist()
+def get_render_cache_stats():
+    """Hit / miss / eviction counters and current disk usage (System Manager only)."""
+    frappe.only_for("System Manager")
+    cache = frappe.cache()
+    stats = {name: int(cache.get(_counter_key(name)) or 0) for name in _COUNTERS}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else None
+    entries = _entries()
+    stats["entries"] = len(entries)
+    stats["size_mb"] = round(sum(size for _, size, _ in entries) / 1048576, 1)
+    stats["max_mb"] = round(_max_bytes() / 1048576, 1)
+    return stats
@@ -0,0 +1,149 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the normalised-attachment cache and the interleaved TDS merge.
+
+No Frappe site needed — the site path, realtime and error log are patched, and attachments
+are local files. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.pdf_helper.test_attachment_cache
+"""
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+
+from nirmaan_stack.api.pdf_helper import attachment_cache as ac
+from nirmaan_stack.api.pdf_helper import pdf_merger_api as merger
+
+LETTER = (612, 792)
+
+
+def _pdf(*sizes):
+    writer = PdfWriter()
+    for width, height in sizes:
+        writer.add_blank_page(width=width, height=height)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def _sizes(path_or_bytes):
+    src = io.BytesIO(path_or_bytes) if isinstance(path_or_bytes, bytes) else path_or_bytes
+    return [(round(float(p.mediabox.width)), round(float(p.mediabox.height)))
+            for p in PdfReader(src).pages]
+
+
+class TestNormalized(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "cache")
+        patcher = patch.object(ac, "_normalize", wraps=ac._normalize)
+        self.normalize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _file(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _source(self, path):
+        return ac.Source(path, self.root, local_path=path)
+
+    def test_pages_are_stretched_to_a4_once(self):
+        path = self._file("letter.pdf", _pdf(LETTER, (792, 612)))
+        first = ac.normalized(self._source(path))
+        self.assertTrue(first.cached and first.converted)
+        self.assertEqual(_sizes(first.path), [(595, 842), (842, 595)])
+        with patch.object(ac, "_fetch") as fetch:
+            second = ac.normalized(self._source(path))
+        fetch.assert_not_called()  # index hit: no read, no normalise
+        self.assertEqual((second.path, second.converted), (first.path, True))
+        self.assertEqual(self.normalize.call_count, 1)
+
+    def test_same_bytes_under_another_url_share_the_blob(self):
+        data = _pdf((595.27, 841.89))
+        a = ac.normalized(self._source(self._file("a.pdf", data)))
+        b = ac.normalized(self._source(self._file("b.pdf", data)))
+        self.assertEqual(a.path, b.path)
+        self.assertFalse(b.converted)
+        self.assertEqual(self.normalize.call_count, 1)
+
+    def test_replaced_file_is_a_miss(self):
+        path = self._file("doc.pdf", _pdf(LETTER))
+        first = ac.normalized(self._source(path))
+        self._file("doc.pdf", _pdf(LETTER, LETTER))
+        os.utime(path, ns=(1, 1))
+        second = ac.normalized(self._source(path))
+        self.assertNotEqual(first.path, second.path)
+        self.assertEqual(len(_sizes(second.path)), 2)
+
+    def test_images_become_a4_pdfs(self):
+        buffer = io.BytesIO()
+        Image.new("RGBA", (300, 200), (255, 0, 0, 255)).save(buffer, format="PNG")
+        result = ac.normalized(ac.Source("/files/x.png", self.root, content=buffer.getvalue()))
+        self.assertEqual(_sizes(result.path), [(842, 595)])
+
+    def test_errors_carry_their_kind(self):
+        with self.assertRaises(ac.AttachmentError) as bad:
+            ac.normalized(ac.Source("/files/x", self.root, content=b"neither pdf nor image"))
+        self.assertEqual(bad.exception.kind, "format")
+        with self.assertRaises(ac.AttachmentError) as missing:
+            ac.normalized(self._source(os.path.join(self.tmp.name, "gone.pdf")))
+        self.assertEqual(missing.exception.kind, "fetch")
+
+    def test_unwritable_cache_falls_back_to_a_tempfile(self):
+        blocker = self._file("not-a-dir", b"")
+        source = ac.Source("/files/a.pdf", os.path.join(blocker, "cache"), content=_pdf(LETTER))
+        result = ac.normalized(source)
+        self.addCleanup(os.unlink, result.path)
+        self.assertFalse(result.cached)
+        self.assertEqual(_sizes(result.path), [(595, 842)])
+
+
+class TestInterleavedMerge(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = os.path.join(self.tmp.name, "cache")
+        self.files = {}
+        for target in ("log_error", "publish_realtime"):
+            patcher = patch.object(merger.frappe, target)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+        for target, kwargs in (
+            ("resolve", {"side_effect": lambda url, s3=None: ac.Source(url, root, content=self.files[url])}),
+            ("evict", {}),
+        ):
+            patcher = patch.object(ac, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_attachments_follow_their_item_page(self):
+        self.files = {"/files/one.pdf": _pdf(LETTER, LETTER), "/files/bad": b"junk"}
+        main = _pdf((595, 842), (600, 800), (595, 842))  # 1 start page + 2 approval pages
+        items = [
+            {"tds_item_name": "One", "tds_attachment": "/files/one.pdf"},
+            {"tds_item_name": "Bad", "tds_attachment": "/files/bad"},
+        ]
+        out = io.BytesIO()
+        failed = merger.write_pdfs_interleaved(out, main, items)
+        self.assertEqual(failed, ["Bad (Invalid PDF/Image format)"])
+        # start, approval 1, two attachment pages, approval 2 -- every page A4
+        self.assertEqual(_sizes(out.getvalue()), [(595, 842)] * 5)
+
+    def test_bytes_api_is_unchanged(self):
+        self.files = {"/files/one.pdf": _pdf(LETTER)}
+        content, failed = merger.merge_pdfs_interleaved(
+            _pdf((595, 842)), [{"tds_attachment": "/files/one.pdf"}])
+        self.assertEqual(failed, [])
+        self.assertEqual(len(_sizes(content)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
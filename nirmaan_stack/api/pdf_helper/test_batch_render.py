@@ -0,0 +1,129 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the batch renderer: order, render-cache reuse, per-item failures.
+
+HTML rendering and wkhtmltopdf are patched (each item "converts" to a one-page PDF whose
+width identifies it), so no site or binary is needed. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.pdf_helper.test_batch_render
+"""
+import io
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from pypdf import PdfReader, PdfWriter
+
+from nirmaan_stack.api.pdf_helper import batch_render as br
+
+
+def _page(width):
+    writer = PdfWriter()
+    writer.add_blank_page(width=width, height=100)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+class TestWriteMerged(unittest.TestCase):
+    def setUp(self):
+        self.cache = {}  # (name, variant) -> bytes
+        self.stored = []
+        self.broken = set()
+        self.lock = threading.Lock()
+        self.running = self.peak = 0
+
+        def prepare(item):
+            if item.name in self.broken:
+                raise ValueError("template error")
+            return item.name, {}
+
+        def convert(html, options, path):
+            with self.lock:
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+            # Later items finish first, so completion order differs from item order.
+            time.sleep(0.02 * (10 - int(html.split("-")[1])))
+            with self.lock:
+                self.running -= 1
+            with open(path, "wb") as f:
+                f.write(_page(100 + int(html.split("-")[1])))
+            return path
+
+        def lookup(doctype, name, print_format, attachment_urls=None, variant=None):
+            return (name, variant), self.cache.get((name, variant))
+
+        def store(path, content):
+            self.stored.append(path)
+            self.cache[path] = content
+
+        for target, kwargs in (
+            ("_prepare", {"side_effect": prepare}),
+            ("_convert", {"side_effect": convert}),
+            ("_workers", {"return_value": 3}),
+            ("cleanup", {}),
+        ):
+            patcher = patch.object(br, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for target, kwargs in (("lookup", {"side_effect": lookup}), ("store", {"side_effect": store})):
+            patcher = patch.object(br.render_cache, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for target, kwargs in (("log_error", {}), ("get_traceback", {}), ("throw", {"side_effect": RuntimeError})):
+            patcher = patch.object(br.frappe, target, **kwargs)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _items(self, n, cache=False, variant=None):
+        return [br.PrintItem("Project Progress Reports", f"R-{i}", "Milestone Report", label=f"zone {i}",
+                             cache=cache, variant=variant) for i in range(n)]
+
+    def _merge(self, items):
+        out, progress = io.BytesIO(), []
+        failed = br.write_merged(items, out, on_progress=lambda *a: progress.append(a))
+        widths = [int(p.mediabox.width) - 100 for p in PdfReader(io.BytesIO(out.getvalue())).pages]
+        return widths, failed, progress
+
+    def test_pages_follow_item_order_with_bounded_concurrency(self):
+        widths, failed, progress = self._merge(self._items(6))
+        self.assertEqual(widths, [0, 1, 2, 3, 4, 5])
+        self.assertEqual(failed, [])
+        self.assertEqual([p[:2] for p in progress], [(i, 6) for i in range(1, 7)])
+        self.assertLessEqual(self.peak, 3)
+        self.assertGreater(self.peak, 1)
+
+    def test_cached_items_skip_rendering_and_misses_are_stored(self):
+        items = self._items(3, cache=True, variant="is_admin=1")
+        self.cache[("R-1", "is_admin=1")] = _page(101)
+        widths, _, _ = self._merge(items)
+        self.assertEqual(widths, [0, 1, 2])
+        self.assertEqual([c.args[0].name for c in br._prepare.call_args_list], ["R-0", "R-2"])
+        self.assertCountEqual(self.stored, [("R-0", "is_admin=1"), ("R-2", "is_admin=1")])
+
+        br._prepare.reset_mock()
+        self.assertEqual(self._merge(items)[0], [0, 1, 2])
+        br._prepare.assert_not_called()
+
+    def test_uncached_items_never_touch_the_cache(self):
+        self._merge(self._items(2))
+        br.render_cache.lookup.assert_not_called()
+        self.assertEqual(self.stored, [])
+
+    def test_a_failed_item_is_left_out_and_reported(self):
+        self.broken = {"R-1"}
+        widths, failed, progress = self._merge(self._items(3))
+        self.assertEqual(widths, [0, 2])
+        self.assertEqual(failed, ["zone 1"])
+        self.assertEqual(len(progress), 3)
+        br.frappe.log_error.assert_called_once()
+
+    def test_nothing_rendered_is_an_error(self):
+        self.broken = {"R-0", "R-1"}
+        with self.assertRaises(RuntimeError):
+            br.write_merged(self._items(2), io.BytesIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the rendered-PDF cache: key sensitivity, hit/miss, LRU eviction.
+
+No Frappe site needed — the site path, DB lookups and counters are patched. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.pdf_helper.test_render_cache
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from nirmaan_stack.api.pdf_helper import render_cache as rc
+
+
+class TestRenderKey(unittest.TestCase):
+    BASE = ("Procurement Orders", "PO/001", "2026-10-01 10:00:00", "PO Orders", "2026-01-01", ["/a.pdf"])
+
+    def test_each_component_changes_the_key(self):
+        base = rc.render_key(*self.BASE)
+        for i, value in enumerate(("Service Requests", "PO/002", "2026-10-02", "PO Orders Without Rate",
+                                   "2026-02-01", ["/b.pdf"])):
+            args = list(self.BASE)
+            args[i] = value
+            with self.subTest(component=i):
+                self.assertNotEqual(base, rc.render_key(*args))
+
+    def test_attachment_order_is_irrelevant(self):
+        a = rc.render_key(*self.BASE[:5], ["/a.pdf", "/b.pdf"])
+        b = rc.render_key(*self.BASE[:5], ["/b.pdf", "/a.pdf", None])
+        self.assertEqual(a, b)
+
+
+class TestGetOrRender(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.modified = "2026-10-01 10:00:00"
+        for target, kwargs in (
+            ("_cache_dir", {"return_value": self.tmp.name}),
+            ("_bump", {}),
+            ("_max_bytes", {"return_value": 10_000}),
+        ):
+            patcher = patch.object(rc, target, **kwargs)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+        for target in ("has_permission", "log_error"):
+            patcher = patch.object(rc.frappe, target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(rc.frappe.db, "get_value", side_effect=lambda *a, **k: self.modified)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.renders = 0
+
+    def _render(self, complete=True, size=100):
+        def render():
+            self.renders += 1
+            return b"x" * size, complete
+        return render
+
+    def _get(self, name="PO/001", **kw):
+        return rc.get_or_render("Procurement Orders", name, "PO Orders", ["/a.pdf"], self._render(**kw))
+
+    def test_second_call_is_a_hit(self):
+        self._get()
+        self._get()
+        self.assertEqual(self.renders, 1)
+        self.assertEqual([c.args[0] for c in self._bump.call_args_list], ["misses", "hits"])
+
+    def test_save_of_the_document_misses(self):
+        self._get()
+        self.modified = "2026-10-01 11:00:00"
+        self._get()
+        self.assertEqual(self.renders, 2)
+
+    def test_incomplete_render_is_not_cached(self):
+        self._get(complete=False)
+        self._get()
+        self.assertEqual(self.renders, 2)
+
+    def test_expired_entry_is_re_rendered(self):
+        self._get()
+        (path,) = [os.path.join(self.tmp.name, f) for f in os.listdir(self.tmp.name)]
+        old = time.time() - (rc.MAX_AGE_HOURS + 1) * 3600
+        os.utime(path, (old, old))
+        self._get()
+        self.assertEqual(self.renders, 2)
+
+    def test_eviction_drops_least_recently_used(self):
+        for i in range(4):  # 4 x 3000 bytes against a 10_000-byte bound
+            self._get(name=f"PO/{i}", size=3000)
+            time.sleep(0.01)  # distinct mtimes -> deterministic LRU order
+        total = sum(os.path.getsize(os.path.join(self.tmp.name, f)) for f in os.listdir(self.tmp.name))
+        self.assertLessEqual(total, 10_000 * rc.disk_cache.EVICT_TO_FRACTION)
+        self.renders = 0
+        self._get(name="PO/3", size=3000)  # newest survives
+        self.assertEqual(self.renders, 0)
+        self._get(name="PO/0", size=3000)  # oldest was evicted
+        self.assertEqual(self.renders, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import frappe
 import json
 from frappe.utils import flt,getdate, nowdate
+from nirmaan_stack.api.inventory_summary_index import refresh_po_rates_for
 from nirmaan_stack.api.vendor_credit import recalculate_vendor_credit
 
 @frappe.whitelist()
@@ -139,6 +140,10 @@ def handle_merge_pos(po_id: str, merged_items: list, order_data: list, payment_t
         for po_name in pos_to_update:
             frappe.db.set_value("Procurement Orders", po_name, "status", "Merged")
             frappe.db.set_value("Procurement Orders", po_name, "merged", new_po_doc.name)
+
+        # set_value fires no hook: the master's insert above still saw the sources
+        # live, so re-derive the inventory rate rows now that they are Merged.
+        refresh_po_rates_for(pos_to_update)
         
         # Vendor credit recalculation after PO merge
         if po_doc.vendor:
@@ -1,9 +1,11 @@
 import frappe
 from frappe import _
-from frappe.utils import flt, create_batch # Use flt for safe float conversion
+from frappe.utils import flt # Use flt for safe float conversion
 import json
 from frappe.utils.caching import redis_cache
 
+from nirmaan_stack.services.name_set import get_all_in
+
 
 def _calculate_sr_totals(sr_doc):
     """
@@ -63,21 +65,18 @@ def get_project_sr_summary_aggregates(project_id: str):
     total_amount_paid_for_srs = 0
     if sr_names:
         sum_field = "sum(CAST(amount as numeric)) as total_paid"
-        # Chunk the `document_name IN (...)` list so the generated query never exceeds sqlparse's
-        # 10,000-token cap (a project can have thousands of approved SRs). SUM is associative, so adding
-        # the per-chunk partial sums is byte-identical to one big IN query.
-        for chunk in create_batch(sr_names, 500):
-            paid_payments_for_srs = frappe.get_all(
-                "Project Payments",
-                filters=[
-                    ["status", "=", "Paid"],
-                    ["document_type", "=", "Service Requests"],
-                    ["document_name", "in", list(chunk)]
-                ],
-                fields=[sum_field]
-            )
-            if paid_payments_for_srs and paid_payments_for_srs[0] and paid_payments_for_srs[0].total_paid is not None:
-                total_amount_paid_for_srs += flt(paid_payments_for_srs[0].total_paid)
+        # A project can have thousands of approved SRs: bind them as one key-set parameter
+        # rather than inlining a `document_name IN (...)` past sqlparse's 10,000-token cap.
+        paid_payments_for_srs = get_all_in(
+            "Project Payments", "document_name", sr_names,
+            filters=[
+                ["status", "=", "Paid"],
+                ["document_type", "=", "Service Requests"],
+            ],
+            fields=[sum_field]
+        )
+        if paid_payments_for_srs and paid_payments_for_srs[0] and paid_payments_for_srs[0].total_paid is not None:
+            total_amount_paid_for_srs += flt(paid_payments_for_srs[0].total_paid)
 
     print(f"DEBUG: Returning SR Aggregates: GST Total={total_sr_value_inc_gst}, Paid Total={total_amount_paid_for_srs}")
 
@@ -353,33 +352,25 @@ def get_project_pr_status_counts(project_id: str):
     # document (the former get_doc-per-name N+1: hundreds of doc loads on a large project).
     # `_get_pr_derived_status_v2` only reads the order_list items (status + item_id) and
     # the PO items (item_id), so we fetch just those two child tables.
-    # Chunk the `parent IN (...)` lists via create_batch. Bounded per project today, but
-    # chunking keeps a very large project from tripping sqlparse's 10k-token cap on prod
-    # and matches the pattern used elsewhere in this file.
+    # The `parent` sets are bound as one key-set parameter (`get_all_in`), so a very large
+    # project is still one statement per table and never trips sqlparse's 10k-token cap.
     pr_items_by_parent = {}
-    if pr_names:
-        for chunk in create_batch(pr_names, 500):
-            for it in frappe.get_all(
-                "Procurement Request Item Detail",
-                filters={"parent": ["in", chunk], "parentfield": "order_list"},
-                fields=["parent", "status", "item_id"],
-                limit_page_length=0,
-            ):
-                pr_items_by_parent.setdefault(it["parent"], []).append(
-                    frappe._dict(status=it["status"], item_id=it["item_id"])
-                )
+    for it in get_all_in(
+        "Procurement Request Item Detail", "parent", pr_names,
+        filters={"parentfield": "order_list"},
+        fields=["parent", "status", "item_id"],
+    ):
+        pr_items_by_parent.setdefault(it["parent"], []).append(
+            frappe._dict(status=it["status"], item_id=it["item_id"])
+        )
     po_items_by_parent = {}
-    if po_names:
-        for chunk in create_batch(po_names, 500):
-            for it in frappe.get_all(
-                "Purchase Order Item",
-                filters={"parent": ["in", chunk]},
-                fields=["parent", "item_id"],
-                limit_page_length=0,
-            ):
-                po_items_by_parent.setdefault(it["parent"], []).append(
-                    frappe._dict(item_id=it["item_id"])
-                )
+    for it in get_all_in(
+        "Purchase Order Item", "parent", po_names,
+        fields=["parent", "item_id"],
+    ):
+        po_items_by_parent.setdefault(it["parent"], []).append(
+            frappe._dict(item_id=it["item_id"])
+        )
 
     # Lightweight doc-like objects so `_get_pr_derived_status_v2` is reused verbatim
     # (byte-identical to the old get_doc path — same fields, same logic).
@@ -525,20 +516,17 @@ def get_project_po_summary_aggregates(project_id: str):
         # sum_field = "sum(CAST(COALESCE(amount, 0) AS numeric)) as total_paid"
         sum_field = "sum(CAST(amount as numeric)) as total_paid"
 
-        # Chunk the `document_name IN (...)` list (a project can have thousands of POs) to stay under
-        # sqlparse's 10,000-token cap. SUM is associative -> per-chunk partial sums add up byte-identically.
-        for chunk in create_batch(po_names, 500):
-            paid_payments_for_pos = frappe.get_all(
-                "Project Payments",
-                filters=[
-                    ["status", "=", "Paid"],
-                    ["document_type", "=", "Procurement Orders"],
-                    ["document_name", "in", list(chunk)]
-                ],
-                fields=[sum_field]
-            )
-            if paid_payments_for_pos and paid_payments_for_pos[0] and paid_payments_for_pos[0].total_paid is not None:
-                total_amount_paid_for_pos += flt(paid_payments_for_pos[0].total_paid)
+        # A project can have thousands of POs: one statement with the names bound as a key set.
+        paid_payments_for_pos = get_all_in(
+            "Project Payments", "document_name", po_names,
+            filters=[
+                ["status", "=", "Paid"],
+                ["document_type", "=", "Procurement Orders"],
+            ],
+            fields=[sum_field]
+        )
+        if paid_payments_for_pos and paid_payments_for_pos[0] and paid_payments_for_pos[0].total_paid is not None:
+            total_amount_paid_for_pos += flt(paid_payments_for_pos[0].total_paid)
             
     result = {
         "total_po_value_inc_gst": round(total_po_value_inc_gst, 2),
@@ -683,22 +671,18 @@ def get_projects_financial_rollup():
 
     # total_credit_purchase — Credit terms on the valid (non-Merged/Inactive) POs.
     # This is a CROSS-PROJECT rollup, so valid_po_project holds EVERY non-Merged/Inactive
-    # PO (thousands). Chunk the `parent IN (...)` list via create_batch so the generated
-    # query never exceeds sqlparse's 10k-token cap on prod (same fix as lines above). Each
-    # PO falls in exactly one chunk, so the sums just accumulate across batches.
-    if valid_po_project:
-        for chunk in create_batch(list(valid_po_project.keys()), 500):
-            for term in frappe.get_all(
-                "PO Payment Terms",
-                filters={"payment_type": "Credit", "parent": ["in", chunk]},
-                fields=["parent", "amount", "term_status"],
-                limit_page_length=0,
-            ):
-                b = bucket(valid_po_project.get(term.get("parent")))
-                if b is not None:
-                    amt = flt(term.get("amount"))
-                    b["total_credit_purchase"] += amt
-                    if term.get("term_status") == "Paid":
-                        b["total_credit_paid"] += amt
+    # PO (thousands). The names are bound as one key-set parameter (`get_all_in`): one
+    # statement of constant size instead of a `parent IN (...)` chunk per 500 POs.
+    for term in get_all_in(
+        "PO Payment Terms", "parent", valid_po_project,
+        filters={"payment_type": "Credit"},
+        fields=["parent", "amount", "term_status"],
+    ):
+        b = bucket(valid_po_project.get(term.get("parent")))
+        if b is not None:
+            amt = flt(term.get("amount"))
+            b["total_credit_purchase"] += amt
+            if term.get("term_status") == "Paid":
+                b["total_credit_paid"] += amt
 
     return rollup
\ No newline at end of file
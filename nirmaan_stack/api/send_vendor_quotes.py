@@ -349,7 +349,7 @@ def handle_delayed_items(pr_id: str, comments: dict = None, loss_justifications=
                         )
                         click_action_url = f"{frappe.utils.get_url()}/frontend/purchase-orders?tab=Approve%20PO" # Adjust URL if needed
                         try:
-                           PrNotification(user, notification_title, notification_body, click_action_url)
+                           PrNotification(user, notification_title, notification_body, click_action_url, doc=pr_doc)
                         except Exception as e:
                            frappe.log_error(f"Failed to send push notification to {user.get('name')}: {e}", "handle_delayed_items Notification")
 
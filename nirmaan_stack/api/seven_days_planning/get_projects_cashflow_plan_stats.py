@@ -3,6 +3,7 @@ from collections import defaultdict
 from datetime import date
 from frappe.utils import create_batch
 from nirmaan_stack.services.role_profiles import PROCUREMENT_PROFILES
+from nirmaan_stack.services.project_permissions import user_projects
 
 
 # Roles that require project-level filtering based on user permissions
@@ -32,11 +33,7 @@ def _get_allowed_projects(user: str) -> list[str]:
     """
     Get list of projects the user has access to via Nirmaan User Permissions.
     """
-    return frappe.get_all(
-        "Nirmaan User Permissions",
-        filters={"user": user, "allow": "Projects"},
-        pluck="for_value",
-    )
+    return user_projects(user)
 
 
 def _should_filter_by_permissions(user: str, role: str) -> bool:
@@ -1,6 +1,7 @@
 import frappe, json
 from frappe import _
 from nirmaan_stack.services.procurement_approval import AWAITING_APPROVAL_STATES, PENDING_ITEM_STATUS
+from nirmaan_stack.services.project_permissions import user_projects
 
 @frappe.whitelist()
 def sidebar_counts(user: str) -> str:
@@ -235,11 +236,7 @@ def sidebar_counts(user: str) -> str:
 
 def _get_projects(user:str) -> list[str]:
     """Return the Projects a non-admin user may access."""
-    return frappe.get_all(
-        "Nirmaan User Permissions",
-        filters={"user": user, "allow": "Projects"},
-        pluck="for_value",
-    )
+    return user_projects(user)
 
 
 # import frappe, json
@@ -10,6 +10,8 @@ Wire contract: `frontend/src/pages/SnagList/types.ts`
   get_sheet_columns -> GetSheetColumnsResponse
   parse_preview     -> ParsePreviewResponse
   ingest_batches    -> IngestBatchesResponse
+  start_ingest_batches -> {status, job_id}; `snag_import_ready` carries the
+                          IngestBatchesResponse as `result`
 """
 
 from __future__ import annotations
@@ -22,6 +24,7 @@ import frappe
 from frappe.utils import now
 from frappe.utils.file_manager import save_file
 
+from nirmaan_stack.api.background_jobs import start_job
 from nirmaan_stack.api.snags import require_import_access
 from nirmaan_stack.api.snags import file_io
 
@@ -29,6 +32,17 @@ _WHITESPACE = re.compile(r"\s+")
 
 _MAPPING_KEYS = ("area", "category", "description", "remarks")
 
+#: Snags per multi-row INSERT on ingest -- one progress event each.
+INSERT_CHUNK = 500
+
+_SNAG_INSERT_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "project", "batch", "area", "category", "description", "status", "remark", "source_row",
+)
+
+_INGEST_JOB_KIND = "snag_import"
+_INGEST_BUILDER = "nirmaan_stack.api.snags.import_wizard.build_ingest"
+
 
 # ---------------------------------------------------------------------------
 # Parser seam
@@ -71,9 +85,7 @@ def _load_grid(path, sheet_name):
     grid -- which is accepted: the file is already on local disk by here, and the
     alternative is a parser entry point that returns both, owned by another module.
     """
-    import openpyxl  # noqa: PLC0415
-
-    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    workbook = _reader().open_workbook(path)
     try:
         if sheet_name not in workbook.sheetnames:
             frappe.throw(
@@ -402,11 +414,72 @@ def parse_preview(project=None, file_url=None, sheet_name=None, mapping=None, he
 # ---------------------------------------------------------------------------
 
 
-def _ingest_one_sheet(project, file_url, entry):
+def _reserve_snag_names(count):
+    """`count` consecutive `Project Snag` names, claimed with ONE bump of the naming series.
+
+    The same `tabSeries` row and lock `frappe.model.naming.getseries` takes per document,
+    so names stay gap-free and cannot collide with a snag added by hand meanwhile; the
+    prefix comes from the doctype's own `autoname` ("SNAG-.YY.-.#####"), never a copy.
+    """
+    from frappe.model.naming import parse_naming_series  # noqa: PLC0415
+
+    prefix_expr, _, hashes = frappe.get_meta("Project Snag").autoname.rpartition(".")
+    key = parse_naming_series(prefix_expr)
+    series = frappe.qb.DocType("Series")
+    current = (
+        frappe.qb.from_(series).select(series.current).where(series.name == key).for_update()
+    ).run()
+    if current and current[0][0] is not None:
+        start = int(current[0][0])
+        frappe.qb.update(series).set(series.current, start + count).where(series.name == key).run()
+    else:
+        start = 0
+        frappe.qb.into(series).columns(series.name, series.current).insert(key, count).run()
+    return [f"{key}{n:0{len(hashes)}d}" for n in range(start + 1, start + count + 1)]
+
+
+def _insert_snags(project, batch, rows, progress=None):
+    """Write a sheet's snags with multi-row INSERTs, `INSERT_CHUNK` rows per statement.
+
+    Rows are built in memory with the values `get_doc(...).insert()` used to store. Going
+    around the document layer skips nothing an insert relies on: the only hook on `Project
+    Snag` is the status-attribution `before_save`, which returns untouched for a NEW snag.
+    """
+    names = _reserve_snag_names(len(rows))
+    stamp, user = now(), frappe.session.user
+    values = [
+        (
+            name, stamp, stamp, user, user, 0,
+            project,
+            batch,
+            row.get("area") or "",
+            row.get("category") or "",
+            # ADR-0019: the mapped text, else the row's first non-empty cell, else
+            # blank. Never an invented placeholder.
+            _description_for(row),
+            # The source file's own Status vocabulary is not ours -- every imported
+            # snag starts at Pending (plan section 2).
+            "Pending",
+            # ONE remark field (ADR-0018). It arrives holding the source author's
+            # text and is overwritten by whoever next changes this snag's status.
+            row.get("remark") or "",
+            row.get("source_row"),
+        )
+        for name, row in zip(names, rows)
+    ]
+    for start in range(0, len(values), INSERT_CHUNK):
+        chunk = values[start : start + INSERT_CHUNK]
+        frappe.db.bulk_insert("Project Snag", _SNAG_INSERT_FIELDS, chunk)
+        if progress:
+            progress(min(start + INSERT_CHUNK, len(values)), len(values))
+
+
+def _ingest_one_sheet(project, file_url, path, entry, progress=None):
     """Create ONE `Project Snag Batch` plus its Snags. Returns a SheetIngestResult body.
 
-    Caller owns the savepoint -- this raises on any failure so the caller can roll THIS
-    sheet back and leave the others standing.
+    `path` is the workbook already fetched to local disk -- ONE fetch per ingest, however
+    many sheets it names. Caller owns the savepoint -- this raises on any failure so the
+    caller can roll THIS sheet back and leave the others standing.
     """
     sheet_name = entry.get("sheet_name")
     if not sheet_name:
@@ -420,14 +493,7 @@ def _ingest_one_sheet(project, file_url, entry):
     # row numbers then address rows nobody looked at.
     header_row = _coerce_header_row(entry.get("header_row"))
 
-    tmp_path = file_io._fetch_file_to_tempfile(file_url)
-    try:
-        parsed = _parser().parse_sheet(tmp_path, sheet_name, mapping, header_row=header_row)
-    finally:
-        try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
+    parsed = _parser().parse_sheet(path, sheet_name, mapping, header_row=header_row)
 
     # The server re-parses and filters to the rows the user left TICKED -- the client
     # never sends row CONTENT, so a tampered payload cannot invent a snag.
@@ -475,26 +541,7 @@ def _ingest_one_sheet(project, file_url, entry):
     )
     batch.insert(ignore_permissions=True)
 
-    for row in rows:
-        frappe.get_doc(
-            {
-                "doctype": "Project Snag",
-                "project": project,
-                "batch": batch.name,
-                "area": row.get("area") or "",
-                "category": row.get("category") or "",
-                # ADR-0019: the mapped text, else the row's first non-empty cell, else
-                # blank. Never an invented placeholder.
-                "description": _description_for(row),
-                # The source file's own Status vocabulary is not ours -- every imported
-                # snag starts at Pending (plan section 2).
-                "status": "Pending",
-                # ONE remark field (ADR-0018). It arrives holding the source author's
-                # text and is overwritten by whoever next changes this snag's status.
-                "remark": row.get("remark") or "",
-                "source_row": row.get("source_row"),
-            }
-        ).insert(ignore_permissions=True)
+    _insert_snags(project, batch.name, rows, progress)
 
     return {
         "sheet_name": sheet_name,
@@ -510,41 +557,58 @@ def _ingest_one_sheet(project, file_url, entry):
     }
 
 
-@frappe.whitelist(methods=["POST"])
-def ingest_batches(project=None, file_url=None, file_name=None, batches=None):
-    """Create one Batch per entry, with PER-SHEET FAILURE ISOLATION.
+def _coerce_batches(batches):
+    batches = frappe.parse_json(batches) if isinstance(batches, str) else batches
+    if not isinstance(batches, list) or not batches:
+        frappe.throw("No sheets were selected for import.", title="Nothing to import")
+    return batches
+
+
+def _ingest_all(project, file_url, file_name, batches, job=None):
+    """The ingest itself, shared by the request path and the background job.
 
     Each sheet runs inside its own savepoint: a sheet that raises is rolled back to that
     savepoint and reported with its error, and every OTHER sheet still imports. A silent
     partial success is a defect, so each failure is also written to the Error Log.
 
-    `file_name` is accepted for provenance/logging; the batch's durable pointer to the
-    workbook is `source_file = file_url`.
+    The workbook is fetched ONCE for every sheet; a fetch that fails imports nothing and
+    raises. `job`, when given, receives a progress event per sheet and per INSERT chunk.
     """
-    _assert_project(project)
-    require_import_access("import a snag list")
-
-    batches = frappe.parse_json(batches) if isinstance(batches, str) else batches
-    if not isinstance(batches, list) or not batches:
-        frappe.throw("No sheets were selected for import.", title="Nothing to import")
-
     results = []
-    for index, entry in enumerate(batches):
-        sheet_name = (entry or {}).get("sheet_name") or f"sheet #{index + 1}"
-        save_point = f"snag_ingest_{index}"
-        frappe.db.savepoint(save_point)
+    tmp_path = file_io._fetch_file_to_tempfile(file_url)
+    try:
+        for index, entry in enumerate(batches):
+            sheet_name = (entry or {}).get("sheet_name") or f"sheet #{index + 1}"
+            on_chunk = None
+            if job:
+                job.progress(index, len(batches), f"Importing {sheet_name}")
+
+                def on_chunk(done, total, index=index, sheet_name=sheet_name):
+                    job.progress(
+                        index, len(batches), f"Importing {sheet_name}: {done} of {total} snags"
+                    )
+
+            save_point = f"snag_ingest_{index}"
+            frappe.db.savepoint(save_point)
+            try:
+                results.append(
+                    _ingest_one_sheet(project, file_url, tmp_path, entry or {}, on_chunk)
+                )
+            except Exception as exc:
+                frappe.db.rollback(save_point=save_point)
+                frappe.log_error(
+                    title="Snag ingest failed for one sheet",
+                    message=(
+                        f"project={project!r} file_name={file_name!r} file_url={file_url!r}\n"
+                        f"sheet={sheet_name!r}\n\n{frappe.get_traceback()}"
+                    ),
+                )
+                results.append({"sheet_name": sheet_name, "ok": False, "error": str(exc)})
+    finally:
         try:
-            results.append(_ingest_one_sheet(project, file_url, entry or {}))
-        except Exception as exc:
-            frappe.db.rollback(save_point=save_point)
-            frappe.log_error(
-                title="Snag ingest failed for one sheet",
-                message=(
-                    f"project={project!r} file_name={file_name!r} file_url={file_url!r}\n"
-                    f"sheet={sheet_name!r}\n\n{frappe.get_traceback()}"
-                ),
-            )
-            results.append({"sheet_name": sheet_name, "ok": False, "error": str(exc)})
+            os.unlink(tmp_path)
+        except OSError:
+            pass
 
     frappe.db.commit()
 
@@ -553,3 +617,47 @@ def ingest_batches(project=None, file_url=None, file_name=None, batches=None):
         "total_imported": sum(r.get("imported") or 0 for r in results if r.get("ok")),
         "failed_count": sum(1 for r in results if not r.get("ok")),
     }
+
+
+@frappe.whitelist(methods=["POST"])
+def ingest_batches(project=None, file_url=None, file_name=None, batches=None):
+    """Create one Batch per entry, with PER-SHEET FAILURE ISOLATION, inside the request.
+
+    Kept for small lists and as the path the API tests drive; the wizard uses
+    `start_ingest_batches`, which runs the same `_ingest_all` off the request.
+
+    `file_name` is accepted for provenance/logging; the batch's durable pointer to the
+    workbook is `source_file = file_url`.
+    """
+    _assert_project(project)
+    require_import_access("import a snag list")
+    return _ingest_all(project, file_url, file_name, _coerce_batches(batches))
+
+
+@frappe.whitelist(methods=["POST"])
+def start_ingest_batches(project=None, file_url=None, file_name=None, batches=None):
+    """Enqueue `ingest_batches` on the shared job runner. Returns {status, job_id}.
+
+    A 2,000-row list outlives a request timeout even with multi-row inserts once the
+    re-parse and the fetch are counted in. Access and the payload shape are checked HERE,
+    so a refusal is an immediate error rather than a failed job. The worker reports
+    `snag_import_progress` and finishes with `snag_import_ready` {job_id, result}, where
+    `result` is the IngestBatchesResponse the synchronous endpoint would have returned.
+    """
+    _assert_project(project)
+    require_import_access("import a snag list")
+    return start_job(
+        _INGEST_JOB_KIND,
+        _INGEST_BUILDER,
+        project=project,
+        file_url=file_url,
+        file_name=file_name,
+        batches=_coerce_batches(batches),
+    )
+
+
+def build_ingest(job, project, file_url, file_name, batches):
+    """Background builder for `start_ingest_batches` (runs as the requesting user)."""
+    result = _ingest_all(project, file_url, file_name, batches, job=job)
+    job.progress(len(batches), len(batches), "Import finished")
+    return {"result": result}
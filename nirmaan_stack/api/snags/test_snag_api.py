@@ -14,6 +14,7 @@ tearDownClass, including the `Deleted Document` rows the delete test deliberatel
 
 import os
 import tempfile
+from unittest.mock import patch
 
 import frappe
 from frappe.tests.utils import FrappeTestCase
@@ -361,6 +362,60 @@ class TestSnagApi(FrappeTestCase):
             "Consultant: urgent, re-check 20th",
         )
 
+    def test_bulk_ingest_stores_what_a_document_insert_would(self):
+        rows = [_row(8, "Kitchen", "Leaking tap"), _row(9, "Lobby", "Cracked tile")]
+        result = self._one_sheet(sheet="Bulk", batch_name="Bulk batch", rows=rows)
+        snags = frappe.get_all(
+            "Project Snag",
+            filters={"batch": result["results"][0]["batch"]},
+            fields=["name", "owner", "docstatus", "status", "status_changed_by", "area"],
+            order_by="source_row asc",
+            limit_page_length=0,
+        )
+        # Consecutive names from the doctype's own series, so the next hand-added snag
+        # continues after them instead of colliding.
+        numbers = [int(s.name.rsplit("-", 1)[1]) for s in snags]
+        self.assertEqual(numbers, [numbers[0], numbers[0] + 1])
+        self.assertTrue(all(s.name.startswith("SNAG-") for s in snags))
+        manual = frappe.get_doc(
+            {"doctype": "Project Snag", "project": self.project, "description": "By hand"}
+        ).insert(ignore_permissions=True)
+        type(self)._created_names.add(manual.name)
+        self.assertEqual(int(manual.name.rsplit("-", 1)[1]), numbers[-1] + 1)
+        for snag in snags:
+            self.assertEqual((snag.owner, snag.docstatus, snag.status), ("Administrator", 0, "Pending"))
+            # A new snag has not been "moved" by anyone yet -- same as the hook's rule.
+            self.assertFalse(snag.status_changed_by)
+
+    def test_background_ingest_reports_progress_and_returns_the_same_result(self):
+        self._install_parser({"Queued": _parsed([_row(n, "Roof", f"Item {n}") for n in range(8, 13)])})
+        entry = {
+            "sheet_name": "Queued",
+            "batch_name": "Queued batch",
+            "mapping": _MAPPING,
+            "header_row": None,
+            "accepted_rows": list(range(8, 13)),
+        }
+        job = type("Job", (), {"events": [], "progress": lambda self, *a: self.events.append(a)})()
+        with patch.object(import_wizard, "INSERT_CHUNK", 2):
+            out = import_wizard.build_ingest(
+                job, self.project, self.file_url, "snags.xlsx", [entry]
+            )
+        result = out["result"]
+        type(self)._created_names.add(result["results"][0]["batch"])
+        self.assertEqual((result["total_imported"], result["failed_count"]), (5, 0))
+        self.assertEqual(frappe.db.count("Project Snag", {"batch": result["results"][0]["batch"]}), 5)
+        self.assertEqual(
+            [event[2] for event in job.events],
+            [
+                "Importing Queued",
+                "Importing Queued: 2 of 5 snags",
+                "Importing Queued: 4 of 5 snags",
+                "Importing Queued: 5 of 5 snags",
+                "Import finished",
+            ],
+        )
+
     def test_ingest_imports_only_accepted_rows(self):
         rows = [_row(8, "Kitchen", "A"), _row(9, "Lobby", "B"), _row(10, "Roof", "C")]
         entry = {
@@ -1348,6 +1403,107 @@ class TestSnagApi(FrappeTestCase):
                 snag="NOT-A-SNAG", area="A", category="C", description="D"
             )
 
+    # -- bulk writer: set-based, same attribution as the document layer --------
+
+    def _stamp_and_last_change(self, snag):
+        stamp = frappe.db.get_value(
+            "Project Snag", snag, ["status", "status_changed_by", "status_changed_on"], as_dict=True
+        )
+        versions = frappe.get_all(
+            "Version",
+            filters={"ref_doctype": "Project Snag", "docname": snag},
+            fields=["data"],
+            order_by="creation desc",
+            limit=1,
+        )
+        changed = frappe.parse_json(versions[0].data)["changed"] if versions else None
+        return stamp, changed
+
+    def test_bulk_attribution_is_identical_to_the_per_doc_path(self):
+        """The bulk writer bypasses `before_save`, so it must reproduce it EXACTLY.
+
+        Same clock, same user, one snag moved by `update_snag_status` (the document layer)
+        and one by `bulk_update_snags`: the stamp and the Version row must match field for
+        field. A third snag "moved" to the status it already has must stamp nothing and
+        log nothing -- the controller's `previous.status == doc.status` branch.
+        """
+        result = self._one_sheet(sheet="BulkParity", batch_name="Bulk parity batch")
+        per_doc, bulk, unchanged = frappe.get_all(
+            "Project Snag",
+            filters={"batch": result["results"][0]["batch"]},
+            pluck="name",
+            order_by="source_row asc",
+        )
+
+        with patch("frappe.utils.now", return_value="2026-10-19 09:30:00.000000"):
+            tracking.update_snag_status(snag=per_doc, status="WIP")
+            payload = tracking.bulk_update_snags(
+                updates=[{"snag": bulk, "status": "WIP"}, {"snag": unchanged, "status": "Pending"}]
+            )
+        self.assertEqual((payload["updated"], payload["changed"]), (2, 1))
+
+        expected_stamp, expected_changed = self._stamp_and_last_change(per_doc)
+        stamp, changed = self._stamp_and_last_change(bulk)
+        self.assertEqual(stamp, expected_stamp)
+        self.assertEqual(changed, expected_changed)
+        self.assertEqual([c[0] for c in changed], ["status", "status_changed_by", "status_changed_on"])
+
+        stamp, changed = self._stamp_and_last_change(unchanged)
+        self.assertIsNone(stamp.status_changed_by)
+        self.assertIsNone(changed)
+
+    def test_bulk_status_and_details_follow_the_single_row_rules(self):
+        result = self._one_sheet(sheet="BulkEdit", batch_name="Bulk edit batch")
+        first, second, _ = frappe.get_all(
+            "Project Snag",
+            filters={"batch": result["results"][0]["batch"]},
+            pluck="name",
+            order_by="source_row asc",
+        )
+        tracking.update_snag_status(snag=first, status="WIP", remark="Started")
+        before = frappe.db.get_value(
+            "Project Snag", first, ["status_changed_by", "status_changed_on"], as_dict=True
+        )
+
+        tracking.bulk_update_snags(
+            updates=[
+                # Details only: normalised like a single edit, and the stamp stays put.
+                {"snag": first, "area": "  Terrace ", "description": " Ponding "},
+                {"snag": second, "status": "Completed", "category": " Electrical "},
+            ]
+        )
+
+        first_doc = frappe.get_doc("Project Snag", first)
+        self.assertEqual((first_doc.area, first_doc.description), ("Terrace", "Ponding"))
+        self.assertEqual(first_doc.category, "Civil")  # not carried -> left alone
+        self.assertEqual(first_doc.remark, "Started")
+        self.assertEqual(first_doc.status_changed_by, before.status_changed_by)
+        self.assertEqual(str(first_doc.status_changed_on), str(before.status_changed_on))
+
+        second_doc = frappe.get_doc("Project Snag", second)
+        self.assertEqual((second_doc.status, second_doc.category), ("Completed", "Electrical"))
+        self.assertEqual(second_doc.status_changed_by, frappe.session.user)
+
+    def test_bulk_update_snags_refuses_remarks_unknown_snags_and_non_admins(self):
+        snag = self._a_snag("BulkRefuse", "Bulk refuse batch")
+        with self.assertRaises(frappe.ValidationError):
+            tracking.bulk_update_snags(updates=[{"snag": snag, "remark": "One note for all"}])
+        with self.assertRaises(frappe.ValidationError):
+            tracking.bulk_update_snags(updates=[{"snag": snag, "status": "Open"}])
+        with self.assertRaises(frappe.ValidationError):
+            tracking.bulk_update_snags(
+                updates=[{"snag": snag, "status": "WIP"}, {"snag": "NOT-A-SNAG", "status": "WIP"}]
+            )
+        # Refused as a whole: the valid entry did not land either.
+        self.assertEqual(frappe.db.get_value("Project Snag", snag, "status"), "Pending")
+
+        frappe.session.user = "snag-nobody@example.com"
+        try:
+            with self.assertRaises(frappe.PermissionError):
+                tracking.bulk_update_snags(updates=[{"snag": snag, "status": "WIP"}])
+        finally:
+            frappe.session.user = "Administrator"
+
     # -- field-value suggestions -----------------------------------------------
 
     def test_get_snag_field_values_excludes_the_empty_string(self):
@@ -4,17 +4,26 @@ delete, stats, field-value suggestions.
 Wire contract: `frontend/src/pages/SnagList/types.ts`.
 Storage decision + delete consequences: `docs/adr/0017-snag-rows-are-standalone-documents.md`.
 
-STATUS ATTRIBUTION IS NOT SET HERE. `status_changed_by` / `status_changed_on` are stamped by
-`integrations/controllers/project_snag.before_save`, which is the single owner -- a second
-stamping site in this module would be free to drift from it. That is also why every write
-below goes through the DOCUMENT LAYER (`frappe.get_doc` + `doc.save`): `frappe.db.set_value`
-and raw SQL bypass `doc_events` entirely, so the stamp would never fire and the attribution
-would read as authoritative while being quietly stale (root CLAUDE.md, Coding Conventions).
+STATUS ATTRIBUTION IS NOT DECIDED HERE. `status_changed_by` / `status_changed_on` are stamped
+by `integrations/controllers/project_snag.before_save`, which is the single owner -- a second
+stamping RULE in this module would be free to drift from it. That is also why every
+single-row write below goes through the DOCUMENT LAYER (`frappe.get_doc` + `doc.save`):
+`frappe.db.set_value` and raw SQL bypass `doc_events` entirely, so the stamp would never fire
+and the attribution would read as authoritative while being quietly stale (root CLAUDE.md,
+Coding Conventions).
+
+THE ONE EXCEPTION IS THE BULK WRITER (`bulk_update_snags`). A site walk moves several hundred
+snags at once, and one full `doc.save()` each is several hundred saves. It loads the rows in
+ONE query and writes them with set-based UPDATEs -- and, because that bypasses the hooks, it
+does by hand the two things the document layer would have done: the attribution, through the
+controller's own pure `status_attribution` (the same rule, not a copy), and a `Version` row
+per changed snag, shaped like the ones `track_changes` writes.
 """
 
 from __future__ import annotations
 
 import frappe
+from frappe.query_builder import Case
 
 from nirmaan_stack.api.snags import (
     require_bulk_access,
@@ -23,6 +32,8 @@ from nirmaan_stack.api.snags import (
     require_row_edit_access,
     require_status_access,
 )
+from nirmaan_stack.integrations.controllers.project_snag import status_attribution
+from nirmaan_stack.services.version_rows import insert_versions, version_data
 
 #: Display order, matching SNAG_STATUSES in types.ts.
 SNAG_STATUSES = ("Pending", "WIP", "Completed", "Not Applicable")
@@ -136,8 +147,8 @@ def bulk_update_snag_status(snags=None, status=None):
     them with a note written about none of them. A remark belongs to the row it describes,
     so it rides the SINGLE-row endpoint only. Do not add it here for symmetry.
 
-    One `doc.save()` per snag rather than a single bulk UPDATE: a bulk DB write bypasses
-    `doc_events`, so the status-change attribution would never be stamped.
+    Written by `_bulk_write` -- one load, set-based UPDATEs, the controller's attribution
+    rule and a Version row per moved snag -- not one `doc.save()` per snag.
     """
     _assert_status(status)
     require_bulk_access("bulk-update snag statuses")
@@ -147,15 +158,129 @@ def bulk_update_snag_status(snags=None, status=None):
     if not names:
         frappe.throw("No snags selected.", title="Nothing to update")
 
-    updated = 0
-    for name in names:
-        doc = frappe.get_doc("Project Snag", name)
-        doc.status = status
-        doc.save(ignore_permissions=True)
-        updated += 1
+    changed = _bulk_write({name: {"status": status} for name in names})
+    frappe.db.commit()
+    return {"updated": len(set(names)), "changed": changed, "status": status}
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_update_snags(updates=None):
+    """Apply MANY per-snag edits in one go -- a site walk's worth. ADMIN ONLY.
+
+    `updates` is a list of `{"snag": name, ...fields}` where the fields are any of `status`
+    and the DETAIL_FIELDS (`area` / `category` / `description`). A field an entry does not
+    carry is left alone; the detail fields go through `_normalized_details`, the same rule
+    as create and single edit. `remark` is refused for the reason `bulk_update_snag_status`
+    takes none (Q12a), and provenance (`batch` / `source_row` / `project`) is never writable.
+    """
+    require_bulk_access("bulk-update snags")
 
+    entries = frappe.parse_json(updates) if isinstance(updates, str) else updates
+    entries = entries or []
+    if not entries:
+        frappe.throw("No snags selected.", title="Nothing to update")
+
+    changes = {}
+    for entry in entries:
+        name = entry.get("snag")
+        if not name:
+            frappe.throw("Every update needs a snag.", title="Missing field: snag")
+        unknown = set(entry) - {"snag", "status", *DETAIL_FIELDS}
+        if unknown:
+            frappe.throw(
+                f"A bulk update cannot write {', '.join(sorted(unknown))}. Only status, "
+                f"{', '.join(DETAIL_FIELDS)} are bulk-editable.",
+                title="Field not bulk-editable",
+            )
+        wanted = changes.setdefault(name, {})
+        if "status" in entry:
+            _assert_status(entry["status"])
+            wanted["status"] = entry["status"]
+        details = _normalized_details(entry.get("area"), entry.get("category"), entry.get("description"))
+        wanted.update({field: details[field] for field in DETAIL_FIELDS if field in entry})
+
+    changed = _bulk_write(changes)
     frappe.db.commit()
-    return {"updated": updated, "status": status}
+    return {"updated": len(changes), "changed": changed}
+
+
+#: Every column `_bulk_write` may set, in DOCTYPE FIELD ORDER -- the order `track_changes`
+#: lists them in a Version row, so a bulk row and a `doc.save()` row read identically.
+_BULK_FIELDS = ("area", "category", "status", "status_changed_by", "status_changed_on", "description")
+
+
+def _plan_bulk_write(current, changes, user, now):
+    """[(snag, {field: new value}, [[field, old, new], ...])] for every snag that changes.
+
+    PURE. `current` is {snag: {field: stored value}}. A field already holding the wanted
+    value is not written (the document layer would record no change for it either), and
+    the attribution comes from `status_attribution` -- the exact rule `before_save` applies.
+    """
+    plan = []
+    for name, wanted in changes.items():
+        row = current[name]
+        new = {field: value for field, value in wanted.items() if row.get(field) != value}
+        if "status" in new:
+            new.update(status_attribution(row.get("status"), new["status"], user, now) or {})
+        if new:
+            diff = [[field, row.get(field), new[field]] for field in _BULK_FIELDS if field in new]
+            plan.append((name, new, diff))
+    return plan
+
+
+def _bulk_write(changes):
+    """Write {snag: {field: value}} set-based; return how many snags actually changed.
+
+    ONE query loads every affected row, ONE UPDATE writes them (a field every changed snag
+    sets to the same value is a plain SET, anything else a CASE on name), and the Version
+    rows go in with one bulk insert.
+    """
+    names = list(changes)
+    rows = frappe.get_all(
+        "Project Snag",
+        filters={"name": ["in", names]},
+        fields=["name", *_BULK_FIELDS],
+        limit_page_length=0,
+    )
+    current = {row.name: row for row in rows}
+    missing = [name for name in names if name not in current]
+    if missing:
+        frappe.throw(
+            f"Snag(s) not found: {', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}",
+            title="Not found",
+        )
+
+    user, now = frappe.session.user, frappe.utils.now()
+    plan = _plan_bulk_write(current, changes, user, now)
+    if not plan:
+        return 0
+
+    snag = frappe.qb.DocType("Project Snag")
+    query = frappe.qb.update(snag).set(snag.modified, now).set(snag.modified_by, user)
+    for field in _BULK_FIELDS:
+        values = {name: new[field] for name, new, _ in plan if field in new}
+        if not values:
+            continue
+        distinct = set(values.values())
+        if len(values) == len(plan) and len(distinct) == 1:
+            query = query.set(snag[field], distinct.pop())
+            continue
+        case = Case()
+        for name, value in values.items():
+            case = case.when(snag.name == name, value)
+        query = query.set(snag[field], case.else_(snag[field]))
+    query.where(snag.name.isin([name for name, _, _ in plan])).run()
+
+    _insert_versions(plan, user, now)
+    return len(plan)
+
+
+def _insert_versions(plan, user, now):
+    """One `Version` row per changed snag, in one insert -- the row `track_changes` would
+    have written for the same save, so the snag's history reads the same either way."""
+    insert_versions(
+        "Project Snag", ((name, version_data(changed=diff)) for name, _, diff in plan), user, now,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -49,7 +49,10 @@ def get_target_rates_for_item_list(item_ids_json, order_by="modified desc"):
              return []
 
         # Define fields to fetch for the parent "Target Rates"
-        parent_fields = ["name", "item_name", "unit","make", "rate", "item_id", "creation", "modified"]
+        parent_fields = [
+            "name", "item_name", "unit", "make", "rate", "item_id", "creation", "modified",
+            "latest_rate", "min_rate", "max_rate", "quote_count", "last_quoted_on",
+        ]
 
         # Fetch parent "Target Rates" documents for the given item_ids.
         # The client-supplied item_ids_list can be large, so chunk the `item_id IN (...)` to keep the
@@ -79,23 +82,23 @@ def get_target_rates_for_item_list(item_ids_json, order_by="modified desc"):
             "procurement_package", "make", "idx", "dispatch_date"
         ]
 
-        results_with_children = []
-
-        for tr_header in target_rates_list:
-            selected_quotations = frappe.get_all(
+        # ONE child read for every header (chunked like the parent read), instead of one
+        # query per Target Rate -- an item list of 300 was 300 round trips here.
+        children_by_parent = {}
+        for chunk in create_batch([tr.name for tr in target_rates_list], 500):
+            for child in frappe.get_all(
                 "Selected Quotations",
-                fields=child_fields,
-                filters={
-                    "parent": tr_header.name,
-                    "parenttype": "Target Rates"
-                    # Optional: "parentfield": "your_child_table_fieldname_in_target_rates"
-                    # e.g., "parentfield": "selected_quotations"
-                },
-                order_by="idx asc"
-            )
+                fields=child_fields + ["parent"],
+                filters={"parent": ["in", list(chunk)], "parenttype": "Target Rates"},
+                order_by="idx asc",
+                limit_page_length=0,
+            ):
+                children_by_parent.setdefault(child.pop("parent"), []).append(child)
 
+        results_with_children = []
+        for tr_header in target_rates_list:
             tr_data = dict(tr_header)
-            tr_data["selected_quotations_items"] = selected_quotations
+            tr_data["selected_quotations_items"] = children_by_parent.get(tr_header.name, [])
             results_with_children.append(tr_data)
 
         return results_with_children
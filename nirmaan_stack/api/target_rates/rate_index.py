@@ -0,0 +1,306 @@
+"""Approved-quotation rate index -- one `Target Rates` row per (item, unit, make).
+
+Each row carries the target rate the procurement screens benchmark against (the rule
+below, unchanged from the old nightly rebuild) plus the latest, lowest and highest valid
+quote, the quote count and the newest quote's date, and the quotes that produced the rate
+as `Selected Quotations` children.
+
+The index is maintained INCREMENTALLY: `integrations/controllers/procurement_orders.py`
+calls `refresh_keys` for exactly the keys a PO's Approved Quotations touch when it writes
+or deletes them. The target rate depends on the clock (a 3-month window), so a key no new
+quote arrives for still drifts as its quotes age out of the window -- the daily
+`verify_index` sweep recomputes every key and rewrites only the rows that disagree, instead
+of deleting and re-inserting the whole table.
+
+Target rate rule, per key, over the VALID quotes (rate > 0, numeric quantity), newest first:
+  - no quote in the last 3 months with quantity > 0  -> the latest quote's rate
+  - exactly one                                      -> that quote's rate
+  - several                                          -> quantity-weighted average, 2 dp
+Keys without a make, and items that no longer exist, are not indexed.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import frappe
+from frappe.utils import add_months, create_batch, cstr, get_datetime, getdate, now
+
+RECENT_MONTHS = 3
+
+QUOTE_FIELDS = [
+    "name", "item_id", "item_name", "vendor", "procurement_order", "unit",
+    "quantity", "quote", "city", "state", "category", "procurement_package", "make", "creation",
+]
+
+INDEX_FIELDS = [
+    "name", "item_id", "item_name", "unit", "make", "rate",
+    "latest_rate", "min_rate", "max_rate", "quote_count", "last_quoted_on",
+]
+
+_SELECTED_FIELDS = [
+    "parent", "procurement_order", "vendor_name", "quote", "quantity", "dispatch_date",
+]
+
+# `item_id IN (...)` chunk size -- keeps the generated query under the sqlparse token cap.
+_CHUNK = 500
+
+
+def index_key(row):
+    """(item_id, unit, make) for an AQ / PO item / index row, or None when it is not indexable."""
+    key = (cstr(row.get("item_id")), cstr(row.get("unit")), cstr(row.get("make")))
+    return key if all(key) else None
+
+
+# ── the rule (pure) ───────────────────────────────────────────────────────────────────
+
+def summarize(quotes, now_dt):
+    """The index row for one key's quotes (any order), or None when none is valid.
+
+    PURE -- quotes are dicts with QUOTE_FIELDS. Returns the rate as a string, exactly as
+    `Target Rates.rate` has always stored it, and `selected` = the quotes behind it.
+    """
+    valid = []
+    for q in quotes:
+        try:
+            quote, quantity = Decimal(q.get("quote")), Decimal(q.get("quantity"))
+        except (InvalidOperation, TypeError, ValueError):
+            continue
+        if quote > 0:
+            valid.append((q, quote, quantity))
+    if not valid:
+        return None
+    valid.sort(key=lambda v: get_datetime(v[0]["creation"]), reverse=True)
+
+    cutoff = get_datetime(add_months(now_dt, -RECENT_MONTHS))
+    recent = [v for v in valid if get_datetime(v[0]["creation"]) >= cutoff and v[2] > 0]
+    if len(recent) > 1:
+        total = sum(quote * quantity for _, quote, quantity in recent)
+        rate = (total / sum(quantity for _, _, quantity in recent)).quantize(
+            Decimal("0.01"), rounding=ROUND_HALF_UP
+        )
+        selected = recent
+    else:
+        selected = recent or valid[:1]
+        rate = selected[0][1]
+
+    rates = [quote for _, quote, _ in valid]
+    return {
+        "rate": str(rate),
+        "latest_rate": float(valid[0][1]),
+        "min_rate": float(min(rates)),
+        "max_rate": float(max(rates)),
+        "quote_count": len(valid),
+        "last_quoted_on": get_datetime(valid[0][0]["creation"]),
+        "selected": [
+            {
+                "item_id": q.get("item_id"),
+                "item_name": q.get("item_name"),
+                "vendor_name": q.get("vendor"),
+                "procurement_order": q.get("procurement_order"),
+                "unit": q.get("unit"),
+                "quantity": str(quantity),
+                "quote": str(quote),
+                "city": q.get("city"),
+                "state": q.get("state"),
+                "category": q.get("category"),
+                "procurement_package": q.get("procurement_package"),
+                "make": q.get("make"),
+                "dispatch_date": q.get("creation"),
+            }
+            for q, quote, quantity in selected
+        ],
+    }
+
+
+def _signature(row, selected):
+    """What decides whether a stored row is current: the stats plus the quotes behind the rate.
+
+    `dispatch_date` is a Date field holding the quote's creation, so it compares as a date.
+    """
+    return (
+        cstr(row.get("rate")),
+        *(round(float(row.get(f) or 0), 2) for f in ("latest_rate", "min_rate", "max_rate")),
+        int(row.get("quote_count") or 0),
+        cstr(get_datetime(row.get("last_quoted_on")) if row.get("last_quoted_on") else ""),
+        sorted(
+            (cstr(s.get("procurement_order")), cstr(s.get("vendor_name")), cstr(s.get("quote")),
+             cstr(s.get("quantity")), cstr(getdate(s.get("dispatch_date")) if s.get("dispatch_date") else ""))
+            for s in selected
+        ),
+    )
+
+
+# ── reads ─────────────────────────────────────────────────────────────────────────────
+
+def _quotes_by_key(item_ids):
+    """Every Approved Quotation of these items, grouped by index key -- one query per chunk."""
+    grouped = {}
+    for chunk in create_batch(sorted(item_ids), _CHUNK):
+        for q in frappe.get_all(
+            "Approved Quotations",
+            filters={"item_id": ["in", list(chunk)]},
+            fields=QUOTE_FIELDS,
+            limit_page_length=0,
+        ):
+            key = index_key(q)
+            if key:
+                grouped.setdefault(key, []).append(q)
+    return grouped
+
+
+def _index_rows(item_ids=None):
+    """Stored index rows (with their selected quotations), grouped by key.
+
+    `item_ids=None` reads the whole table -- the sweep's view.
+    """
+    rows = []
+    if item_ids is None:
+        rows = frappe.get_all("Target Rates", fields=INDEX_FIELDS, limit_page_length=0)
+    else:
+        for chunk in create_batch(sorted(item_ids), _CHUNK):
+            rows.extend(frappe.get_all(
+                "Target Rates", filters={"item_id": ["in", list(chunk)]},
+                fields=INDEX_FIELDS, limit_page_length=0,
+            ))
+    selected = {}
+    for chunk in create_batch([r.name for r in rows], _CHUNK):
+        for s in frappe.get_all(
+            "Selected Quotations",
+            filters={"parenttype": "Target Rates", "parent": ["in", list(chunk)]},
+            fields=_SELECTED_FIELDS,
+            limit_page_length=0,
+        ):
+            selected.setdefault(s.parent, []).append(s)
+    grouped = {}
+    for row in rows:
+        row.selected = selected.get(row.name, [])
+        grouped.setdefault((cstr(row.item_id), cstr(row.unit), cstr(row.make)), []).append(row)
+    return grouped
+
+
+# ── writes ────────────────────────────────────────────────────────────────────────────
+
+def _reconcile(keys, quotes, stored, item_names, now_dt):
+    """Bring the stored rows for `keys` in line with `quotes`. Returns per-outcome counts."""
+    counts = {"checked": 0, "inserted": 0, "updated": 0, "deleted": 0}
+    for key in sorted(keys):
+        counts["checked"] += 1
+        existing = sorted(stored.get(key, []), key=lambda r: cstr(r.name))
+        summary = summarize(quotes.get(key, []), now_dt) if key[0] in item_names else None
+
+        keep = existing[0] if existing and summary else None
+        for row in existing:
+            if row is not keep:
+                frappe.delete_doc("Target Rates", row.name, ignore_permissions=True, force=True)
+                counts["deleted"] += 1
+        if not summary:
+            continue
+        if keep and _signature(keep, keep.selected) == _signature(summary, summary["selected"]):
+            continue
+
+        doc = frappe.get_doc("Target Rates", keep.name) if keep else frappe.new_doc("Target Rates")
+        doc.update({
+            "item_id": key[0], "unit": key[1], "make": key[2], "item_name": item_names[key[0]],
+            **{f: summary[f] for f in INDEX_FIELDS[5:]},
+        })
+        doc.set("selected_quotations", summary["selected"])
+        if keep:
+            doc.save(ignore_permissions=True)
+            counts["updated"] += 1
+        else:
+            doc.insert(ignore_permissions=True, ignore_mandatory=True)
+            counts["inserted"] += 1
+    return counts
+
+
+def _item_names(item_ids):
+    names = {}
+    for chunk in create_batch(sorted(item_ids), _CHUNK):
+        for item in frappe.get_all(
+            "Items", filters={"name": ["in", list(chunk)]}, fields=["name", "item_name"],
+            limit_page_length=0,
+        ):
+            names[item.name] = item.item_name
+    return names
+
+
+def refresh_keys(keys):
+    """Recompute the index rows for `keys` (iterable of (item_id, unit, make)). Returns counts.
+
+    Reads every quote of the keys' items in one query per chunk, so a 40-line PO costs a
+    handful of reads and writes only the rows whose rate or quotes actually moved.
+    """
+    keys = {k for k in keys if k and all(k)}
+    if not keys:
+        return {"checked": 0, "inserted": 0, "updated": 0, "deleted": 0}
+    item_ids = {k[0] for k in keys}
+    return _reconcile(
+        keys, _quotes_by_key(item_ids), _index_rows(item_ids), _item_names(item_ids),
+        get_datetime(now()),
+    )
+
+
+def refresh_after_write(keys):
+    """`refresh_keys` for a write path: a failure is rolled back to a savepoint and logged,
+    never raised.
+
+    A PO status change must not fail because the index could not be refreshed -- the
+    daily `verify_index` sweep repairs any key this misses. The savepoint matters on
+    PostgreSQL: a failed statement aborts the whole transaction otherwise.
+    """
+    frappe.db.savepoint("target_rate_index")
+    try:
+        refresh_keys(keys)
+    except Exception:
+        frappe.db.rollback(save_point="target_rate_index")
+        frappe.log_error(frappe.get_traceback(), "Target rate index refresh failed")
+
+
+def verify_index():
+    """Recompute EVERY key and rewrite only the rows that disagree. Returns per-outcome counts.
+
+    The scheduled backstop: catches keys whose 3-month window moved with no new quote,
+    and anything a write path's refresh missed. Rows for keys that have no valid quote
+    left (or whose item is gone) are deleted.
+    """
+    quotes = {}
+    item_ids = set()
+    for q in frappe.get_all(
+        "Approved Quotations",
+        filters={"item_id": ["is", "set"], "unit": ["is", "set"], "make": ["is", "set"]},
+        fields=QUOTE_FIELDS,
+        limit_page_length=0,
+    ):
+        key = index_key(q)
+        if key:
+            quotes.setdefault(key, []).append(q)
+            item_ids.add(key[0])
+    stored = _index_rows()
+    counts = _reconcile(
+        set(quotes) | set(stored), quotes, stored, _item_names(item_ids), get_datetime(now())
+    )
+    frappe.db.commit()
+    return counts
+
+
+# ── lookup API ────────────────────────────────────────────────────────────────────────
+
+@frappe.whitelist()
+def get_rates(keys_json):
+    """Batched index lookup. `keys_json`: a JSON list of {item_id, unit, make}.
+
+    Returns the index rows that exist for those keys (INDEX_FIELDS), one read per chunk
+    of items. A key with no row is simply absent.
+    """
+    keys = frappe.parse_json(keys_json) if isinstance(keys_json, str) else keys_json
+    if not isinstance(keys, list):
+        frappe.throw("keys_json must be a JSON array of {item_id, unit, make}.")
+    wanted = {k for k in (index_key(frappe._dict(k)) for k in keys if isinstance(k, dict)) if k}
+    rows = []
+    for chunk in create_batch(sorted({k[0] for k in wanted}), _CHUNK):
+        rows.extend(
+            r for r in frappe.get_all(
+                "Target Rates", filters={"item_id": ["in", list(chunk)]},
+                fields=INDEX_FIELDS, limit_page_length=0,
+            )
+            if (cstr(r.item_id), cstr(r.unit), cstr(r.make)) in wanted
+        )
+    return rows
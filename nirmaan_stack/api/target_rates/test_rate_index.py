@@ -0,0 +1,141 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the approved-quotation rate index.
+
+The rule (`summarize`) is pure; `_reconcile` is driven with `frappe.get_doc` / `new_doc` /
+`delete_doc` patched, so no site is needed. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.target_rates.test_rate_index
+"""
+import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+import frappe
+
+from nirmaan_stack.api.target_rates import rate_index
+
+NOW = datetime.datetime(2026, 6, 30, 12, 0)
+KEY = ("ITEM-1", "Nos", "Havells")
+
+
+def _aq(name, quote, quantity, days_ago, po="PO-1"):
+    return frappe._dict(
+        name=name, item_id=KEY[0], item_name="Switch", vendor="V-1", procurement_order=po,
+        unit=KEY[1], quantity=str(quantity), quote=str(quote), city="Pune", state="MH",
+        category="Electrical", procurement_package="Elec", make=KEY[2],
+        creation=NOW - datetime.timedelta(days=days_ago),
+    )
+
+
+def _stored(summary, name="TR-1"):
+    """An index row as `_index_rows` returns it, holding exactly `summary`."""
+    row = frappe._dict(name=name, item_id=KEY[0], unit=KEY[1], make=KEY[2], item_name="Switch")
+    row.update({f: summary[f] for f in rate_index.INDEX_FIELDS[5:]})
+    row.selected = [frappe._dict(s) for s in summary["selected"]]
+    return row
+
+
+class TestSummarize(unittest.TestCase):
+    def test_several_recent_quotes_give_the_weighted_average(self):
+        quotes = [_aq("a", 100, 10, 5), _aq("b", 130, 20, 40), _aq("c", 50, 1, 200)]
+        summary = rate_index.summarize(quotes, NOW)
+        self.assertEqual(summary["rate"], "120.00")  # (1000 + 2600) / 30
+        self.assertEqual([s["procurement_order"] for s in summary["selected"]], ["PO-1", "PO-1"])
+        self.assertEqual(
+            (summary["latest_rate"], summary["min_rate"], summary["max_rate"], summary["quote_count"]),
+            (100.0, 50.0, 130.0, 3),
+        )
+        self.assertEqual(summary["last_quoted_on"], NOW - datetime.timedelta(days=5))
+
+    def test_one_recent_quote_is_used_as_is(self):
+        summary = rate_index.summarize([_aq("a", 99.5, 4, 10), _aq("b", 80, 4, 300)], NOW)
+        self.assertEqual(summary["rate"], "99.5")
+        self.assertEqual(len(summary["selected"]), 1)
+
+    def test_no_recent_quote_falls_back_to_the_latest(self):
+        summary = rate_index.summarize([_aq("old", 70, 3, 400), _aq("newer", 75, 0, 120)], NOW)
+        self.assertEqual(summary["rate"], "75")
+        self.assertEqual(summary["quote_count"], 2)
+
+    def test_a_zero_quantity_recent_quote_does_not_count_as_recent(self):
+        summary = rate_index.summarize([_aq("a", 60, 0, 1), _aq("b", 65, 2, 150)], NOW)
+        self.assertEqual(summary["rate"], "60")  # latest valid quote, not an average
+
+    def test_invalid_quotes_are_ignored(self):
+        self.assertIsNone(rate_index.summarize([_aq("a", 0, 1, 1), _aq("b", "n/a", 1, 1)], NOW))
+
+
+class TestReconcile(unittest.TestCase):
+    def setUp(self):
+        for target in ("get_doc", "new_doc", "delete_doc"):
+            patcher = patch.object(rate_index.frappe, target)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def _reconcile(self, quotes, stored, items=None):
+        return rate_index._reconcile(
+            {KEY} | set(stored), {KEY: quotes} if quotes else {}, stored,
+            {KEY[0]: "Switch"} if items is None else items, NOW,
+        )
+
+    def test_a_current_row_is_left_alone(self):
+        quotes = [_aq("a", 100, 10, 5), _aq("b", 130, 20, 40)]
+        stored = {KEY: [_stored(rate_index.summarize(quotes, NOW))]}
+        counts = self._reconcile(quotes, stored)
+        self.assertEqual(counts, {"checked": 1, "inserted": 0, "updated": 0, "deleted": 0})
+        self.get_doc.assert_not_called()
+        self.new_doc.assert_not_called()
+
+    def test_a_quote_aging_out_of_the_window_rewrites_the_row(self):
+        quotes = [_aq("a", 100, 10, 5), _aq("b", 130, 20, 40)]
+        stored = {KEY: [_stored(rate_index.summarize(quotes, NOW - datetime.timedelta(days=80)))]}
+        stored[KEY][0].rate = "999"
+        doc = self.get_doc.return_value
+        counts = self._reconcile(quotes, stored)
+        self.assertEqual(counts["updated"], 1)
+        doc.update.assert_called_once()
+        self.assertEqual(doc.update.call_args.args[0]["rate"], "120.00")
+        doc.save.assert_called_once()
+
+    def test_new_keys_insert_and_dead_keys_delete(self):
+        counts = self._reconcile([_aq("a", 10, 1, 1)], {})
+        self.assertEqual(counts["inserted"], 1)
+        self.new_doc.return_value.insert.assert_called_once()
+
+        gone = ("ITEM-2", "Nos", "Anchor")
+        stored = {gone: [frappe._dict(name="TR-9", selected=[])]}
+        counts = rate_index._reconcile({gone}, {}, stored, {}, NOW)
+        self.assertEqual(counts["deleted"], 1)
+        self.delete_doc.assert_called_once_with(
+            "Target Rates", "TR-9", ignore_permissions=True, force=True)
+
+    def test_duplicate_rows_collapse_to_one(self):
+        quotes = [_aq("a", 10, 1, 1)]
+        summary = rate_index.summarize(quotes, NOW)
+        stored = {KEY: [_stored(summary, "TR-1"), _stored(summary, "TR-2")]}
+        counts = self._reconcile(quotes, stored)
+        self.assertEqual((counts["deleted"], counts["updated"]), (1, 0))
+        self.delete_doc.assert_called_once_with(
+            "Target Rates", "TR-2", ignore_permissions=True, force=True)
+
+    def test_a_deleted_item_is_not_indexed(self):
+        quotes = [_aq("a", 10, 1, 1)]
+        stored = {KEY: [_stored(rate_index.summarize(quotes, NOW))]}
+        counts = self._reconcile(quotes, stored, items={})
+        self.assertEqual(counts["deleted"], 1)
+
+
+class TestRefreshAfterWrite(unittest.TestCase):
+    def test_failures_are_logged_not_raised(self):
+        with patch.object(rate_index, "refresh_keys", side_effect=RuntimeError("db down")), \
+                patch.object(rate_index.frappe, "db") as db, \
+                patch.object(rate_index.frappe, "log_error") as log_error, \
+                patch.object(rate_index.frappe, "get_traceback", MagicMock(return_value="tb")):
+            rate_index.refresh_after_write({KEY})
+        db.rollback.assert_called_once_with(save_point="target_rate_index")
+        log_error.assert_called_once_with("tb", "Target rate index refresh failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the shared background job runner (slots, events, artifact hand-off).
+
+No Frappe site needed — Redis, realtime and the builder lookup are patched. Run inside the bench venv:
+    python -m unittest nirmaan_stack.api.test_background_jobs
+"""
+import unittest
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.api import background_jobs as jobs
+
+
+class _FakeRedis:
+    """Just enough of RedisWrapper for SET NX EX slots."""
+
+    def __init__(self):
+        self.store = {}
+
+    def make_key(self, key):
+        return f"site|{key}"
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value.encode()
+        return True
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+_RESULT = {}
+
+
+def _builder(job, **kwargs):
+    job.progress(1, 2, "half")
+    return dict(_RESULT)
+
+
+class TestSlots(unittest.TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        patcher = patch.object(jobs.frappe, "cache", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cap_is_per_user(self):
+        taken = [jobs._acquire_slot("a@x", f"j{i}", 60) for i in range(jobs.MAX_JOBS_PER_USER)]
+        self.assertEqual(taken, list(range(jobs.MAX_JOBS_PER_USER)))
+        self.assertIsNone(jobs._acquire_slot("a@x", "late", 60))
+        self.assertEqual(jobs._acquire_slot("b@x", "other", 60), 0)
+
+    def test_release_frees_only_own_slot(self):
+        slot = jobs._acquire_slot("a@x", "j1", 60)
+        jobs._release_slot("a@x", slot, "someone-else")
+        self.assertEqual(self.redis.get(jobs._slot_key("a@x", slot)), b"j1")
+        jobs._release_slot("a@x", slot, "j1")
+        self.assertEqual(jobs._acquire_slot("a@x", "j3", 60), slot)
+
+
+class TestRunJob(unittest.TestCase):
+    def setUp(self):
+        self.redis = _FakeRedis()
+        for target, kwargs in (
+            ("cache", {"return_value": self.redis}),
+            ("publish_realtime", {}),
+            ("set_user", {}),
+            ("log_error", {}),
+            ("get_attr", {"return_value": _builder}),
+        ):
+            patcher = patch.object(jobs.frappe, target, **kwargs)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(jobs, "write_temp_artifact", return_value="tok")
+        self.write = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _events(self):
+        return [c.args[0] for c in self.publish_realtime.call_args_list]
+
+    def _run(self, kind="milestone_reports"):
+        slot = jobs._acquire_slot("a@x", "job1", 60)
+        jobs._run_job(kind, "mod.builder", filename="out.pdf", user="a@x", job_id="job1", slot=slot)
+        return slot
+
+    def test_ready_carries_token_filename_and_extras(self):
+        _RESULT.clear()
+        _RESULT.update({"content": b"%PDF", "failed": 1})
+        self._run()
+        self.assertEqual(self._events(), ["milestone_reports_progress", "milestone_reports_ready"])
+        ready = self.publish_realtime.call_args_list[-1].args[1]
+        self.assertEqual(ready, {"job_id": "job1", "token": "tok", "filename": "out.pdf", "failed": 1})
+        self.write.assert_called_once_with(b"%PDF", write=None)
+
+    def test_prestored_token_is_published_as_is(self):
+        _RESULT.clear()
+        _RESULT.update({"token": "own", "filename": "priced.xlsx"})
+        self._run()
+        ready = self.publish_realtime.call_args_list[-1].args[1]
+        self.assertEqual(ready, {"job_id": "job1", "token": "own", "filename": "priced.xlsx"})
+        self.write.assert_not_called()
+
+    def test_result_only_job_publishes_its_data(self):
+        _RESULT.clear()
+        _RESULT.update({"result": {"total_imported": 3}})
+        self._run(kind="snag_import")
+        self.assertEqual(self._events(), ["snag_import_progress", "snag_import_ready"])
+        ready = self.publish_realtime.call_args_list[-1].args[1]
+        self.assertEqual(ready, {"job_id": "job1", "result": {"total_imported": 3}})
+        self.write.assert_not_called()
+
+    def test_slot_released_after_failure(self):
+        self.get_attr.return_value = MagicMock(side_effect=RuntimeError("boom"))
+        slot = self._run()
+        self.assertEqual(self._events(), ["milestone_reports_failed"])
+        self.log_error.assert_called_once()
+        self.assertEqual(jobs._acquire_slot("a@x", "next", 60), slot)
+
+    def test_empty_result_fails(self):
+        _RESULT.clear()
+        self._run()
+        self.assertEqual(self._events()[-1], "milestone_reports_failed")
+        self.write.assert_not_called()
+
+    def test_legacy_kinds_keep_their_event_names(self):
+        self.assertEqual(
+            jobs.job_events("bulk_download"),
+            ("bulk_download_progress", "bulk_download_all_ready", "bulk_download_failed"),
+        )
+        self.assertEqual(jobs.job_events("tds_export")[1], "tds_export_ready")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the paged inventory item-wise summary and its helper-table hooks.
+
+`frappe.db` is patched, so no site is needed:
+    python -m unittest nirmaan_stack.api.test_inventory_item_wise
+"""
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.api import inventory_item_wise as iw
+from nirmaan_stack.api import inventory_summary_index as idx
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class TestSummary(unittest.TestCase):
+    def setUp(self):
+        self.rows = []
+        db = MagicMock()
+        db.sql.side_effect = lambda sql, values, as_dict=False: [_Row(r) for r in self.rows]
+        patcher = patch.object(iw.frappe, "db", db)
+        self.db = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(idx, "is_ready", return_value=True)
+        self.ready = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unpaged_call_returns_the_full_list_from_the_helper_tables(self):
+        self.rows = [{"project": "P-1", "item_id": "ITEM-1"}, {"project": "P-2", "item_id": "ITEM-1"}]
+        rows = iw.get_inventory_item_wise_summary()
+        self.assertEqual(rows, self.rows)
+        sql = self.db.sql.call_args.args[0]
+        self.assertIn('"tabInventory Latest Report"', sql)
+        self.assertIn('"tabInventory PO Rate"', sql)
+        self.assertNotIn("LIMIT", sql)
+
+    def test_a_page_carries_the_window_total_and_whitelisted_order(self):
+        self.rows = [{"project": "P-1", "_total": 7}]
+        page = iw.get_inventory_item_wise_summary(
+            project="P-1", search_term="tmt bar", order_by="estimated_cost desc",
+            limit_start=20, limit_page_length=10,
+        )
+        self.assertEqual(page, {"data": [{"project": "P-1"}], "total_count": 7})
+        sql, values = self.db.sql.call_args.args
+        self.assertIn("ORDER BY s.estimated_cost DESC, s.item_id", sql)
+        self.assertIn("LIMIT %(_limit)s OFFSET %(_offset)s", sql)
+        self.assertEqual((values["project"], values["s_1"], values["_limit"], values["_offset"]),
+                         ("P-1", "%bar%", 10, 20))
+
+        iw.get_inventory_item_wise_summary(order_by="name; DROP TABLE x")
+        self.assertIn("ORDER BY s.item_id, s.make NULLS FIRST", self.db.sql.call_args.args[0])
+
+    def test_before_the_backfill_the_inline_legs_run(self):
+        self.ready.return_value = False
+        iw.get_inventory_item_wise_summary()
+        sql, values = self.db.sql.call_args.args
+        self.assertIn("DISTINCT ON (project)", sql)
+        self.assertNotIn("tabInventory PO Rate", sql)
+        self.assertEqual(values["excluded_po"], idx.EXCLUDED_PO_STATUSES)
+
+
+def _po(status="PO Approved", project="P-1", items=(("ITEM-1", "Tata", 100, 18),)):
+    rows = [_Row(zip(idx._PO_LINE_FIELDS, i)) for i in items]
+    return SimpleNamespace(status=status, project=project, get=lambda f: rows if f == "items" else None)
+
+
+class TestHooks(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(idx, "refresh_po_rates")
+        self.refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _save(self, before, after, method="on_update"):
+        after.get_doc_before_save = lambda: before
+        idx.on_po_change(after, method)
+
+    def test_a_dispatch_does_not_touch_the_rates(self):
+        self._save(_po(), _po(status="Dispatched"))
+        self.refresh.assert_not_called()
+
+    def test_amendment_and_line_edits_refresh_the_affected_items(self):
+        self._save(_po(), _po(status="PO Amendment"))
+        self.refresh.assert_called_once_with("P-1", {"ITEM-1"})
+
+        self.refresh.reset_mock()
+        self._save(_po(), _po(items=(("ITEM-1", "Tata", 120, 18), ("ITEM-2", None, 5, 18))))
+        self.refresh.assert_called_once_with("P-1", {"ITEM-1", "ITEM-2"})
+
+    def test_a_move_refreshes_both_projects_and_delete_needs_no_before_image(self):
+        self._save(_po(), _po(project="P-2"))
+        self.assertEqual(sorted(c.args[0] for c in self.refresh.call_args_list), ["P-1", "P-2"])
+
+        self.refresh.reset_mock()
+        doc = _po()
+        doc.get_doc_before_save = MagicMock()
+        idx.on_po_change(doc, "after_delete")
+        doc.get_doc_before_save.assert_not_called()
+        self.refresh.assert_called_once_with("P-1", {"ITEM-1"})
+
+    def test_raw_status_writes_refresh_the_items_of_the_named_pos(self):
+        with patch.object(idx.frappe, "db") as db:
+            db.sql.return_value = [_Row(project="P-1", item_id="ITEM-1"), _Row(project="P-1", item_id="ITEM-2"),
+                                   _Row(project=None, item_id="ITEM-3")]
+            idx.refresh_po_rates_for(["PO-1", "PO-2", None])
+            self.assertEqual(sorted(db.sql.call_args.args[1]["pos"]), ["PO-1", "PO-2"])
+        self.refresh.assert_called_once_with("P-1", {"ITEM-1", "ITEM-2"})
+
+        self.refresh.reset_mock()
+        idx.refresh_po_rates_for([])
+        self.refresh.assert_not_called()
+
+
+class TestRefreshLocking(unittest.TestCase):
+    def setUp(self):
+        for target, value in (("db", MagicMock()), ("session", SimpleNamespace(user="u@x"))):
+            patcher = patch.object(idx.frappe, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.db = idx.frappe.db
+
+    def _statements(self):
+        return [c.args[0].strip() for c in self.db.sql.call_args_list]
+
+    def test_a_refresh_locks_its_projects_in_order_before_the_delete(self):
+        idx.refresh_latest_reports({"P-2", "P-1", None})
+        statements = self._statements()
+        self.assertIn("pg_advisory_xact_lock_shared", statements[0])
+        self.assertEqual([c.args[1][0] for c in self.db.sql.call_args_list[1:3]],
+                         ["inventory_summary:latest_report:P-1", "inventory_summary:latest_report:P-2"])
+        self.assertTrue(statements[3].startswith("DELETE"))
+
+    def test_the_rebuild_takes_the_index_lock_exclusively(self):
+        idx.rebuild_inventory_summary_index()
+        first = self.db.sql.call_args_list[0].args
+        self.assertIn("pg_advisory_xact_lock(", first[0])
+        self.assertEqual(first[1], (idx._INDEX_LOCK,))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,55 +1,147 @@
+import json
+
 import frappe
 from frappe.utils import flt, now_datetime
 
+DEFAULT_CREDIT_LIMIT = 50000
 
-def _compute_credit_used(vendor_doc, exclude_po=None):
+# Statuses whose POs no longer carry credit exposure.
+_INACTIVE_PO_STATUSES = ("Cancelled", "Merged", "Inactive")
+
+# Cut-over between the two exposure formulas (see compute_credit_used_for).
+_EXPOSURE_CUTOVER = "2025-04-01"
+
+# Per-vendor credit cache. Invalidated from the Procurement Orders / Project
+# Payments hooks and by every recalculation; the TTL is the safety net for the
+# writes that bypass hooks (frappe.db.set_value on po_amount_delivered etc.).
+_CACHE_PREFIX = "vendor_credit"
+CACHE_TTL_SECONDS = 60 * 60
+
+
+def compute_credit_used_for(vendor_names, exclude_po=None):
     """
-    credit_used = pre_april_exposure + post_april_exposure.
+    credit_used for many vendors in ONE grouped query -> {vendor: credit_used}.
+
+    credit_used = pre_april_exposure + post_april_exposure, per PO:
 
     Post-April (creation >= 2025-04-01):
-        Σ max(po_amount_delivered - amount_paid, 0) per PO
+        max(po_amount_delivered - amount_paid, 0)
 
     Pre-April (creation < 2025-04-01):
-        Σ max(total_invoiced - amount_paid, 0) per PO
+        max(total_invoiced - amount_paid, 0)
         where total_invoiced = SUM(invoice_amount) from approved Vendor Invoices
+
+    Vendors with no eligible PO are returned with 0.
     """
-    exclude_clause = f" AND po.name != %s" if exclude_po else ""
-    params_base = [vendor_doc.name]
-    if exclude_po:
-        params_base.append(exclude_po)
-
-    # Post-April: use po_amount_delivered
-    post_april = frappe.db.sql(f"""
-        SELECT COALESCE(po.po_amount_delivered, 0) as delivered,
-               COALESCE(po.amount_paid, 0) as paid
+    vendor_names = list(dict.fromkeys(v for v in (vendor_names or []) if v))
+    if not vendor_names:
+        return {}
+
+    exclude_clause = "AND po.name != %(exclude_po)s" if exclude_po else ""
+    rows = frappe.db.sql(f"""
+        SELECT po.vendor,
+               SUM(GREATEST(
+                   CASE WHEN po.creation >= %(cutover)s
+                        THEN COALESCE(po.po_amount_delivered, 0)
+                        ELSE COALESCE(vi.total_invoiced, 0)
+                   END - COALESCE(po.amount_paid, 0),
+                   0
+               )) AS credit_used
         FROM "tabProcurement Orders" po
-        WHERE po.vendor = %s
-        AND po.status NOT IN ('Cancelled', 'Merged', 'Inactive')
-        AND po.creation >= '2025-04-01'
+        LEFT JOIN (
+            SELECT inv.document_name, SUM(inv.invoice_amount) AS total_invoiced
+            FROM "tabVendor Invoices" inv
+            INNER JOIN "tabProcurement Orders" ipo ON ipo.name = inv.document_name
+            WHERE inv.document_type = 'Procurement Orders'
+            AND inv.status = 'Approved'
+            AND ipo.vendor IN %(vendors)s
+            AND ipo.creation < %(cutover)s
+            GROUP BY inv.document_name
+        ) vi ON vi.document_name = po.name AND po.creation < %(cutover)s
+        WHERE po.vendor IN %(vendors)s
+        AND po.status NOT IN %(inactive)s
         {exclude_clause}
-    """, tuple(params_base), as_dict=True)
+        GROUP BY po.vendor
+    """, {
+        "vendors": tuple(vendor_names),
+        "cutover": _EXPOSURE_CUTOVER,
+        "inactive": _INACTIVE_PO_STATUSES,
+        "exclude_po": exclude_po,
+    }, as_dict=True)
 
-    post_april_exposure = sum(max(flt(r.delivered) - flt(r.paid), 0) for r in post_april)
+    credit_used = dict.fromkeys(vendor_names, 0.0)
+    for r in rows:
+        credit_used[r.vendor] = flt(r.credit_used)
+    return credit_used
 
-    # Pre-April: use total_invoiced from Vendor Invoices
-    pre_april = frappe.db.sql(f"""
-        SELECT COALESCE(SUM(vi.invoice_amount), 0) as total_invoiced,
-               COALESCE(po.amount_paid, 0) as paid
-        FROM "tabProcurement Orders" po
-        LEFT JOIN "tabVendor Invoices" vi
-            ON vi.document_type = 'Procurement Orders'
-            AND vi.document_name = po.name
-            AND vi.status = 'Approved'
-        WHERE po.vendor = %s
-        AND po.status NOT IN ('Cancelled', 'Merged', 'Inactive')
-        AND po.creation < '2025-04-01'
-        {exclude_clause}
-        GROUP BY po.name, po.amount_paid
-    """, tuple(params_base), as_dict=True)
 
-    pre_april_exposure = sum(max(flt(r.total_invoiced) - flt(r.paid), 0) for r in pre_april)
+def _compute_credit_used(vendor_doc, exclude_po=None):
+    """credit_used for one vendor — see compute_credit_used_for."""
+    return compute_credit_used_for([vendor_doc.name], exclude_po=exclude_po)[vendor_doc.name]
+
+
+# ---------------------------------------------------------------------------
+# Per-vendor cache
+# ---------------------------------------------------------------------------
+
+def _cache_key(vendor):
+    return frappe.cache().make_key(f"{_CACHE_PREFIX}:{vendor}")
+
+
+def get_vendor_credit(vendor_names):
+    """
+    Live credit figures for many vendors -> {vendor: {credit_limit, credit_used, available_credit}}.
+
+    Cache-first: one MGET for every vendor, then one compute_credit_used_for pass
+    (plus one Vendors read for the limits) over the misses only.
+    """
+    vendor_names = list(dict.fromkeys(v for v in (vendor_names or []) if v))
+    if not vendor_names:
+        return {}
+
+    cache = frappe.cache()
+    result, misses = {}, []
+    for vendor, raw in zip(vendor_names, cache.mget([_cache_key(v) for v in vendor_names])):
+        if raw:
+            result[vendor] = json.loads(raw)
+        else:
+            misses.append(vendor)
+
+    if misses:
+        limits = dict(frappe.get_all(
+            "Vendors", filters={"name": ["in", misses]}, fields=["name", "credit_limit"], as_list=True
+        ))
+        used = compute_credit_used_for(misses)
+        pipe = cache.pipeline()
+        for vendor in misses:
+            limit = flt(limits[vendor]) if limits.get(vendor) is not None else DEFAULT_CREDIT_LIMIT
+            entry = {
+                "credit_limit": limit,
+                "credit_used": used[vendor],
+                "available_credit": limit - used[vendor],
+            }
+            result[vendor] = entry
+            pipe.set(_cache_key(vendor), json.dumps(entry), ex=CACHE_TTL_SECONDS)
+        pipe.execute()
+
+    return result
+
+
+def invalidate_vendor_credit_cache(*vendor_names):
+    """Drop cached figures now, and again after commit.
+
+    The post-commit drop closes the window where a concurrent reader recomputes
+    from the not-yet-committed state and re-caches a stale value.
+    """
+    keys = [_cache_key(v) for v in vendor_names if v]
+    if not keys:
+        return
+
+    def _drop():
+        frappe.cache().delete(*keys)
 
-    return pre_april_exposure + post_april_exposure
+    _drop()
+    frappe.db.after_commit.add(_drop)
 
 
 def recalculate_vendor_credit(vendor_id, entry_type, po_id=None, project=None, description=None, exclude_po=None):
@@ -67,7 +159,7 @@ def recalculate_vendor_credit(vendor_id, entry_type, po_id=None, project=None, d
     old_credit_used = flt(vendor.credit_used)
 
     credit_used = _compute_credit_used(vendor, exclude_po=exclude_po)
-    credit_limit = flt(vendor.credit_limit) if vendor.credit_limit is not None else 50000
+    credit_limit = flt(vendor.credit_limit) if vendor.credit_limit is not None else DEFAULT_CREDIT_LIMIT
     available_credit = credit_limit - credit_used
     delta = credit_used - old_credit_used
 
@@ -92,6 +184,7 @@ def recalculate_vendor_credit(vendor_id, entry_type, po_id=None, project=None, d
     })
 
     vendor.save(ignore_permissions=True)
+    invalidate_vendor_credit_cache(vendor.name)
 
 
 @frappe.whitelist()
@@ -128,6 +221,7 @@ def update_credit_limit(vendor_id, new_limit):
     })
 
     vendor.save(ignore_permissions=True)
+    invalidate_vendor_credit_cache(vendor.name)
     frappe.db.commit()
 
     return {
@@ -130,19 +130,40 @@ doc_events = {
 		"on_update": "nirmaan_stack.nirmaan_stack.doctype.nirmaan_users.nirmaan_users.on_user_update",
 		# "on_trash": "nirmaan_stack.nirmaan_stack.doctype.nirmaan_users.nirmaan_users.delete_user_profile"
 	},
+    # The project-permission cache (services/project_permissions.py) is dropped on
+    # every change to who is permitted where, or to a permitted user's role.
     "Nirmaan Users": {
+        "on_update": "nirmaan_stack.services.project_permissions.on_nirmaan_user_change",
         "on_trash": [
             "nirmaan_stack.integrations.controllers.nirmaan_users.on_trash",
             "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
+            "nirmaan_stack.services.project_permissions.on_nirmaan_user_change",
+        ],
+        "after_rename": [
+            "nirmaan_stack.integrations.controllers.nirmaan_users.after_rename",
+            "nirmaan_stack.services.project_permissions.on_nirmaan_user_rename",
         ],
-        "after_rename": "nirmaan_stack.integrations.controllers.nirmaan_users.after_rename",
     },
     "User Permission": {
         "after_insert": [
             "nirmaan_stack.integrations.controllers.user_permission.after_insert",
-            "nirmaan_stack.integrations.controllers.user_permission.add_nirmaan_user_permissions"
+            "nirmaan_stack.integrations.controllers.user_permission.add_nirmaan_user_permissions",
+            "nirmaan_stack.services.project_permissions.on_user_permission_change",
+        ],
+        "on_update": "nirmaan_stack.services.project_permissions.on_user_permission_change",
+        "on_trash": [
+            "nirmaan_stack.integrations.controllers.user_permission.on_trash",
+            "nirmaan_stack.services.project_permissions.on_user_permission_change",
         ],
-        "on_trash": "nirmaan_stack.integrations.controllers.user_permission.on_trash"
+    },
+    # Warm the Document Extraction Cache the moment an autofill-eligible file lands,
+    # so the autofill dialog reads a stored result instead of waiting on the model.
+    # See integrations/controllers/extraction_prefetch.py for why there are two triggers.
+    "File": {
+        "after_insert": "nirmaan_stack.integrations.controllers.extraction_prefetch.on_file_insert",
+    },
+    "Nirmaan Attachments": {
+        "after_insert": "nirmaan_stack.integrations.controllers.extraction_prefetch.on_attachment_insert",
     },
     "Project Snag": {
         # Attribution for a status move. In a hook, NOT in the API, so a Desk / bulk-edit /
@@ -168,7 +189,10 @@ doc_events = {
         # `sync_project_schedule` is invoked conditionally from inside
         # `projects.on_update` (only when the project window changes), so we
         # don't list it as a separate doc_event here.
-        "on_update": "nirmaan_stack.nirmaan_stack.doctype.projects.projects.on_update"
+        "on_update": [
+            "nirmaan_stack.nirmaan_stack.doctype.projects.projects.on_update",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
+        ],
     },
     "Project Progress Reports": {
         # Adopt capture-time DPR photo Files (uploaded before the report existed,
@@ -205,10 +229,14 @@ doc_events = {
         # "before_insert": "nirmaan_stack.integrations.controllers.procurement_requests.before_insert",
         "validate": "nirmaan_stack.integrations.controllers.procurement_requests.validate",
         "after_insert": "nirmaan_stack.integrations.controllers.procurement_requests.after_insert",
-        "on_update": "nirmaan_stack.integrations.controllers.procurement_requests.on_update",
+        "on_update": [
+            "nirmaan_stack.integrations.controllers.procurement_requests.on_update",
+            "nirmaan_stack.api.data_table.item_index.on_parent_update",
+        ],
         "on_trash": [
             "nirmaan_stack.integrations.controllers.procurement_requests.on_trash",
-            "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions"
+            "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
+            "nirmaan_stack.api.data_table.item_index.on_parent_trash",
         ],
         "after_delete": "nirmaan_stack.integrations.controllers.procurement_requests.after_delete"
     },
@@ -219,19 +247,29 @@ doc_events = {
             "nirmaan_stack.integrations.controllers.procurement_orders.on_update",
             "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_procurement_order",
             "nirmaan_stack.services.action_items.doc_hooks.on_po_update",
+            "nirmaan_stack.api.data_table.item_index.on_parent_update",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
+            "nirmaan_stack.api.inventory_summary_index.on_po_change",
         ],
         "on_trash": [
             "nirmaan_stack.integrations.controllers.procurement_orders.on_trash",
             "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
             "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_procurement_order",
-        ]
+            "nirmaan_stack.api.data_table.item_index.on_parent_trash",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
+        ],
+        "after_delete": "nirmaan_stack.api.inventory_summary_index.on_po_change",
     },
     "Sent Back Category": {
         "after_insert": "nirmaan_stack.integrations.controllers.sent_back_category.after_insert",
-        "on_update": "nirmaan_stack.integrations.controllers.sent_back_category.on_update",
+        "on_update": [
+            "nirmaan_stack.integrations.controllers.sent_back_category.on_update",
+            "nirmaan_stack.api.data_table.item_index.on_parent_update",
+        ],
         "on_trash": [
             "nirmaan_stack.integrations.controllers.sent_back_category.on_trash",
             "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
+            "nirmaan_stack.api.data_table.item_index.on_parent_trash",
         ]
     },
     "Version": {
@@ -243,9 +281,21 @@ doc_events = {
         "validate": "nirmaan_stack.integrations.controllers.service_requests.validate",
         "on_trash": [
             "nirmaan_stack.integrations.controllers.service_requests.on_trash",
-            "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions"
+            "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
+            "nirmaan_stack.api.data_table.item_index.on_parent_trash",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
         ],
-        "on_update": "nirmaan_stack.integrations.controllers.service_requests.on_update"
+        "on_update": [
+            "nirmaan_stack.integrations.controllers.service_requests.on_update",
+            "nirmaan_stack.api.data_table.item_index.on_parent_update",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
+        ]
+    },
+    # The inventory item-wise summary reads a project's latest Submitted report from
+    # `Inventory Latest Report`; `after_delete` so the deleted report is gone first.
+    "Remaining Items Report": {
+        "on_update": "nirmaan_stack.api.inventory_summary_index.on_report_change",
+        "after_delete": "nirmaan_stack.api.inventory_summary_index.on_report_change",
     },
     "Project Estimates" : {
         "on_trash": "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
@@ -253,11 +303,12 @@ doc_events = {
     # `invoice_amount` on the parent PO / SR is maintained HERE, on the doctype,
     # not by hand-placed calls in the invoice endpoints — three of the nine ways an
     # invoice changes run no application code (the backfill patch, the legacy
-    # migration, a desk edit). `after_delete`, never `on_trash`: on_trash fires
-    # before the row is gone, so the sum would still count the deleted invoice.
+    # migration, a desk edit). `after_delete`, never `on_trash`: the delete must be
+    # final before its negative delta lands. Checked nightly by
+    # tasks/invoice_total_verify.py.
     "Vendor Invoices": {
         # No `after_insert`: Document.insert() runs after_insert AND then
-        # run_post_save_methods() -> on_update, so binding both fired the recompute
+        # run_post_save_methods() -> on_update, so binding both would apply the delta
         # TWICE per saved invoice. on_update alone covers insert.
         "on_update": "nirmaan_stack.integrations.controllers.vendor_invoices.recompute_parent_total",
         "after_delete": "nirmaan_stack.integrations.controllers.vendor_invoices.recompute_parent_total",
@@ -268,11 +319,13 @@ doc_events = {
         "on_update": [
             "nirmaan_stack.integrations.controllers.project_payments.on_update",
             "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_project_payment",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
         ],
         "on_trash": [
             "nirmaan_stack.integrations.controllers.project_payments.on_trash",
             "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
             "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_project_payment",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
         ]
     },
      "Project Invoices": {
@@ -295,10 +348,14 @@ doc_events = {
     "Project Inflows": {
         "validate": "nirmaan_stack.integrations.controllers.project_inflows.validate",
         "after_insert": "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_project_inflow",
-        "on_update": "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_project_inflow",
+        "on_update": [
+            "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_project_inflow",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
+        ],
         "on_trash": [
             "nirmaan_stack.integrations.controllers.delete_doc_versions.generate_versions",
             "nirmaan_stack.integrations.controllers.project_cashflow_hold_update.on_project_inflow",
+            "nirmaan_stack.api.customers.customer_financials.on_financial_doc_change",
         ],
     },
     "PO Delivery Documents": {
@@ -321,6 +378,7 @@ doc_events = {
         "after_insert": "nirmaan_stack.integrations.controllers.internal_transfer_memo.after_insert",
         "before_delete": "nirmaan_stack.integrations.controllers.internal_transfer_memo.before_delete",
         "on_update": "nirmaan_stack.integrations.controllers.internal_transfer_memo.on_update",
+        "after_delete": "nirmaan_stack.integrations.controllers.internal_transfer_memo.after_delete",
     },
     "Category": {
         "after_rename": "nirmaan_stack.integrations.controllers.category.handle_category_rename"
@@ -359,8 +417,24 @@ scheduler_events = {
         "nirmaan_stack.tasks.cleanup_orphan_commission_attachments.cleanup_orphan_commission_attachments",
         "nirmaan_stack.tasks.cashflow_gap_limit_default.set_default_cashflow_gap_limit",
         "nirmaan_stack.tasks.cleanup_orphan_private_files.cleanup_orphan_private_files",
+        "nirmaan_stack.integrations.Notifications.outbox.prune_outbox",
+        "nirmaan_stack.tasks.invoice_total_verify.verify_invoice_totals",
+        # Backstop for Warehouse Stock Item.reserved_qty (ITM rows written without a save).
+        "nirmaan_stack.integrations.controllers.warehouse_stock.sync_reserved_qty",
+	],
+	# Long queue: full re-derives of the item-search token index and the inventory
+	# summary tables. The save hooks keep them current; these are the backstop for
+	# rows written without a parent save.
+	"daily_long": [
+		"nirmaan_stack.api.data_table.item_index.rebuild_item_search_index",
+		"nirmaan_stack.api.inventory_summary_index.rebuild_inventory_summary_index",
 	],
 	"cron": {
+		# Every minute — FCM outbox retries whose backoff elapsed (first delivery is
+		# kicked right after the writing transaction commits).
+		"* * * * *": [
+			"nirmaan_stack.integrations.Notifications.outbox.drain_due"
+		],
 		"30 4 * * *": [
 			"nirmaan_stack.tasks.vendor_credit_update.update_all_vendor_credits",
 			# "nirmaan_stack.tasks.project_cashflow_hold_update.update_projects_cashflow_hold"
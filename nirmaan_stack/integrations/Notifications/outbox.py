@@ -0,0 +1,213 @@
+"""Transactional outbox for FCM push notifications.
+
+Save hooks used to call FCM inline: one HTTPS round-trip per recipient, retried with
+`time.sleep(2)`, inside the request that approved the PR / PO. Now `PrNotification`
+calls `enqueue_push`, which only INSERTS a `Notification Outbox` row in the caller's
+transaction — a save that rolls back never notifies — and asks for a drain after commit.
+
+`drain_outbox` (short queue, deduplicated job id, plus a per-minute cron for retries):
+  * locks due Pending rows (FOR UPDATE SKIP LOCKED, so concurrent drains never double-send)
+  * collapses rows sharing a dedupe key (recipient + reference doc + event) to the newest
+  * groups identical messages and sends each group as ONE FCM multicast
+  * marks Sent; transient failures back off exponentially (BACKOFF_BASE_SECONDS x 4^n)
+    up to MAX_ATTEMPTS; a dead token (unregistered / invalid) fails at once.
+
+The sender is injectable: `drain_outbox(client=...)` takes anything with
+`send_multicast(tokens, title, body, click_action_url) -> [None | Exception per token]`.
+`FcmClient` is the Firebase Admin implementation; tests pass a local fake.
+"""
+
+import hashlib
+from collections import OrderedDict
+from datetime import timedelta
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+OUTBOX_DOCTYPE = "Notification Outbox"
+DRAIN_JOB_ID = "notification_outbox_drain"
+BATCH_SIZE = 500            # rows per drain pass; also the FCM multicast token cap
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+SENT_RETENTION_DAYS = 7
+ICON_URL = "https://nirmaan-stack-public-bucket.s3.ap-south-1.amazonaws.com/android-chrome-192x192.png"
+
+# firebase_admin.messaging error classes that mean "this token will never work".
+_PERMANENT_ERRORS = {"UnregisteredError", "SenderIdMismatchError", "InvalidArgumentError"}
+
+
+class FcmClient:
+    """Firebase Admin multicast sender (the production client)."""
+
+    def send_multicast(self, tokens, title, body, click_action_url):
+        from firebase_admin import messaging
+
+        message = messaging.MulticastMessage(
+            tokens=list(tokens),
+            notification=messaging.Notification(title=title, body=body),
+            webpush=messaging.WebpushConfig(
+                notification=messaging.WebpushNotification(title=title, body=body, icon=ICON_URL),
+                data={"click_action_url": click_action_url or ""},
+            ),
+        )
+        response = messaging.send_each_for_multicast(message)
+        return [None if r.success else (r.exception or Exception("FCM send failed")) for r in response.responses]
+
+
+def dedupe_key(recipient, event, reference_doctype=None, reference_name=None, fallback=None):
+    basis = "\x1f".join(str(p or "") for p in (recipient, reference_doctype, reference_name, event, fallback))
+    return hashlib.sha1(basis.encode()).hexdigest()
+
+
+def enqueue_push(user, title, body, click_action_url, doc=None, event=None):
+    """Write one outbox row for `user` (a Nirmaan Users dict with name + fcm_token).
+
+    `doc` / `event` identify the notification for dedupe; without a doc the exact message
+    text is the identity, so only true repeats collapse.
+    """
+    if not user or not user.get("fcm_token"):
+        return None
+    reference_doctype = doc.doctype if doc else None
+    reference_name = doc.name if doc else None
+    event = event or title
+    row = frappe.get_doc({
+        "doctype": OUTBOX_DOCTYPE,
+        "recipient": user.get("name"),
+        "fcm_token": user.get("fcm_token"),
+        "event": event,
+        "reference_doctype": reference_doctype,
+        "reference_name": reference_name,
+        "dedupe_key": dedupe_key(
+            user.get("name"), event, reference_doctype, reference_name,
+            fallback=None if doc else f"{body}\x1f{click_action_url}",
+        ),
+        "title": title,
+        "body": body,
+        "click_action_url": click_action_url,
+        "status": "Pending",
+        "attempts": 0,
+        "next_attempt_at": now_datetime(),
+    })
+    row.db_insert()
+    frappe.db.after_commit.add(_kick_drain)
+    return row.name
+
+
+def _kick_drain():
+    frappe.enqueue(
+        "nirmaan_stack.integrations.Notifications.outbox.drain_outbox",
+        queue="short", job_id=DRAIN_JOB_ID, deduplicate=True,
+    )
+
+
+def _backoff(attempts):
+    return min(BACKOFF_BASE_SECONDS * 4 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS)
+
+
+def plan_batch(rows):
+    """Split due rows into (deduped_names, groups).
+
+    Rows are newest-first; the first row of each dedupe key wins, the rest are Deduped.
+    Winners with the same (title, body, url) form one group: {message_key: [rows]}.
+    """
+    seen, deduped = set(), []
+    groups = OrderedDict()
+    for row in sorted(rows, key=lambda r: get_datetime(r["creation"]), reverse=True):
+        if row["dedupe_key"] in seen:
+            deduped.append(row["name"])
+            continue
+        seen.add(row["dedupe_key"])
+        groups.setdefault((row["title"], row["body"], row["click_action_url"]), []).append(row)
+    return deduped, groups
+
+
+def deliver(groups, client):
+    """Send each group as multicast(s). Returns {row name: None (sent) | Exception}."""
+    results = {}
+    for (title, body, url), rows in groups.items():
+        for start in range(0, len(rows), BATCH_SIZE):
+            chunk = rows[start:start + BATCH_SIZE]
+            try:
+                outcomes = client.send_multicast([r["fcm_token"] for r in chunk], title, body, url)
+            except Exception as e:  # whole call failed (network, auth) -> every row retries
+                outcomes = [e] * len(chunk)
+            for row, outcome in zip(chunk, outcomes):
+                results[row["name"]] = outcome
+    return results
+
+
+def drain_outbox(client=None, limit=BATCH_SIZE):
+    """Deliver every due Pending row, one locked batch per commit, until none are due."""
+    client = client or FcmClient()
+    total = {"sent": 0, "failed": 0, "retry": 0, "deduped": 0}
+    while True:
+        rows = frappe.db.sql(
+            f"""SELECT name, creation, recipient, fcm_token, dedupe_key, title, body,
+                       click_action_url, attempts
+                FROM `tab{OUTBOX_DOCTYPE}`
+                WHERE status = 'Pending' AND next_attempt_at <= %s
+                ORDER BY creation
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED""",
+            (now_datetime(), limit),
+            as_dict=True,
+        )
+        if not rows:
+            break
+        deduped, groups = plan_batch(rows)
+        results = deliver(groups, client)
+        _record(rows, deduped, results, total)
+        frappe.db.commit()
+        if len(rows) < limit:
+            break
+    return total
+
+
+def _record(rows, deduped, results, total):
+    now = now_datetime()
+    if deduped:
+        frappe.db.sql(
+            f"UPDATE `tab{OUTBOX_DOCTYPE}` SET status = 'Deduped', modified = %s WHERE name IN %s",
+            (now, tuple(deduped)),
+        )
+        total["deduped"] += len(deduped)
+    sent = [name for name, outcome in results.items() if outcome is None]
+    if sent:
+        frappe.db.sql(
+            f"""UPDATE `tab{OUTBOX_DOCTYPE}` SET status = 'Sent', sent_at = %s, modified = %s,
+                       attempts = attempts + 1, last_error = NULL
+                WHERE name IN %s""",
+            (now, now, tuple(sent)),
+        )
+        total["sent"] += len(sent)
+    attempts_by_name = {r["name"]: int(r.get("attempts") or 0) for r in rows}
+    for name, outcome in results.items():
+        if outcome is None:
+            continue
+        attempts = attempts_by_name[name] + 1
+        permanent = type(outcome).__name__ in _PERMANENT_ERRORS
+        if permanent or attempts >= MAX_ATTEMPTS:
+            values = {"status": "Failed", "attempts": attempts, "last_error": str(outcome)[:1000]}
+            total["failed"] += 1
+        else:
+            values = {
+                "attempts": attempts,
+                "last_error": str(outcome)[:1000],
+                "next_attempt_at": now + timedelta(seconds=_backoff(attempts)),
+            }
+            total["retry"] += 1
+        frappe.db.set_value(OUTBOX_DOCTYPE, name, values, update_modified=True)
+
+
+def drain_due():
+    """Per-minute cron: picks up retries whose backoff elapsed and anything a lost kick left."""
+    if frappe.db.exists(OUTBOX_DOCTYPE, {"status": "Pending", "next_attempt_at": ["<=", now_datetime()]}):
+        drain_outbox()
+
+
+def prune_outbox():
+    """Daily: drop delivered / collapsed rows past retention. Failed rows stay for inspection."""
+    cutoff = now_datetime() - timedelta(days=SENT_RETENTION_DAYS)
+    frappe.db.delete(OUTBOX_DOCTYPE, {"status": ["in", ["Sent", "Deduped"]], "modified": ["<", cutoff]})
+    frappe.db.commit()
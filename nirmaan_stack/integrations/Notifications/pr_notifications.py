@@ -1,35 +1,18 @@
-from firebase_admin import messaging
 import frappe
-import time
 
+from nirmaan_stack.integrations.Notifications.outbox import enqueue_push
+from nirmaan_stack.services.project_permissions import project_users
 from nirmaan_stack.services.role_profiles import MATERIAL_PROCUREMENT_PROFILES
 
-# def PrNotification(lead_users, notification_title, notification_body):
-#         # Send push notifications to each project lead
-#         for lead in lead_users:
-#             if lead['fcm_token']:
-#                 print(f"running send firebase notification")
-#                 send_firebase_notification(lead['fcm_token'], notification_title, notification_body)
-
-MAX_RETRY_ATTEMPTS = 3  # Number of retries for failed notifications
-
-def PrNotification(lead, notification_title, notification_body, click_action_url):
-    """Send push notifications to a project lead with retry logic."""
-    if lead['fcm_token']:
-        print(f"Running Firebase notification for {lead['name']}")
-        retry_count = 0
-        success = False
-        while not success and retry_count < MAX_RETRY_ATTEMPTS:
-            try:
-                send_firebase_notification(lead['fcm_token'], notification_title, notification_body, click_action_url)
-                success = True
-                print(f"Notification sent successfully to {lead['name']}")
-            except Exception as e:
-                retry_count += 1
-                frappe.logger().error(f"Failed to send notification to {lead['name']}: {e}. Attempt {retry_count}")
-                time.sleep(2)  # Wait before retrying
-                if retry_count >= MAX_RETRY_ATTEMPTS:
-                    print(f"Notification failed after {MAX_RETRY_ATTEMPTS} attempts for {lead['name']}.")
+def PrNotification(lead, notification_title, notification_body, click_action_url, doc=None, event=None):
+    """Queue a push notification for a user (delivered by the outbox worker, not inline).
+
+    The row is written in the caller's transaction; FCM is called after commit by
+    outbox.drain_outbox, so a save never waits on (or retries against) FCM. Pass `doc`
+    (and optionally `event`) so repeats for the same user/doc/event collapse.
+    """
+    if lead.get('fcm_token'):
+        enqueue_push(lead, notification_title, notification_body, click_action_url, doc=doc, event=event)
 
 
 def get_admin_users():
@@ -43,12 +26,9 @@ def get_admin_users():
 
 def get_allowed_lead_users(doc):
         """Retrieves all Allowed Lead users for a given project."""
-        allowed_users = frappe.db.get_list(
-            'Nirmaan User Permissions',
-            filters={'for_value': doc.project},
-            fields=['user']
-        )
-        lead_user_ids = [pl['user'] for pl in allowed_users]
+        lead_user_ids = project_users(doc.project, 'Nirmaan Project Lead Profile')
+        if not lead_user_ids:
+            return []
 
         lead_users = frappe.db.get_list(
             'Nirmaan Users',
@@ -63,12 +43,9 @@ def get_allowed_lead_users(doc):
 
 def get_allowed_procurement_users(doc):
         """Retrieves all Allowed Procurement users for a given project."""
-        allowed_users = frappe.db.get_list(
-            'Nirmaan User Permissions',
-            filters={'for_value': doc.project},
-            fields=['user']
-        )
-        proc_user_ids = [pe['user'] for pe in allowed_users]
+        proc_user_ids = project_users(doc.project, MATERIAL_PROCUREMENT_PROFILES)
+        if not proc_user_ids:
+            return []
 
         proc_users = frappe.db.get_list(
             'Nirmaan Users',
@@ -83,12 +60,9 @@ def get_allowed_procurement_users(doc):
 
 def get_allowed_manager_users(doc):
         """Retrieves all Allowed Manager users for a given project."""
-        allowed_users = frappe.db.get_list(
-            'Nirmaan User Permissions',
-            filters={'for_value': doc.project},
-            fields=['user']
-        )
-        manager_user_ids = [pm['user'] for pm in allowed_users]
+        manager_user_ids = project_users(doc.project, 'Nirmaan Project Manager Profile')
+        if not manager_user_ids:
+            return []
 
         manager_users = frappe.db.get_list(
             'Nirmaan Users',
@@ -103,12 +77,9 @@ def get_allowed_manager_users(doc):
 
 def get_allowed_accountants(doc):
     """Retrieves all Allowed Accountant users for a given project."""
-    allowed_users = frappe.db.get_list(
-            'Nirmaan User Permissions',
-            filters={'for_value': doc.project},
-            fields=['user']
-        )
-    accountant_user_ids = [pm['user'] for pm in allowed_users]
+    accountant_user_ids = project_users(doc.project, ['Nirmaan Accountant Profile', 'Nirmaan Accountant Lead Profile'])
+    if not accountant_user_ids:
+        return []
 
     accountant_users = frappe.db.get_list(
         'Nirmaan Users',
@@ -129,37 +100,3 @@ def get_allowed_accountants(doc):
     # accountant_admin_users = accountant_users + admin_users
     
     return accountant_users
-
-
-def send_firebase_notification(fcm_token, title, body, click_action_url):
-    """Sends a push notification using Firebase Admin SDK."""
-    message = messaging.Message(
-        notification=messaging.Notification(
-            title=title,
-            body=body
-        ),
-        webpush=messaging.WebpushConfig(
-            notification=messaging.WebpushNotification(
-                title=title,
-                body=body,
-                icon="https://nirmaan-stack-public-bucket.s3.ap-south-1.amazonaws.com/android-chrome-192x192.png",
-                # actions=[
-                #     messaging.WebpushNotificationAction(
-                #         action="open_url",
-                #         title="View Details",
-                #         icon="https://tal7aouy.gallerycdn.vsassets.io/extensions/tal7aouy/icons/3.8.0/1703110281439/Microsoft.VisualStudio.Services.Icons.Default"
-                #     )
-                # ],
-            ),
-            data={"click_action_url" : click_action_url}
-        ),
-        token=fcm_token
-    )
-    try:
-        print(f"Sending FCM Notification to {fcm_token} with payload: {message}")
-        response = messaging.send(message)
-        print(f"Successfully sent message: {response}")
-        frappe.logger().info(f"Successfully sent message: {response}")
-    except Exception as e:
-        print(f"failed to send notification from pr_notifications.py")
-        frappe.logger().error(f"Failed to send notification: {e}")
\ No newline at end of file
@@ -0,0 +1,109 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the FCM outbox: dedupe, multicast grouping, retry/backoff classification.
+
+No Frappe site or Firebase needed — the send client is a local fake and the row updates
+are captured. Run inside the bench venv:
+    python -m unittest nirmaan_stack.integrations.Notifications.test_outbox
+"""
+import unittest
+from unittest.mock import patch
+
+from nirmaan_stack.integrations.Notifications import outbox
+
+
+class UnregisteredError(Exception):
+    """Same class name as firebase_admin.messaging's dead-token error."""
+
+
+class FakeClient:
+    def __init__(self, fail=None):
+        self.calls = []
+        self.fail = fail or {}
+
+    def send_multicast(self, tokens, title, body, click_action_url):
+        self.calls.append((tuple(tokens), title))
+        return [self.fail.get(t) for t in tokens]
+
+
+def _row(name, key, token, title="PO approved", body="b", created="2026-10-19 10:00:00", attempts=0):
+    return {
+        "name": name, "dedupe_key": key, "fcm_token": token, "title": title, "body": body,
+        "click_action_url": "/x", "creation": created, "attempts": attempts, "recipient": f"u-{token}",
+    }
+
+
+class TestPlanAndDeliver(unittest.TestCase):
+    def test_same_key_collapses_to_newest(self):
+        rows = [
+            _row("a", "k1", "t1", created="2026-10-19 10:00:00"),
+            _row("b", "k1", "t1", created="2026-10-19 10:00:05"),
+            _row("c", "k2", "t2"),
+        ]
+        deduped, groups = outbox.plan_batch(rows)
+        self.assertEqual(deduped, ["a"])
+        self.assertEqual(sorted(r["name"] for g in groups.values() for r in g), ["b", "c"])
+
+    def test_identical_messages_share_one_multicast(self):
+        rows = [_row("a", "k1", "t1"), _row("b", "k2", "t2"), _row("c", "k3", "t3", title="Other")]
+        _, groups = outbox.plan_batch(rows)
+        client = FakeClient()
+        results = outbox.deliver(groups, client)
+        self.assertEqual(len(client.calls), 2)
+        self.assertIn((("t1", "t2"), "PO approved"), [(tuple(sorted(t)), ti) for t, ti in client.calls])
+        self.assertEqual(results, {"a": None, "b": None, "c": None})
+
+    def test_whole_call_failure_marks_every_row(self):
+        class Down:
+            def send_multicast(self, *a):
+                raise ConnectionError("fcm down")
+        _, groups = outbox.plan_batch([_row("a", "k1", "t1"), _row("b", "k2", "t2")])
+        results = outbox.deliver(groups, Down())
+        self.assertTrue(all(isinstance(e, ConnectionError) for e in results.values()))
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.updates = {}
+        for target, kwargs in (("sql", {}), ("set_value", {"side_effect": self._set_value})):
+            patcher = patch.object(outbox.frappe.db, target, **kwargs)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def _set_value(self, doctype, name, values, update_modified=True):
+        self.updates[name] = values
+
+    def test_transient_failure_backs_off_and_dead_token_fails(self):
+        rows = [_row("a", "k1", "t1", attempts=1), _row("b", "k2", "t2"), _row("c", "k3", "t3")]
+        results = {"a": TimeoutError("slow"), "b": UnregisteredError("gone"), "c": None}
+        total = {"sent": 0, "failed": 0, "retry": 0, "deduped": 0}
+        outbox._record(rows, [], results, total)
+        self.assertEqual(total, {"sent": 1, "failed": 1, "retry": 1, "deduped": 0})
+        self.assertEqual(self.updates["a"]["attempts"], 2)
+        self.assertIn("next_attempt_at", self.updates["a"])
+        self.assertEqual(self.updates["b"]["status"], "Failed")
+
+    def test_gives_up_after_max_attempts(self):
+        rows = [_row("a", "k1", "t1", attempts=outbox.MAX_ATTEMPTS - 1)]
+        total = {"sent": 0, "failed": 0, "retry": 0, "deduped": 0}
+        outbox._record(rows, [], {"a": TimeoutError("slow")}, total)
+        self.assertEqual(self.updates["a"]["status"], "Failed")
+
+    def test_backoff_grows_and_is_capped(self):
+        self.assertEqual(outbox._backoff(1), outbox.BACKOFF_BASE_SECONDS)
+        self.assertEqual(outbox._backoff(2), outbox.BACKOFF_BASE_SECONDS * 4)
+        self.assertEqual(outbox._backoff(20), outbox.MAX_BACKOFF_SECONDS)
+
+
+class TestDedupeKey(unittest.TestCase):
+    def test_key_is_per_user_doc_event(self):
+        base = outbox.dedupe_key("u1", "PO approved", "Procurement Orders", "PO/1")
+        self.assertEqual(base, outbox.dedupe_key("u1", "PO approved", "Procurement Orders", "PO/1"))
+        self.assertNotEqual(base, outbox.dedupe_key("u2", "PO approved", "Procurement Orders", "PO/1"))
+        self.assertNotEqual(base, outbox.dedupe_key("u1", "PO approved", "Procurement Orders", "PO/2"))
+        self.assertNotEqual(base, outbox.dedupe_key("u1", "PO rejected", "Procurement Orders", "PO/1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
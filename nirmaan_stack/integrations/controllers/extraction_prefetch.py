@@ -0,0 +1,46 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+"""
+Pre-extraction triggers — warm the Document Extraction Cache as soon as an
+autofill-eligible file is attached, so the autofill dialog reads a stored result.
+
+Two entry points, because the attach moment is recognisable in two places:
+
+  * File.after_insert — for uploads whose (doctype, field) pair is only ever used
+    for one kind of document (payment receipts, project-invoice / expense invoice
+    files).
+  * Nirmaan Attachments.after_insert — for PO / SR vendor invoices. Their File row
+    is uploaded against the parent's generic `attachment` field, which DC / MIR
+    uploads share, so the File alone cannot tell an invoice from a challan; the
+    `po invoice` / `sr invoice` attachment row can.
+
+Capture-only: each handler resolves (file_url, doc_kind) and calls
+`services.extraction.cache.enqueue_pre_extraction`, which never raises into the
+host save. The extraction itself runs after commit on the `short` queue.
+"""
+from nirmaan_stack.services.extraction.base import INVOICE, PAYMENT
+from nirmaan_stack.services.extraction.cache import enqueue_pre_extraction
+
+# (attached_to_doctype, attached_to_field) -> doc_kind, for unambiguous uploads only.
+_FILE_TARGETS = {
+    ("Project Payments", "payment_attachment"): PAYMENT,
+    ("Non Project Expenses", "payment_attachment"): PAYMENT,
+    ("Non Project Expenses", "invoice_attachment"): INVOICE,
+    ("Project Invoices", "attachment"): INVOICE,
+}
+
+# Nirmaan Attachments.attachment_type values that are vendor invoices.
+_INVOICE_ATTACHMENT_TYPES = {"po invoice", "sr invoice"}
+
+
+def on_file_insert(doc, method=None):
+    """File.after_insert — pre-extract a payment receipt / invoice upload."""
+    doc_kind = _FILE_TARGETS.get((doc.attached_to_doctype, doc.attached_to_field))
+    if doc_kind:
+        enqueue_pre_extraction(doc.file_url, doc_kind)
+
+
+def on_attachment_insert(doc, method=None):
+    """Nirmaan Attachments.after_insert — pre-extract a PO / SR vendor invoice."""
+    if (doc.attachment_type or "").strip().lower() in _INVOICE_ATTACHMENT_TYPES:
+        enqueue_pre_extraction(doc.attachment, INVOICE)
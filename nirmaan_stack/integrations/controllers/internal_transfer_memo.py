@@ -10,7 +10,8 @@ there is no separate approval step. This controller handles:
   * basic invariants and the Approved → Dispatched → Delivered state machine
   * the cross-cutting availability guard used by picker / create / delete
   * realtime events on insert, dispatch, and delivery transitions
-  * warehouse-stock side-effects on dispatch
+  * warehouse-stock side-effects on dispatch, and the warehouse `reserved_qty`
+    that Approved ITMs hold
 """
 
 import frappe
@@ -109,9 +110,15 @@ def after_insert(doc, method):
 def on_update(doc, method):
     """Emit real-time events and adjust warehouse stock on status transitions."""
     _adjust_warehouse_stock_on_dispatch(doc)
+    _sync_warehouse_reservations(doc)
     _emit_transition_events(doc)
 
 
+def after_delete(doc, method):
+    """A deleted pre-dispatch ITM releases whatever it held on warehouse stock."""
+    _sync_warehouse_reservations(doc, deleted=True)
+
+
 def _adjust_warehouse_stock_on_dispatch(doc):
     """When ITM source=Warehouse transitions Approved → Dispatched, deduct stock."""
     before = doc.get_doc_before_save()
@@ -128,6 +135,40 @@ def _adjust_warehouse_stock_on_dispatch(doc):
             adjust_on_dispatch_from_warehouse(doc)
 
 
+def _sync_warehouse_reservations(doc, deleted=False):
+    """Keep `Warehouse Stock Item.reserved_qty` in step with this ITM.
+
+    An ITM sourcing the warehouse holds its quantities while Approved. Saves that
+    cannot move a reservation are skipped: only an insert, a delete, a status change,
+    or an edit to the lines of an Approved ITM touches the sum. The buckets of the
+    old and new lines are both re-derived, so a line whose item / make changed
+    releases the old bucket too. Runs after the dispatch adjustment above, whose
+    `wsi.save()` writes back the reservation it loaded.
+    """
+    before = None if deleted else doc.get_doc_before_save()
+    docs = [d for d in (doc, before) if d is not None
+            and (getattr(d, "source_type", None) or "Project") == "Warehouse"]
+    if not docs:
+        return
+    if before is not None and not deleted and not _reservation_may_change(before, doc):
+        return
+
+    from nirmaan_stack.integrations.controllers.warehouse_stock import sync_reserved_qty
+    sync_reserved_qty({(row.item_id, row.make) for d in docs for row in (d.items or [])})
+
+
+def _reservation_may_change(before, doc):
+    if before.status != doc.status or before.source_type != doc.source_type:
+        return True
+    if doc.status != "Approved":
+        return False
+
+    def lines(d):
+        return sorted((row.item_id, row.make or "", flt(row.transfer_quantity)) for row in d.items or [])
+
+    return lines(before) != lines(doc)
+
+
 # ---------------------------------------------------------------------------
 # Validate helpers
 # ---------------------------------------------------------------------------
@@ -450,3 +491,176 @@ def warehouse_available_quantity(item_id, make=None, exclude_itm=None):
     reserved_itm = flt(approved_itm[0][0]) if approved_itm else 0.0
 
     return max(on_hand - reserved_itm, 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Batched availability guard
+# ---------------------------------------------------------------------------
+#
+# The per-bucket helpers above run their legs once per (item, source, make), so
+# a 60-line selection costs 60 x three queries. The batched forms below resolve
+# every bucket in a fixed number of grouped statements and return exactly what
+# the per-bucket helper would for each one (locked in by the parity test in
+# `doctype/internal_transfer_memo/test_internal_transfer_memo.py`).
+#
+# `available_quantity(make=None)` means "any make" -- it drops the make filter
+# -- while a given make is an exact bucket. `GROUPING SETS` yields both shapes
+# from one scan: the per-make rows and, with GROUPING(make) = 1, the all-makes
+# total, summed in SQL just as the per-bucket query sums it.
+
+_ANY_MAKE = object()
+
+_LATEST_RIR_CTE = """
+    latest AS (
+        SELECT DISTINCT ON (project) project, name, modified
+        FROM "tabRemaining Items Report"
+        WHERE project IN %(projects)s AND status = 'Submitted'
+        ORDER BY project, report_date DESC, creation DESC
+    )
+"""
+
+
+def available_quantities(buckets, exclude_itm=None):
+    """`available_quantity` for many ``(item_id, source_project, make)`` buckets.
+
+    Three statements whatever the number of buckets: the latest-RIR quantities,
+    the Approved reservations, and the post-RIR dispatches, each grouped by
+    (project, item, make). Returns ``{bucket: qty}`` keyed by the buckets as
+    passed.
+    """
+    buckets = list(dict.fromkeys(buckets))
+    normalized = {
+        bucket: (bucket[0], bucket[1], _bucket_make(bucket[2]))
+        for bucket in buckets
+        if bucket[0] and bucket[1]
+    }
+    result = {bucket: 0.0 for bucket in buckets}
+    if not normalized:
+        return result
+
+    values = {
+        "projects": tuple({b[1] for b in normalized.values()}),
+        "items": tuple({b[0] for b in normalized.values()}),
+        "exclude": exclude_itm,
+    }
+
+    rir = _by_bucket(frappe.db.sql(
+        f"""
+        WITH {_LATEST_RIR_CTE}
+        SELECT l.project, rie.item_id, rie.make, GROUPING(rie.make) AS any_make,
+               COALESCE(SUM(rie.remaining_quantity), 0) AS qty
+        FROM latest l
+        JOIN "tabRemaining Item Entry" rie ON rie.parent = l.name
+        WHERE rie.item_id IN %(items)s
+        GROUP BY GROUPING SETS ((l.project, rie.item_id, rie.make), (l.project, rie.item_id))
+        """,
+        values,
+        as_dict=True,
+    ))
+    reserved = _by_bucket(frappe.db.sql(
+        """
+        SELECT itm.source_project AS project, itmi.item_id, itmi.make,
+               GROUPING(itmi.make) AS any_make,
+               COALESCE(SUM(itmi.transfer_quantity), 0) AS qty
+        FROM "tabInternal Transfer Memo Item" itmi
+        JOIN "tabInternal Transfer Memo" itm ON itmi.parent = itm.name
+        WHERE itm.source_project IN %(projects)s
+          AND itm.source_type = 'Project'
+          AND itm.status = 'Approved'
+          AND itmi.item_id IN %(items)s
+          AND (%(exclude)s IS NULL OR itm.name != %(exclude)s)
+        GROUP BY GROUPING SETS ((itm.source_project, itmi.item_id, itmi.make),
+                                (itm.source_project, itmi.item_id))
+        """,
+        values,
+        as_dict=True,
+    ))
+    dispatched = _by_bucket(frappe.db.sql(
+        f"""
+        WITH {_LATEST_RIR_CTE}
+        SELECT itm.source_project AS project, itmi.item_id, itmi.make,
+               GROUPING(itmi.make) AS any_make,
+               COALESCE(SUM(itmi.transfer_quantity), 0) AS qty
+        FROM "tabInternal Transfer Memo Item" itmi
+        JOIN "tabInternal Transfer Memo" itm ON itmi.parent = itm.name
+        JOIN latest l ON l.project = itm.source_project
+        WHERE itmi.item_id IN %(items)s
+          AND itm.status IN ('Dispatched', 'Partially Delivered', 'Delivered')
+          AND itm.dispatched_on > l.modified
+        GROUP BY GROUPING SETS ((itm.source_project, itmi.item_id, itmi.make),
+                                (itm.source_project, itmi.item_id))
+        """,
+        values,
+        as_dict=True,
+    ))
+
+    for bucket, (item_id, source_project, make) in normalized.items():
+        key = (source_project, item_id, _ANY_MAKE if make is None else make)
+        if key not in rir:
+            continue  # no entry in the latest submitted RIR: nothing to transfer
+        result[bucket] = max(rir[key] - reserved.get(key, 0.0) - dispatched.get(key, 0.0), 0.0)
+    return result
+
+
+def warehouse_available_quantities(buckets, exclude_itm=None):
+    """`warehouse_available_quantity` for many ``(item_id, make)`` buckets.
+
+    One statement: on-hand and the Approved warehouse reservations are looked up
+    per bucket from a VALUES list, matching the make with IS NOT DISTINCT FROM.
+    Returns ``{bucket: qty}`` keyed by the buckets as passed.
+    """
+    buckets = list(dict.fromkeys(buckets))
+    result = {bucket: 0.0 for bucket in buckets}
+    keys = sorted({(b[0], b[1] or None) for b in buckets if b[0]}, key=lambda k: (k[0], k[1] or ""))
+    if not keys:
+        return result
+
+    values = {"exclude": exclude_itm}
+    rows = []
+    for i, (item_id, make) in enumerate(keys):
+        values[f"i{i}"], values[f"m{i}"] = item_id, make
+        rows.append(f"(%(i{i})s, CAST(%(m{i})s AS text))")
+
+    available = frappe.db.sql(
+        f"""
+        SELECT k.item_id, k.make,
+            COALESCE((
+                SELECT wsi.quantity FROM "tabWarehouse Stock Item" wsi
+                WHERE wsi.item_id = k.item_id AND wsi.make IS NOT DISTINCT FROM k.make
+                LIMIT 1
+            ), 0) AS on_hand,
+            COALESCE((
+                SELECT SUM(itmi.transfer_quantity)
+                FROM "tabInternal Transfer Memo Item" itmi
+                JOIN "tabInternal Transfer Memo" itm ON itmi.parent = itm.name
+                WHERE itm.source_type = 'Warehouse'
+                  AND itmi.item_id = k.item_id
+                  AND itmi.make IS NOT DISTINCT FROM k.make
+                  AND itm.status = 'Approved'
+                  AND (%(exclude)s IS NULL OR itm.name != %(exclude)s)
+            ), 0) AS reserved
+        FROM (VALUES {", ".join(rows)}) AS k(item_id, make)
+        """,
+        values,
+        as_dict=True,
+    )
+    by_key = {(r.item_id, r.make): max(flt(r.on_hand) - flt(r.reserved), 0.0) for r in available}
+    for bucket in buckets:
+        if bucket[0]:
+            result[bucket] = by_key.get((bucket[0], bucket[1] or None), 0.0)
+    return result
+
+
+def _bucket_make(make):
+    """`available_quantity`'s make normalisation: blank strings are the NULL bucket."""
+    if isinstance(make, str):
+        return make.strip() or None
+    return make
+
+
+def _by_bucket(rows):
+    """{(project, item_id, make | _ANY_MAKE): qty} from GROUPING SETS rows."""
+    return {
+        (r.project, r.item_id, _ANY_MAKE if r.any_make else r.make): flt(r.qty)
+        for r in rows
+    }
@@ -2,8 +2,9 @@ import frappe
 from frappe import _
 from ..Notifications.pr_notifications import PrNotification, get_allowed_lead_users, get_admin_users, get_allowed_procurement_users, get_allowed_accountants
 from .procurement_requests import get_user_name
-from nirmaan_stack.api.vendor_credit import recalculate_vendor_credit
+from nirmaan_stack.api.vendor_credit import invalidate_vendor_credit_cache, recalculate_vendor_credit
 from nirmaan_stack.api.projects._tendering_guard import validate_won
+from nirmaan_stack.api.target_rates import rate_index
 
 def after_insert(doc, method):
         proc_admin_account_users = get_allowed_procurement_users(doc) + get_admin_users() + get_allowed_accountants(doc)
@@ -30,7 +31,7 @@ def after_insert(doc, method):
                     else:
                         click_action_url = f"{frappe.utils.get_url()}/frontend/project-payments?tab=PO%20Wise"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -121,6 +122,8 @@ def on_update(doc, method):
     Manage Approved Quotations and Deletion of PO
     """
     old_doc = doc.get_doc_before_save()
+    # Status / delivered / paid changes all move the vendor's credit exposure.
+    invalidate_vendor_credit_cache(doc.vendor, old_doc.vendor if old_doc else None)
     doc = frappe.get_doc("Procurement Orders", doc.name)
     custom = doc.custom == "true"
 
@@ -283,11 +286,27 @@ def on_trash(doc, method):
     })
 
 
-def delete_existing_aq_docs(doc):
-    # Check and delete existing approved quotations for this procurement order
+def delete_existing_aq_docs(doc, refresh_index=True):
+    """Delete this PO's approved quotations. Returns the target-rate index keys they fed.
+
+    With `refresh_index` (the default) those keys are re-derived straight away; the create
+    path passes False and refreshes once, after writing the replacement AQs.
+    """
+    touched = {
+        rate_index.index_key(aq)
+        for aq in frappe.get_all(
+            "Approved Quotations",
+            filters={"procurement_order": doc.name},
+            fields=["item_id", "unit", "make"],
+            limit_page_length=0,
+        )
+    }
     frappe.db.delete("Approved Quotations", {
         "procurement_order" : ("=", doc.name)
     })
+    if refresh_index:
+        rate_index.refresh_after_write(touched)
+    return touched
 
 
 def cleanup_po_linked_docs(po_name):
@@ -326,11 +345,11 @@ def _all_items_dispatched(doc):
 
 
 def _create_approved_quotations(doc, custom):
-    """Create AQ records for all PO items."""
+    """Create AQ records for all PO items, then refresh their target-rate index keys."""
     try:
         vendor = frappe.get_doc("Vendors", doc.vendor)
         orders = doc.get("items")
-        delete_existing_aq_docs(doc)
+        touched = delete_existing_aq_docs(doc, refresh_index=False)
         for order in orders:
             aq = frappe.new_doc('Approved Quotations')
             try:
@@ -349,7 +368,9 @@ def _create_approved_quotations(doc, custom):
                 aq.city = vendor.vendor_city
                 aq.state = vendor.vendor_state
                 aq.insert()
+                touched.add(rate_index.index_key(aq))
             except frappe.DoesNotExistError:
                 continue
+        rate_index.refresh_after_write(touched)
     except frappe.DoesNotExistError:
         print("VENDOR NOT AVAILABLE IN DB")
\ No newline at end of file
@@ -6,7 +6,6 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import flt, get_datetime, add_months, now_datetime, create_batch
 from datetime import datetime
-from functools import lru_cache
 import math # Though not used in the final version 3 logic, kept if needed later
 # from ...api.approve_vendor_quotes import generate_pos_from_selection
 
@@ -61,32 +60,29 @@ class ProcessedQuote(TypedDict):
 # Helper Function: Calculate Historical Average Quote Rate for an Item
 # ----------------------------------------------------------------------
 
-# Using lru_cache for memoization
-@lru_cache(maxsize=128)
-def get_historical_average_quote_cached(item_id: str) -> HistoricalAverageResult:
+def get_approved_quotes_by_item(item_ids) -> dict[str, list[dict[str, any]]]:
     """
-    Fetches approved quotes for the item and calculates the historical average rate.
-    This function acts as a wrapper to fetch data and call the core logic,
-    allowing the core logic to be potentially testable with mocked data.
+    Fetches the approved quotations of every item in `item_ids` in one query per
+    500 items (not one per item), grouped by item_id, newest first. The input
+    `calculate_historical_average_quote` takes for each item.
 
     Args:
-        item_id: The name (ID) of the item to calculate the rate for.
+        item_ids: The names (IDs) of the items to fetch quotes for.
 
     Returns:
-        A HistoricalAverageResult dictionary.
+        {item_id: [approved quotation dicts]}; an item with no quotes is absent.
     """
-    # Fetch all potentially relevant approved quotations for this item
-    # We filter by docstatus=1 assuming "Approved Quotations" are submitted documents
-    all_approved_quotes = frappe.get_all(
-        "Approved Quotations",
-        filters={"item_id": item_id},
-        fields=["name", "creation", "quote", "quantity", "item_id"], # Include fields needed
-        order_by="creation desc"
-    )
-    print(f"Fetcher for quotes: {item_id}", all_approved_quotes)
-
-    # Call the main calculation logic
-    return calculate_historical_average_quote(all_approved_quotes, item_id)
+    quotes_by_item: dict[str, list[dict[str, any]]] = {}
+    for chunk in create_batch(sorted({i for i in item_ids if i}), 500):
+        for quote in frappe.get_all(
+            "Approved Quotations",
+            filters={"item_id": ["in", list(chunk)]},
+            fields=["name", "creation", "quote", "quantity", "item_id"], # Include fields needed
+            order_by="creation desc",
+            limit_page_length=0,
+        ):
+            quotes_by_item.setdefault(quote.item_id, []).append(quote)
+    return quotes_by_item
 
 
 # Using built-in list/dict and Union operator | for Optional (Python 3.10+)
@@ -223,8 +219,6 @@ def validate_procurement_request(doc: Document) -> bool:
         True if all checks pass, False otherwise.
         (Consider raising frappe.ValidationError in hooks)
     """
-    get_historical_average_quote_cached.cache_clear()
-
     # procurement_list_json = doc.get("procurement_list")
     # items = []
     items = doc.get("order_list", [])
@@ -259,6 +253,10 @@ def validate_procurement_request(doc: Document) -> bool:
             return False # Fail check 1
 
     # --- Checks 2, 3 & 4: Calculate total estimated amount for "Pending" items ---
+    # Every pending item's approved quotes in one read, instead of one query per item.
+    quotes_by_item = get_approved_quotes_by_item(
+        item.get("item_id") for item in items if item.get("status") == "Pending"
+    )
     for item in items:
         current_item_status = item.get("status")
 
@@ -294,7 +292,7 @@ def validate_procurement_request(doc: Document) -> bool:
 
             # --- Check 2 & 3: Get Estimated Rate ---
             try:
-                rate_result = get_historical_average_quote_cached(item_id)
+                rate_result = calculate_historical_average_quote(quotes_by_item.get(item_id), item_id)
                 print(f"Fetched rate for item {item_id}: {rate_result}")
                 estimated_rate = rate_result["averageRate"]
 
@@ -689,7 +687,7 @@ def after_insert(doc, method):
                         )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/procurement-requests?tab=Approve%20PR"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -858,7 +856,7 @@ def on_update(doc, method):
                             )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/purchase-orders?tab=Approve%20PO"
                     print(f"click_action_url: {click_action_url}")
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
 
@@ -925,7 +923,7 @@ def on_update(doc, method):
                         )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/procurement-requests?tab=New%20PR%20Request"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -989,7 +987,7 @@ def on_update(doc, method):
                     notification_title = f"{'Custom PR' if custom else 'PR'}: {doc.name} Rejected!"
                     click_action_url = f"{frappe.utils.get_url()}/frontend/prs&milestones/procurement-requests/{doc.name}"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -3,6 +3,7 @@ from frappe import _
 from frappe.utils import flt
 
 from nirmaan_stack.nirmaan_stack.doctype.projects.projects import CEO_HOLD_SYSTEM_USER
+from nirmaan_stack.services import deferred_recompute
 from nirmaan_stack.services.ceo_hold import core
 from ..Notifications.pr_notifications import PrNotification
 
@@ -208,6 +209,11 @@ def trigger_check(project_id):
 	if frappe.flags.in_import or frappe.flags.in_patch or frappe.flags.in_migrate or frappe.flags.in_install:
 		return
 
+	# Inside a bulk flow's coalescing scope, every save touching this project collapses
+	# into ONE evaluation when the scope exits -- on the final state, not the first save's.
+	if deferred_recompute.defer("cashflow_hold", project_id, _evaluate):
+		return
+
 	# Dedup within a single request: Frappe fires both `after_insert` and
 	# `on_update` on a fresh insert, so the same Payment / Expense / Inflow
 	# save would otherwise drive two gap recomputations. The first call
@@ -217,6 +223,10 @@ def trigger_check(project_id):
 		return
 	frappe.flags[flag_key] = True
 
+	_evaluate(project_id)
+
+
+def _evaluate(project_id):
 	try:
 		sync_cashflow_reason(project_id)
 	except Exception:
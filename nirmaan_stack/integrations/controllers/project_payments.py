@@ -3,7 +3,7 @@
 import frappe
 from frappe import _
 from frappe.utils import nowdate
-from nirmaan_stack.api.vendor_credit import recalculate_vendor_credit
+from nirmaan_stack.api.vendor_credit import invalidate_vendor_credit_cache, recalculate_vendor_credit
 from nirmaan_stack.constants.authorized_users import CEO_AUTHORIZED_USER
 from nirmaan_stack.api.projects._tendering_guard import validate_won
 
@@ -19,10 +19,6 @@ def _find_and_update_po_term(payment_doc, new_status, clear_link=False):
     Finds the corresponding PO term by searching through the child table
     and updates its status.
     """
-    if payment_doc.flags.get("bulk_approval"):
-        # Bulk endpoint owns the PO row lock and syncs terms once per group.
-        return
-
     if payment_doc.flags.get("split_approval"):
         # Partial CEO approval (services/payment_split.py) already holds the PO
         # row lock and writes BOTH term rows — the shrunk original and the new
@@ -84,7 +80,7 @@ def _notify_accountants_payment_ready(doc):
                 "Please review and fulfil the payment."
             )
             click_action_url = f"{frappe.utils.get_url()}/frontend/project-payments?tab=New%20Payments"
-            PrNotification(user, notification_title, notification_body, click_action_url)
+            PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
 
         message = {
             "title": _("Payment Ready to Fulfil"),
@@ -189,7 +185,7 @@ def after_insert(doc, method):
                     f"PO has been requested by {get_user_name(frappe.session.user)}, click here to take action."
                 )
                 click_action_url = f"{frappe.utils.get_url()}/frontend/project-payments?tab=Approve%20Payments"
-                PrNotification(user, notification_title, notification_body, click_action_url)
+                PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
             else:
                 print(f"push notifications were not enabled for user: {user.get('full_name')}")
     else:
@@ -234,6 +230,10 @@ def on_update(doc, method):
     """
     On update, find the related PO term by searching and sync the status.
     """
+    # Before any early return: a payment change moves the vendor's credit exposure.
+    if doc.document_type == "Procurement Orders":
+        invalidate_vendor_credit_cache(doc.vendor)
+
     # Skip during PO Revision — notifications call frappe.db.commit() which kills rollback
     if doc.flags.from_adjustment:
         return
@@ -248,9 +248,6 @@ def on_update(doc, method):
     # --- Notification logic for specific status transitions ---
     if old_doc.status == 'Requested' and doc.status == "CEO Pending":
         # Project Lead has approved → notify the CEO that a payment is awaiting their gate.
-        if doc.flags.get("bulk_approval"):
-            # Bulk endpoint emits one summary notification covering all payments.
-            return
         ceo_user = _get_ceo_user()
         project = frappe.get_doc("Projects", doc.project)
         if ceo_user:
@@ -261,7 +258,7 @@ def on_update(doc, method):
                     "and is awaiting your final review."
                 )
                 click_action_url = f"{frappe.utils.get_url()}/frontend/project-payments?tab=CEO%20Pending"
-                PrNotification(ceo_user, notification_title, notification_body, click_action_url)
+                PrNotification(ceo_user, notification_title, notification_body, click_action_url, doc=doc)
 
             message = {
                 "title": _("Payment Awaiting CEO Approval"),
@@ -287,9 +284,6 @@ def on_update(doc, method):
 
     elif old_doc.status == 'CEO Pending' and doc.status == 'Approved':
         # CEO has approved → notify accountants that the payment is ready to fulfil.
-        if doc.flags.get("bulk_approval"):
-            # Bulk endpoint emits one summary notification per accountant per project.
-            return
         if doc.flags.get("split_approval"):
             # Partial CEO approval: the notification is NOT dropped — the endpoint
             # emits it after its commit. Emitting it here would commit mid-savepoint
@@ -335,7 +329,7 @@ def on_update(doc, method):
                         f"Hi {user.get('full_name')}, the payment: {doc.name} associated with PO: {doc.document_name} has been fulfilled."
                     )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/project-payments?tab=Payments%20Done"
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
 
                 message = {
                     "title": _("Payment Status Changed"),
@@ -8,12 +8,25 @@ Those paths all go through the document layer, so a `before_save` hook covers ev
 
 The standing counterpart trap (root CLAUDE.md): raw SQL and `frappe.db.set_value` BYPASS this
 hook. Any future backfill or repair script that moves `status` must stamp these two fields
-itself, or say at the call site why skipping them is correct.
+itself, or say at the call site why skipping them is correct. The RULE lives in
+`status_attribution` below, so such a writer applies the same one rather than a copy:
+`api/snags/tracking.bulk_update_snags` (set-based UPDATEs) is the one that does today.
 """
 
 import frappe
 
 
+def status_attribution(previous_status, new_status, user, now):
+    """The attribution fields a status transition stamps, or None when it stamps nothing.
+
+    PURE -- no document, no session, no clock -- so the hook below and the set-based bulk
+    writer in `api/snags/tracking.py` apply one rule and cannot drift apart.
+    """
+    if previous_status == new_status:
+        return None
+    return {"status_changed_by": user, "status_changed_on": now}
+
+
 def before_save(doc, method=None):
     """Stamp the status-change attribution whenever `status` actually changes.
 
@@ -32,8 +45,6 @@ def before_save(doc, method=None):
         # Frappe could not load the pre-save state; do not invent an attribution.
         return
 
-    if previous.status == doc.status:
-        return
-
-    doc.status_changed_by = frappe.session.user
-    doc.status_changed_on = frappe.utils.now()
+    stamp = status_attribution(previous.status, doc.status, frappe.session.user, frappe.utils.now())
+    if stamp:
+        doc.update(stamp)
@@ -25,7 +25,7 @@ def after_insert(doc, method):
                     
                     click_action_url = f"{frappe.utils.get_url()}/frontend/procurement-requests?tab={doc.type}"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -88,7 +88,7 @@ def on_update(doc, method):
                             "Please review the selection and proceed with approval or rejection."
                         )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/purchase-orders?tab=Approve%20Sent%20Back%20PO"
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
                 message = {
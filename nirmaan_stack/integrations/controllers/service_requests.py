@@ -62,7 +62,7 @@ def on_update(doc, method):
                         )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/service-requests?tab=approve-service-order"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -118,7 +118,7 @@ def on_update(doc, method):
                         )
                     click_action_url = f"{frappe.utils.get_url()}/frontend/service-requests?tab=approve-amended-so"
                     # Send notification for each lead
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -180,7 +180,7 @@ def on_update(doc, method):
                     else:
                         click_action_url = f"{frappe.utils.get_url()}/frontend/project-payments?tab=PO%20Wise"
 
-                    PrNotification(user, notification_title, notification_body, click_action_url)
+                    PrNotification(user, notification_title, notification_body, click_action_url, doc=doc)
                 else:
                     print(f"push notifications were not enabled for user: {user['full_name']}")
         else:
@@ -19,8 +19,12 @@ and writes every Purchase Order Item row, so putting it on doc events would fire
 on paths it deliberately does not run on today.
 """
 
+from collections import defaultdict
+
+from frappe.utils import flt
+
 from nirmaan_stack.api.invoices._item_billing_sync import (
-    recompute_document_amount_invoiced,
+    apply_document_amount_invoiced_delta,
 )
 
 # The stored total sums APPROVED invoices only, so an invoice can only move it while
@@ -40,56 +44,70 @@ _SUM_INPUT_FIELDS = (
 
 
 def recompute_parent_total(doc, method=None):
-    """Recompute the parent's `amount_invoiced`. Bound to after_insert / on_update /
-    after_delete.
+    """Move the parent's `amount_invoiced` by this invoice's change. Bound to
+    on_update / after_delete.
 
     THE RULE, stated once: the total changes only when this invoice is Approved BEFORE
-    the change, AFTER it, or both.
+    the change, AFTER it, or both. It contributes `invoice_amount` to its parent while
+    Approved and nothing otherwise, so the parent moves by new contribution minus old:
 
-      * Pending -> Approved   the parent gains this amount        (recompute the new parent)
-      * Approved -> anything  the parent loses it                 (recompute the old parent)
-      * Approved -> Approved  only if the amount or the parent moved
+      * Pending -> Approved   the parent gains this amount        (+new on the new parent)
+      * Approved -> anything  the parent loses it                 (-old on the old parent)
+      * Approved -> Approved  only if the amount or the parent moved (both of the above)
       * anything else         the sum is arithmetically unchanged — return
 
-    `after_delete`, never `on_trash`: on_trash fires BEFORE the row leaves the database,
-    so the sum would still count the invoice being deleted. Project Expenses and Non
-    Project Expenses already moved for this reason.
+    The cost is one UPDATE per parent touched, however many invoices the order
+    already has. `find_amount_invoiced_drift` (run nightly) compares the result with
+    a full recompute.
+
+    `after_delete`, never `on_trash`: the delete must be final before its negative
+    delta lands. Project Expenses and Non Project Expenses already moved for this
+    reason.
 
     `get_doc_before_save()` returns None on both insert and delete — there is no prior
-    image — so those are judged on the invoice's own status alone.
+    image — so those are judged on the invoice's own status alone, and `method` says
+    which way the amount goes.
 
-    Raises rather than swallowing. This is one SELECT plus one UPDATE inside the caller's
+    Applied immediately: deltas add up, so two of them for the same parent must BOTH
+    land.
+
+    Raises rather than swallowing. This is one UPDATE per parent inside the caller's
     transaction; a silently stale total is the worse outcome.
     """
+    for (document_type, document_name), delta in _parent_deltas(doc, method).items():
+        apply_document_amount_invoiced_delta(document_type, document_name, delta)
+
+
+def _parent_deltas(doc, method=None):
+    """{(document_type, document_name): delta} for one invoice event; zero deltas
+    are left out."""
     before = doc.get_doc_before_save()
+    deltas = defaultdict(float)
 
     # ---- insert / delete: no prior image, so the invoice's own status decides ----
     if before is None:
-        if doc.status != _APPROVED:
-            return          # a Pending insert, or deleting a non-Approved invoice
-        recompute_document_amount_invoiced(doc.document_type, doc.document_name)
-        return
+        if doc.status == _APPROVED:     # a Pending insert / non-Approved delete: nothing
+            sign = -1 if method == "after_delete" else 1
+            deltas[(doc.document_type, doc.document_name)] += sign * flt(doc.invoice_amount)
+        return {k: v for k, v in deltas.items() if v}
 
     # ---- update ----
     was_approved = before.status == _APPROVED
     is_approved = doc.status == _APPROVED
 
     if not was_approved and not is_approved:
-        return              # Pending edits, Pending -> Rejected, autofill saves, ...
+        return {}           # Pending edits, Pending -> Rejected, autofill saves, ...
 
     if was_approved and is_approved and not any(
         before.get(f) != doc.get(f) for f in _SUM_INPUT_FIELDS
     ):
-        return              # still Approved, and nothing feeding the sum moved
+        return {}           # still Approved, and nothing feeding the sum moved
 
-    # Recompute each side that actually held this invoice. When it was re-pointed at a
-    # different order these are two different documents, and the one it LEFT still holds
-    # a total that includes it.
-    targets = set()
-    if is_approved:
-        targets.add((doc.document_type, doc.document_name))
+    # Take the old contribution off the parent that held it and put the new one on
+    # the parent that holds it now. When the invoice was re-pointed at a different
+    # order these are two different documents; otherwise they net into one delta.
     if was_approved:
-        targets.add((before.document_type, before.document_name))
-
-    for document_type, document_name in targets:
-        recompute_document_amount_invoiced(document_type, document_name)
+        deltas[(before.document_type, before.document_name)] -= flt(before.invoice_amount)
+    if is_approved:
+        deltas[(doc.document_type, doc.document_name)] += flt(doc.invoice_amount)
+    return {k: v for k, v in deltas.items() if v}
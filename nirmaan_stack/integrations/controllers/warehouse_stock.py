@@ -4,10 +4,11 @@ Warehouse Stock Item adjustment helpers.
 Called from:
   - ITM lifecycle (Approved → Dispatched with source=Warehouse): decrease stock
   - DN lifecycle via recalculate_itm_delivery_fields (target=Warehouse): delta-adjust stock
+  - ITM lifecycle (any save / delete of a source=Warehouse ITM): re-derive `reserved_qty`
 """
 
 import frappe
-from frappe.utils import flt, nowdate
+from frappe.utils import flt, now, nowdate
 
 
 def _get_or_create_stock_item(item_id: str, make, item_meta: dict):
@@ -123,3 +124,56 @@ def apply_warehouse_delta(itm, item_row, delta: float):
         "date": today,
     })
     wsi.save(ignore_permissions=True)
+
+
+def sync_reserved_qty(keys=None):
+    """Re-derive `reserved_qty` for the given (item_id, make) buckets, or for every
+    Warehouse Stock Item when `keys` is None.
+
+    reserved_qty = SUM(transfer_quantity) over Approved ITMs with source=Warehouse,
+    the same figure the stock list and `warehouse_available_quantity` compute. It is
+    recomputed from source for each touched bucket, never moved by a delta, so the
+    stored value follows whatever path changed the ITM. One UPDATE per call, writing
+    only rows whose value changed; `modified` is bumped on those, so a concurrent
+    `wsi.save()` holding the old row fails its timestamp check instead of writing
+    a stale reservation back.
+    """
+    values = {"now": now(), "user": frappe.session.user}
+    scope = "TRUE"
+    if keys is not None:
+        keys = {(item_id, make or None) for item_id, make in keys if item_id}
+        if not keys:
+            return
+        # A VALUES list, not IN: the make half of the key needs IS NOT DISTINCT FROM.
+        rows = []
+        for i, (item_id, make) in enumerate(sorted(keys, key=lambda k: (k[0], k[1] or ""))):
+            values[f"i{i}"], values[f"m{i}"] = item_id, make
+            rows.append(f"(%(i{i})s, CAST(%(m{i})s AS text))")
+        scope = f"""EXISTS (
+                SELECT 1 FROM (VALUES {", ".join(rows)}) AS k(item_id, make)
+                WHERE k.item_id = w.item_id AND k.make IS NOT DISTINCT FROM w.make
+            )"""
+
+    frappe.db.sql(
+        f"""
+        UPDATE "tabWarehouse Stock Item" wsi
+        SET reserved_qty = r.reserved, modified = %(now)s, modified_by = %(user)s
+        FROM (
+            SELECT w.name, COALESCE(SUM(itmi.transfer_quantity), 0) AS reserved
+            FROM "tabWarehouse Stock Item" w
+            LEFT JOIN "tabInternal Transfer Memo Item" itmi
+              ON itmi.item_id = w.item_id AND itmi.make IS NOT DISTINCT FROM w.make
+             AND EXISTS (
+                SELECT 1 FROM "tabInternal Transfer Memo" itm
+                WHERE itm.name = itmi.parent
+                  AND itm.source_type = 'Warehouse'
+                  AND itm.status = 'Approved'
+             )
+            WHERE {scope}
+            GROUP BY w.name
+        ) r
+        WHERE r.name = wsi.name
+          AND COALESCE(wsi.reserved_qty, 0) != r.reserved
+        """,
+        values,
+    )
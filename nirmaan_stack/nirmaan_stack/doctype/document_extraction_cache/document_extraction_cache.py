@@ -0,0 +1,16 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Document Extraction Cache -- one persisted AI extraction per (file bytes x doc kind x settings).
+
+Written and read ONLY by services/extraction/cache.py, which owns the key (content SHA-256 +
+doc_kind + settings_version) and the (entities, line_items) payload shape. Entries are immutable
+once written (track_changes 0); a settings or prompt change mints a new settings_version, so stale
+entries are simply never looked up again. Controller stays minimal.
+"""
+
+from frappe.model.document import Document
+
+
+class DocumentExtractionCache(Document):
+    pass
@@ -1,9 +1,114 @@
 # Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from nirmaan_stack.integrations.controllers import internal_transfer_memo as itm_controller
+
+MAKES = (None, "", " ", "Tata", "JSW", "Other")
+
+
+def _raw(doctype, name=None, **fields):
+	"""Insert a row with only the given fields, skipping ALL hooks/validation."""
+	d = frappe.new_doc(doctype)
+	d.update(fields)
+	d.name = name or frappe.generate_hash(length=12)
+	d.db_insert()
+	return d.name
+
+
+def _child(doctype, parent, parenttype, idx, **fields):
+	return _raw(doctype, parent=parent, parenttype=parenttype, parentfield="items", idx=idx, **fields)
+
 
 class TestInternalTransferMemo(FrappeTestCase):
 	pass
+
+
+class TestBatchedAvailability(FrappeTestCase):
+	"""`available_quantities` / `warehouse_available_quantities` must return, for every
+	bucket, exactly what the per-bucket helpers return -- including the any-make reading
+	of `make=None`, the blank-make normalisation and `exclude_itm`."""
+
+	def setUp(self):
+		tag = frappe.generate_hash(length=6)
+		self.project, self.other_project = f"_T-ITM-{tag}-A", f"_T-ITM-{tag}-B"
+		self.items = [f"_T-ITEM-{tag}-1", f"_T-ITEM-{tag}-2", f"_T-ITEM-{tag}-3"]
+		i1, i2, _ = self.items
+
+		self._rir("2026-01-01", "2026-01-01 09:00:00", [(i1, "Tata", 999)])
+		self._rir("2026-01-10", "2026-01-10 10:00:00", [(i1, "Tata", 50), (i1, "JSW", 20), (i1, None, 15), (i2, "Tata", 8)])
+		self._rir("2026-01-20", "2026-01-20 10:00:00", [(i1, "Tata", 1)], status="Draft")
+
+		self.approved = self._itm("Approved", [(i1, "Tata", 12), (i1, "JSW", 25), (i2, "Tata", 3)])
+		self._itm("Dispatched", [(i1, "Tata", 7), (i2, "Tata", 2)], dispatched_on="2026-01-11 08:00:00")
+		self._itm("Delivered", [(i1, "Tata", 100)], dispatched_on="2026-01-09 08:00:00")
+
+		_raw("Warehouse Stock Item", item_id=i1, make="Tata", quantity=40)
+		_raw("Warehouse Stock Item", item_id=i1, make=None, quantity=6)
+		self.wh_approved = self._itm("Approved", [(i1, "Tata", 15), (i1, None, 9)], source_type="Warehouse")
+
+	def _rir(self, report_date, modified, lines, status="Submitted"):
+		name = _raw(
+			"Remaining Items Report", project=self.project, report_date=report_date,
+			status=status, creation=modified, modified=modified,
+		)
+		for idx, (item_id, make, qty) in enumerate(lines, start=1):
+			_child("Remaining Item Entry", name, "Remaining Items Report", idx,
+				   item_id=item_id, make=make, remaining_quantity=qty)
+
+	def _itm(self, status, lines, source_type="Project", dispatched_on=None):
+		name = _raw(
+			"Internal Transfer Memo", status=status, source_type=source_type,
+			source_project=self.project if source_type == "Project" else None,
+			target_type="Project", target_project=self.other_project, dispatched_on=dispatched_on,
+		)
+		for idx, (item_id, make, qty) in enumerate(lines, start=1):
+			_child("Internal Transfer Memo Item", name, "Internal Transfer Memo", idx,
+				   item_id=item_id, make=make, transfer_quantity=qty)
+		return name
+
+	def test_project_buckets_match_the_per_bucket_helper(self):
+		buckets = [
+			(item_id, project, make)
+			for item_id in (*self.items, None)
+			for project in (self.project, self.other_project, "")
+			for make in MAKES
+		]
+		for exclude in (None, self.approved):
+			batched = itm_controller.available_quantities(buckets, exclude_itm=exclude)
+			for item_id, project, make in buckets:
+				with self.subTest(item=item_id, project=project, make=make, exclude=exclude):
+					self.assertAlmostEqual(
+						batched[(item_id, project, make)],
+						itm_controller.available_quantity(item_id, project, exclude_itm=exclude, make=make),
+					)
+		# Not vacuous: any make nets 85 - 37 - 7, Tata 50 - 12 - 7, JSW floors at 0.
+		batched = itm_controller.available_quantities(buckets)
+		i1 = self.items[0]
+		self.assertEqual(batched[(i1, self.project, None)], 41)
+		self.assertEqual(batched[(i1, self.project, "Tata")], 31)
+		self.assertEqual(batched[(i1, self.project, "JSW")], 0)
+
+	def test_warehouse_buckets_match_the_per_bucket_helper(self):
+		buckets = [(item_id, make) for item_id in (*self.items, None) for make in MAKES]
+		for exclude in (None, self.wh_approved):
+			batched = itm_controller.warehouse_available_quantities(buckets, exclude_itm=exclude)
+			for item_id, make in buckets:
+				with self.subTest(item=item_id, make=make, exclude=exclude):
+					self.assertAlmostEqual(
+						batched[(item_id, make)],
+						itm_controller.warehouse_available_quantity(item_id, make=make, exclude_itm=exclude),
+					)
+		batched = itm_controller.warehouse_available_quantities(buckets)
+		self.assertEqual(batched[(self.items[0], "Tata")], 25)
+
+	def test_query_count_does_not_grow_with_the_buckets(self):
+		buckets = [(item_id, self.project, make) for item_id in self.items for make in MAKES]
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			itm_controller.available_quantities(buckets)
+			itm_controller.warehouse_available_quantities([(b[0], b[2]) for b in buckets])
+		self.assertEqual(sql.call_count, 4)
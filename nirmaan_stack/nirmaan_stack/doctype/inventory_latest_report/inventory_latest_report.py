@@ -0,0 +1,15 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Inventory Latest Report -- one row per project: its latest Submitted Remaining Items Report.
+
+The `latest_reports` leg of the inventory item-wise summary, kept as a table. Written
+and read ONLY by api/inventory_summary_index.py, from the Remaining Items Report save /
+delete hooks. Never hand-edited; track_changes 0.
+"""
+
+from frappe.model.document import Document
+
+
+class InventoryLatestReport(Document):
+    pass
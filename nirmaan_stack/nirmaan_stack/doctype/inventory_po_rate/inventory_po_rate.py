@@ -0,0 +1,25 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Inventory PO Rate -- one row per (project, item, make) ordered on a live PO.
+
+The max-PO-rate and PO-number legs of the inventory item-wise summary, kept as a
+table. Written and read ONLY by api/inventory_summary_index.py, from the Procurement
+Orders save / delete hooks. Never hand-edited; track_changes 0.
+"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class InventoryPORate(Document):
+    pass
+
+
+def on_doctype_update():
+    """The summary joins on (project, item_id, make).
+
+    EXPLICIT NAME: PostgreSQL index names are unique per schema and `CREATE INDEX IF
+    NOT EXISTS` matches by name only (see item_search_token.on_doctype_update).
+    """
+    frappe.db.add_index("Inventory PO Rate", ["project", "item_id", "make"], "inventory_po_rate_key_idx")
@@ -0,0 +1,45 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Item Search Token -- one row per (list document x child row x field x word).
+
+The word-prefix index behind "Item in X" list searches. Written and read ONLY by
+api/data_table/item_index.py, which rebuilds a parent's rows from its save hook and
+owns the tokenization (it must match token_search.tokenize). Never hand-edited;
+track_changes 0.
+"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class ItemSearchToken(Document):
+    pass
+
+
+def on_doctype_update():
+    """Parent lookup index plus the token index.
+
+    EXPLICIT NAMES: PostgreSQL index names are unique per schema and `CREATE INDEX IF
+    NOT EXISTS` matches by name only (see outflow_row_match.on_doctype_update).
+
+    The token index is a pg_trgm GIN when the extension can be enabled -- it serves the
+    `token LIKE 'abc%'` lookups whether or not Frappe rewrites them to ILIKE. Without
+    pg_trgm (extension creation needs a privileged role) it falls back to a
+    text_pattern_ops btree, which serves the plain prefix LIKE.
+    """
+    frappe.db.add_index("Item Search Token", ["ref_doctype", "ref_name"], "item_search_token_parent_idx")
+    frappe.db.savepoint("item_search_token_trgm")
+    try:
+        frappe.db.sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        frappe.db.sql(
+            'CREATE INDEX IF NOT EXISTS item_search_token_trgm_idx '
+            'ON "tabItem Search Token" USING gin (token gin_trgm_ops)'
+        )
+    except Exception:
+        frappe.db.rollback(save_point="item_search_token_trgm")
+        frappe.log_error(frappe.get_traceback(), "Item Search Token: pg_trgm unavailable")
+        frappe.db.sql(
+            'CREATE INDEX IF NOT EXISTS item_search_token_prefix_idx '
+            'ON "tabItem Search Token" (ref_doctype, search_field, token text_pattern_ops)'
+        )
@@ -0,0 +1,23 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Notification Outbox -- one pending FCM push, written in the caller's transaction.
+
+Written by `integrations/Notifications/outbox.enqueue_push` (via PrNotification) and
+drained ONLY by `outbox.drain_outbox`, which owns status / attempts / backoff. A row
+rolled back with its save was never a notification; a committed row is delivered at
+least once. Controller stays minimal.
+"""
+
+import frappe
+from frappe.model.document import Document
+
+
+class NotificationOutbox(Document):
+    pass
+
+
+def on_doctype_update():
+    """The drain's pick-up index (status + due time). Explicit name -- see
+    outflow_row_match.on_doctype_update for why."""
+    frappe.db.add_index("Notification Outbox", ["status", "next_attempt_at"], "notification_outbox_due_idx")
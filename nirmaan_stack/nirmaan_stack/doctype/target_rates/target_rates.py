@@ -1,9 +1,16 @@
 # Copyright (c) 2025, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
 # For license information, please see license.txt
 
-# import frappe
+import frappe
 from frappe.model.document import Document
 
 
 class TargetRates(Document):
 	pass
+
+
+def on_doctype_update():
+	"""Composite read index for the rate-index lookups: one row per (item_id, unit, make),
+	read by item list (`get_target_rates_for_item_list`, `rate_index.get_rates`) and by exact
+	key (`send_vendor_quotes.compute_item_loss_percent`)."""
+	frappe.db.add_index("Target Rates", ["item_id", "unit", "make"])
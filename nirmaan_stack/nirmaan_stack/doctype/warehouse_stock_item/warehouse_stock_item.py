@@ -1,8 +1,16 @@
 # Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
 # For license information, please see license.txt
 
+import frappe
 from frappe.model.document import Document
 
 
 class WarehouseStockItem(Document):
 	pass
+
+
+def on_doctype_update():
+	# Keyset paging of the stock list walks (item_name, name); the reservation
+	# sync matches rows on (item_id, make).
+	frappe.db.add_index("Warehouse Stock Item", ["item_name", "name"], "warehouse_stock_item_name_idx")
+	frappe.db.add_index("Warehouse Stock Item", ["item_id", "make"], "warehouse_stock_item_key_idx")
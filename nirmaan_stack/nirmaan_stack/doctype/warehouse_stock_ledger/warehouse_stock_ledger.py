@@ -1,8 +1,14 @@
 # Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
 # For license information, please see license.txt
 
+import frappe
 from frappe.model.document import Document
 
 
 class WarehouseStockLedger(Document):
 	pass
+
+
+def on_doctype_update():
+	# Keyset paging of the ledger list walks (creation, name), newest first.
+	frappe.db.add_index("Warehouse Stock Ledger", ["creation", "name"], "warehouse_stock_ledger_creation_idx")
@@ -0,0 +1,24 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Fill `Inventory Latest Report` and `Inventory PO Rate` from existing reports and POs.
+
+The save hooks only refresh a project when one of its reports or POs is next saved,
+so history starts empty. Until `rebuild_inventory_summary_index` completes,
+`inventory_summary_index.is_ready()` stays False and the inventory item-wise summary
+keeps its inline CTEs -- a half-built table is never read.
+
+IDEMPOTENT -- the rebuild replaces every row, so a re-run rewrites the same tables.
+"""
+
+import frappe
+
+from nirmaan_stack.api.inventory_summary_index import rebuild_inventory_summary_index
+
+
+def execute():
+    print("[backfill_inventory_summary_index] building inventory summary tables")
+    rebuild_inventory_summary_index()
+    frappe.db.sql('ANALYZE "tabInventory Latest Report"')
+    frappe.db.sql('ANALYZE "tabInventory PO Rate"')
+    print("[backfill_inventory_summary_index] done.")
@@ -13,6 +13,12 @@ import frappe
 #               HIT  (mapped entry in extraction_cache.json) -> replay, no AI;
 #               FAIL (failed entry)                          -> skip, leave for the UI;
 #               MISS (not cached) -> Gemini reads it ONCE -> registers a 'mapped' or 'failed' entry.
+#             The raw Gemini read itself goes through extract_invoice_fields, i.e. the
+#             content-hash Document Extraction Cache (services/extraction/cache.py): an aborted
+#             run that is re-started, or the same PDF filed on two invoices, never pays for the
+#             model twice. extraction_cache.json is therefore NOT an extraction cache any more —
+#             it only records per-invoice OUTCOMES (mapped / failed + Resolve-UI fixes) so they
+#             can ship to prod with the app.
 #
 #   run()          -- optional all-in-one MANUAL alternative = execute() + import_cache(apply=True):
 #                       bench --site <site> execute nirmaan_stack.patches.v3_0.backfill_invoice_qty.run
@@ -465,7 +471,10 @@ def _resolve_row(m, po_doc):
 
 
 def _content_hash(attachment_id):
-    """Lightweight file identity for the cache (the attachment's file_url)."""
+    """Lightweight file identity for the outcome record (the attachment's file_url).
+
+    Informational only — the real content hash (SHA-256 of the bytes) keys the Document
+    Extraction Cache, which is what makes a repeat Gemini read free."""
     return (frappe.db.get_value("Nirmaan Attachments", attachment_id, "attachment")
             if attachment_id else None)
 
@@ -0,0 +1,23 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Build the `Item Search Token` index for every existing list document.
+
+The save hooks only index a parent when it is next saved, so history starts empty.
+Until `rebuild_item_search_index` completes, `item_index.is_ready()` stays False and
+item search keeps the regex path -- a half-built index is never read.
+
+IDEMPOTENT -- the rebuild replaces each parent's rows, so a re-run rewrites the same
+index. Commits per chunk (see item_index.REBUILD_CHUNK).
+"""
+
+import frappe
+
+from nirmaan_stack.api.data_table.item_index import rebuild_item_search_index
+
+
+def execute():
+    print("[backfill_item_search_index] building item search token index")
+    rebuild_item_search_index()
+    frappe.db.sql('ANALYZE "tabItem Search Token"')
+    print("[backfill_item_search_index] done.")
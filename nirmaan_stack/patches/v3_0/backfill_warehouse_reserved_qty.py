@@ -0,0 +1,22 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Fill `Warehouse Stock Item.reserved_qty` from the Approved warehouse ITMs.
+
+The ITM hooks only re-derive the buckets an ITM touches when it is next saved, so
+the new column starts at 0 everywhere. One full `sync_reserved_qty()` brings every
+row in line with what the stock list used to compute per request.
+
+IDEMPOTENT -- the sync recomputes from source and skips rows already correct.
+"""
+
+import frappe
+
+from nirmaan_stack.integrations.controllers.warehouse_stock import sync_reserved_qty
+
+
+def execute():
+    print("[backfill_warehouse_reserved_qty] deriving reserved_qty")
+    sync_reserved_qty()
+    frappe.db.commit()
+    print("[backfill_warehouse_reserved_qty] done.")
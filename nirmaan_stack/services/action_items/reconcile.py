@@ -32,6 +32,7 @@ from nirmaan_stack.services.action_items.predicates import (
     is_dn_pending,
 )
 from nirmaan_stack.services.ceo_hold import core as ceo_hold
+from nirmaan_stack.services.project_permissions import project_users
 
 # A duplicate dedup_key can surface as EITHER class depending on cache/timing — the
 # in-app pre-check raises UniqueValidationError (<- ValidationError) while the DB unique
@@ -329,29 +330,11 @@ def reconcile_project_action_items(project_name):
 def _project_has_no_pm(project_name):
     """True iff the project resolves to zero Project-Manager-Profile users.
 
-    Mirrors the `get_allowed_manager_users` pattern (Nirmaan User Permissions for_value
-    + role_profile filter), keyed on a project NAME rather than a doc. Cheap two-step
-    lookup; used only for the nightly orphan warning.
+    Same resolution as `get_allowed_manager_users` (Nirmaan User Permissions for_value
+    + role_profile filter), keyed on a project NAME rather than a doc, read from the
+    cached project-permission index. Used only for the nightly orphan warning.
     """
-    permitted = frappe.get_all(
-        "Nirmaan User Permissions",
-        filters={"for_value": project_name},
-        fields=["user"],
-        limit_page_length=0,
-    )
-    user_ids = [p["user"] for p in permitted]
-    if not user_ids:
-        return True
-    pms = frappe.get_all(
-        "Nirmaan Users",
-        filters={
-            "name": ["in", user_ids],
-            "role_profile": ASSIGNED_ROLE_PM,
-        },
-        fields=["name"],
-        limit_page_length=1,
-    )
-    return not pms
+    return not project_users(project_name, ASSIGNED_ROLE_PM)
 
 
 def reconcile_all():
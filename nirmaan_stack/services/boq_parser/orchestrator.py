@@ -183,7 +183,7 @@ def _enrich_column_headers(reader: "BoqReader", sheet_config: SheetConfig) -> No
 # Orchestrator
 # ------------------------------------------------------------------
 
-def parse_boq(file_path: str, config: MappingConfig) -> ParsedBoq:
+def parse_boq(file_path: str, config: MappingConfig, snapshot=None) -> ParsedBoq:
     """
     Parse a BoQ workbook using the given MappingConfig.
 
@@ -197,8 +197,15 @@ def parse_boq(file_path: str, config: MappingConfig) -> ParsedBoq:
       6. Assemble ParsedSheet
 
     Master preamble text is extracted from sheets with treat_as="master_preamble".
+
+    `snapshot`: optional open sheet snapshot of `file_path`, handed to BoqReader,
+    which closes it when the parse returns.
     """
-    reader = BoqReader(file_path)
+    with BoqReader(file_path, snapshot=snapshot) as reader:
+        return _parse_with_reader(reader, file_path, config)
+
+
+def _parse_with_reader(reader: "BoqReader", file_path: str, config: MappingConfig) -> ParsedBoq:
     global_settings = config.global_settings
 
     master_preambles: dict[str, str] = {}
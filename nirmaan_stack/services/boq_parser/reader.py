@@ -153,8 +153,26 @@ class BoqReader:
     Use read_only=False (default) so cell formatting attributes are available.
     """
 
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, file_path: str, snapshot=None) -> None:
+        """`snapshot`: an open `snapshot.WorkbookSnapshot` of this file. Its
+        "values" / "formulas" workbooks stand in for the two openpyxl loads below,
+        so every method runs unchanged and yields what it would have yielded for
+        the .xlsx (asserted by test_snapshot.py) -- without the XML parse.
+
+        The reader takes ownership of `snapshot`: `close()` (or leaving a `with`
+        block) unmaps it, and so does a failure here.
+        """
         self._path = file_path
+        self._snapshot = snapshot
+        if snapshot is not None:
+            try:
+                self._wb_values = snapshot.workbook("values")
+                self._wb_formulas = snapshot.workbook("formulas")
+                self._index_merged_origins()
+            except Exception:
+                snapshot.close()
+                raise
+            return
         # data_only=True — computed cell values (cached by Excel/LibreOffice)
         self._wb_values = openpyxl.load_workbook(
             file_path, data_only=True, read_only=False
@@ -163,7 +181,21 @@ class BoqReader:
         self._wb_formulas = openpyxl.load_workbook(
             file_path, data_only=False, read_only=False
         )
+        self._index_merged_origins()
+
+    def close(self) -> None:
+        """Unmap the snapshot this reader was opened on, if any. Idempotent."""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
+    def _index_merged_origins(self) -> None:
         # Pre-build merged-range lookup per sheet:
         # sheet_name → { "A1" → "A1:B3", ... } for each top-left cell
         self._merged_origins: dict[str, dict[str, str]] = {}
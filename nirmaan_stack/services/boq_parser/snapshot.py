@@ -0,0 +1,538 @@
+"""
+snapshot — a compact, memory-mapped "sheet snapshot" of a BoQ workbook.
+
+WHY THIS EXISTS
+---------------
+Every BoQ wizard stage re-opens the same source workbook with openpyxl and re-walks
+its XML to rebuild the same grid: the config preview and the commit pipeline (one
+read_only values pass), upload / parse / revision (`BoqReader`, which loads the
+workbook TWICE in full mode for values + formulas + styles). For a 2 MB customer
+BoQ the full-mode load is seconds per stage. A snapshot is built ONCE per workbook
+version and every later stage reads it instead.
+
+WHAT IS STORED
+--------------
+Per sheet, columnar arrays over every cell openpyxl knows about, ordered by
+(row, column):
+
+  rows, cols, styles   uint32 arrays -- read through a memoryview of the mmap,
+  flags                uint8 array   -- bit 0: the cell is in the read_only grid
+  values               JSON          -- data_only values (typed: dates are tagged)
+  formulas             JSON          -- sparse [cell index, "=..."] pairs
+  ro_values            JSON          -- sparse read_only values where they differ
+                                        from full mode (merge-covered cells)
+
+plus the sheet's dimensions (full mode and the read_only <dimension> tag), its
+state and merged ranges, and one workbook-wide style table of exactly the
+attributes the parser reads: number format, bold, solid-fill RGB, indent.
+msgpack / Arrow would be the obvious encoders but are not dependencies of this
+app; the stdlib `array` + JSON sections give the same per-sheet lazy, zero-copy
+access for the integer columns.
+
+File layout: MAGIC, a little header length, a JSON header (sheet metadata + the
+byte range of every section), then the sections. Opening a snapshot parses only
+the header; a sheet's sections are decoded on first access.
+
+HOW CONSUMERS READ IT
+---------------------
+`WorkbookSnapshot.workbook(mode)` returns an object with the slice of the openpyxl
+Workbook / Worksheet / Cell surface the wizard uses (`sheetnames`, `worksheets`,
+`wb[name]`, `ws.iter_rows`, `ws.cell`, `ws["B5"]`, `merged_cells.ranges`,
+`max_row`, `max_column`, `sheet_state`, `cell.font.bold`, ...):
+
+  "values"    == load_workbook(path, data_only=True)            (full mode)
+  "formulas"  == load_workbook(path, data_only=False)           (full mode)
+  "read_only" == load_workbook(path, data_only=True, read_only=True)
+
+So `BoqReader.from_snapshot` and `sheet_preview._extract_grid_rows` run their ONE
+existing implementation over it -- there is no second parser to drift.
+`test_snapshot.py` asserts parity against openpyxl on the parser fixtures.
+
+No Frappe imports, matching `reader.py`. Where snapshots live and when they are
+built is owned by `api/boq/wizard/workbook_cache.py`.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import openpyxl
+from openpyxl.cell.cell import Cell
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+
+from nirmaan_stack.services.boq_parser.reader import _extract_fill_rgb, _extract_indent
+
+# Bump whenever what is stored, or how it is derived, changes: the cache keys
+# snapshot files on it, so old ones are simply never opened again.
+SNAPSHOT_VERSION = 1
+
+MAGIC = b"BOQSNAP\x00"
+_HEADER_LEN = struct.Struct("<I")
+_INT_SECTIONS = ("rows", "cols", "styles")
+_IN_READ_ONLY = 1
+
+_DEFAULT_STYLE = 0
+
+
+class SnapshotError(Exception):
+    """The snapshot is missing, corrupt, or was written by another format version."""
+
+
+# --------------------------------------------------------------------------- values
+
+
+def _encode(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime.datetime):
+        return {"t": "dt", "v": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"t": "d", "v": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"t": "tm", "v": value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {"t": "td", "v": [value.days, value.seconds, value.microseconds]}
+    # Anything else (array-formula objects, rich text) is not representable: refuse
+    # to build rather than store a lossy copy -- callers fall back to openpyxl.
+    raise SnapshotError(f"unsupported cell value type {type(value).__name__}")
+
+
+def _decode(value):
+    if not isinstance(value, dict):
+        return value
+    tag, raw = value["t"], value["v"]
+    if tag == "dt":
+        return datetime.datetime.fromisoformat(raw)
+    if tag == "d":
+        return datetime.date.fromisoformat(raw)
+    if tag == "tm":
+        return datetime.time.fromisoformat(raw)
+    return datetime.timedelta(days=raw[0], seconds=raw[1], microseconds=raw[2])
+
+
+# --------------------------------------------------------------------------- build
+
+
+def _style_of(cell) -> tuple:
+    font = getattr(cell, "font", None)
+    return (
+        getattr(cell, "number_format", None),
+        bool(font and font.bold),
+        _extract_fill_rgb(cell),
+        _extract_indent(cell),
+    )
+
+
+def build_snapshot(file_path: str, out_path: str) -> None:
+    """Write the snapshot of `file_path` to `out_path` (overwritten).
+
+    Three openpyxl passes, once: full-mode values (styles, merges, dimensions),
+    read_only values (the read_only grid), read_only formulas. Formula text is the
+    same in read_only and full mode for every non-covered cell, which is the only
+    place `BoqReader` reads it.
+    """
+    wb_full = openpyxl.load_workbook(file_path, data_only=True, read_only=False)
+    wb_ro = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+    wb_fml = openpyxl.load_workbook(file_path, data_only=False, read_only=True)
+    try:
+        if len(wb_full.sheetnames) != len(wb_full.worksheets):
+            raise SnapshotError("chartsheets are not snapshotted")
+        styles: dict[tuple, int] = {}
+        probe = Cell(wb_full.worksheets[0]) if wb_full.worksheets else None
+        styles[_style_of(probe) if probe is not None else ("General", False, None, 0)] = _DEFAULT_STYLE
+
+        sheets_meta, sections = [], []
+        for ws in wb_full.worksheets:
+            meta, payload = _build_sheet(ws, wb_ro[ws.title], wb_fml[ws.title], styles)
+            sheets_meta.append(meta)
+            sections.append(payload)
+    finally:
+        wb_full.close()
+        wb_ro.close()
+        wb_fml.close()
+
+    style_table = [list(s) for s, _ in sorted(styles.items(), key=lambda kv: kv[1])]
+    _write(out_path, sheets_meta, sections, style_table)
+
+
+def _build_sheet(ws, ws_ro, ws_fml, styles: dict) -> tuple[dict, dict]:
+    # Full-mode cells BEFORE anything touches the sheet (ws.cell() would add cells).
+    full = dict(ws._cells)  # noqa: SLF001 -- the only record of which cells exist
+    has_cells = bool(full)
+    max_row, max_col = ws.max_row, ws.max_column
+
+    ro_max_row, ro_max_col = ws_ro.max_row, ws_ro.max_column
+    ws_ro.reset_dimensions()  # read EVERY cell; the tag is kept separately below
+    ws_fml.reset_dimensions()
+
+    ro_cells = {}
+    for row in ws_ro.iter_rows():
+        for cell in row:
+            if hasattr(cell, "column"):
+                ro_cells[(cell.row, cell.column)] = cell.value
+    formulas = {}
+    for row in ws_fml.iter_rows():
+        for cell in row:
+            value = getattr(cell, "value", None)
+            if isinstance(value, str) and value.startswith("="):
+                formulas[(cell.row, cell.column)] = value
+
+    coords = sorted(set(full) | set(ro_cells))
+    rows, cols, style_ids = array("I"), array("I"), array("I")
+    flags = array("B")
+    values, formula_pairs, ro_pairs = [], [], []
+    for idx, coord in enumerate(coords):
+        cell = full.get(coord)
+        rows.append(coord[0])
+        cols.append(coord[1])
+        if cell is not None:
+            style = _style_of(cell)
+            style_ids.append(styles.setdefault(style, len(styles)))
+            value = cell.value
+        else:
+            style_ids.append(_DEFAULT_STYLE)
+            value = None
+        values.append(_encode(value))
+        if coord in ro_cells:
+            flags.append(_IN_READ_ONLY)
+            if ro_cells[coord] != value or type(ro_cells[coord]) is not type(value):
+                ro_pairs.append([idx, _encode(ro_cells[coord])])
+        else:
+            flags.append(0)
+        if coord in formulas:
+            formula_pairs.append([idx, formulas[coord]])
+
+    meta = {
+        "title": ws.title,
+        "state": ws.sheet_state,
+        "max_row": max_row,
+        "max_col": max_col,
+        "has_cells": has_cells,
+        "ro_max_row": ro_max_row,
+        "ro_max_col": ro_max_col,
+        "merged": [[r.min_row, r.min_col, r.max_row, r.max_col] for r in ws.merged_cells.ranges],
+    }
+    payload = {
+        "rows": rows.tobytes(),
+        "cols": cols.tobytes(),
+        "styles": style_ids.tobytes(),
+        "flags": flags.tobytes(),
+        "values": json.dumps(values, separators=(",", ":")).encode(),
+        "formulas": json.dumps(formula_pairs, separators=(",", ":")).encode(),
+        "ro_values": json.dumps(ro_pairs, separators=(",", ":")).encode(),
+    }
+    return meta, payload
+
+
+def _write(out_path, sheets_meta, sections, style_table) -> None:
+    # Section offsets are relative to the end of the header, so the header can be
+    # serialised once with its final offsets.
+    body, offset = [], 0
+    for meta, payload in zip(sheets_meta, sections):
+        meta["sections"] = {}
+        for name, blob in payload.items():
+            meta["sections"][name] = [offset, len(blob)]
+            body.append(blob)
+            offset += len(blob)
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "byteorder": sys.byteorder,
+        "styles": style_table,
+        "sheets": sheets_meta,
+    }, separators=(",", ":")).encode()
+    with open(out_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for blob in body:
+            f.write(blob)
+
+
+# --------------------------------------------------------------------------- read
+
+
+class WorkbookSnapshot:
+    """A memory-mapped snapshot. Opening parses only the header."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._sheets: dict[str, _SheetData] = {}
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < len(MAGIC) + _HEADER_LEN.size:
+                raise SnapshotError(f"{path}: truncated snapshot")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise SnapshotError(f"{path}: not a BoQ sheet snapshot")
+        (header_len,) = _HEADER_LEN.unpack_from(self._mm, len(MAGIC))
+        start = len(MAGIC) + _HEADER_LEN.size
+        try:
+            header = json.loads(self._mm[start:start + header_len])
+        except ValueError as e:
+            self.close()
+            raise SnapshotError(f"{path}: unreadable snapshot header") from e
+        if header.get("version") != SNAPSHOT_VERSION or header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise SnapshotError(f"{path}: snapshot format {header.get('version')} not readable")
+        self._body = start + header_len
+        self.styles = [_Style(*s) for s in header["styles"]]
+        self._meta = {m["title"]: m for m in header["sheets"]}
+        self.sheetnames = [m["title"] for m in header["sheets"]]
+
+    def close(self) -> None:
+        # Sheet data keeps memoryviews into the map; release them first.
+        for data in self._sheets.values():
+            data.release()
+        self._sheets.clear()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # an adapter cell still references a view; the GC unmaps it later
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def sheet(self, title: str) -> "_SheetData":
+        data = self._sheets.get(title)
+        if data is None:
+            data = self._sheets[title] = _SheetData(self, self._meta[title])
+        return data
+
+    def _range(self, meta: dict, name: str) -> tuple[int, int]:
+        offset, length = meta["sections"][name]
+        return self._body + offset, self._body + offset + length
+
+    def section_view(self, meta: dict, name: str) -> memoryview:
+        """Zero-copy view of a section (the integer columns)."""
+        start, end = self._range(meta, name)
+        return memoryview(self._mm)[start:end]
+
+    def section_json(self, meta: dict, name: str):
+        start, end = self._range(meta, name)
+        return json.loads(self._mm[start:end])
+
+    def workbook(self, mode: str = "values", owns_snapshot: bool = False) -> "SnapshotWorkbook":
+        """A workbook view in `mode`. With `owns_snapshot`, closing the workbook closes
+        this snapshot too -- for callers that hold only the workbook."""
+        if mode not in ("values", "formulas", "read_only"):
+            raise ValueError(f"unknown snapshot workbook mode {mode!r}")
+        return SnapshotWorkbook(self, mode, owns_snapshot)
+
+
+class _SheetData:
+    """Decoded columns of one sheet plus a (row, col) -> cell index lookup."""
+
+    def __init__(self, snapshot: WorkbookSnapshot, meta: dict) -> None:
+        self.meta = meta
+        self._views = [snapshot.section_view(meta, name) for name in (*_INT_SECTIONS, "flags")]
+        rows, cols, styles, flags = self._views
+        self.rows = rows.cast("I")
+        self.cols = cols.cast("I")
+        self.styles = styles.cast("I")
+        self.flags = flags
+        self._views += [self.rows, self.cols, self.styles]
+        self.values = [_decode(v) for v in snapshot.section_json(meta, "values")]
+        self.formulas = dict(snapshot.section_json(meta, "formulas"))
+        self.ro_values = {i: _decode(v) for i, v in snapshot.section_json(meta, "ro_values")}
+        self.index = {(r, c): i for i, (r, c) in enumerate(zip(self.rows, self.cols))}
+
+    def release(self) -> None:
+        for view in reversed(self._views):
+            view.release()
+
+
+class _Style:
+    __slots__ = ("number_format", "font", "fill", "alignment")
+
+    def __init__(self, number_format, bold, fill_rgb, indent):
+        self.number_format = number_format
+        self.font = _Font(bold)
+        self.fill = _Fill(fill_rgb) if fill_rgb else None
+        self.alignment = _Alignment(indent)
+
+
+class _Font:
+    __slots__ = ("bold",)
+
+    def __init__(self, bold):
+        self.bold = bold
+
+
+class _Color:
+    __slots__ = ("rgb",)
+
+    def __init__(self, rgb):
+        self.rgb = rgb
+
+
+class _Fill:
+    __slots__ = ("fill_type", "fgColor")
+
+    def __init__(self, rgb):
+        self.fill_type = "solid"
+        self.fgColor = _Color(rgb)
+
+
+class _Alignment:
+    __slots__ = ("indent",)
+
+    def __init__(self, indent):
+        self.indent = indent
+
+
+class SnapshotCell:
+    """The read surface of an openpyxl Cell that the wizard uses."""
+
+    __slots__ = ("row", "column", "value", "_style")
+
+    def __init__(self, row, column, value, style):
+        self.row = row
+        self.column = column
+        self.value = value
+        self._style = style
+
+    @property
+    def number_format(self):
+        return self._style.number_format
+
+    @property
+    def font(self):
+        return self._style.font
+
+    @property
+    def fill(self):
+        return self._style.fill
+
+    @property
+    def alignment(self):
+        return self._style.alignment
+
+    @property
+    def coordinate(self):
+        return f"{get_column_letter(self.column)}{self.row}"
+
+
+class _MergedRange:
+    __slots__ = ("min_row", "min_col", "max_row", "max_col")
+
+    def __init__(self, min_row, min_col, max_row, max_col):
+        self.min_row, self.min_col, self.max_row, self.max_col = min_row, min_col, max_row, max_col
+
+    def __str__(self):
+        return (
+            f"{get_column_letter(self.min_col)}{self.min_row}:"
+            f"{get_column_letter(self.max_col)}{self.max_row}"
+        )
+
+
+class _MergedCells:
+    __slots__ = ("ranges",)
+
+    def __init__(self, ranges):
+        self.ranges = ranges
+
+
+class SnapshotWorksheet:
+    def __init__(self, snapshot: WorkbookSnapshot, title: str, mode: str) -> None:
+        self._snapshot = snapshot
+        self._mode = mode
+        self._data = snapshot.sheet(title)
+        meta = self._data.meta
+        self.title = title
+        self.sheet_state = meta["state"]
+        self.merged_cells = _MergedCells([_MergedRange(*r) for r in meta["merged"]])
+        if mode == "read_only":
+            self.max_row, self.max_column = meta["ro_max_row"], meta["ro_max_col"]
+        else:
+            self.max_row, self.max_column = meta["max_row"], meta["max_col"]
+
+    def _value(self, idx):
+        if self._mode == "formulas":
+            return self._data.formulas.get(idx)
+        if self._mode == "read_only" and idx in self._data.ro_values:
+            return self._data.ro_values[idx]
+        return self._data.values[idx]
+
+    def cell(self, row: int, column: int) -> SnapshotCell:
+        idx = self._data.index.get((row, column))
+        if idx is None:
+            return SnapshotCell(row, column, None, self._snapshot.styles[_DEFAULT_STYLE])
+        return SnapshotCell(row, column, self._value(idx), self._snapshot.styles[self._data.styles[idx]])
+
+    def __getitem__(self, coordinate: str) -> SnapshotCell:
+        letters, row = coordinate_from_string(coordinate)
+        return self.cell(row, column_index_from_string(letters))
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None):
+        if self._mode == "read_only":
+            return self._iter_read_only(min_row or 1, max_row or self.max_row, min_col or 1,
+                                        max_col or self.max_column)
+        if not self._data.meta["has_cells"] and not any([min_col, min_row, max_col, max_row]):
+            return iter(())
+        return self._iter_rectangle(min_row or 1, max_row or self.max_row, min_col or 1,
+                                    max_col or self.max_column)
+
+    def _iter_rectangle(self, min_row, max_row, min_col, max_col):
+        # Full mode: every coordinate of the rectangle, as openpyxl's iter_rows does.
+        for r in range(min_row, max_row + 1):
+            yield tuple(self.cell(r, c) for c in range(min_col, max_col + 1))
+
+    def _iter_read_only(self, min_row, max_row, min_col, max_col):
+        # read_only mode: only cells present in the sheet XML. The EmptyCell padding
+        # openpyxl adds carries no row/column, and every consumer skips it.
+        data, styles = self._data, self._snapshot.styles
+        row_cells: list[SnapshotCell] = []
+        current = None
+        for idx, (r, c) in enumerate(zip(data.rows, data.cols)):
+            if not data.flags[idx] & _IN_READ_ONLY or r < min_row:
+                continue
+            if max_row is not None and r > max_row:
+                break
+            if c < min_col or (max_col is not None and c > max_col):
+                continue
+            if r != current:
+                if row_cells:
+                    yield tuple(row_cells)
+                row_cells, current = [], r
+            row_cells.append(SnapshotCell(r, c, self._value(idx), styles[data.styles[idx]]))
+        if row_cells:
+            yield tuple(row_cells)
+
+
+class SnapshotWorkbook:
+    def __init__(self, snapshot: WorkbookSnapshot, mode: str, owns_snapshot: bool = False) -> None:
+        self._snapshot = snapshot
+        self._mode = mode
+        self._owns_snapshot = owns_snapshot
+        self.sheetnames = list(snapshot.sheetnames)
+        self._worksheets: dict[str, SnapshotWorksheet] = {}
+
+    def __getitem__(self, title: str) -> SnapshotWorksheet:
+        if title not in self._worksheets:
+            if title not in self.sheetnames:
+                raise KeyError(f"Worksheet {title} does not exist.")
+            self._worksheets[title] = SnapshotWorksheet(self._snapshot, title, self._mode)
+        return self._worksheets[title]
+
+    def __contains__(self, title: str) -> bool:
+        return title in self.sheetnames
+
+    @property
+    def worksheets(self) -> list[SnapshotWorksheet]:
+        return [self[title] for title in self.sheetnames]
+
+    def close(self) -> None:
+        """Closes the snapshot when this workbook owns it; otherwise a no-op, like
+        closing a read_only workbook twice: the snapshot owns the map."""
+        if self._owns_snapshot:
+            self._snapshot.close()
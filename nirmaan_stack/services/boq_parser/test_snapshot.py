@@ -0,0 +1,131 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# See license.txt
+
+"""Parity: a sheet snapshot reads back exactly what openpyxl reads from the .xlsx.
+
+Two surfaces, both over the parser fixtures:
+  * BoqReader(path) vs BoqReader(path, snapshot=...) -- every public method, every
+    sheet, with and without text-role formatting (Bug 17 / Bug 18 paths).
+  * load_workbook(read_only=True, data_only=True) vs snapshot.workbook("read_only")
+    -- the (row, column, value) grid `sheet_preview._extract_grid_rows` consumes,
+    whole-sheet and windowed, plus the <dimension>-derived max_row.
+"""
+import dataclasses
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import openpyxl
+
+from nirmaan_stack.services.boq_parser.reader import BoqReader
+from nirmaan_stack.services.boq_parser.snapshot import (
+    SnapshotError,
+    WorkbookSnapshot,
+    build_snapshot,
+)
+from nirmaan_stack.services.boq_parser.tests.fixtures.generate_synthetic import (
+    generate_all,
+)
+
+_FIXTURES = Path(__file__).parent / "tests" / "fixtures"
+
+# Real customer workbooks kept small enough for the unit suite; between them they
+# cover merged banners, formulas, fills, indents, hidden sheets and dated cells.
+_REAL_FIXTURES = (
+    "snitch_electrical.xlsx",
+    "KSM 66_Internal Electrical BOQ R1 Final.xlsx",
+    "multi_area_single_header_v1.xlsx",
+)
+
+
+def _grid(ws, min_row=1, max_row=None):
+    """The read_only grid exactly as _extract_grid_rows walks it (raw values)."""
+    out = []
+    for row in ws.iter_rows(min_row=min_row, max_row=max_row if max_row is not None else ws.max_row):
+        cells = [(c.row, c.column, c.value) for c in row if hasattr(c, "column")]
+        if cells:
+            out.append(cells)
+    return out
+
+
+class TestSnapshotParity(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generate_all()
+        cls.fixtures = sorted(str(p) for p in _FIXTURES.glob("synthetic_*.xlsx"))
+        cls.fixtures += [str(_FIXTURES / name) for name in _REAL_FIXTURES if (_FIXTURES / name).exists()]
+        cls.tmp = tempfile.TemporaryDirectory()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+        super().tearDownClass()
+
+    def _snapshot(self, path):
+        out = os.path.join(self.tmp.name, os.path.basename(path) + ".snap")
+        build_snapshot(path, out)
+        snapshot = WorkbookSnapshot(out)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_boq_reader_parity(self):
+        for path in self.fixtures:
+            with self.subTest(fixture=os.path.basename(path)):
+                expected = BoqReader(path)
+                actual = BoqReader(path, snapshot=self._snapshot(path))
+                self.assertEqual(actual.list_sheets(), expected.list_sheets())
+                self.assertEqual(actual.list_sheet_states(), expected.list_sheet_states())
+                for sheet in expected.list_sheets():
+                    for method in ("get_sheet_dimensions", "detect_header_row",
+                                   "detect_blank_columns", "get_master_preamble_text"):
+                        self.assertEqual(getattr(actual, method)(sheet), getattr(expected, method)(sheet),
+                                         f"{sheet!r}.{method}")
+                    for text_roles in (None, {"A", "B", "C", "D"}):
+                        self.assertEqual(
+                            [dataclasses.asdict(r) for r in actual.iter_rows(sheet, text_role_columns=text_roles)],
+                            [dataclasses.asdict(r) for r in expected.iter_rows(sheet, text_role_columns=text_roles)],
+                            f"{sheet!r}.iter_rows(text_role_columns={text_roles})",
+                        )
+
+    def test_read_only_grid_parity(self):
+        for path in self.fixtures:
+            with self.subTest(fixture=os.path.basename(path)):
+                snapshot = self._snapshot(path).workbook("read_only")
+                expected = openpyxl.load_workbook(path, data_only=True, read_only=True)
+                try:
+                    self.assertEqual(snapshot.sheetnames, expected.sheetnames)
+                    for sheet in expected.sheetnames:
+                        ws, ws_snap = expected[sheet], snapshot[sheet]
+                        self.assertEqual(ws_snap.max_row, ws.max_row)
+                        self.assertEqual(_grid(ws_snap), _grid(ws))
+                        self.assertEqual(_grid(ws_snap, 3, 9), _grid(ws, 3, 9))
+                finally:
+                    expected.close()
+
+    def test_owners_unmap_the_snapshot_on_close(self):
+        path = self.fixtures[0]
+        snapshot = self._snapshot(path)
+        with BoqReader(path, snapshot=snapshot) as reader:
+            reader.list_sheets()
+        self.assertTrue(snapshot._mm.closed)
+
+        snapshot = self._snapshot(path)
+        snapshot.workbook("read_only").close()
+        self.assertFalse(snapshot._mm.closed)  # a borrowed view leaves the map alone
+        wb = snapshot.workbook("read_only", owns_snapshot=True)
+        _grid(wb[wb.sheetnames[0]])
+        wb.close()
+        self.assertTrue(snapshot._mm.closed)
+
+    def test_rejects_foreign_files(self):
+        junk = os.path.join(self.tmp.name, "junk.snap")
+        with open(junk, "wb") as f:
+            f.write(b"not a snapshot at all")
+        with self.assertRaises(SnapshotError):
+            WorkbookSnapshot(junk)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -56,6 +56,11 @@ import shutil
 import tempfile
 import zipfile
 
+# Bump whenever a rule below is added or changed. `api/boq/wizard/workbook_cache.py`
+# stores workbooks AFTER repair and names them with this number, so a bump makes
+# every cached copy a miss and re-derives it under the new rules.
+RULES_VERSION = 1
+
 # Rule 1 -- openpyxl's Font.family is MinMax(min=0, max=14); anything above aborts
 # the stylesheet read. 2 ("swiss") is the neutral fallback Excel itself assumes for
 # an unrecognised family, and nothing in the parser reads this attribute.
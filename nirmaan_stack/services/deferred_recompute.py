@@ -0,0 +1,121 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Request-scoped coalescing of hook-triggered recomputations.
+
+Doc-event hooks re-derive state from source -- the project's cashflow-gap hold is the
+expensive one. One save costs one recompute. A bulk flow that saves N documents in one
+request or job costs N, and most of them recompute the same project.
+
+Inside `coalescing()` a hook calls `defer(kind, key, compute)` instead of computing.
+Each distinct (kind, key) is queued once, and `compute(key)` runs once when the
+outermost scope exits. Outside a scope `defer` returns False and the hook computes
+inline exactly as before, so single-document saves are unchanged.
+
+The flush is tied to the scope, not to `frappe.db.before_commit`: a worker that
+commits per row (the Cashbook import) would otherwise flush on every row and collapse
+nothing. A row that was rolled back leaves its key queued; the run re-derives from
+what is in the database, so an extra key costs one recompute, never a wrong value.
+That is also what makes deferring safe at all -- a compute that depends on the
+triggering document's in-memory state does NOT belong here.
+
+Each flush logs how many requests it collapsed (`stats()` returns the same counters).
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, Hashable
+
+import frappe
+
+
+class _State:
+    def __init__(self):
+        self.depth = 0
+        self.pending: dict[tuple, Callable] = {}
+        self.requested: dict[str, int] = {}
+        self.computed: dict[str, int] = {}
+
+
+def _state() -> _State:
+    state = getattr(frappe.local, "deferred_recompute", None)
+    if state is None:
+        state = frappe.local.deferred_recompute = _State()
+    return state
+
+
+def is_coalescing() -> bool:
+    return _state().depth > 0
+
+
+def defer(kind: str, key: Hashable, compute: Callable) -> bool:
+    """Queue `compute(key)` if a coalescing scope is open. Returns whether it was queued.
+
+    A (kind, key) already queued is counted and dropped -- the queued run will see
+    this write too. False means no scope is open: the caller computes inline.
+    """
+    state = _state()
+    if state.depth == 0:
+        return False
+    state.requested[kind] = state.requested.get(kind, 0) + 1
+    state.pending.setdefault((kind, key), compute)
+    return True
+
+
+@contextmanager
+def coalescing():
+    """Collapse the recomputes deferred inside the block; run them once when it exits.
+
+    Nests: only the outermost scope flushes. It flushes on an exception too -- what
+    the block already committed still needs its recompute -- and then re-raises.
+    """
+    state = _state()
+    state.depth += 1
+    try:
+        yield
+    finally:
+        state.depth -= 1
+        if state.depth == 0:
+            flush()
+
+
+def flush() -> None:
+    """Run every queued recompute once, in first-queued order.
+
+    A compute's own saves may defer further keys; they run in the same flush. Each
+    key is isolated: a failure is logged and the rest still run, as a failing inline
+    hook would not have stopped the other saves either.
+    """
+    state = _state()
+    ran = {}
+    state.depth += 1
+    try:
+        while state.pending:
+            (kind, key), compute = next(iter(state.pending.items()))
+            del state.pending[(kind, key)]
+            try:
+                compute(key)
+            except Exception:
+                frappe.log_error(
+                    title=f"Deferred {kind} recompute failed",
+                    message=f"{key!r}\n\n{frappe.get_traceback()}",
+                )
+            ran[kind] = ran.get(kind, 0) + 1
+            state.computed[kind] = state.computed.get(kind, 0) + 1
+    finally:
+        state.depth -= 1
+    if ran:
+        frappe.logger("deferred_recompute").info({"computed": ran, "stats": stats()})
+
+
+def stats() -> dict:
+    """Per kind, this request's {requested, computed, collapsed} counts."""
+    state = _state()
+    return {
+        kind: {
+            "requested": requested,
+            "computed": state.computed.get(kind, 0),
+            "collapsed": requested - state.computed.get(kind, 0),
+        }
+        for kind, requested in state.requested.items()
+    }
@@ -0,0 +1,211 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""disk_cache — the machinery shared by the bench-local file caches.
+
+Three caches keep derived files under `sites/<site>/private/`: rendered print PDFs
+(api/pdf_helper/render_cache.py), normalised TDS attachments
+(api/pdf_helper/attachment_cache.py) and repaired BoQ workbooks plus their sheet
+snapshots (api/boq/wizard/workbook_cache.py). Each owns its key scheme and its
+directory; this module owns what they have in common:
+
+  * atomic writes -- tmp + `os.replace`, so a concurrent reader sees either no file
+    or a complete one (`write_atomic`, `write_tmp`);
+  * the content-addressed layout -- `blobs/` named by the sha256 of their bytes and
+    `index/<sha256 of a source identity>.json` -> {"blob": name} (`index_path`,
+    `lookup`, `write_index`), where the identity is the S3 key + ETag or the local
+    path + mtime + size (`s3_identity`, `file_identity`);
+  * the size bound -- least-recently-used files (by mtime, which a hit refreshes)
+    are evicted down to EVICT_TO_FRACTION of the limit, sparing anything touched in
+    the last `min_idle_sec` (`evict`);
+  * the daily upkeep -- idle files, index entries whose blob is gone, aged scratch
+    files, then the bound (`sweep`).
+
+Callers pass the root and the limit in, so each cache keeps its own directory and
+site-config key. Everything here raises OSError; failing open is the caller's call.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+EVICT_TO_FRACTION = 0.9
+EVICT_MIN_IDLE_SEC = 600   # a file used this recently may be about to be opened
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# --------------------------------------------------------------------------- identities
+
+
+def s3_identity(key: str, client=None, bucket: str | None = None) -> str:
+    """Identity of an S3 object: its key plus the ETag from a HEAD when a client is
+    given. Upload keys are per-upload, so a failed HEAD falls back to the key alone."""
+    etag = ""
+    if client is not None and bucket:
+        try:
+            etag = client.head_object(Bucket=bucket, Key=key).get("ETag") or ""
+        except Exception:
+            etag = ""  # HEAD is an optimisation; the key alone identifies an upload
+    return f"s3\x1f{key}\x1f{etag}"
+
+
+def file_identity(path: str) -> str:
+    """Identity of a local file: path, mtime and size. Raises OSError if it is gone."""
+    st = os.stat(path)
+    return f"file\x1f{os.path.abspath(path)}\x1f{st.st_mtime_ns}\x1f{st.st_size}"
+
+
+# --------------------------------------------------------------------------- writes
+
+
+def write_tmp(data: bytes, suffix: str, directory: str | None = None) -> str:
+    """`data` in a fresh tempfile (in `directory`, else the system temp dir); the
+    caller renames or unlinks it."""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+    except BaseException:
+        _unlink(path)
+        raise
+    return path
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write `data` to `path` via a sibling tmp + `os.replace`."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink(tmp)
+        raise
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+# --------------------------------------------------------------------------- index
+
+
+def index_path(root: str, key: str) -> str:
+    return os.path.join(root, "index", sha256(key.encode()) + ".json")
+
+
+def lookup(root: str, index_file: str) -> str | None:
+    """The blob an index entry points at, refreshed as most recently used, or None."""
+    try:
+        with open(index_file) as f:
+            blob = os.path.join(root, "blobs", json.load(f)["blob"])
+        os.utime(blob)  # LRU: a hit makes the blob the newest
+        return blob
+    except (OSError, ValueError, KeyError, TypeError):
+        return None  # absent, or its blob was evicted -> refetch and rewrite the entry
+
+
+def write_index(index_file: str, blob_name: str) -> None:
+    write_atomic(index_file, json.dumps({"blob": blob_name}).encode())
+
+
+# --------------------------------------------------------------------------- upkeep
+
+
+def files(directory: str, exts: tuple[str, ...] | None = None) -> list[tuple[float, int, str]]:
+    """(mtime, size, path) of the files in `directory` ending in one of `exts`."""
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if exts and not entry.name.endswith(exts):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, entry.path))
+    return out
+
+
+def evict(root: str, bounded, limit: int, min_idle_sec: int = EVICT_MIN_IDLE_SEC) -> int:
+    """Trim the files of `bounded` ((subdir, exts) pairs under `root`) to `limit`
+    bytes, oldest first. Returns how many were removed."""
+    entries = [e for sub, exts in bounded for e in files(os.path.join(root, sub), exts)]
+    total = sum(size for _, size, _ in entries)
+    if total <= limit:
+        return 0
+    target = limit * EVICT_TO_FRACTION
+    recent = time.time() - min_idle_sec
+    evicted = 0
+    for mtime, size, path in sorted(entries):
+        if total <= target or mtime >= recent:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def sweep(root: str, bounded, limit: int, idle_days: int, aged=None, dry_run: bool = False) -> dict:
+    """Daily upkeep of a content-addressed cache.
+
+    Drops the files of `bounded` untouched for `idle_days` (counted under their
+    subdir's name), index entries whose blob is gone, files of `aged`
+    ({kind: (subdir, max_age_sec)}) older than their bound, then evicts to `limit`.
+    Returns the counts and freed MB for the janitor log.
+    """
+    now = time.time()
+    removed = {sub: 0 for sub, _ in bounded}
+    removed.update({"index": 0, **{kind: 0 for kind in (aged or {})}, "mb": 0.0})
+
+    def _drop(kind, path, size=0):
+        if not dry_run:
+            try:
+                os.remove(path)
+            except OSError:
+                return
+        removed[kind] += 1
+        removed["mb"] += size / 1048576
+
+    live = set()
+    for sub, exts in bounded:
+        for mtime, size, path in files(os.path.join(root, sub), exts):
+            if now - mtime > idle_days * 86400:
+                _drop(sub, path, size)
+            elif sub == "blobs":
+                live.add(os.path.basename(path))
+
+    for _, _, path in files(os.path.join(root, "index"), (".json",)):
+        try:
+            with open(path) as f:
+                blob = json.load(f).get("blob")
+        except (OSError, ValueError, AttributeError):
+            blob = None
+        if blob not in live:
+            _drop("index", path)
+
+    for kind, (sub, max_age_sec) in (aged or {}).items():
+        for mtime, size, path in files(os.path.join(root, sub)):
+            if now - mtime > max_age_sec:
+                _drop(kind, path, size)
+
+    if not dry_run:
+        removed[bounded[0][0]] += evict(root, bounded, limit)
+    removed["mb"] = round(removed["mb"], 1)
+    return removed
@@ -0,0 +1,238 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Content-addressed store for extraction results + background pre-extraction.
+
+`extract_cached(content, file_ext, settings, doc_kind, ...)` is a drop-in for
+`services.extraction.extract` that returns the same (text, entities, line_items)
+triple, but persists every provider result in `Document Extraction Cache` under
+
+    sha256(file bytes) : doc_kind : settings_version
+
+so re-opening an autofill dialog on the same file, the backfill patch, or any
+other re-read of identical bytes costs one indexed lookup instead of a model
+call. The key is the BYTES, not the URL: a re-upload of the same PDF hits, a
+replaced file misses.
+
+`settings_version` folds in EXTRACTOR_VERSION and every Document AI Setting
+that changes the output (provider, model, thinking level, media resolution).
+Bump EXTRACTOR_VERSION whenever a prompt or response schema in gemini.py
+changes; old entries then stop matching and are never served again.
+
+Pre-extraction: the File / Nirmaan Attachments hooks call
+`enqueue_pre_extraction(file_url, doc_kind)` as soon as an autofill-eligible
+file is attached. The job fills the store off the request path; while it runs,
+a short-lived in-flight marker lets `extract_cached` wait for the job's result
+instead of paying for a second, identical model call.
+
+Only the raw provider output is cached. Everything downstream (confidence
+gates, validation, PO line matching) is recomputed per request because it
+reads live PO / vendor data.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+
+import frappe
+from frappe.database.database import savepoint
+from frappe.exceptions import DuplicateEntryError, UniqueValidationError
+from frappe.utils import now_datetime
+
+from . import extract
+from .base import CUSTOMER_PO, INVOICE, PAYMENT
+from .files import SUPPORTED_EXTS, fetch_file_content, get_extraction_settings
+
+CACHE_DOCTYPE = "Document Extraction Cache"
+
+# Bump when a prompt / response schema in the provider changes the output shape
+# or content for the same bytes — retires every existing entry.
+EXTRACTOR_VERSION = "1"
+
+# The settings that change what the provider returns for the same bytes.
+_VERSIONED_SETTINGS = (
+    "provider", "gemini_model", "gemini_thinking_level", "gemini_media_resolution",
+)
+
+DOC_KINDS = {INVOICE, PAYMENT, CUSTOMER_PO}
+
+# In-flight marker TTL — a dead job releases it on its own.
+INFLIGHT_TTL_SECONDS = 180
+_POLL_SECONDS = 1.0
+
+# A concurrent insert of the same key surfaces as either class (see
+# services/action_items/reconcile.py); the savepoint swallows both.
+_DUP_ERRORS = (UniqueValidationError, DuplicateEntryError)
+
+_PRE_EXTRACT_METHOD = "nirmaan_stack.services.extraction.cache.pre_extract_file"
+
+
+def content_sha256(content: bytes) -> str:
+    return hashlib.sha256(content or b"").hexdigest()
+
+
+def settings_version(settings: dict) -> str:
+    """Short, stable fingerprint of the extractor version + output-relevant settings."""
+    basis = {"v": EXTRACTOR_VERSION}
+    for field in _VERSIONED_SETTINGS:
+        basis[field] = str(settings.get(field) or "").strip().lower()
+    digest = hashlib.sha256(json.dumps(basis, sort_keys=True).encode()).hexdigest()
+    return digest[:12]
+
+
+def cache_key(sha: str, doc_kind: str, settings: dict) -> str:
+    return f"{sha}:{doc_kind}:{settings_version(settings)}"
+
+
+def _inflight_key(key: str) -> str:
+    return f"extraction_inflight:{key}"
+
+
+def get_cached(key: str):
+    """Return (entities, line_items) for a stored key, or None on a miss."""
+    row = frappe.db.get_value(
+        CACHE_DOCTYPE, key, ["entities_json", "line_items_json"], as_dict=True
+    )
+    if not row:
+        return None
+    return _loads(row.entities_json), _loads(row.line_items_json)
+
+
+def _loads(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return []
+    return value
+
+
+def _store(key, sha, doc_kind, settings, entities, line_items, file_url=None):
+    """Persist one result. A concurrent writer that got there first wins; ours is dropped."""
+    if frappe.db.exists(CACHE_DOCTYPE, key):
+        return
+    doc = frappe.get_doc({
+        "doctype": CACHE_DOCTYPE,
+        "cache_key": key,
+        "content_sha256": sha,
+        "doc_kind": doc_kind,
+        "settings_version": settings_version(settings),
+        "provider": settings.get("provider"),
+        "model": settings.get("gemini_model"),
+        "entities_json": json.dumps(entities or []),
+        "line_items_json": json.dumps(line_items or []),
+        "source_file_url": file_url,
+        "extracted_at": now_datetime(),
+    })
+    # Savepoint, not try/except: on PostgreSQL a failed INSERT aborts the whole
+    # transaction, and this runs inside the autofill request's transaction.
+    with savepoint(catch=_DUP_ERRORS):
+        doc.insert(ignore_permissions=True)
+
+
+def _wait_for_inflight(key, settings):
+    """If a pre-extraction job holds this key, poll the store until it lands or the marker goes.
+
+    Bounded by the provider's own request timeout: past that the job has failed or
+    stalled, and the caller falls back to extracting inline.
+    """
+    cache = frappe.cache()
+    deadline = time.monotonic() + int(settings.get("request_timeout_seconds") or 90)
+    while time.monotonic() < deadline:
+        if not cache.get(cache.make_key(_inflight_key(key))):
+            return get_cached(key)
+        time.sleep(_POLL_SECONDS)
+        hit = get_cached(key)
+        if hit:
+            return hit
+    return None
+
+
+def extract_cached(content, file_ext, settings, doc_kind, file_url=None):
+    """Cache-first `extract()`. Same (text, entities, line_items) return shape.
+
+    raw_text is never stored (no consumer reads it) and comes back as ''.
+    """
+    sha = content_sha256(content)
+    key = cache_key(sha, doc_kind, settings)
+
+    hit = get_cached(key) or _wait_for_inflight(key, settings)
+    if hit:
+        entities, line_items = hit
+        return "", entities, line_items
+
+    _, entities, line_items = extract(content, file_ext, settings, doc_kind=doc_kind)
+    _store(key, sha, doc_kind, settings, entities, line_items, file_url=file_url)
+    return "", entities, line_items
+
+
+# ---------------------------------------------------------------------------
+# Background pre-extraction
+# ---------------------------------------------------------------------------
+
+def enqueue_pre_extraction(file_url, doc_kind):
+    """Enqueue an after-commit pre-extraction for one attached file.
+
+    Safe to call from inside any doc save: extraction disabled / unsupported
+    kind is a no-op, and any failure is logged and swallowed — the host save
+    must never fail because of a cache warm-up.
+    """
+    if not file_url or doc_kind not in DOC_KINDS:
+        return
+    try:
+        if not get_extraction_settings().get("enabled"):
+            return
+        frappe.enqueue(
+            _PRE_EXTRACT_METHOD,
+            file_url=file_url,
+            doc_kind=doc_kind,
+            queue="short",
+            deduplicate=True,
+            job_id=f"pre_extract::{doc_kind}::{hashlib.sha1(file_url.encode()).hexdigest()}",
+            enqueue_after_commit=True,  # the File row must be visible to the worker
+        )
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "pre-extraction enqueue failed")
+
+
+def pre_extract_file(file_url, doc_kind):
+    """Worker: fetch the file, and fill the store if its key is not already there."""
+    from .helpers import get_file_doc_by_url
+
+    file_doc = get_file_doc_by_url(file_url)
+    if not file_doc or not file_doc.file_name:
+        return
+    file_ext = file_doc.file_name.rsplit(".", 1)[-1].lower()
+    if file_ext not in SUPPORTED_EXTS:
+        return
+
+    settings = get_extraction_settings()
+    if not settings.get("enabled"):
+        return
+
+    content = fetch_file_content(file_doc, file_doc.name)
+    if not content:
+        return
+
+    sha = content_sha256(content)
+    key = cache_key(sha, doc_kind, settings)
+    if get_cached(key):
+        return
+
+    cache = frappe.cache()
+    marker = cache.make_key(_inflight_key(key))
+    # SET NX: a second job for identical bytes (same file attached twice) backs off.
+    if not cache.set(marker, "1", ex=INFLIGHT_TTL_SECONDS, nx=True):
+        return
+    try:
+        _, entities, line_items = extract(content, file_ext, settings, doc_kind=doc_kind)
+        _store(key, sha, doc_kind, settings, entities, line_items, file_url=file_url)
+        frappe.db.commit()
+    except Exception:
+        # extract() logs provider failures itself; the dialog will retry inline.
+        frappe.db.rollback()
+    finally:
+        cache.delete(marker)
@@ -0,0 +1,101 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the extraction cache's key derivation + cache-first dispatch.
+
+No Frappe site needed — the store and provider are patched. Run inside the bench venv:
+    python -m unittest nirmaan_stack.services.extraction.test_cache
+"""
+import unittest
+from unittest.mock import patch
+
+from nirmaan_stack.services.extraction import cache
+
+SETTINGS = {
+    "enabled": True,
+    "provider": "gemini",
+    "gemini_model": "gemini-3.1-pro-preview",
+    "gemini_thinking_level": "low",
+    "gemini_media_resolution": "high",
+    "request_timeout_seconds": 90,
+}
+
+
+class TestCacheKey(unittest.TestCase):
+    def test_key_is_content_not_url(self):
+        a = cache.cache_key(cache.content_sha256(b"%PDF-1 same"), "invoice", SETTINGS)
+        b = cache.cache_key(cache.content_sha256(b"%PDF-1 same"), "invoice", SETTINGS)
+        c = cache.cache_key(cache.content_sha256(b"%PDF-1 other"), "invoice", SETTINGS)
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_doc_kind_is_part_of_key(self):
+        sha = cache.content_sha256(b"x")
+        self.assertNotEqual(
+            cache.cache_key(sha, "invoice", SETTINGS), cache.cache_key(sha, "payment", SETTINGS)
+        )
+
+    def test_output_relevant_settings_change_version(self):
+        base = cache.settings_version(SETTINGS)
+        for field, value in (
+            ("gemini_model", "gemini-2.5-flash"),
+            ("gemini_thinking_level", "high"),
+            ("gemini_media_resolution", "low"),
+            ("provider", "other"),
+        ):
+            with self.subTest(field=field):
+                self.assertNotEqual(base, cache.settings_version({**SETTINGS, field: value}))
+
+    def test_irrelevant_settings_do_not_change_version(self):
+        base = cache.settings_version(SETTINGS)
+        self.assertEqual(base, cache.settings_version({**SETTINGS, "request_timeout_seconds": 30}))
+        self.assertEqual(base, cache.settings_version({**SETTINGS, "gcp_location": "us-central1"}))
+
+    def test_extractor_version_bump_retires_entries(self):
+        base = cache.settings_version(SETTINGS)
+        with patch.object(cache, "EXTRACTOR_VERSION", "999"):
+            self.assertNotEqual(base, cache.settings_version(SETTINGS))
+
+    def test_key_fits_docname(self):
+        key = cache.cache_key(cache.content_sha256(b"x"), "customer_po", SETTINGS)
+        self.assertLessEqual(len(key), 140)
+
+
+class TestExtractCached(unittest.TestCase):
+    def test_hit_skips_provider(self):
+        stored = ([{"type": "utr", "mention_text": "U1", "normalized_text": "U1", "confidence": 1.0}], [])
+        with patch.object(cache, "get_cached", return_value=stored), \
+                patch.object(cache, "extract") as provider, \
+                patch.object(cache, "_store") as store:
+            out = cache.extract_cached(b"bytes", "pdf", SETTINGS, "payment")
+        provider.assert_not_called()
+        store.assert_not_called()
+        self.assertEqual(out, ("", stored[0], []))
+
+    def test_miss_extracts_once_and_stores(self):
+        entities = [{"type": "invoice_id", "mention_text": "7", "normalized_text": "7", "confidence": 1.0}]
+        lines = [{"description": "Cement", "amount": 10.0}]
+        with patch.object(cache, "get_cached", return_value=None), \
+                patch.object(cache, "_wait_for_inflight", return_value=None), \
+                patch.object(cache, "extract", return_value=("raw", entities, lines)) as provider, \
+                patch.object(cache, "_store") as store:
+            out = cache.extract_cached(b"bytes", "pdf", SETTINGS, "invoice", file_url="/f.pdf")
+        provider.assert_called_once()
+        store.assert_called_once()
+        key = store.call_args.args[0]
+        self.assertEqual(key, cache.cache_key(cache.content_sha256(b"bytes"), "invoice", SETTINGS))
+        # raw_text is never cached, so both paths return '' for it.
+        self.assertEqual(out, ("", entities, lines))
+
+    def test_inflight_result_is_reused(self):
+        stored = ([], [{"description": "Pipe"}])
+        with patch.object(cache, "get_cached", return_value=None), \
+                patch.object(cache, "_wait_for_inflight", return_value=stored), \
+                patch.object(cache, "extract") as provider:
+            out = cache.extract_cached(b"bytes", "pdf", SETTINGS, "invoice")
+        provider.assert_not_called()
+        self.assertEqual(out, ("", [], [{"description": "Pipe"}]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Constant-size key-set reads: bind a set of keys as ONE parameter and join against it.
+
+`frappe.get_all(filters={"parent": ["in", names]})` inlines every name into the query
+text. Past a few thousand names that trips sqlparse's 10,000-token cap
+(validate_generated_query), which is why callers chunk with `create_batch(names, 500)`:
+N/500 round trips, each parsed and planned on its own. A bound tuple (`IN %(names)s`)
+dodges the cap, but psycopg2 still expands it into N literals in the statement text.
+
+Here the keys travel as one JSON text parameter and are unnested on the server:
+
+    col IN (SELECT jsonb_array_elements_text(%(keys)s::jsonb))
+
+The statement text is the same for 10 keys or 50,000, and the read is one round trip.
+JSON rather than a native array because Frappe turns a list parameter into a tuple, and
+`= ANY(%s)` on a tuple fails with "op ANY/ALL (array) requires array on right side" (see
+`services/outflow_import/candidates.py`). JSON text also escapes any name safely.
+
+Raw `frappe.db.sql` is exempt from the sqlparse check. NOTHING here applies permissions.
+Callers either compute server-side aggregates or hydrate names that an
+already-permissioned query produced.
+"""
+from __future__ import annotations
+
+import json
+import re
+from typing import Iterable
+
+import frappe
+from frappe.utils import cstr
+
+__all__ = ["key_set_json", "in_key_set", "get_all_in"]
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Operators `get_all_in` accepts in `filters`. `!=`, `not in` and `is` treat NULL as '' the
+# way Frappe's own filter builder does, so they are for text columns only.
+_OPERATORS = {"=", "!=", "<", ">", "<=", ">=", "in", "not in", "is"}
+
+
+def key_set_json(keys: Iterable) -> str:
+    """The JSON text bound for a key set: distinct, non-empty keys as strings, first-seen order."""
+    return json.dumps(list(dict.fromkeys(cstr(k) for k in keys if k not in (None, ""))))
+
+
+def in_key_set(column: str, param: str = "keys") -> str:
+    """`<column> IN (<the keys bound as %(param)s>)`, for hand-written SQL.
+
+    `column` is emitted verbatim (quote it yourself). Bind `key_set_json(keys)` as `param`.
+    """
+    return f"{column} IN (SELECT jsonb_array_elements_text(%({param})s::jsonb))"
+
+
+def _column(field: str) -> str:
+    """A plain field name is quoted; anything else (`sum(...) as x`) is a trusted expression."""
+    return f"`{field}`" if _IDENTIFIER.match(field) else field
+
+
+def _filter_triples(filters) -> list[tuple]:
+    if not filters:
+        return []
+    if isinstance(filters, dict):
+        triples = []
+        for field, value in filters.items():
+            if isinstance(value, (list, tuple)) and len(value) == 2 and isinstance(value[0], str):
+                triples.append((field, value[0], value[1]))
+            else:
+                triples.append((field, "=", value))
+        return triples
+    triples = []
+    for f in filters:
+        if len(f) == 4:
+            f = f[1:]
+        if len(f) != 3:
+            frappe.throw(f"Unsupported filter {f!r}")
+        triples.append(tuple(f))
+    return triples
+
+
+def _where(filters, values: dict) -> list[str]:
+    """SQL conditions for `filters` (get_all dict or list form), binding values into `values`."""
+    clauses = []
+    for i, (field, op, value) in enumerate(_filter_triples(filters)):
+        op = cstr(op).lower()
+        if op not in _OPERATORS or not _IDENTIFIER.match(cstr(field)):
+            frappe.throw(f"Unsupported filter {field!r} {op!r}")
+        column, param = _column(field), f"f{i}"
+        if op == "is":
+            clauses.append(
+                f"COALESCE({column}, '') != ''" if value == "set" else f"COALESCE({column}, '') = ''"
+            )
+            continue
+        if op in ("in", "not in"):
+            items = tuple(value or ())
+            if not items:
+                clauses.append("FALSE" if op == "in" else "TRUE")
+                continue
+            values[param] = items
+            clauses.append(
+                f"{column} IN %({param})s" if op == "in" else f"COALESCE({column}, '') NOT IN %({param})s"
+            )
+            continue
+        values[param] = value
+        clauses.append(
+            f"COALESCE({column}, '') != %({param})s" if op == "!=" else f"{column} {op} %({param})s"
+        )
+    return clauses
+
+
+def get_all_in(
+    doctype: str,
+    key_field: str,
+    keys: Iterable,
+    fields: list[str],
+    filters=None,
+    group_by: str | None = None,
+    order_by: str | None = None,
+    limit: int | None = None,
+) -> list:
+    """`frappe.get_all(doctype, fields, filters + {key_field: ["in", keys]})` as ONE statement.
+
+    `filters` takes the get_all dict or list form with the operators in `_OPERATORS`.
+    `fields`, `group_by` and `order_by` are server-side constants: a plain field name is
+    quoted, an expression (`sum(CAST(amount as numeric)) as total_paid`) passes verbatim.
+    No keys -> no query, `[]`. Rows come back as `frappe._dict`, like get_all.
+    """
+    key_json = key_set_json(keys)
+    if key_json == "[]":
+        return []
+    values = {"keys": key_json}
+    conditions = [in_key_set(_column(key_field))] + _where(filters, values)
+    query = (
+        f"SELECT {', '.join(_column(f) for f in fields)} FROM `tab{doctype}` "
+        f"WHERE {' AND '.join(conditions)}"
+    )
+    if group_by:
+        query += f" GROUP BY {group_by}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if limit:
+        values["limit"] = int(limit)
+        query += " LIMIT %(limit)s"
+    return frappe.db.sql(query, values, as_dict=True)
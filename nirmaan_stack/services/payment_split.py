@@ -40,8 +40,8 @@ would quietly widen that ceiling.
 
 TRANSACTION SHAPE
 -----------------
-Copied deliberately from ``api.payments.bulk_actions._process_group``, which is
-the one place in this app that already gets concurrent payment writes right:
+Copied deliberately from the per-group shape ``api.payments.bulk_actions`` used
+before it went set-based, which got concurrent payment writes right:
 
   * ``SELECT ... FOR UPDATE`` on the payment row AND on the parent PO row, so a
     bulk run or another single-row approver serialises behind us instead of
@@ -60,9 +60,9 @@ the one place in this app that already gets concurrent payment writes right:
     worse, a silent overwrite of the term rows we just wrote.
   * ``on_update``'s accountant notification and ``after_insert``'s admin fan-out
     both call ``frappe.db.commit()`` mid-flight, which ends our savepoint's
-    isolation. That is the same reason ``from_adjustment`` and ``bulk_approval``
-    exist. The accountant notification is not dropped — the CALLER emits it
-    after the commit.
+    isolation. That is the same reason ``from_adjustment`` exists. The
+    accountant notification is not dropped — the CALLER emits it after the
+    commit.
 
 This module performs DB work but never reads request context: the CEO
 permission gate lives in the endpoint, and so does the commit + the notify
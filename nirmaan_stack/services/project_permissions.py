@@ -0,0 +1,156 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Cached project-permission index: user -> projects and project -> users.
+
+Project scope lives in `Nirmaan User Permissions` (the mirror of `User Permission`
+rows with allow = "Projects"), and the role that decides who gets notified or who
+counts as the PM lives on `Nirmaan Users.role_profile`. Endpoints and notification
+fan-out used to query both on every call. This module holds the two directions in
+Redis instead:
+
+  * ``user_projects(user)`` -- the project names `user` is permitted on.
+  * ``project_users(project, role_profiles=None)`` -- the users permitted on
+    `project`, optionally narrowed to some role profiles (one cached
+    ``{user: role_profile}`` map per project, filtered in Python).
+
+Each is one cache read when warm and one query when cold. Who has full access
+(admins, FULL_ACCESS_ROLES) is still the caller's decision; this only answers
+"which projects / which users".
+
+Invalidation (doc events in hooks.py):
+  * `User Permission` after_insert / on_update / on_trash -> that user and that
+    project.
+  * `Nirmaan Users` on_update (role_profile changed), on_trash and after_rename
+    -> the user and every project they are permitted on.
+Keys are dropped now and again after commit, so a reader racing the writing
+transaction cannot re-cache the old state. CACHE_TTL_SECONDS bounds anything
+written around the hooks (raw SQL, patches).
+"""
+
+import json
+
+import frappe
+
+CACHE_TTL_SECONDS = 6 * 60 * 60
+_CACHE_PREFIX = "nirmaan_project_permissions"
+
+
+def _user_key(user):
+    return frappe.cache().make_key(f"{_CACHE_PREFIX}:user:{user}")
+
+
+def _project_key(project):
+    return frappe.cache().make_key(f"{_CACHE_PREFIX}:project:{project}")
+
+
+def user_projects(user) -> list[str]:
+    """Projects `user` is permitted on (via Nirmaan User Permissions)."""
+    if not user:
+        return []
+    cache = frappe.cache()
+    raw = cache.get(_user_key(user))
+    if raw:
+        return json.loads(raw)
+
+    projects = sorted(set(frappe.get_all(
+        "Nirmaan User Permissions",
+        filters={"user": user, "allow": "Projects"},
+        pluck="for_value",
+        limit_page_length=0,
+    )))
+    cache.set(_user_key(user), json.dumps(projects), ex=CACHE_TTL_SECONDS)
+    return projects
+
+
+def project_users(project, role_profiles=None) -> list[str]:
+    """Users permitted on `project` that have a Nirmaan Users record, narrowed to
+    `role_profiles` (a profile name or an iterable of them) when given."""
+    if not project:
+        return []
+    cache = frappe.cache()
+    raw = cache.get(_project_key(project))
+    if raw:
+        roles_by_user = json.loads(raw)
+    else:
+        rows = frappe.db.sql(
+            """
+            SELECT DISTINCT nup.user, nu.role_profile
+            FROM "tabNirmaan User Permissions" nup
+            JOIN "tabNirmaan Users" nu ON nu.name = nup.user
+            WHERE nup.for_value = %(project)s AND nup.allow = 'Projects'
+            """,
+            {"project": project},
+            as_dict=True,
+        )
+        roles_by_user = {r.user: r.role_profile for r in rows}
+        cache.set(_project_key(project), json.dumps(roles_by_user), ex=CACHE_TTL_SECONDS)
+
+    if role_profiles is None:
+        return sorted(roles_by_user)
+    if isinstance(role_profiles, str):
+        role_profiles = (role_profiles,)
+    wanted = set(role_profiles)
+    return sorted(user for user, role in roles_by_user.items() if role in wanted)
+
+
+def invalidate(users=(), projects=()):
+    """Drop the cached entries for these users and projects now, and again after commit."""
+    keys = [_user_key(u) for u in dict.fromkeys(users) if u]
+    keys += [_project_key(p) for p in dict.fromkeys(projects) if p]
+    if not keys:
+        return
+
+    def _drop():
+        frappe.cache().delete(*keys)
+
+    _drop()
+    frappe.db.after_commit.add(_drop)
+
+
+def invalidate_user(*users):
+    """Drop `users` and every project they are permitted on (read from the table, not
+    the cache, so a stale cache entry cannot hide a project)."""
+    users = [u for u in users if u]
+    if not users:
+        return
+    projects = frappe.get_all(
+        "Nirmaan User Permissions",
+        filters={"user": ["in", users], "allow": "Projects"},
+        pluck="for_value",
+        limit_page_length=0,
+    )
+    invalidate(users=users, projects=projects)
+
+
+# ---------------------------------------------------------------------------
+# Doc-event hooks
+# ---------------------------------------------------------------------------
+
+
+def on_user_permission_change(doc, method=None):
+    """`User Permission` after_insert / on_update / on_trash. An edit drops both the
+    old and the new (user, project)."""
+    docs = [doc]
+    if method == "on_update":
+        docs.append(doc.get_doc_before_save())
+    docs = [d for d in docs if d is not None]
+    invalidate(
+        users=[d.user for d in docs],
+        projects=[d.for_value for d in docs if d.allow == "Projects"],
+    )
+
+
+def on_nirmaan_user_change(doc, method=None):
+    """`Nirmaan Users` on_update / on_trash. A save that kept the role profile (an FCM
+    token refresh, a name edit) cannot change either direction and is skipped."""
+    if method == "on_update":
+        before = doc.get_doc_before_save()
+        if before is not None and before.role_profile == doc.role_profile:
+            return
+    invalidate_user(doc.name)
+
+
+def on_nirmaan_user_rename(doc, method, old_name, new_name, merge):
+    """`Nirmaan Users` after_rename: the permissions now point at `new_name`."""
+    invalidate_user(old_name, new_name)
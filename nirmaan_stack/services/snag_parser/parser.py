@@ -21,11 +21,10 @@ from __future__ import annotations
 
 import re
 
-from openpyxl import load_workbook
 from openpyxl.utils import column_index_from_string
 
 from .guess import is_known_header_label
-from .reader import all_header_rows, find_header_row, read_grid
+from .reader import all_header_rows, find_header_row, open_workbook, read_grid
 
 #: A row whose FIRST non-empty cell reads like this opens a summary/tally block.
 SUMMARY_RE = re.compile(r"summary|total|risk\s*summary", re.IGNORECASE)
@@ -267,7 +266,7 @@ def parse_sheet(path: str, sheet_name: str, mapping, header_row: "int | None" =
     `header_row` (1-based) overrides auto-detection; every row AT or ABOVE it is
     excluded from the data region with a stated reason.
     """
-    wb = load_workbook(path, data_only=True)
+    wb = open_workbook(path)
     try:
         if sheet_name not in wb.sheetnames:
             raise ValueError("sheet not found in workbook: %r" % (sheet_name,))
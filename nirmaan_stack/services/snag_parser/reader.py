@@ -27,37 +27,40 @@ MIN_HEADER_CELLS = 3
 # ---------------------------------------------------------------------------
 
 
-def sheet_extent(ws) -> "tuple[int, int]":
-    """The sheet's REAL last used (row, col) — openpyxl's max_row/max_column
-    count rows that only carry formatting. (0, 0) for an empty sheet."""
-    last_row = 0
-    last_col = 0
-    for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=ws.max_column):
-        for cell in row:
-            if cell.value is None:
-                continue
-            if not cell_text(cell.value):
-                continue
-            if cell.row > last_row:
-                last_row = cell.row
-            if cell.column > last_col:
-                last_col = cell.column
-    return last_row, last_col
+def open_workbook(path: str):
+    """The workbook at `path`, opened READ-ONLY: worksheets stream their XML row
+    by row instead of materialising a Cell object per coordinate, so a
+    2,000-row snag list costs one pass and no per-cell objects. The caller
+    closes it (read-only mode keeps the archive open)."""
+    return load_workbook(path, read_only=True, data_only=True)
 
 
 def read_grid(ws) -> "list[list[str]]":
     """The sheet as trimmed text, row-major, 0-indexed. `grid[r][c]` is Excel
-    row r+1, column c+1. Trailing empty rows/columns are dropped."""
-    last_row, last_col = sheet_extent(ws)
-    if not last_row or not last_col:
+    row r+1, column c+1. Trailing empty rows/columns are dropped — openpyxl's
+    max_row/max_column count rows that only carry formatting, and a read-only
+    sheet has neither when its writer skipped the dimension tag.
+
+    ONE streaming pass over `iter_rows(values_only=True)`, which works the same
+    on a read-only and a regular worksheet. Blank rows are only counted until a
+    used row follows them, so a sheet formatted down to row 100,000 never holds
+    a list per empty row."""
+    rows = []
+    blank_run = 0
+    last_col = 0
+    for values in ws.iter_rows(values_only=True):
+        cells = [cell_text(v) if v is not None else "" for v in values]
+        used = [c for c, text in enumerate(cells) if text]
+        if not used:
+            blank_run += 1
+            continue
+        rows.extend([] for _ in range(blank_run))
+        blank_run = 0
+        rows.append(cells)
+        last_col = max(last_col, used[-1] + 1)
+    if not rows:
         return []
-    grid = [["" for _ in range(last_col)] for _ in range(last_row)]
-    for row in ws.iter_rows(min_row=1, max_row=last_row, max_col=last_col):
-        for cell in row:
-            text = cell_text(cell.value)
-            if text:
-                grid[cell.row - 1][cell.column - 1] = text
-    return grid
+    return [(cells + [""] * (last_col - len(cells)))[:last_col] for cells in rows]
 
 
 # ---------------------------------------------------------------------------
@@ -154,7 +157,7 @@ def inspect_workbook(path: str) -> "list[dict]":
     Returns one dict per sheet, in workbook order, matching the
     `WorkbookSheet` TS interface.
     """
-    wb = load_workbook(path, data_only=True)
+    wb = open_workbook(path)
     try:
         return [inspect_sheet(ws) for ws in wb.worksheets]
     finally:
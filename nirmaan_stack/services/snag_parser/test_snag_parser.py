@@ -26,7 +26,13 @@ from openpyxl import load_workbook
 
 from .guess import guess_mapping
 from .parser import parse_grid, parse_sheet
-from .reader import columns_for_header_row, inspect_sheet, inspect_workbook, read_grid
+from .reader import (
+    columns_for_header_row,
+    inspect_sheet,
+    inspect_workbook,
+    open_workbook,
+    read_grid,
+)
 
 FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "food_box_mep_snags.xlsx")
 
@@ -367,6 +373,37 @@ class TestSyntheticWorkbooks(unittest.TestCase):
         self._paths.append(path)
         return path
 
+    def test_streamed_grid_matches_the_full_load(self):
+        """Read-only streaming drops formatting-only rows/columns exactly as the
+        full load does, and keeps interior blank rows so row numbers hold."""
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Sheet1"
+        ws.append(["Area", "Category", "Description"])
+        ws.append(["Lobby", None, "  Loose socket "])
+        ws.append([])
+        ws.append([None, None, "Cracked tile", None])
+        ws["F40"].number_format = "0.00"  # formatting only, far past the data
+        handle, path = tempfile.mkstemp(suffix=".xlsx")
+        os.close(handle)
+        self._paths.append(path)
+        wb.save(path)
+
+        expected = [
+            ["Area", "Category", "Description"],
+            ["Lobby", "", "Loose socket"],
+            ["", "", ""],
+            ["", "", "Cracked tile"],
+        ]
+        full = load_workbook(path, data_only=True)
+        streamed = open_workbook(path)
+        try:
+            self.assertEqual(read_grid(full["Sheet1"]), expected)
+            self.assertEqual(read_grid(streamed["Sheet1"]), expected)
+        finally:
+            full.close()
+            streamed.close()
+
     def test_a_sheet_with_no_header_row(self):
         path = self._workbook([["just"], ["some"], ["prose"]])
         sheet = inspect_workbook(path)[0]
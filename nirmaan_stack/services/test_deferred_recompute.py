@@ -0,0 +1,110 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for request-scoped recompute coalescing.
+
+`frappe.local` and `frappe.db` are patched, so no site is needed:
+    python -m unittest nirmaan_stack.services.test_deferred_recompute
+"""
+import types
+import unittest
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.services import deferred_recompute as dr
+
+
+class _PatchedSite(unittest.TestCase):
+    def setUp(self):
+        for target, value in (("local", types.SimpleNamespace()), ("db", MagicMock()), ("logger", MagicMock())):
+            patcher = patch.object(dr.frappe, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.db = dr.frappe.db
+        self.computed = []
+
+
+class TestCoalescing(_PatchedSite):
+    def _compute(self, key):
+        self.computed.append(key)
+
+    def test_outside_a_scope_nothing_is_deferred(self):
+        self.assertFalse(dr.defer("cashflow_hold", "P-1", self._compute))
+        self.assertEqual(self.computed, [])
+
+    def test_each_key_runs_once_when_the_scope_exits(self):
+        with dr.coalescing():
+            for key in ("P-1", "P-2", "P-1", "P-1"):
+                self.assertTrue(dr.defer("cashflow_hold", key, self._compute))
+            dr.defer("reconcile", ("Procurement Orders", "PO-1"), self._compute)
+            self.assertEqual(self.computed, [])
+        self.assertEqual(self.computed, ["P-1", "P-2", ("Procurement Orders", "PO-1")])
+        self.assertEqual(dr.stats(), {
+            "cashflow_hold": {"requested": 4, "computed": 2, "collapsed": 2},
+            "reconcile": {"requested": 1, "computed": 1, "collapsed": 0},
+        })
+
+    def test_commits_inside_the_scope_do_not_flush(self):
+        with dr.coalescing():
+            for _ in range(3):  # a per-row-commit worker
+                dr.defer("cashflow_hold", "P-1", self._compute)
+                self.db.commit()
+            self.assertEqual(self.computed, [])
+        self.assertEqual(self.computed, ["P-1"])
+        self.db.before_commit.add.assert_not_called()
+
+    def test_only_the_outermost_scope_flushes(self):
+        with dr.coalescing():
+            with dr.coalescing():
+                dr.defer("cashflow_hold", "P-1", self._compute)
+            self.assertEqual(self.computed, [])
+        self.assertEqual(self.computed, ["P-1"])
+        self.assertFalse(dr.is_coalescing())
+
+    def test_an_exception_still_flushes_then_propagates(self):
+        with self.assertRaises(RuntimeError):
+            with dr.coalescing():
+                dr.defer("cashflow_hold", "P-1", self._compute)
+                raise RuntimeError("rollup failed")
+        self.assertEqual(self.computed, ["P-1"])
+        self.assertFalse(dr.is_coalescing())
+
+    def test_a_failing_key_is_logged_and_the_rest_still_run(self):
+        def broken(key):
+            raise ValueError(key)
+
+        with patch.object(dr.frappe, "log_error") as log_error:
+            with dr.coalescing():
+                dr.defer("cashflow_hold", "P-1", broken)
+                dr.defer("cashflow_hold", "P-2", self._compute)
+        self.assertEqual(self.computed, ["P-2"])
+        log_error.assert_called_once()
+
+    def test_keys_deferred_by_a_compute_run_in_the_same_flush(self):
+        def chained(key):
+            self.computed.append(("hold", key))
+            dr.defer("reconcile", key, lambda k: self.computed.append(("reconcile", k)))
+
+        with dr.coalescing():
+            dr.defer("cashflow_hold", "P-1", chained)
+        self.assertEqual(self.computed, [("hold", "P-1"), ("reconcile", "P-1")])
+        self.assertFalse(dr.is_coalescing())
+
+
+class TestCashflowHoldHook(_PatchedSite):
+    def test_a_bulk_flow_evaluates_each_project_once_on_the_final_state(self):
+        from nirmaan_stack.integrations.controllers import project_cashflow_hold_update as hold
+
+        with patch.object(hold.frappe, "flags", hold.frappe._dict()), \
+                patch.object(hold, "sync_cashflow_reason") as sync:
+            with dr.coalescing():
+                for project in ("P-1", "P-2", "P-1", "P-1"):
+                    hold.trigger_check(project)
+                sync.assert_not_called()
+            self.assertEqual([c.args[0] for c in sync.call_args_list], ["P-1", "P-2"])
+
+            hold.trigger_check("P-3")  # outside a scope: inline, as before
+            sync.assert_called_with("P-3")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the shared disk-cache machinery (index, eviction, sweep).
+
+Pure filesystem, no Frappe site needed:
+    python -m unittest nirmaan_stack.services.test_disk_cache
+"""
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from nirmaan_stack.services import disk_cache as dc
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = self.tmp.name
+
+    def _put(self, sub, name, size, age=0):
+        path = os.path.join(self.root, sub, name)
+        dc.write_atomic(path, b"x" * size)
+        when = time.time() - age
+        os.utime(path, (when, when))
+        return path
+
+    def test_identities(self):
+        client = MagicMock()
+        client.head_object.return_value = {"ETag": '"abc"'}
+        self.assertEqual(dc.s3_identity("k", client, "b"), 's3\x1fk\x1f"abc"')
+        client.head_object.side_effect = RuntimeError("denied")
+        self.assertEqual(dc.s3_identity("k", client, "b"), "s3\x1fk\x1f")
+        path = self._put("blobs", "a.pdf", 3)
+        self.assertTrue(dc.file_identity(path).startswith(f"file\x1f{path}\x1f"))
+        with self.assertRaises(OSError):
+            dc.file_identity(os.path.join(self.root, "gone"))
+
+    def test_index_points_at_a_live_blob_only(self):
+        blob = self._put("blobs", "a.pdf", 3, age=100)
+        index = dc.index_path(self.root, "identity")
+        dc.write_index(index, "a.pdf")
+        self.assertEqual(dc.lookup(self.root, index), blob)
+        self.assertGreater(os.path.getmtime(blob), time.time() - 10)  # a hit refreshes the LRU
+        os.remove(blob)
+        self.assertIsNone(dc.lookup(self.root, index))
+
+    def test_evict_drops_oldest_first_and_spares_recent_files(self):
+        bounded = (("blobs", (".pdf",)), ("snapshots", (".snap",)))
+        old = self._put("blobs", "old.pdf", 3000, age=dc.EVICT_MIN_IDLE_SEC + 300)
+        older = self._put("snapshots", "older.snap", 3000, age=dc.EVICT_MIN_IDLE_SEC + 400)
+        recent = self._put("blobs", "recent.pdf", 3000, age=10)
+        self.assertEqual(dc.evict(self.root, bounded, 5000), 2)
+        self.assertEqual([os.path.exists(p) for p in (older, old, recent)], [False, False, True])
+
+    def test_sweep_counts_per_kind(self):
+        bounded = (("blobs", (".pdf",)),)
+        idle = self._put("blobs", "idle.pdf", 10, age=3 * 86400)
+        self._put("blobs", "live.pdf", 10)
+        dc.write_index(dc.index_path(self.root, "one"), "idle.pdf")
+        dc.write_index(dc.index_path(self.root, "two"), "live.pdf")
+        self._put("checkout", "leak.pdf", 10, age=7200)
+        aged = {"checkouts": ("checkout", 3600)}
+
+        self.assertEqual(dc.sweep(self.root, bounded, 10_000, 2, aged, dry_run=True)["blobs"], 1)
+        self.assertTrue(os.path.exists(idle))
+        result = dc.sweep(self.root, bounded, 10_000, 2, aged)
+        self.assertEqual((result["blobs"], result["index"], result["checkouts"]), (1, 1, 1))
+        self.assertEqual(len(os.listdir(os.path.join(self.root, "index"))), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
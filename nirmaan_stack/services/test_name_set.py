@@ -0,0 +1,89 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the constant-size key-set reads.
+
+`frappe.db.sql` is patched, so these check the statement and its parameters, not a result
+set; `scripts/bench_name_set.py` runs the real thing against a site. No Frappe site needed:
+    python -m unittest nirmaan_stack.services.test_name_set
+"""
+import json
+import unittest
+from unittest.mock import patch
+
+from nirmaan_stack.services import name_set
+
+
+class TestKeySet(unittest.TestCase):
+    def test_keys_are_distinct_strings_in_first_seen_order(self):
+        self.assertEqual(json.loads(name_set.key_set_json(["b", "a", "b", None, "", 7])), ["b", "a", "7"])
+
+    def test_awkward_names_survive_the_round_trip(self):
+        names = ["PO/001/25-26", "it's", 'say "hi"', "back\\slash", "%(keys)s"]
+        self.assertEqual(json.loads(name_set.key_set_json(names)), names)
+
+
+class TestGetAllIn(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(name_set.frappe, "db")
+        self.db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db.sql.return_value = []
+
+    def _query(self):
+        self.db.sql.assert_called_once()
+        return self.db.sql.call_args.args
+
+    def test_statement_size_does_not_grow_with_the_key_set(self):
+        name_set.get_all_in("PO Payment Terms", "parent", [f"PO-{i}" for i in range(10)], ["parent"])
+        small, _ = self._query()
+        self.db.sql.reset_mock()
+        name_set.get_all_in("PO Payment Terms", "parent", [f"PO-{i}" for i in range(50_000)], ["parent"])
+        large, values = self._query()
+        self.assertEqual(small, large)
+        self.assertEqual(len(json.loads(values["keys"])), 50_000)
+        self.assertEqual(self.db.sql.call_args.kwargs, {"as_dict": True})
+
+    def test_no_keys_means_no_query(self):
+        self.assertEqual(name_set.get_all_in("Projects", "name", [None, ""], ["name"]), [])
+        self.db.sql.assert_not_called()
+
+    def test_filters_compile_like_get_all(self):
+        name_set.get_all_in(
+            "Procurement Orders", "project", ["P-1"],
+            fields=["name", "sum(CAST(amount as numeric)) as total"],
+            filters={"status": ("not in", ["Merged", "Cancelled"]), "docstatus": 1, "vendor": ["is", "set"]},
+            group_by="name", order_by="modified desc", limit=100,
+        )
+        query, values = self._query()
+        self.assertEqual(
+            query,
+            "SELECT `name`, sum(CAST(amount as numeric)) as total FROM `tabProcurement Orders` "
+            "WHERE `project` IN (SELECT jsonb_array_elements_text(%(keys)s::jsonb)) "
+            "AND COALESCE(`status`, '') NOT IN %(f0)s AND `docstatus` = %(f1)s "
+            "AND COALESCE(`vendor`, '') != '' "
+            "GROUP BY name ORDER BY modified desc LIMIT %(limit)s",
+        )
+        self.assertEqual(values["f0"], ("Merged", "Cancelled"))
+        self.assertEqual((values["f1"], values["limit"]), (1, 100))
+
+    def test_list_filters_and_empty_in(self):
+        name_set.get_all_in(
+            "Project Payments", "document_name", ["SR-1"], ["amount"],
+            filters=[["Project Payments", "status", "=", "Paid"], ["document_type", "in", []]],
+        )
+        query, values = self._query()
+        self.assertTrue(query.endswith("AND `status` = %(f0)s AND FALSE"))
+        self.assertEqual(values["f0"], "Paid")
+
+    def test_unsupported_filters_are_refused(self):
+        with patch.object(name_set.frappe, "throw", side_effect=ValueError) as throw:
+            for bad in ([["status", "like", "%x%"]], [["status; drop", "=", "x"]]):
+                with self.assertRaises(ValueError):
+                    name_set.get_all_in("Projects", "name", ["P-1"], ["name"], filters=bad)
+        self.assertEqual(throw.call_count, 2)
+        self.db.sql.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
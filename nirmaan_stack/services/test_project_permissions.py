@@ -0,0 +1,91 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the cached project-permission index and its invalidation hooks.
+
+`frappe.cache()` is a dict and `frappe.db` / `frappe.get_all` are patched, so these
+count the queries a read costs. No Frappe site needed:
+    python -m unittest nirmaan_stack.services.test_project_permissions
+"""
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from nirmaan_stack.services import project_permissions as pp
+
+
+class _Cache(dict):
+    def make_key(self, key):
+        return key
+
+    def set(self, key, value, ex=None):
+        self[key] = value.encode()
+
+    def get(self, key):
+        return super().get(key)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.pop(key, None)
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class TestProjectPermissions(unittest.TestCase):
+    def setUp(self):
+        self.cache = _Cache()
+        self.get_all = MagicMock(return_value=["P-2", "P-1", "P-1"])
+        self.db = MagicMock()
+        self.db.sql.return_value = [
+            _Row(user="pm@x", role_profile="Nirmaan Project Manager Profile"),
+            _Row(user="lead@x", role_profile="Nirmaan Project Lead Profile"),
+        ]
+        for target, value in (("cache", lambda: self.cache), ("get_all", self.get_all), ("db", self.db)):
+            patcher = patch.object(pp.frappe, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_user_projects_queries_once_then_reads_the_cache(self):
+        self.assertEqual(pp.user_projects("pm@x"), ["P-1", "P-2"])
+        self.assertEqual(pp.user_projects("pm@x"), ["P-1", "P-2"])
+        self.get_all.assert_called_once()
+        self.assertEqual(pp.user_projects(""), [])
+
+    def test_an_empty_scope_is_cached_too(self):
+        self.get_all.return_value = []
+        pp.user_projects("new@x")
+        pp.user_projects("new@x")
+        self.get_all.assert_called_once()
+
+    def test_project_users_filter_by_role_profile_from_one_cached_map(self):
+        self.assertEqual(pp.project_users("P-1"), ["lead@x", "pm@x"])
+        self.assertEqual(pp.project_users("P-1", "Nirmaan Project Manager Profile"), ["pm@x"])
+        self.assertEqual(pp.project_users("P-1", ["Nirmaan Accountant Profile"]), [])
+        self.db.sql.assert_called_once()
+
+    def test_a_permission_change_drops_the_user_and_the_project_now_and_after_commit(self):
+        pp.user_projects("pm@x")
+        pp.project_users("P-1")
+        pp.project_users("P-9")
+        doc = SimpleNamespace(user="pm@x", allow="Projects", for_value="P-1")
+        pp.on_user_permission_change(doc, "on_trash")
+        self.assertEqual(set(self.cache), {"nirmaan_project_permissions:project:P-9"})
+        self.db.after_commit.add.assert_called_once()
+
+    def test_a_role_change_drops_every_project_of_the_user_and_other_saves_do_not(self):
+        pp.project_users("P-1")
+        pp.project_users("P-2")
+        doc = SimpleNamespace(name="pm@x", role_profile="Nirmaan Project Manager Profile")
+        doc.get_doc_before_save = lambda: SimpleNamespace(role_profile="Nirmaan Project Manager Profile")
+        pp.on_nirmaan_user_change(doc, "on_update")
+        self.assertEqual(len(self.cache), 2)
+
+        doc.get_doc_before_save = lambda: SimpleNamespace(role_profile="Nirmaan Project Lead Profile")
+        pp.on_nirmaan_user_change(doc, "on_update")
+        self.assertEqual(self.cache, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Unit tests for the zip-part-level .xlsx patcher.
+
+Parity: the same edits applied through openpyxl and through `PatchedWorkbook` read back
+identically (values, formulas, fills, the base cell's number format and font). Fidelity:
+parts the patch never touched come out byte-for-byte. No Frappe site needed:
+    python -m unittest nirmaan_stack.services.test_xlsx_patch
+"""
+import os
+import tempfile
+import unittest
+import zipfile
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+
+from nirmaan_stack.services import xlsx_patch
+
+_YELLOW = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+_GREEN = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
+
+# (sheet, row, column, value, fill) -- existing cells, blank cells in existing rows,
+# new rows past the end, a new column, a formula and a fill-only edit.
+_EDITS = (
+    ("BOQ", 2, 4, 125.5, _YELLOW),
+    ("BOQ", 3, 4, 7, None),
+    ("BOQ", 3, 5, "=C3*D3", None),
+    ("BOQ", 4, 4, "=SUM(D2:D3)", None),
+    ("BOQ", 4, 2, "Rate <incl.> & \"GST\"", _GREEN),
+    ("BOQ", 4, 7, "remark", None),
+    ("BOQ", 9, 1, "late row", _YELLOW),
+    ("BOQ", 6, 3, None, _GREEN),
+    ("Notes", 1, 1, "overwritten", None),
+)
+
+
+def _fixture(path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "BOQ"
+    ws.append(["S.No", "Description", "Qty", "Rate", "Amount"])
+    ws.append([1, "Cable tray", 10, None, "=C2*D2"])
+    ws.append([2, "Conduit", 20, 3, "=C3*D3"])
+    ws.append([3, "Sub total", None, None, "=SUM(E2:E3)"])
+    ws["D2"].number_format = "#,##0.00"
+    ws["B4"].font = Font(bold=True)
+    ws.merge_cells("A6:C6")
+    ws["A6"] = "Banner"
+    notes = wb.create_sheet("Notes")
+    notes["A1"] = "shared text"
+    notes["B2"] = "untouched"
+    wb.create_sheet("Spare")["A1"] = "never opened"
+    wb.defined_names["Rates"] = openpyxl.workbook.defined_name.DefinedName(
+        "Rates", attr_text="BOQ!$D$2:$D$3")
+    wb.save(path)
+
+
+def _apply(wb, edits=_EDITS):
+    for sheet, row, column, value, fill in edits:
+        cell = wb[sheet].cell(row=row, column=column)
+        if value is not None:
+            cell.value = value
+        if fill is not None:
+            cell.fill = fill
+
+
+def _read(path):
+    wb = openpyxl.load_workbook(path)
+    try:
+        out = {}
+        for ws in wb.worksheets:
+            for row in ws.iter_rows():
+                for c in row:
+                    if c.value is None and c.fill.fill_type is None:
+                        continue
+                    out[(ws.title, c.coordinate)] = (
+                        c.value, c.fill.fill_type, c.fill.fgColor.rgb if c.fill.fill_type else None,
+                        c.number_format, bool(c.font.bold),
+                    )
+        return out
+    finally:
+        wb.close()
+
+
+class TestPatchedWorkbook(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = self._path("src.xlsx")
+        _fixture(self.src)
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def _patched(self, edits=_EDITS):
+        out = self._path("patched.xlsx")
+        wb = xlsx_patch.PatchedWorkbook(self.src)
+        try:
+            _apply(wb, edits)
+            wb.save(out)
+        finally:
+            wb.close()
+        return out
+
+    def test_parity_with_openpyxl(self):
+        expected = self._path("openpyxl.xlsx")
+        wb = openpyxl.load_workbook(self.src)
+        _apply(wb)
+        wb.save(expected)
+        self.assertEqual(_read(self._patched()), _read(expected))
+
+    def test_reads_existing_values_and_formulas(self):
+        wb = xlsx_patch.PatchedWorkbook(self.src)
+        self.addCleanup(wb.close)
+        self.assertEqual(wb.sheetnames, ["BOQ", "Notes", "Spare"])
+        ws = wb["BOQ"]
+        self.assertEqual(ws["B2"].value, "Cable tray")
+        self.assertEqual(ws.cell(row=3, column=3).value, 20)
+        self.assertEqual(ws["E2"].data_type, "f")
+        self.assertIsNone(ws["D2"].value)
+        self.assertEqual(ws.max_row, 6)
+        with self.assertRaises(KeyError):
+            wb["Missing"]
+
+    def test_untouched_parts_are_byte_identical(self):
+        out = self._patched(edits=(("BOQ", 2, 4, 125.5, None),))
+        with zipfile.ZipFile(self.src) as a, zipfile.ZipFile(out) as b:
+            self.assertEqual(a.namelist(), b.namelist())
+            changed = {n for n in a.namelist() if a.read(n) != b.read(n)}
+        # A value-only edit rewrites its sheet (and the calc flag), never the styles part.
+        self.assertEqual(changed - {"xl/workbook.xml"}, {"xl/worksheets/sheet1.xml"})
+
+    def test_value_edit_forces_recalculation(self):
+        with zipfile.ZipFile(self.src) as z:
+            workbook = z.read("xl/workbook.xml")
+        # openpyxl stamps the flag on every save; start from a workbook that lacks it.
+        with zipfile.ZipFile(self.src) as a, zipfile.ZipFile(self._path("nocalc.xlsx"), "w") as b:
+            for info in a.infolist():
+                data = a.read(info)
+                if info.filename == "xl/workbook.xml":
+                    data = workbook.replace(b' fullCalcOnLoad="1"', b"")
+                b.writestr(info, data)
+        os.replace(self._path("nocalc.xlsx"), self.src)
+        with zipfile.ZipFile(self._patched(edits=(("BOQ", 2, 4, None, _YELLOW),))) as z:
+            self.assertNotIn(b"fullCalcOnLoad", z.read("xl/workbook.xml"))
+        with zipfile.ZipFile(self._patched()) as z:
+            self.assertIn(b'fullCalcOnLoad="1"', z.read("xl/workbook.xml"))
+
+    def test_structure_counts_raw_parts(self):
+        before = xlsx_patch.structure(self.src)
+        self.assertEqual(before, {"formulas": 3, "merges": 1, "sheets": 3, "defined_names": 1})
+        after = xlsx_patch.structure(self._patched())
+        self.assertEqual(after, dict(before, formulas=4))
+
+    def test_rejects_non_packages(self):
+        junk = self._path("junk.xlsx")
+        with open(junk, "wb") as f:
+            f.write(b"not a zip")
+        with self.assertRaises(xlsx_patch.XlsxPatchError):
+            xlsx_patch.PatchedWorkbook(junk)
+        bare = self._path("bare.xlsx")
+        with zipfile.ZipFile(bare, "w") as z:
+            z.writestr("[Content_Types].xml", "<Types/>")
+        with self.assertRaises(xlsx_patch.XlsxPatchError):
+            xlsx_patch.PatchedWorkbook(bare)
+
+
+if __name__ == "__main__":
+    unittest.main()
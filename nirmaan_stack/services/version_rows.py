@@ -0,0 +1,51 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""`Version` rows for writes that bypass the document layer.
+
+A set-based UPDATE skips `doc.save()`, and with it the `Version` row `track_changes`
+would have written. A bulk writer hands its diffs here instead and gets the same
+rows -- same `data` shape, same owner / timestamps -- in one multi-row INSERT, so
+the document's history reads the same whichever path made the change.
+"""
+from __future__ import annotations
+
+import frappe
+
+_FIELDS = ["creation", "modified", "owner", "modified_by", "ref_doctype", "docname", "data"]
+
+
+def version_data(changed=(), row_changed=()):
+    """The `Version.data` JSON for one save.
+
+    changed      [[fieldname, old, new], ...] on the document itself
+    row_changed  [[table_fieldname, row_index, row_name, [[fieldname, old, new], ...]], ...]
+    """
+    return frappe.as_json(
+        {
+            "changed": list(changed),
+            "added": [],
+            "removed": [],
+            "row_changed": list(row_changed),
+            "data_import": None,
+            "updater_reference": None,
+        },
+        indent=None,
+        separators=(",", ":"),
+    )
+
+
+def insert_versions(ref_doctype, entries, user=None, now=None):
+    """One `Version` row per (docname, data) in `entries`, in one insert."""
+    entries = list(entries)
+    if not entries:
+        return
+    user = user or frappe.session.user
+    now = now or frappe.utils.now()
+    # An autoincrement-named Version table numbers its own rows.
+    hashed = frappe.get_meta("Version").autoname != "autoincrement"
+    values = []
+    for docname, data in entries:
+        row = (now, now, user, user, ref_doctype, docname, data)
+        values.append((frappe.generate_hash(length=10), *row) if hashed else row)
+    frappe.db.bulk_insert("Version", ["name", *_FIELDS] if hashed else _FIELDS, values)
@@ -0,0 +1,691 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Stamp a few hundred cells into a client's .xlsx without round-tripping it through openpyxl.
+
+An .xlsx is a zip of XML parts. A priced-tender write-back changes a handful of cells on the
+ticked sheets and adds a few fills -- yet `openpyxl.load_workbook` + `save` parses EVERY part
+into objects and re-serialises ALL of them, which on a large tender costs tens of seconds,
+several hundred MB, and silently drops whatever openpyxl does not model (images, charts,
+data-validation extensions, slicers).
+
+`PatchedWorkbook` instead presents the small slice of the openpyxl workbook / worksheet / cell
+API the stamping helpers use (`wb.sheetnames`, `wb[title]`, `ws[coord]`, `ws.cell(row, column)`,
+`ws.max_row`, `cell.value`, `cell.data_type`, `cell.fill = PatternFill(...)`), records the edits,
+and on `save` rewrites ONLY:
+
+  * each touched worksheet part -- the edited <row> elements are re-rendered, every other byte
+    of the part is copied through verbatim;
+  * the styles part, when a fill was set -- new <fill> / <xf> records are APPENDED, existing
+    indexes never move;
+  * the workbook part, when a value was set -- `fullCalcOnLoad="1"` on <calcPr>, so Excel
+    recomputes the client's amount formulas over the stamped rates (openpyxl writes the same
+    flag on every save).
+
+Every other part is copied from the source archive unchanged. That is what makes the fidelity
+check cheap: `structure()` counts formulas, merges, sheets and defined names straight off the
+raw XML instead of loading the workbook twice.
+
+Text written by the patcher is an inline string (`t="inlineStr"`), so the shared-strings part
+never has to be rewritten. A string starting with "=" is a formula, exactly as openpyxl's
+`Cell.value` setter treats it.
+
+`XlsxPatchError` from the constructor means the package has a shape the patcher does not handle
+(no workbook part, no styles part, a sheet part that is missing); callers fall back to openpyxl.
+"""
+from __future__ import annotations
+
+import copy
+import math
+import numbers
+import posixpath
+import re
+import shutil
+import xml.etree.ElementTree as ET
+import zipfile
+from xml.sax.saxutils import escape, unescape
+
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.cell import coordinate_from_string
+
+_REL_OFFICE_DOCUMENT = "/officeDocument"
+_REL_WORKSHEET = "/worksheet"
+_REL_STYLES = "/styles"
+_REL_SHARED_STRINGS = "/sharedStrings"
+
+_ATTR = re.compile(r'([\w:.-]+)\s*=\s*"([^"]*)"')
+_REF = re.compile(r"\$?([A-Z]{1,3})\$?(\d+)")
+_QUOTE = {'"': "&quot;"}
+
+# XML 1.0 forbids most C0 control characters even escaped; openpyxl refuses them with
+# IllegalCharacterError. A remark pasted from another workbook occasionally carries one (a
+# vertical tab from Alt+Enter in older Excel), so they are dropped rather than failing the export.
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_KEEP = object()
+
+
+class XlsxPatchError(Exception):
+    """The package cannot be patched in place."""
+
+
+def _attrs(raw: str) -> dict[str, str]:
+    """Attributes of an opening tag, RAW (still XML-escaped), in document order."""
+    return dict(_ATTR.findall(raw or ""))
+
+
+def _render_attrs(attrs: dict[str, str]) -> str:
+    return "".join(f' {k}="{v}"' for k, v in attrs.items())
+
+
+def _prefix(tag_match: re.Match | None) -> str:
+    return (tag_match.group("p") or "") if tag_match else ""
+
+
+def _split_ref(ref: str) -> tuple[int, int]:
+    m = _REF.fullmatch(ref)
+    if not m:
+        raise XlsxPatchError(f"unreadable cell reference {ref!r}")
+    return int(m.group(2)), column_index_from_string(m.group(1))
+
+
+def _resolve(base_dir: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def _relationships(zf: zipfile.ZipFile, part: str) -> list[tuple[str, str, str]]:
+    """(Id, Type, resolved target) for every relationship of `part`."""
+    rels = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    try:
+        root = ET.fromstring(zf.read(rels))
+    except KeyError:
+        return []
+    base = posixpath.dirname(part)
+    return [
+        (r.get("Id"), r.get("Type") or "", _resolve(base, r.get("Target") or ""))
+        for r in root
+        if r.get("TargetMode") != "External"
+    ]
+
+
+class _Package:
+    """The workbook part, its sheet list and the parts it points at."""
+
+    def __init__(self, zf: zipfile.ZipFile) -> None:
+        self.zf = zf
+        names = set(zf.namelist())
+        office = [t for _, typ, t in _relationships(zf, "") if typ.endswith(_REL_OFFICE_DOCUMENT)]
+        if not office or office[0] not in names:
+            raise XlsxPatchError("no workbook part")
+        self.workbook_part = office[0]
+        rels = _relationships(zf, self.workbook_part)
+        by_id = {rid: (typ, target) for rid, typ, target in rels}
+        self.styles_part = next((t for _, typ, t in rels if typ.endswith(_REL_STYLES)), None)
+        self.shared_strings_part = next(
+            (t for _, typ, t in rels if typ.endswith(_REL_SHARED_STRINGS) and t in names), None)
+
+        root = ET.fromstring(zf.read(self.workbook_part))
+        self.sheets: list[tuple[str, str | None]] = []  # (title, worksheet part or None)
+        for sheet in root.iterfind("{*}sheets/{*}sheet"):
+            rid = next((v for k, v in sheet.attrib.items() if k.endswith("}id")), None)
+            typ, target = by_id.get(rid, ("", None))
+            if typ.endswith(_REL_WORKSHEET):
+                if target not in names:
+                    raise XlsxPatchError(f"sheet part {target!r} is missing")
+                self.sheets.append((sheet.get("name"), target))
+            else:
+                self.sheets.append((sheet.get("name"), None))  # a chartsheet / dialogsheet
+        self.defined_names = len(root.findall("{*}definedNames/{*}definedName"))
+
+
+def _count_formulas_and_merges(xml: bytes) -> tuple[int, int]:
+    start = xml.find(b"sheetData")
+    end = xml.rfind(b"sheetData")
+    data = xml[start:end] if start != -1 else b""
+    formulas = len(re.findall(rb"<(?:[\w.-]+:)?f[\s/>]", data))
+    merges = len(re.findall(rb"<(?:[\w.-]+:)?mergeCell[\s/>]", xml))
+    return formulas, merges
+
+
+def structure(path) -> dict:
+    """The four write-back invariants, counted from the raw XML of the package at `path`:
+    formula cells, merged ranges, sheets and defined names (the keys of
+    `export_writeback._fidelity_snapshot`)."""
+    with zipfile.ZipFile(path) as zf:
+        pkg = _Package(zf)
+        formulas = merges = 0
+        for _, part in pkg.sheets:
+            if part:
+                f, m = _count_formulas_and_merges(zf.read(part))
+                formulas += f
+                merges += m
+        return {
+            "formulas": formulas,
+            "merges": merges,
+            "sheets": len(pkg.sheets),
+            "defined_names": pkg.defined_names,
+        }
+
+
+# ── styles ────────────────────────────────────────────────────────────────────────
+class _Styles:
+    """Appends fill + cell-format records to the styles part. Existing indexes never move."""
+
+    def __init__(self, xml: str) -> None:
+        self.xml = xml
+        root = re.search(r"<(?P<p>[\w.-]+:)?styleSheet\b", xml)
+        self.p = _prefix(root)
+        self._fills = self._block("fills")
+        self._xfs = self._block("cellXfs")
+        if not self._fills or not self._xfs:
+            raise XlsxPatchError("styles part has no fills / cellXfs")
+        p = re.escape(self.p)
+        self.fill_count = len(re.findall(rf"<{p}fill[\s/>]", self._body(self._fills)))
+        self.xfs = [m.group(0) for m in re.finditer(
+            rf"<{p}xf\b[^>]*?(?:/>|>.*?</{p}xf>)", self._body(self._xfs), re.S)]
+        if not self.xfs:
+            raise XlsxPatchError("styles part has no cell formats")
+        self.new_fills: list[str] = []
+        self.new_xfs: list[str] = []
+        self._cache: dict[tuple, int] = {}
+
+    def _block(self, name: str):
+        p = re.escape(self.p)
+        m = re.search(rf"<{p}{name}\b[^>]*?(/?)>", self.xml)
+        if not m:
+            return None
+        if m.group(1):
+            return (m.start(), m.end(), m.end(), m.end())
+        close = self.xml.find(f"</{self.p}{name}>", m.end())
+        if close == -1:
+            return None
+        return (m.start(), m.end(), close, close + len(f"</{self.p}{name}>"))
+
+    def _body(self, block) -> str:
+        return self.xml[block[1]:block[2]]
+
+    def styled(self, base: int, fill) -> int:
+        """Index of a cell format equal to format `base` with `fill` applied."""
+        fill_xml = self._fill_xml(fill)
+        key = (base, fill_xml)
+        if key in self._cache:
+            return self._cache[key]
+        fill_id = self.fill_count + len(self.new_fills)
+        self.new_fills.append(fill_xml)
+        xf = self.xfs[base] if 0 <= base < len(self.xfs) else self.xfs[0]
+        head_end = xf.index(">")
+        head = xf[:head_end]
+        if head.endswith("/"):
+            head, tail = head[:-1], "/" + xf[head_end:]
+        else:
+            tail = xf[head_end:]
+        for attr, value in (("fillId", str(fill_id)), ("applyFill", "1")):
+            if re.search(rf'\s{attr}="[^"]*"', head):
+                head = re.sub(rf'(\s{attr}=)"[^"]*"', rf'\g<1>"{value}"', head, count=1)
+            else:
+                head += f' {attr}="{value}"'
+        self.new_xfs.append(head + tail)
+        index = len(self.xfs) + len(self.new_xfs) - 1
+        self._cache[key] = index
+        return index
+
+    def _fill_xml(self, fill) -> str:
+        pattern = getattr(fill, "fill_type", None) or getattr(fill, "patternType", None)
+        colors = []
+        for tag in ("fgColor", "bgColor"):
+            rgb = getattr(getattr(fill, tag, None), "rgb", None)
+            if rgb is not None and not isinstance(rgb, str):
+                raise XlsxPatchError(f"unsupported {tag} on fill {fill!r}")
+            if rgb:
+                colors.append(f'<{self.p}{tag} rgb="{escape(rgb, _QUOTE)}"/>')
+        if not pattern:
+            raise XlsxPatchError(f"unsupported fill {fill!r}")
+        p = self.p
+        return (f'<{p}fill><{p}patternFill patternType="{escape(pattern, _QUOTE)}">'
+                f'{"".join(colors)}</{p}patternFill></{p}fill>')
+
+    def render(self) -> str:
+        xml = self.xml
+        # Later block first, so the earlier block's offsets stay valid.
+        for block, added, total in sorted(
+            ((self._xfs, self.new_xfs, len(self.xfs)), (self._fills, self.new_fills, self.fill_count)),
+            key=lambda b: b[0][0], reverse=True,
+        ):
+            start, head_end, close, end = block
+            name = "cellXfs" if block is self._xfs else "fills"
+            head = xml[start:head_end].rstrip("/>").rstrip("/")
+            count = total + len(added)
+            if re.search(r'\scount="\d*"', head):
+                head = re.sub(r'(\scount=)"\d*"', rf'\g<1>"{count}"', head, count=1)
+            else:
+                head += f' count="{count}"'
+            body = xml[head_end:close] + "".join(added)
+            xml = xml[:start] + head + ">" + body + f"</{self.p}{name}>" + xml[end:]
+        return xml
+
+
+# ── worksheets ────────────────────────────────────────────────────────────────────
+class _Edit:
+    __slots__ = ("value", "fill")
+
+    def __init__(self) -> None:
+        self.value = _KEEP
+        self.fill = None
+
+
+class _XmlCell:
+    __slots__ = ("start", "end", "attrs", "body")
+
+    def __init__(self, start, end, attrs, body) -> None:
+        self.start = start   # offsets within the row body
+        self.end = end
+        self.attrs = attrs
+        self.body = body
+
+
+class PatchedCell:
+    """One cell, openpyxl-style. Reads come from the source XML; writes are recorded."""
+
+    __slots__ = ("parent", "row", "column")
+
+    def __init__(self, parent: "PatchedSheet", row: int, column: int) -> None:
+        self.parent = parent
+        self.row = row
+        self.column = column
+
+    @property
+    def coordinate(self) -> str:
+        return f"{get_column_letter(self.column)}{self.row}"
+
+    @property
+    def value(self):
+        edit = self.parent._edits.get((self.row, self.column))
+        if edit is not None and edit.value is not _KEEP:
+            return edit.value
+        return self.parent._xml_value(self.row, self.column)[0]
+
+    @value.setter
+    def value(self, value) -> None:
+        self.parent._edit(self.row, self.column).value = value
+
+    @property
+    def data_type(self) -> str:
+        edit = self.parent._edits.get((self.row, self.column))
+        if edit is not None and edit.value is not _KEEP:
+            v = edit.value
+            if isinstance(v, str):
+                return "f" if v.startswith("=") and len(v) > 1 else "s"
+            return "b" if isinstance(v, bool) else "n"
+        return self.parent._xml_value(self.row, self.column)[1]
+
+    @property
+    def fill(self):
+        edit = self.parent._edits.get((self.row, self.column))
+        return edit.fill if edit is not None else None
+
+    @fill.setter
+    def fill(self, fill) -> None:
+        self.parent._edit(self.row, self.column).fill = fill
+
+
+class PatchedSheet:
+    """A worksheet part, parsed lazily: rows are indexed on first access, a row's cells on
+    first access to that row."""
+
+    def __init__(self, book: "PatchedWorkbook", title: str, part: str) -> None:
+        self.parent = book
+        self.title = title
+        self.part = part
+        self._xml: str | None = None
+        self._edits: dict[tuple[int, int], _Edit] = {}
+        self._cells: dict[int, dict[int, _XmlCell]] = {}
+
+    # -- loading
+    def _load(self) -> None:
+        if self._xml is not None:
+            return
+        try:
+            xml = self.parent._zip.read(self.part).decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise XlsxPatchError(f"{self.part} is not UTF-8") from e
+        m = re.search(r"<(?P<p>[\w.-]+:)?sheetData\b[^>]*?(?P<empty>/?)>", xml)
+        if not m:
+            raise XlsxPatchError(f"{self.part} has no sheetData")
+        self.p = _prefix(m)
+        p = re.escape(self.p)
+        self._row_re = re.compile(rf"<{p}row\b(?P<a>[^>]*?)(?:/>|>(?P<b>.*?)</{p}row>)", re.S)
+        self._cell_re = re.compile(rf"<{p}c\b(?P<a>[^>]*?)(?:/>|>(?P<b>.*?)</{p}c>)", re.S)
+        self._sd = m
+        if m.group("empty"):
+            self._body = (m.end(), m.end())
+        else:
+            close = xml.find(f"</{self.p}sheetData>", m.end())
+            if close == -1:
+                raise XlsxPatchError(f"{self.part} has an unterminated sheetData")
+            self._body = (m.end(), close)
+        self._rows: dict[int, re.Match] = {}
+        self._implicit_rows = False
+        self._max_row = 0
+        r = 0
+        for row in self._row_re.finditer(xml, *self._body):
+            ref = re.search(r'\sr="(\d+)"', " " + row.group("a"))
+            if ref:
+                n = int(ref.group(1))
+            else:
+                n = r + 1
+                self._implicit_rows = True
+            if n <= r:
+                raise XlsxPatchError(f"{self.part}: rows out of order at {n}")
+            r = n
+            self._rows[n] = row
+            if row.group("b") and "<" in row.group("b"):
+                self._max_row = n
+        self._xml = xml
+
+    def _row_cells(self, row: int) -> dict[int, _XmlCell]:
+        cells = self._cells.get(row)
+        if cells is not None:
+            return cells
+        self._load()
+        cells = {}
+        match = self._rows.get(row)
+        body = match.group("b") if match else None
+        if body:
+            col = 0
+            for c in self._cell_re.finditer(body):
+                attrs = _attrs(c.group("a"))
+                col = _split_ref(attrs["r"])[1] if "r" in attrs else col + 1
+                cells[col] = _XmlCell(c.start(), c.end(), attrs, c.group("b"))
+        self._cells[row] = cells
+        return cells
+
+    def _xml_value(self, row: int, column: int):
+        """(value, data_type) of the source cell, as openpyxl would load it."""
+        cell = self._row_cells(row).get(column)
+        if cell is None or not cell.body:
+            return None, "n"
+        p = re.escape(self.p)
+        body = cell.body
+        f = re.search(rf"<{p}f\b[^>]*?(?:/>|>(.*?)</{p}f>)", body, re.S)
+        if f:
+            return "=" + unescape(f.group(1) or ""), "f"
+        t = cell.attrs.get("t", "n")
+        if t == "inlineStr":
+            texts = re.findall(rf"<{p}t\b[^>]*?(?:/>|>(.*?)</{p}t>)", body, re.S)
+            return unescape("".join(texts)), "s"
+        v = re.search(rf"<{p}v\b[^>]*?(?:/>|>(.*?)</{p}v>)", body, re.S)
+        raw = v.group(1) if v else None
+        if raw is None:
+            return None, "n"
+        if t == "s":
+            return self.parent._shared_string(int(raw)), "s"
+        if t == "b":
+            return raw.strip() == "1", "b"
+        if t in ("str", "e", "d"):
+            return unescape(raw), {"str": "s"}.get(t, t)
+        try:
+            return (int(raw) if re.fullmatch(r"\s*-?\d+\s*", raw) else float(raw)), "n"
+        except ValueError:
+            return unescape(raw), "s"
+
+    # -- openpyxl surface
+    def _edit(self, row: int, column: int) -> _Edit:
+        if row < 1 or column < 1:
+            raise ValueError("Row or column values must be at least 1")
+        edit = self._edits.get((row, column))
+        if edit is None:
+            edit = self._edits[(row, column)] = _Edit()
+        return edit
+
+    def cell(self, row: int, column: int, value=None) -> PatchedCell:
+        if row < 1 or column < 1:
+            raise ValueError("Row or column values must be at least 1")
+        cell = PatchedCell(self, row, column)
+        if value is not None:
+            cell.value = value
+        return cell
+
+    def __getitem__(self, coord: str) -> PatchedCell:
+        col, row = coordinate_from_string(coord)
+        return self.cell(row=row, column=column_index_from_string(col))
+
+    @property
+    def max_row(self) -> int:
+        self._load()
+        edited = max((r for r, _ in self._edits), default=0)
+        return max(self._max_row, edited, 1)
+
+    # -- rendering
+    def _dirty(self) -> bool:
+        return bool(self._edits)
+
+    def _render_cell(self, row: int, column: int, cell: _XmlCell | None, edit: _Edit) -> str:
+        p = self.p
+        attrs = {"r": f"{get_column_letter(column)}{row}"}
+        if cell is not None:
+            attrs.update(cell.attrs)
+            attrs["r"] = f"{get_column_letter(column)}{row}"
+        body = cell.body if cell is not None else None
+        if edit.value is not _KEEP:
+            for key in ("t", "vm", "cm"):
+                attrs.pop(key, None)
+            v = edit.value
+            if v is None:
+                body = None
+            elif isinstance(v, bool):
+                attrs["t"] = "b"
+                body = f"<{p}v>{int(v)}</{p}v>"
+            elif isinstance(v, numbers.Number):
+                if isinstance(v, float) and not math.isfinite(v):
+                    raise XlsxPatchError(f"cannot write {v!r} to {attrs['r']}")
+                body = f"<{p}v>{v!r}</{p}v>" if isinstance(v, float) else f"<{p}v>{v}</{p}v>"
+            elif isinstance(v, str):
+                text = _ILLEGAL_XML_CHARS.sub("", v)
+                if text.startswith("=") and len(text) > 1:
+                    body = f"<{p}f>{escape(text[1:])}</{p}f>"
+                else:
+                    attrs["t"] = "inlineStr"
+                    space = ' xml:space="preserve"' if text != text.strip() else ""
+                    body = f"<{p}is><{p}t{space}>{escape(text)}</{p}t></{p}is>"
+            else:
+                raise XlsxPatchError(f"cannot write a {type(v).__name__} to {attrs['r']}")
+        if edit.fill is not None:
+            base = int(attrs.get("s") or 0)
+            attrs["s"] = str(self.parent._styles_for_write().styled(base, edit.fill))
+        head = f"<{p}c{_render_attrs(attrs)}"
+        return f"{head}>{body}</{p}c>" if body else f"{head}/>"
+
+    def _render_row(self, row: int, edits: dict[int, _Edit]) -> str:
+        p = self.p
+        match = self._rows.get(row)
+        attrs = _attrs(match.group("a")) if match else {}
+        attrs.pop("spans", None)  # an optional hint; stale once cells are added past it
+        attrs = {"r": str(row), **{k: v for k, v in attrs.items() if k != "r"}}
+        body = (match.group("b") or "") if match else ""
+        cells = self._row_cells(row)
+        out: list[str] = []
+        head = tail = ""
+        if cells:
+            first = min(c.start for c in cells.values())
+            last = max(c.end for c in cells.values())
+            head, tail = body[:first], body[last:]
+        else:
+            tail = body
+        for col in sorted(set(cells) | set(edits)):
+            cell = cells.get(col)
+            edit = edits.get(col)
+            if edit is not None:
+                out.append(self._render_cell(row, col, cell, edit))
+            elif "r" in cell.attrs:
+                out.append(body[cell.start:cell.end])
+            else:
+                out.append(self._render_cell(row, col, cell, _Edit()))
+        return f"<{p}row{_render_attrs(attrs)}>{head}{''.join(out)}{tail}</{p}row>"
+
+    def _with_row_number(self, row: int) -> str:
+        match = self._rows[row]
+        text = match.group(0)
+        if re.search(r'\sr="\d+"', " " + match.group("a")):
+            return text
+        cut = len(self.p) + 4  # "<" + prefix + "row"
+        return f'{text[:cut]} r="{row}"{text[cut:]}'
+
+    def render(self) -> str:
+        self._load()
+        xml = self._xml
+        by_row: dict[int, dict[int, _Edit]] = {}
+        for (r, c), edit in self._edits.items():
+            by_row.setdefault(r, {})[c] = edit
+        pending = sorted(r for r in by_row if r not in self._rows)
+        start, end = self._body
+        empty = bool(self._sd.group("empty"))
+        if empty:  # <sheetData/> -> <sheetData>...</sheetData>
+            out = [xml[:self._sd.start()], self._sd.group(0)[:-2].rstrip() + ">"]
+        else:
+            out = [xml[:start]]
+        pos = start
+        for row, match in self._rows.items():
+            if pending and pending[0] < row:
+                out.append(xml[pos:match.start()])
+                pos = match.start()
+                while pending and pending[0] < row:
+                    new_row = pending.pop(0)
+                    out.append(self._render_row(new_row, by_row[new_row]))
+            if row in by_row or self._implicit_rows:
+                out.append(xml[pos:match.start()])
+                out.append(self._render_row(row, by_row[row]) if row in by_row
+                           else self._with_row_number(row))
+                pos = match.end()
+        out.append(xml[pos:end])
+        for row in pending:
+            out.append(self._render_row(row, by_row[row]))
+        if empty:
+            out.append(f"</{self.p}sheetData>")
+            out.append(xml[self._sd.end():])
+        else:
+            out.append(xml[end:])
+        return self._with_dimension("".join(out))
+
+    def _with_dimension(self, xml: str) -> str:
+        p = re.escape(self.p)
+        m = re.search(rf'(<{p}dimension\b[^>]*?\sref=)"([^"]*)"', xml)
+        if not m:
+            return xml
+        refs = m.group(2).split(":")
+        try:
+            (r1, c1), (r2, c2) = _split_ref(refs[0]), _split_ref(refs[-1])
+        except XlsxPatchError:
+            return xml
+        for r, c in self._edits:
+            r1, c1, r2, c2 = min(r1, r), min(c1, c), max(r2, r), max(c2, c)
+        ref = f"{get_column_letter(c1)}{r1}:{get_column_letter(c2)}{r2}"
+        return xml[:m.start()] + f'{m.group(1)}"{ref}"' + xml[m.end():]
+
+
+class PatchedWorkbook:
+    """A workbook opened for in-place cell patching. See the module docstring."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        try:
+            self._zip = zipfile.ZipFile(path)
+        except (zipfile.BadZipFile, OSError) as e:
+            raise XlsxPatchError(f"not an xlsx package: {e}") from e
+        try:
+            self._pkg = _Package(self._zip)
+            if not self._pkg.styles_part:
+                raise XlsxPatchError("no styles part")
+            # Validated up front so a fallback decision is made before anything is stamped.
+            self._styles = _Styles(self._zip.read(self._pkg.styles_part).decode("utf-8"))
+        except (ET.ParseError, KeyError, UnicodeDecodeError) as e:
+            self._zip.close()
+            raise XlsxPatchError(str(e)) from e
+        except XlsxPatchError:
+            self._zip.close()
+            raise
+        self._sheets = {
+            title: PatchedSheet(self, title, part) for title, part in self._pkg.sheets if part
+        }
+        self.sheetnames = [title for title, _ in self._pkg.sheets]
+        self._shared: list[str] | None = None
+
+    @property
+    def worksheets(self) -> list[PatchedSheet]:
+        return [self._sheets[t] for t in self.sheetnames if t in self._sheets]
+
+    def __getitem__(self, title: str) -> PatchedSheet:
+        if title not in self._sheets:
+            raise KeyError(f"Worksheet {title} does not exist.")
+        return self._sheets[title]
+
+    def __contains__(self, title: str) -> bool:
+        return title in self._sheets
+
+    def _styles_for_write(self) -> _Styles:
+        return self._styles
+
+    def _shared_string(self, index: int) -> str:
+        if self._shared is None:
+            self._shared = []
+            part = self._pkg.shared_strings_part
+            if part:
+                with self._zip.open(part) as f:
+                    for _, el in ET.iterparse(f):
+                        if el.tag.endswith("}si"):
+                            texts = [t.text or "" for t in el.iterfind("{*}t")]
+                            texts += [t.text or "" for t in el.iterfind("{*}r/{*}t")]
+                            self._shared.append("".join(texts))
+                            el.clear()
+        return self._shared[index] if 0 <= index < len(self._shared) else ""
+
+    def _full_calc_on_load(self, xml: str) -> str:
+        m = re.search(r"<(?P<p>[\w.-]+:)?workbook\b", xml)
+        p = _prefix(m)
+        ep = re.escape(p)
+        calc = re.search(rf"<{ep}calcPr\b(?P<a>[^>]*?)(?P<s>/?)>", xml)
+        if calc:
+            attrs = _attrs(calc.group("a"))
+            attrs["fullCalcOnLoad"] = "1"
+            tag = f"<{p}calcPr{_render_attrs(attrs)}{calc.group('s')}>"
+            return xml[:calc.start()] + tag + xml[calc.end():]
+        # CT_Workbook order: ... sheets, functionGroups, externalReferences, definedNames, calcPr.
+        anchors = [m.end() for m in re.finditer(
+            rf"</{ep}(?:sheets|functionGroups|externalReferences|definedNames)>"
+            rf"|<{ep}functionGroups\b[^>]*/>", xml)]
+        if not anchors:
+            raise XlsxPatchError("workbook part has no sheets element")
+        at = max(anchors)
+        return xml[:at] + f'<{p}calcPr fullCalcOnLoad="1"/>' + xml[at:]
+
+    def save(self, target) -> None:
+        """Write the patched package to `target` (a path or a writable binary file)."""
+        rewritten: dict[str, bytes] = {}
+        values_changed = False
+        for sheet in self._sheets.values():
+            if sheet._dirty():
+                rewritten[sheet.part] = sheet.render().encode("utf-8")
+                values_changed = values_changed or any(
+                    e.value is not _KEEP for e in sheet._edits.values())
+        if self._styles.new_xfs:
+            rewritten[self._pkg.styles_part] = self._styles.render().encode("utf-8")
+        if values_changed:
+            xml = self._zip.read(self._pkg.workbook_part).decode("utf-8")
+            rewritten[self._pkg.workbook_part] = self._full_calc_on_load(xml).encode("utf-8")
+
+        with zipfile.ZipFile(target, "w", allowZip64=True) as out:
+            for info in self._zip.infolist():
+                new_info = copy.copy(info)
+                data = rewritten.get(info.filename)
+                if data is not None:
+                    out.writestr(new_info, data)
+                    continue
+                # Untouched part: same name, same compression, same bytes.
+                with self._zip.open(info) as src, out.open(
+                    new_info, "w", force_zip64=info.file_size > zipfile.ZIP64_LIMIT
+                ) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+
+    def close(self) -> None:
+        self._zip.close()
@@ -23,6 +23,13 @@ Safety posture (deletion is irreversible):
   * If the keep-set cannot be built completely, the sweep ABORTS rather than
     deleting against a partial picture (fail-safe, see _referenced_local_basenames).
   * `dry_run=True` logs what it would remove and touches nothing.
+
+The same run also trims the BoQ workbook fetch cache
+(`private/boq_workbook_cache/`, see api/boq/wizard/workbook_cache.py). It lives
+outside `private/files` so the sweep above never considers it; its own `sweep()`
+drops idle blobs, dangling index entries and leaked checkouts. The TDS attachment
+cache (`private/tds_attachment_cache/`, api/pdf_helper/attachment_cache.py) is
+trimmed the same way.
 """
 
 import os
@@ -101,6 +108,40 @@ def _referenced_local_basenames() -> set:
     return referenced
 
 
+def _sweep_workbook_cache(dry_run: bool) -> None:
+    from nirmaan_stack.api.boq.wizard.workbook_cache import sweep
+
+    try:
+        r = sweep(dry_run=dry_run)
+    except Exception:
+        frappe.log_error(
+            title="[private janitor] workbook cache sweep failed",
+            message=frappe.get_traceback(),
+        )
+        return
+    janitor_log(
+        f"[workbook cache] {'would remove' if dry_run else 'removed'} {r['blobs']} blobs, "
+        f"{r['index']} index entries, {r['checkouts']} stale checkouts, {r['mb']:.1f} MB"
+    )
+
+
+def _sweep_attachment_cache(dry_run: bool) -> None:
+    from nirmaan_stack.api.pdf_helper.attachment_cache import sweep
+
+    try:
+        r = sweep(dry_run=dry_run)
+    except Exception:
+        frappe.log_error(
+            title="[private janitor] TDS attachment cache sweep failed",
+            message=frappe.get_traceback(),
+        )
+        return
+    janitor_log(
+        f"[attachment cache] {'would remove' if dry_run else 'removed'} {r['blobs']} blobs, "
+        f"{r['index']} index entries, {r['mb']:.1f} MB"
+    )
+
+
 def cleanup_orphan_private_files(dry_run=False):
     """Daily cron entry point. Wired in hooks.py scheduler_events.daily.
 
@@ -112,6 +153,9 @@ def cleanup_orphan_private_files(dry_run=False):
     if isinstance(dry_run, str):
         dry_run = dry_run.strip().lower() not in ("", "0", "false", "no")
 
+    _sweep_workbook_cache(dry_run)
+    _sweep_attachment_cache(dry_run)
+
     private_dir = frappe.utils.get_site_path("private", "files")
     if not os.path.isdir(private_dir):
         return
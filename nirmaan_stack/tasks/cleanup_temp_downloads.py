@@ -3,9 +3,10 @@
 
 """Hourly janitor for bulk-download temp files (Leak A).
 
-`run_bulk_download_job` writes the merged PDF to
-`public/files/temp_downloads/{token}.bin` and fires a realtime event; the client
-is expected to call `fetch_temp_file`, which deletes the file on read. That
+Every job on the shared runner (`api/background_jobs.py` — bulk downloads,
+commission / milestone reports, PO prints, BoQ write-backs) writes its artifact
+to `public/files/temp_downloads/{token}.bin` and fires a realtime event; the
+client is expected to call `fetch_temp_file`, which deletes the file on read. That
 deletion happens ONLY on a successful fetch — a missed socket event, a closed
 tab, or a failed request strands the `.bin` forever. There is no File doc and no
 TTL behind it, so this filesystem sweep is the only safety net.
@@ -0,0 +1,50 @@
+# Copyright (c) 2026, Nirmaan (Stratos Infra Technologies Pvt. Ltd.) and contributors
+# For license information, please see license.txt
+
+"""Nightly check of `amount_invoiced` / `amount_due` against a full recompute.
+
+The Vendor Invoices doc events keep `amount_invoiced` by DELTAS
+(`integrations/controllers/vendor_invoices.py`). A delta is only as good as the value
+it lands on: a raw SQL fix-up, an invoice written with `db_set`, or a restore that
+skipped the hooks would leave the stored total off by a constant that no later delta
+corrects. This is the backstop.
+
+Every drifted order is logged to the Error Log, with its stored and expected
+figures, and then healed with `recompute_document_amount_invoiced`. That is the same
+from-source recompute the patches use, and it re-derives `amount_due` too. An Error
+Log entry here means something wrote around the hooks and is worth finding.
+"""
+
+import frappe
+
+from nirmaan_stack.api.invoices._item_billing_sync import (
+    find_amount_invoiced_drift,
+    recompute_document_amount_invoiced,
+)
+
+# Orders listed in the Error Log entry; the count is always complete.
+LOG_SAMPLE = 50
+
+
+def verify_invoice_totals(heal=True):
+    drift = find_amount_invoiced_drift()
+    if not drift:
+        return []
+
+    lines = [
+        f"{d.document_type} {d.name}: amount_invoiced {d.stored} (expected {d.expected}), "
+        f"amount_due {d.stored_due} (expected {d.expected_due})"
+        for d in drift[:LOG_SAMPLE]
+    ]
+    if len(drift) > LOG_SAMPLE:
+        lines.append(f"... and {len(drift) - LOG_SAMPLE} more")
+    frappe.log_error(
+        title=f"amount_invoiced drift on {len(drift)} order(s)",
+        message="\n".join(lines),
+    )
+
+    if heal:
+        for d in drift:
+            recompute_document_amount_invoiced(d.document_type, d.name)
+        frappe.db.commit()
+    return drift
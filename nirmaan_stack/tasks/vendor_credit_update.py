@@ -1,6 +1,10 @@
 import frappe
 from frappe.utils import flt, now_datetime
-from nirmaan_stack.api.vendor_credit import _compute_credit_used
+from nirmaan_stack.api.vendor_credit import (
+    DEFAULT_CREDIT_LIMIT,
+    compute_credit_used_for,
+    invalidate_vendor_credit_cache,
+)
 
 
 def update_all_vendor_credits():
@@ -9,15 +13,18 @@ def update_all_vendor_credits():
     and automatic vendor_status update based on available_credit.
 
     Does NOT respect admin overrides — always resets status based on numbers.
+
+    credit_used for every vendor comes from one grouped query up front.
     """
-    vendors = frappe.get_all("Vendors", fields=["name"])
+    vendors = frappe.get_all("Vendors", pluck="name")
+    all_credit_used = compute_credit_used_for(vendors)
 
-    for v in vendors:
-        vendor_doc = frappe.get_doc("Vendors", v.name)
+    for name in vendors:
+        vendor_doc = frappe.get_doc("Vendors", name)
         old_credit_used = flt(vendor_doc.credit_used)
 
-        credit_used = _compute_credit_used(vendor_doc)
-        credit_limit = flt(vendor_doc.credit_limit) if vendor_doc.credit_limit is not None else 50000
+        credit_used = all_credit_used[name]
+        credit_limit = flt(vendor_doc.credit_limit) if vendor_doc.credit_limit is not None else DEFAULT_CREDIT_LIMIT
         available_credit = credit_limit - credit_used
 
         # Status decision
@@ -39,4 +46,5 @@ def update_all_vendor_credits():
 
         vendor_doc.save(ignore_permissions=True)
 
+    invalidate_vendor_credit_cache(*vendors)
     frappe.db.commit()
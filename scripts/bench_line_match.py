@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark the invoice-line -> PO-item matcher: pruned scoring + optimal assignment.
+
+Compares, on the committed regression fixture
+(``nirmaan_stack/api/invoices/fixtures/line_match_large.json`` — 150 invoice lines
+plus 3 charge lines against a 200-item PO):
+
+  * SCORING   brute force (``_pair_score`` on every pair) vs ``_scored_pairs`` (token
+              inverted index + SequenceMatcher upper bounds). The two must return the
+              SAME above-threshold pairs; the script exits 1 if they differ.
+  * SELECTION the old greedy best-first pick vs ``_assign`` (optimal one-to-one),
+              reported as lines matched, lines matched to the ground-truth item, and
+              total score.
+
+Usage:
+    python3 scripts/bench_line_match.py            # default 5 timed runs
+    python3 scripts/bench_line_match.py --runs 20
+
+Stdlib only; no bench / Frappe site needed. ``_line_match.py`` is pure, so it is loaded
+straight from its file (importing the ``nirmaan_stack`` package would initialise Firebase).
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+MODULE = REPO_ROOT / "nirmaan_stack" / "api" / "invoices" / "_line_match.py"
+FIXTURE = REPO_ROOT / "nirmaan_stack" / "api" / "invoices" / "fixtures" / "line_match_large.json"
+
+
+def load_matcher():
+    spec = importlib.util.spec_from_file_location("_line_match", MODULE)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def brute_pairs(lm, lines, pos, skip):
+    return [
+        (lm._pair_score(ln, po), i, j)
+        for i, ln in enumerate(lines) if i not in skip
+        for j, po in enumerate(pos)
+    ]
+
+
+def greedy(lm, pairs):
+    """The pre-assignment selection: best-first, one-to-one."""
+    chosen, used_line, used_po = {}, set(), set()
+    for score, i, j in sorted(pairs, reverse=True):
+        if score < lm.MATCH_THRESHOLD or i in used_line or j in used_po:
+            continue
+        chosen[i] = (j, score)
+        used_line.add(i)
+        used_po.add(j)
+    return chosen
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return result, statistics.median(samples)
+
+
+def quality(chosen, pos, truth):
+    correct = sum(1 for i, (j, _) in chosen.items() if pos[j]["item_id"] == truth[i])
+    total = round(sum(score for _, score in chosen.values()), 4)
+    return len(chosen), correct, total
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5, help="timed runs per variant (median reported)")
+    args = ap.parse_args(argv)
+
+    lm = load_matcher()
+    data = json.loads(FIXTURE.read_text())
+    lines, pos, truth = data["invoice_lines"], data["po_items"], data["expected_po_item_id"]
+    skip = {i for i, ln in enumerate(lines) if lm._NON_ITEM_RE.search(ln.get("description") or "")}
+
+    brute, t_brute = timed(lambda: brute_pairs(lm, lines, pos, skip), args.runs)
+    pruned, t_pruned = timed(lambda: lm._scored_pairs(lines, pos, skip=skip), args.runs)
+    kept = sorted(p for p in brute if p[0] >= lm.MATCH_THRESHOLD)
+
+    print(f"fixture: {len(lines)} invoice lines x {len(pos)} PO items "
+          f"({len(lines) - len(skip)} scoreable, {len(brute)} pairs)")
+    print(f"scoring   brute force  {t_brute * 1000:8.1f} ms")
+    print(f"scoring   pruned       {t_pruned * 1000:8.1f} ms   "
+          f"({t_brute / max(t_pruned, 1e-9):.1f}x, {len(pruned)} pairs >= threshold)")
+    if sorted(pruned) != kept:
+        print("FAIL: pruned scoring differs from brute force", file=sys.stderr)
+        return 1
+
+    g, t_greedy = timed(lambda: greedy(lm, kept), args.runs)
+    a, t_assign = timed(lambda: lm._assign(kept), args.runs)
+    for label, chosen, t in (("greedy ", g, t_greedy), ("optimal", a, t_assign)):
+        matched, correct, total = quality(chosen, pos, truth)
+        print(f"selection {label}      {t * 1000:8.1f} ms   matched {matched}  "
+              f"correct {correct}  total score {total}")
+
+    _, t_full = timed(lambda: lm.match_invoice_lines_to_po(lines, pos), args.runs)
+    print(f"match_invoice_lines_to_po end-to-end {t_full * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
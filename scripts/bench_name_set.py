@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Benchmark key-set reads: chunked `get_all(... ["in", chunk])` vs `name_set.get_all_in`.
+
+For each key-set size (default 1k, 10k and 50k keys) it reads the same rows two ways:
+
+  * CHUNKED  ``frappe.get_all(doctype, filters={key: ["in", chunk]})`` per 500-key chunk --
+             the `create_batch(names, 500)` pattern the callers used so no single inlined
+             `IN (...)` trips sqlparse's 10,000-token cap.
+  * KEY SET  ``get_all_in(doctype, key, keys)`` -- the whole set bound as ONE JSON
+             parameter and unnested server-side (``nirmaan_stack/services/name_set.py``).
+
+and reports, per strategy: round trips (``frappe.db.sql`` calls), the largest statement text
+sent, and the median / min wall time over ``--runs``. The keys are the doctype's real values
+of ``--key`` (up to the size), padded with names that match nothing, so every size does the
+full lookup work. The two strategies must return the SAME rows; the script exits 1 if not.
+
+Read-only. USAGE (inside the container, from the bench directory):
+    env/bin/python apps/nirmaan_stack/scripts/bench_name_set.py
+    env/bin/python apps/nirmaan_stack/scripts/bench_name_set.py --doctype "PO Payment Terms" --key parent
+    env/bin/python apps/nirmaan_stack/scripts/bench_name_set.py --sizes 1000 10000 50000 --runs 7
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.chdir("/workspace/development/frappe-bench/sites")
+import frappe  # noqa: E402
+from frappe.utils import create_batch  # noqa: E402
+
+CHUNK = 500
+
+
+class SqlCounter:
+    """Wraps `frappe.db.sql` to count round trips and the largest statement text."""
+
+    def __init__(self):
+        self.calls, self.largest, self._sql = 0, 0, None
+
+    def __enter__(self):
+        self._sql = frappe.db.sql
+
+        def counted(query, *args, **kwargs):
+            self.calls += 1
+            self.largest = max(self.largest, len(str(query)))
+            return self._sql(query, *args, **kwargs)
+
+        frappe.db.sql = counted
+        return self
+
+    def __exit__(self, *exc):
+        frappe.db.sql = self._sql
+
+
+def chunked(doctype, key, keys):
+    rows = []
+    for chunk in create_batch(keys, CHUNK):
+        rows.extend(frappe.get_all(
+            doctype, filters={key: ["in", list(chunk)]}, fields=[key], limit_page_length=0,
+        ))
+    return rows
+
+
+def key_set(doctype, key, keys):
+    from nirmaan_stack.services.name_set import get_all_in
+
+    return get_all_in(doctype, key, keys, fields=[key])
+
+
+STRATEGIES = (("chunked", chunked), ("key set", key_set))
+
+
+def sample_keys(doctype, key, size):
+    real = frappe.db.sql(
+        f"SELECT DISTINCT `{key}` FROM `tab{doctype}` WHERE `{key}` IS NOT NULL LIMIT %(n)s",
+        {"n": size}, pluck=True,
+    )
+    return list(real) + [f"BENCH-MISS-{i:06d}" for i in range(size - len(real))], len(real)
+
+
+def measure(fn, doctype, key, keys, runs):
+    times, rows, counter = [], None, None
+    for _ in range(runs):
+        with SqlCounter() as c:
+            start = time.perf_counter()
+            rows = fn(doctype, key, keys)
+            times.append(time.perf_counter() - start)
+        counter = c
+    return rows, counter, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--site", default="localhost")
+    parser.add_argument("--doctype", default="Purchase Order Item")
+    parser.add_argument("--key", default="parent")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    frappe.init(site=args.site)
+    frappe.connect()
+    ok = True
+    try:
+        print(f"{args.doctype}.{args.key}, {args.runs} runs per strategy, chunk={CHUNK}")
+        print(f"{'keys':>7} {'real':>7}  {'strategy':<8} {'trips':>6} {'stmt bytes':>11} "
+              f"{'median ms':>10} {'min ms':>8} {'rows':>7}")
+        for size in args.sizes:
+            keys, real = sample_keys(args.doctype, args.key, size)
+            seen = {}
+            for label, fn in STRATEGIES:
+                rows, counter, times = measure(fn, args.doctype, args.key, keys, args.runs)
+                seen[label] = sorted(str(r[args.key]) for r in rows)
+                print(f"{size:>7} {real:>7}  {label:<8} {counter.calls:>6} {counter.largest:>11} "
+                      f"{statistics.median(times) * 1000:>10.1f} {min(times) * 1000:>8.1f} {len(rows):>7}")
+            if seen["chunked"] != seen["key set"]:
+                ok = False
+                print(f"  !! {size} keys: the strategies returned different rows")
+    finally:
+        frappe.destroy()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())